@@ -1,5 +1,11 @@
 #include <gtest/gtest.h>
 
+#include <atomic>
+#include <memory>
+#include <string>
+#include <thread>
+#include <vector>
+
 #include "datatypes.h"
 
 TEST(ResultTest, BasicResultTest) {
@@ -727,3 +733,140 @@ TEST_F(ResultConvertedValueTest, HandlesDoubleConvertedValueToString) {
    // std::to_string of a double contains a decimal point
    EXPECT_NE(s.find('.'), std::string::npos);
 }
+
+namespace {
+
+// A lazy value that counts how many times it is rendered.
+class CountingValue : public Result::LazyValue {
+  public:
+   CountingValue(std::string text, std::atomic<int>& renders)
+       : m_text(std::move(text)), m_renders(renders) {}
+
+  private:
+   std::string render() const override {
+      m_renders++;
+      return m_text;
+   }
+
+   std::string m_text;
+   std::atomic<int>& m_renders;
+};
+
+} // namespace
+
+// Test that a lazy value is only rendered once, when it is first read
+TEST(ResultTest, RendersValueOnFirstAccess) {
+   std::atomic<int> renders{0};
+   Result r;
+   r.oid = "IF-MIB::ifInOctets";
+   r.index = "1";
+   r.type = "Counter32";
+   r._lazy_value = std::make_shared<CountingValue>("1234", renders);
+
+   EXPECT_EQ(renders, 0);
+   EXPECT_EQ(r.get_value(), "1234");
+   EXPECT_EQ(r.get_value(), "1234");
+   EXPECT_EQ(renders, 1);
+
+   // Copies share the rendered text
+   Result copy = r;
+   EXPECT_EQ(copy.get_value(), "1234");
+   EXPECT_EQ(renders, 1);
+}
+
+// Test that threads reading a lazy value at the same time render it once
+TEST(ResultTest, RendersValueOnceAcrossThreads) {
+   std::atomic<int> renders{0};
+   Result r;
+   r.type = "STRING";
+   r._lazy_value = std::make_shared<CountingValue>(std::string(4096, 'x'), renders);
+
+   std::vector<std::thread> readers;
+   std::atomic<int> mismatches{0};
+   for (int i = 0; i < 8; i++) {
+      readers.emplace_back([&r, &mismatches]() {
+         if (r.get_value() != std::string(4096, 'x')) {
+            mismatches++;
+         }
+      });
+   }
+   for (auto& reader : readers) {
+      reader.join();
+   }
+
+   EXPECT_EQ(renders, 1);
+   EXPECT_EQ(mismatches, 0);
+}
+
+// Test that _to_string() renders a pending value
+TEST(ResultTest, ToStringRendersPendingValue) {
+   std::atomic<int> renders{0};
+   Result r;
+   r.oid = "SNMPv2-MIB::sysDescr";
+   r.index = "0";
+   r.type = "STRING";
+   r.converted_value = std::string("Linux");
+   r._lazy_value = std::make_shared<CountingValue>("Linux", renders);
+
+   EXPECT_EQ(r._to_string(),
+             "oid: SNMPv2-MIB::sysDescr, index: 0, type: STRING, value: Linux, "
+             "converted_value: Linux");
+   EXPECT_EQ(r.get_value(), "Linux");
+   EXPECT_EQ(renders, 1);
+}
+
+// Test that set_value() replaces a pending value
+TEST(ResultTest, SetValueDropsPendingValue) {
+   std::atomic<int> renders{0};
+   Result r;
+   r.type = "INTEGER";
+   r._lazy_value = std::make_shared<CountingValue>("up(1)", renders);
+
+   r.set_value("2");
+   EXPECT_EQ(r._lazy_value, nullptr);
+   EXPECT_EQ(r.get_value(), "2");
+   EXPECT_EQ(renders, 0);
+
+   r.update_converted_value();
+   ASSERT_TRUE(std::holds_alternative<int>(r.converted_value));
+   EXPECT_EQ(std::get<int>(r.converted_value), 2);
+}
+
+// Test that a ResultTable keeps its rows in parallel arrays
+TEST(ResultTableTest, StoresRowsInParallelArrays) {
+   unsigned long const if_in_octets_1[] = {1, 3, 6, 1, 2, 1, 2, 2, 1, 10, 1};
+   unsigned long const if_descr_2[] = {1, 3, 6, 1, 2, 1, 2, 2, 1, 2, 2};
+   unsigned long const sys_descr[] = {1, 3, 6, 1, 2, 1, 1, 1};
+
+   ResultTable table;
+   EXPECT_EQ(table.size(), 0u);
+   table.append(if_in_octets_1, 11, 1, 0x41, 4000000000u, "");
+   table.append(if_descr_2, 11, 1, 0x04, 0, std::string("eth\0", 4));
+   table.append(sys_descr, 8, 0, 0x02, static_cast<uint64_t>(-5), "");
+
+   ASSERT_EQ(table.size(), 3u);
+   EXPECT_EQ(table.oid_subids.size(), 30u);
+   EXPECT_EQ(table.oid_offsets, (std::vector<uint64_t>{0, 11, 22, 30}));
+   EXPECT_EQ(table.text_offsets, (std::vector<uint64_t>{0, 0, 4, 4}));
+
+   EXPECT_EQ(table.oid(0), ".1.3.6.1.2.1.2.2.1.10");
+   EXPECT_EQ(table.index(0), "1");
+   EXPECT_EQ(table.type(0), "Counter32");
+   EXPECT_TRUE(table.has_integer_value(0));
+   EXPECT_EQ(table.integer_values[0], 4000000000u);
+
+   EXPECT_EQ(table.index(1), "2");
+   EXPECT_EQ(table.type(1), "STRING");
+   EXPECT_FALSE(table.has_integer_value(1));
+   EXPECT_EQ(table.text_value(1), std::string("eth\0", 4));
+
+   EXPECT_EQ(table.index_number(0), 1u);
+   EXPECT_EQ(table.index_number(1), 2u);
+
+   EXPECT_EQ(table.oid(2), ".1.3.6.1.2.1.1.1");
+   EXPECT_EQ(table.index(2), "");
+   EXPECT_EQ(table.index_number(2), 0u);
+   EXPECT_EQ(table.type(2), "INTEGER");
+   EXPECT_EQ(static_cast<int64_t>(table.integer_values[2]), -5);
+   EXPECT_EQ(table.text_value(2), "");
+}
@@ -0,0 +1,86 @@
+#include <gtest/gtest.h>
+
+#include <chrono>
+#include <string>
+#include <thread>
+
+#include "enginecache.h"
+
+class EngineCacheTest : public ::testing::Test {
+  protected:
+   void SetUp() override {
+      engine_cache_set_ttl(300);
+      engine_cache_clear();
+   }
+
+   void TearDown() override {
+      engine_cache_set_ttl(300);
+      engine_cache_clear();
+   }
+};
+
+TEST_F(EngineCacheTest, ReturnsStoredEngine) {
+   std::string const engine_id("\x80\x00\x1f\x88\x04", 5);
+   engine_cache_store("localhost:11161", engine_id, 7, 1000);
+
+   std::string cached_id;
+   unsigned int boots = 0;
+   unsigned int time = 0;
+   ASSERT_TRUE(engine_cache_lookup("localhost:11161", cached_id, boots, time));
+   EXPECT_EQ(cached_id, engine_id);
+   EXPECT_EQ(boots, 7u);
+   EXPECT_GE(time, 1000u);
+
+   EXPECT_FALSE(engine_cache_lookup("localhost:11162", cached_id, boots, time));
+}
+
+TEST_F(EngineCacheTest, DescribesEntries) {
+   EngineCacheInfo info = engine_cache_info("localhost:11161");
+   EXPECT_FALSE(info.cached);
+   EXPECT_EQ(info.address, "localhost:11161");
+   EXPECT_EQ(info.ttl, 300);
+
+   engine_cache_store("localhost:11161", std::string("\x80\x00\x1f\x88\x04", 5), 7, 1000);
+   info = engine_cache_info("localhost:11161");
+   EXPECT_TRUE(info.cached);
+   EXPECT_EQ(info.engine_id, "80001f8804");
+   EXPECT_EQ(info.engine_boots, 7u);
+   EXPECT_EQ(info.engine_time, 1000u);
+   EXPECT_GE(info.age, 0);
+   EXPECT_LT(info.age, 300);
+}
+
+TEST_F(EngineCacheTest, ExpiresEntriesAfterTtl) {
+   engine_cache_set_ttl(0.05);
+   engine_cache_store("localhost:11161", "engine", 1, 1);
+   EXPECT_TRUE(engine_cache_info("localhost:11161").cached);
+
+   std::this_thread::sleep_for(std::chrono::milliseconds(100));
+   std::string cached_id;
+   unsigned int boots = 0;
+   unsigned int time = 0;
+   EXPECT_FALSE(engine_cache_lookup("localhost:11161", cached_id, boots, time));
+   EXPECT_FALSE(engine_cache_info("localhost:11161").cached);
+}
+
+TEST_F(EngineCacheTest, ZeroTtlDisablesTheCache) {
+   engine_cache_store("localhost:11161", "engine", 1, 1);
+   engine_cache_set_ttl(0);
+   EXPECT_EQ(engine_cache_get_ttl(), 0);
+   EXPECT_FALSE(engine_cache_info("localhost:11161").cached);
+
+   engine_cache_store("localhost:11161", "engine", 1, 1);
+   EXPECT_FALSE(engine_cache_info("localhost:11161").cached);
+}
+
+TEST_F(EngineCacheTest, ForgetsSingleAddresses) {
+   engine_cache_store("localhost:11161", "first", 1, 1);
+   engine_cache_store("localhost:11162", "second", 1, 1);
+
+   engine_cache_forget("localhost:11161");
+   EXPECT_FALSE(engine_cache_info("localhost:11161").cached);
+   EXPECT_TRUE(engine_cache_info("localhost:11162").cached);
+
+   engine_cache_clear();
+   EXPECT_FALSE(engine_cache_info("localhost:11162").cached);
+}
@@ -0,0 +1,82 @@
+#include <gtest/gtest.h>
+
+#include "maxrepetitions.h"
+
+TEST(MaxRepetitionsTunerTest, ClampsTheInitialValue) {
+   EXPECT_EQ(MaxRepetitionsTuner(0).max_repetitions(), 1);
+   EXPECT_EQ(MaxRepetitionsTuner(10).max_repetitions(), 10);
+   EXPECT_EQ(MaxRepetitionsTuner(100000).max_repetitions(), MaxRepetitionsTuner::LIMIT);
+}
+
+TEST(MaxRepetitionsTunerTest, GrowsWhileResponsesAreFullFastAndSmall) {
+   MaxRepetitionsTuner tuner(10);
+
+   tuner.response_received(10, 200, 0.010);
+   EXPECT_EQ(tuner.max_repetitions(), 20);
+   tuner.response_received(20, 400, 0.012);
+   EXPECT_EQ(tuner.max_repetitions(), 40);
+
+   // 20 bytes per variable: 70 of them fit the budget
+   tuner.response_received(40, 800, 0.011);
+   EXPECT_EQ(tuner.max_repetitions(), 70);
+}
+
+TEST(MaxRepetitionsTunerTest, DoesNotGrowOnShortOrSlowResponses) {
+   MaxRepetitionsTuner tuner(10);
+
+   // The end of the table
+   tuner.response_received(4, 80, 0.010);
+   EXPECT_EQ(tuner.max_repetitions(), 10);
+
+   tuner.response_received(10, 200, 0.050);
+   EXPECT_EQ(tuner.max_repetitions(), 10);
+}
+
+TEST(MaxRepetitionsTunerTest, ShrinksToFitTheBudget) {
+   MaxRepetitionsTuner tuner(50);
+
+   // 100 bytes per variable
+   tuner.response_received(50, 5000, 0.010);
+   EXPECT_EQ(tuner.max_repetitions(), 14);
+}
+
+TEST(MaxRepetitionsTunerTest, HalvesOnTooBig) {
+   MaxRepetitionsTuner tuner(5);
+
+   EXPECT_TRUE(tuner.too_big());
+   EXPECT_EQ(tuner.max_repetitions(), 2);
+   EXPECT_TRUE(tuner.too_big());
+   EXPECT_FALSE(tuner.too_big());
+   EXPECT_EQ(tuner.max_repetitions(), 1);
+}
+
+TEST(MaxRepetitionsTunerTest, HalvesOnTimeoutsOnlyAfterAResponse) {
+   MaxRepetitionsTuner tuner(40);
+
+   // An agent that never answered is down, not overwhelmed
+   EXPECT_FALSE(tuner.timed_out());
+   EXPECT_EQ(tuner.max_repetitions(), 40);
+
+   tuner.response_received(40, 800, 0.010);
+   ASSERT_EQ(tuner.max_repetitions(), 70);
+   EXPECT_TRUE(tuner.timed_out());
+   EXPECT_EQ(tuner.max_repetitions(), 35);
+   EXPECT_FALSE(tuner.timed_out());
+}
+
+TEST(MaxRepetitionsCacheTest, RemembersValuesPerAddress) {
+   max_repetitions_cache_clear();
+
+   int max_repetitions = 0;
+   EXPECT_FALSE(max_repetitions_cache_lookup("localhost:161", max_repetitions));
+
+   max_repetitions_cache_store("localhost:161", 40);
+   max_repetitions_cache_store("localhost:162", 5);
+   ASSERT_TRUE(max_repetitions_cache_lookup("localhost:161", max_repetitions));
+   EXPECT_EQ(max_repetitions, 40);
+   ASSERT_TRUE(max_repetitions_cache_lookup("localhost:162", max_repetitions));
+   EXPECT_EQ(max_repetitions, 5);
+
+   max_repetitions_cache_clear();
+   EXPECT_FALSE(max_repetitions_cache_lookup("localhost:161", max_repetitions));
+}
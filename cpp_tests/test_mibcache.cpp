@@ -0,0 +1,193 @@
+#include <gtest/gtest.h>
+
+#include <chrono>
+#include <filesystem>
+#include <fstream>
+#include <memory>
+#include <mutex>
+#include <string>
+
+#include "mibcache.h"
+#include "thread_safety.h"
+
+namespace {
+
+oid const SYS_DESCR[] = {1, 3, 6, 1, 2, 1, 1, 1};
+oid const IF_DESCR_1[] = {1, 3, 6, 1, 2, 1, 2, 2, 1, 2, 1};
+
+std::filesystem::path empty_directory(std::string const& name) {
+   std::filesystem::path const directory =
+       std::filesystem::temp_directory_path() / ("ezsnmp_test_mibcache_" + name);
+   std::filesystem::remove_all(directory);
+   std::filesystem::create_directories(directory);
+   return directory;
+}
+
+std::shared_ptr<MibTree const> compile(std::string const& key) {
+   netsnmp_thread_init("test_mibcache");
+   std::shared_ptr<MibTree const> tree;
+   {
+      std::lock_guard<std::mutex> lock(g_netsnmp_mib_mutex);
+      tree = MibTree::compile(key);
+   }
+   netsnmp_thread_cleanup("test_mibcache");
+   return tree;
+}
+
+uint32_t labelled(MibTree const& tree, char const* label) {
+   auto const nodes = tree.nodes_labelled(label);
+   return nodes.first == nodes.second ? MibTree::NONE : *nodes.first;
+}
+
+} // namespace
+
+TEST(MibTreeTest, CompilesTheParsedMibs) {
+   std::shared_ptr<MibTree const> const tree = compile("key");
+   ASSERT_GT(tree->size(), 0u);
+   EXPECT_EQ(tree->key(), "key");
+
+   std::size_t depth = 0;
+   uint32_t node = tree->find(SYS_DESCR, OID_LENGTH(SYS_DESCR), depth);
+   ASSERT_NE(node, MibTree::NONE);
+   EXPECT_EQ(depth, OID_LENGTH(SYS_DESCR));
+   EXPECT_STREQ(tree->string(tree->node(node).label), "sysDescr");
+   EXPECT_STREQ(tree->string(tree->node(node).module), "SNMPv2-MIB");
+   EXPECT_EQ(tree->node(node).first_child, MibTree::NONE);
+   EXPECT_EQ(labelled(*tree, "sysDescr"), node);
+
+   // The index of a variable is below the leaf
+   node = tree->find(IF_DESCR_1, OID_LENGTH(IF_DESCR_1), depth);
+   ASSERT_NE(node, MibTree::NONE);
+   EXPECT_EQ(depth, OID_LENGTH(IF_DESCR_1) - 1);
+   EXPECT_STREQ(tree->string(tree->node(node).label), "ifDescr");
+
+   uint32_t const entry = labelled(*tree, "ifEntry");
+   ASSERT_NE(entry, MibTree::NONE);
+   ASSERT_EQ(tree->node(entry).index_count, 1u);
+   EXPECT_STREQ(tree->index_name(tree->node(entry).indexes), "ifIndex");
+   oid name[MAX_OID_LEN];
+   ASSERT_EQ(tree->oid_of(entry, name), 9u);
+   EXPECT_EQ(name[0], 1u);
+   EXPECT_EQ(name[7], 2u);
+   EXPECT_EQ(name[8], 1u);
+
+   uint32_t const admin_status = labelled(*tree, "ifAdminStatus");
+   ASSERT_NE(admin_status, MibTree::NONE);
+   bool up = false;
+   MibTree::Node const& admin_status_node = tree->node(admin_status);
+   for (uint32_t i = 0; i < admin_status_node.enum_count; ++i) {
+      MibTree::Enumeration const& item = tree->enumeration(admin_status_node.enums + i);
+      up = up || (item.value == 1 && std::string(tree->string(item.label)) == "up");
+   }
+   EXPECT_TRUE(up);
+
+   EXPECT_EQ(labelled(*tree, "noSuchMibObject"), MibTree::NONE);
+}
+
+TEST(MibTreeTest, LoadsTheSavedTree) {
+   std::filesystem::path const path = empty_directory("load") / "tree.bin";
+   std::shared_ptr<MibTree const> const tree = compile("key 1");
+   ASSERT_TRUE(tree->save(path.string()));
+
+   std::shared_ptr<MibTree const> const loaded = MibTree::load(path.string(), "key 1");
+   ASSERT_NE(loaded, nullptr);
+   EXPECT_EQ(loaded->size(), tree->size());
+   std::size_t depth = 0;
+   uint32_t const node = loaded->find(SYS_DESCR, OID_LENGTH(SYS_DESCR), depth);
+   std::size_t compiled_depth = 0;
+   EXPECT_EQ(node, tree->find(SYS_DESCR, OID_LENGTH(SYS_DESCR), compiled_depth));
+   EXPECT_EQ(depth, compiled_depth);
+   EXPECT_STREQ(loaded->string(loaded->node(node).label), "sysDescr");
+   EXPECT_EQ(labelled(*loaded, "ifEntry"), labelled(*tree, "ifEntry"));
+
+   // Compiled from other MIB files, missing
+   EXPECT_EQ(MibTree::load(path.string(), "key 2"), nullptr);
+   EXPECT_EQ(MibTree::load((path.parent_path() / "missing.bin").string(), "key 1"), nullptr);
+}
+
+TEST(MibTreeTest, RejectsDamagedFiles) {
+   std::filesystem::path const directory = empty_directory("damaged");
+   std::filesystem::path const path = directory / "tree.bin";
+   ASSERT_TRUE(compile("key")->save(path.string()));
+
+   std::filesystem::resize_file(path, std::filesystem::file_size(path) - 1);
+   EXPECT_EQ(MibTree::load(path.string(), "key"), nullptr);
+
+   std::ofstream(path, std::ios::binary | std::ios::trunc) << "not a compiled MIB tree";
+   EXPECT_EQ(MibTree::load(path.string(), "key"), nullptr);
+}
+
+TEST(MibFilesKeyTest, ChangesWithTheMibFiles) {
+   std::filesystem::path const directory = empty_directory("key");
+   std::filesystem::path const file = directory / "TEST-MIB.txt";
+   std::ofstream(file) << "TEST-MIB DEFINITIONS ::= BEGIN";
+
+   std::string const key = mib_files_key(directory.string(), "ALL");
+   EXPECT_EQ(mib_files_key(directory.string(), "ALL"), key);
+   EXPECT_NE(mib_files_key(directory.string(), "IF-MIB"), key);
+
+   std::filesystem::last_write_time(
+       file, std::filesystem::last_write_time(file) + std::chrono::seconds(10));
+   std::string const touched = mib_files_key(directory.string(), "ALL");
+   EXPECT_NE(touched, key);
+
+   std::ofstream(directory / "OTHER-MIB.txt") << "OTHER-MIB DEFINITIONS ::= BEGIN";
+   EXPECT_NE(mib_files_key(directory.string(), "ALL"), touched);
+}
+
+TEST(MibTreeCacheTest, SavesTheTreeAndLoadsItAgain) {
+   std::filesystem::path const directory = empty_directory("cache");
+   mib_cache_set_directory(directory.string());
+   EXPECT_EQ(mib_cache_get_directory(), directory.string());
+
+   std::shared_ptr<MibTree const> const tree = mib_tree();
+   ASSERT_GT(tree->size(), 0u);
+   EXPECT_EQ(mib_tree(), tree);
+   std::size_t files = 0;
+   for (auto const& entry : std::filesystem::directory_iterator(directory)) {
+      files += entry.path().extension() == ".bin";
+   }
+   EXPECT_EQ(files, 1u);
+
+   mib_tree_reset();
+   std::shared_ptr<MibTree const> const loaded = mib_tree();
+   EXPECT_NE(loaded, tree);
+   EXPECT_EQ(loaded->key(), tree->key());
+   EXPECT_EQ(loaded->size(), tree->size());
+
+   mib_cache_set_directory("");
+}
+
+TEST(MibLoadingTest, LoadsEachModuleOnce) {
+   netsnmp_thread_init("test_mibcache");
+   {
+      std::lock_guard<std::mutex> lock(g_netsnmp_mib_mutex);
+      unsigned const generation = g_netsnmp_mib_generation.load();
+      mib_load_modules("", "IF-MIB,SNMPv2-MIB");
+      EXPECT_EQ(g_netsnmp_mib_generation.load(), generation + 1);
+
+      mib_load_modules("", "+SNMPv2-MIB:IF-MIB");
+      mib_load_modules("", "");
+      EXPECT_EQ(g_netsnmp_mib_generation.load(), generation + 1);
+   }
+   netsnmp_thread_cleanup("test_mibcache");
+}
+
+TEST(MibLoadingTest, LazyLoadingParsesTheModulesOnDemand) {
+   netsnmp_library_set_mib_loading(MIB_LOADING_LAZY);
+   netsnmp_thread_init("test_mibcache");
+   EXPECT_EQ(g_netsnmp_mib_loading.load(), MIB_LOADING_LAZY);
+   {
+      std::lock_guard<std::mutex> lock(g_netsnmp_mib_mutex);
+      oid name[MAX_OID_LEN];
+      size_t name_length = MAX_OID_LEN;
+      EXPECT_EQ(snmp_parse_oid("sysDescr.0", name, &name_length), nullptr);
+
+      mib_load_modules("", "");
+      name_length = MAX_OID_LEN;
+      ASSERT_NE(snmp_parse_oid("sysDescr.0", name, &name_length), nullptr);
+      EXPECT_EQ(name_length, OID_LENGTH(SYS_DESCR) + 1);
+   }
+   netsnmp_thread_cleanup("test_mibcache");
+   netsnmp_library_set_mib_loading(MIB_LOADING_EAGER);
+}
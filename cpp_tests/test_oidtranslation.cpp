@@ -0,0 +1,149 @@
+#include <gtest/gtest.h>
+
+#include <chrono>
+#include <future>
+#include <mutex>
+#include <string>
+#include <thread>
+#include <vector>
+
+#include "exceptionsbase.h"
+#include "oidtranslation.h"
+#include "thread_safety.h"
+
+namespace {
+
+oid const SYS_DESCR_0[] = {1, 3, 6, 1, 2, 1, 1, 1, 0};
+
+OutputFormat numeric_output_format() {
+   OutputFormat format;
+   format.oid_output_format = NETSNMP_OID_OUTPUT_NUMERIC;
+   return format;
+}
+
+std::vector<oid> translate(std::string const& name) {
+   oid objid[MAX_OID_LEN];
+   size_t objid_len = 0;
+   translate_name(name, objid, &objid_len);
+   return std::vector<oid>(objid, objid + objid_len);
+}
+
+} // namespace
+
+class OidTranslationTest : public ::testing::Test {
+  protected:
+   void SetUp() override { translation_cache_clear(); }
+};
+
+TEST_F(OidTranslationTest, TranslatesNames) {
+   std::vector<oid> const expected(SYS_DESCR_0, SYS_DESCR_0 + OID_LENGTH(SYS_DESCR_0));
+   EXPECT_EQ(translate("sysDescr.0"), expected);
+   EXPECT_EQ(translate("SNMPv2-MIB::sysDescr.0"), expected);
+   EXPECT_EQ(translate(".1.3.6.1.2.1.1.1.0"), expected);
+}
+
+TEST_F(OidTranslationTest, TranslatesOids) {
+   EXPECT_EQ(translate_oid(SYS_DESCR_0, OID_LENGTH(SYS_DESCR_0), OutputFormat()),
+             "SNMPv2-MIB::sysDescr.0");
+   EXPECT_EQ(translate_oid(SYS_DESCR_0, OID_LENGTH(SYS_DESCR_0), numeric_output_format()),
+             ".1.3.6.1.2.1.1.1.0");
+}
+
+TEST_F(OidTranslationTest, RemembersTranslations) {
+   EXPECT_EQ(translation_cache_size(), 0u);
+   std::vector<oid> const first = translate("sysDescr.0");
+   EXPECT_EQ(translation_cache_size(), 1u);
+   EXPECT_EQ(translate("sysDescr.0"), first);
+   EXPECT_EQ(translation_cache_size(), 1u);
+
+   std::string const name = translate_oid(SYS_DESCR_0, OID_LENGTH(SYS_DESCR_0), OutputFormat());
+   EXPECT_EQ(translation_cache_size(), 2u);
+   EXPECT_EQ(translate_oid(SYS_DESCR_0, OID_LENGTH(SYS_DESCR_0), OutputFormat()), name);
+   EXPECT_EQ(translation_cache_size(), 2u);
+
+   // Other output formats are remembered apart
+   translate_oid(SYS_DESCR_0, OID_LENGTH(SYS_DESCR_0), numeric_output_format());
+   EXPECT_EQ(translation_cache_size(), 3u);
+
+   translation_cache_clear();
+   EXPECT_EQ(translation_cache_size(), 0u);
+}
+
+TEST_F(OidTranslationTest, KeepsRecentlyUsedTranslations) {
+   std::promise<std::size_t> walked;
+   std::promise<void> mib_locked;
+   std::future<std::size_t> walked_size = walked.get_future();
+   std::future<void> locked = mib_locked.get_future();
+
+   std::future<std::string> remembered = std::async(std::launch::async, [&walked, &locked] {
+      translate_oid(SYS_DESCR_0, OID_LENGTH(SYS_DESCR_0), OutputFormat());
+
+      // A long walk translates many OIDs once, while a few are translated again and again
+      oid instance[] = {1, 3, 6, 1, 2, 1, 2, 2, 1, 10, 0};
+      for (oid i = 1; i <= 4500; ++i) {
+         instance[OID_LENGTH(instance) - 1] = i;
+         translate_oid(instance, OID_LENGTH(instance), numeric_output_format());
+         if (i % 1000 == 0) {
+            translate_oid(SYS_DESCR_0, OID_LENGTH(SYS_DESCR_0), OutputFormat());
+         }
+      }
+      walked.set_value(translation_cache_size());
+
+      // Still remembered, so translated without taking g_netsnmp_mib_mutex
+      locked.wait();
+      return translate_oid(SYS_DESCR_0, OID_LENGTH(SYS_DESCR_0), OutputFormat());
+   });
+
+   EXPECT_EQ(walked_size.get(), 4096u);
+   {
+      std::lock_guard<std::mutex> lock(g_netsnmp_mib_mutex);
+      mib_locked.set_value();
+      EXPECT_EQ(remembered.wait_for(std::chrono::seconds(2)), std::future_status::ready);
+   }
+   EXPECT_EQ(remembered.get(), "SNMPv2-MIB::sysDescr.0");
+}
+
+TEST_F(OidTranslationTest, TranslatesListsOfNames) {
+   std::vector<std::string> const names = {"sysDescr.0", ".1.3.6.1.2.1.1.1.0", "sysDescr.0"};
+   std::vector<std::string> const numeric = translate_names(names, numeric_output_format());
+   EXPECT_EQ(numeric, std::vector<std::string>(3, ".1.3.6.1.2.1.1.1.0"));
+   EXPECT_EQ(translation_cache_size(), 3u);
+
+   EXPECT_EQ(translate_names(numeric, OutputFormat()),
+             std::vector<std::string>(3, "SNMPv2-MIB::sysDescr.0"));
+   EXPECT_TRUE(translate_names({}, OutputFormat()).empty());
+
+   // Remembered by the single translations too
+   EXPECT_EQ(translate("sysDescr.0"), translate(".1.3.6.1.2.1.1.1.0"));
+   EXPECT_EQ(translation_cache_size(), 4u);
+
+   EXPECT_THROW(translate_names({"sysDescr.0", "noSuchMibObject.0"}, OutputFormat()),
+                GenericErrorBase);
+}
+
+TEST_F(OidTranslationTest, ThrowsOnUnknownNames) {
+   EXPECT_THROW(translate("noSuchMibObject.0"), GenericErrorBase);
+   EXPECT_EQ(translation_cache_size(), 0u);
+}
+
+TEST_F(OidTranslationTest, TranslatesFromManyThreads) {
+   std::vector<oid> const expected = translate("sysDescr.0");
+   std::vector<std::thread> threads;
+   std::vector<int> matches(8, 0);
+   for (std::size_t i = 0; i < matches.size(); ++i) {
+      threads.emplace_back([&, i] {
+         for (int j = 0; j < 100; ++j) {
+            bool const match = translate("sysDescr.0") == expected &&
+                               translate_oid(SYS_DESCR_0, OID_LENGTH(SYS_DESCR_0),
+                                             OutputFormat()) == "SNMPv2-MIB::sysDescr.0";
+            matches[i] += match;
+         }
+      });
+   }
+   for (auto& thread : threads) {
+      thread.join();
+   }
+   for (int match : matches) {
+      EXPECT_EQ(match, 100);
+   }
+}
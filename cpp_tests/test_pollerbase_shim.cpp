@@ -0,0 +1,365 @@
+#include <gtest/gtest.h>
+#include <sys/socket.h>
+#include <unistd.h>
+
+#include <chrono>
+#include <exception>
+#include <map>
+#include <mutex>
+#include <stdexcept>
+#include <string>
+#include <utility>
+#include <vector>
+
+#include "exceptionsbase.h"
+#include "pollerbase.h"
+#include "sessionbase.h"
+#include "sessionhandle.h"
+
+namespace {
+
+// The shim handles answer an operation once a byte is written to their socket, except for
+// operations on the OID "timeout", which time out after 10 ms.
+std::mutex g_state_mutex;
+std::map<SessionHandle const *, std::pair<int, int>> g_sockets;
+std::map<std::pair<SessionHandle const *, int>, std::vector<std::string>> g_operations;
+int g_started = 0;
+int g_last_max_repetitions = 0;
+
+void reset_shim_state() {
+   std::lock_guard<std::mutex> lock(g_state_mutex);
+   g_operations.clear();
+   g_started = 0;
+   g_last_max_repetitions = 0;
+}
+
+bool has_operations(SessionHandle const *handle, bool timing_out) {
+   for (auto const &entry : g_operations) {
+      if (entry.first.first == handle &&
+          (!timing_out || (!entry.second.empty() && entry.second[0] == "timeout"))) {
+         return true;
+      }
+   }
+   return false;
+}
+
+int start(SessionHandle const *handle, int id, std::vector<std::string> const &oids) {
+   if (!oids.empty() && oids[0] == "fail") {
+      throw GenericErrorBase("shim start failure");
+   }
+   std::lock_guard<std::mutex> lock(g_state_mutex);
+   g_operations[{handle, id}] = oids;
+   ++g_started;
+   return id;
+}
+
+// Completes the operations of a handle that match the predicate.
+template <typename Predicate>
+std::vector<AsyncCompletion> complete(SessionHandle const *handle, Predicate predicate) {
+   std::lock_guard<std::mutex> lock(g_state_mutex);
+   std::vector<AsyncCompletion> completions;
+   for (auto entry = g_operations.begin(); entry != g_operations.end();) {
+      if (entry->first.first != handle || !predicate(entry->second)) {
+         ++entry;
+         continue;
+      }
+      AsyncCompletion completion;
+      completion.request_id = entry->first.second;
+      if (!entry->second.empty() && entry->second[0] == "timeout") {
+         completion.error = std::make_exception_ptr(TimeoutErrorBase("shim timeout"));
+      } else {
+         Result result;
+         result.oid = entry->second.empty() ? "" : entry->second[0];
+         completion.results.push_back(result);
+      }
+      completions.push_back(completion);
+      entry = g_operations.erase(entry);
+   }
+   return completions;
+}
+
+} // namespace
+
+SessionHandle::SessionHandle(std::vector<std::string> const &, std::string const &init_app_name)
+    : m_init_name(init_app_name) {
+   int fds[2];
+   if (socketpair(AF_UNIX, SOCK_STREAM, 0, fds) != 0) {
+      throw std::runtime_error("socketpair failed");
+   }
+   std::lock_guard<std::mutex> lock(g_state_mutex);
+   g_sockets[this] = {fds[0], fds[1]};
+}
+
+SessionHandle::~SessionHandle() {
+   std::lock_guard<std::mutex> lock(g_state_mutex);
+   close(g_sockets.at(this).first);
+   close(g_sockets.at(this).second);
+   g_sockets.erase(this);
+}
+
+std::string const &SessionHandle::security_name() const { return m_security_name; }
+
+std::string const &SessionHandle::security_engine_id() const { return m_security_engine_id; }
+
+std::string const &SessionHandle::engine_cache_key() const { return m_engine_cache_key; }
+
+bool SessionHandle::engine_stale() const { return m_engine_stale; }
+
+void SessionHandle::set_batch_limits(BatchLimits const &limits) { m_batch_limits = limits; }
+
+void SessionHandle::forget_usm_user() {}
+
+std::vector<Result> SessionHandle::get(std::vector<std::string> const &) { return {}; }
+
+std::vector<Result> SessionHandle::get_next(std::vector<std::string> const &) { return {}; }
+
+std::vector<Result> SessionHandle::bulk_get(std::vector<std::string> const &, int, int) {
+   return {};
+}
+
+std::vector<Result> SessionHandle::set(std::vector<std::string> const &) { return {}; }
+
+std::vector<Result> SessionHandle::walk(std::string const &) { return {}; }
+
+std::vector<Result> SessionHandle::bulk_walk(std::vector<std::string> const &, int, bool) {
+   return {};
+}
+
+std::vector<std::vector<Result>> SessionHandle::bulk_walk_table(
+    std::vector<std::string> const &columns, int) {
+   return std::vector<std::vector<Result>>(columns.size());
+}
+
+TableRows SessionHandle::get_table(std::string const &, bool, int) { return {}; }
+
+ResultTable SessionHandle::get_columnar(std::vector<std::string> const &) { return {}; }
+
+ResultTable SessionHandle::walk_columnar(std::string const &) { return {}; }
+
+ResultTable SessionHandle::bulk_walk_columnar(std::vector<std::string> const &, int, bool) {
+   return {};
+}
+
+std::vector<Result> SessionHandle::run_walk(WalkState &) { return {}; }
+
+std::vector<std::vector<Result>> SessionHandle::pipelined_walks(std::vector<WalkState> const &,
+                                                                std::size_t) {
+   return {};
+}
+
+std::string SessionHandle::change_indicator(std::string const &) const { return ""; }
+
+ResumableWalk SessionHandle::resumable_walk(
+    std::vector<std::string> const &, std::string const &, bool, int, bool) {
+   return {};
+}
+
+std::vector<std::string> SessionHandle::sample_split_points(std::string const &, std::size_t) {
+   return {};
+}
+
+std::vector<Result> SessionHandle::walk_step(WalkState &state) {
+   state.done = true;
+   return {};
+}
+
+// The shim keeps no request objects, the declaration only has to be complete.
+class SessionHandle::Request {
+  public:
+   virtual ~Request() = default;
+};
+
+int SessionHandle::async_get(std::vector<std::string> const &oids) {
+   return start(this, s_async_next_id++, oids);
+}
+
+int SessionHandle::async_get_next(std::vector<std::string> const &oids) { return async_get(oids); }
+
+int SessionHandle::async_bulk_get(std::vector<std::string> const &oids, int, int max_repetitions) {
+   {
+      std::lock_guard<std::mutex> lock(g_state_mutex);
+      g_last_max_repetitions = max_repetitions;
+   }
+   return async_get(oids);
+}
+
+int SessionHandle::async_set(std::vector<std::string> const &oid_type_values) {
+   return async_get(oid_type_values);
+}
+
+int SessionHandle::async_walk(WalkState const &state) {
+   {
+      std::lock_guard<std::mutex> lock(g_state_mutex);
+      g_last_max_repetitions = state.max_repetitions;
+   }
+   return async_get(state.roots);
+}
+
+// Drains the socket and answers every operation that is not timing out.
+std::vector<AsyncCompletion> SessionHandle::async_read() {
+   char buffer[16];
+   (void)read(async_fd(), buffer, sizeof(buffer));
+   return complete(this, [](std::vector<std::string> const &oids) {
+      return oids.empty() || oids[0] != "timeout";
+   });
+}
+
+std::vector<AsyncCompletion> SessionHandle::async_timeout() {
+   return complete(this, [](std::vector<std::string> const &oids) {
+      return !oids.empty() && oids[0] == "timeout";
+   });
+}
+
+std::vector<AsyncCompletion> SessionHandle::async_cancel(std::string const &) {
+   return complete(this, [](std::vector<std::string> const &) { return true; });
+}
+
+int SessionHandle::async_fd() {
+   std::lock_guard<std::mutex> lock(g_state_mutex);
+   return g_sockets.at(this).first;
+}
+
+double SessionHandle::async_next_timeout() {
+   std::lock_guard<std::mutex> lock(g_state_mutex);
+   if (has_operations(this, true)) {
+      return 0.01;
+   }
+   return has_operations(this, false) ? 10 : -1;
+}
+
+class PollerBaseShimTest : public ::testing::Test {
+  protected:
+   void SetUp() override { reset_shim_state(); }
+
+   // Makes the handle of a session readable, as if its responses had arrived.
+   static void respond(SessionBase &session) {
+      int fd = session._async_fd();
+      int peer = -1;
+      {
+         std::lock_guard<std::mutex> lock(g_state_mutex);
+         for (auto const &entry : g_sockets) {
+            if (entry.second.first == fd) {
+               peer = entry.second.second;
+            }
+         }
+      }
+      char const byte = 0;
+      ASSERT_EQ(write(peer, &byte, 1), 1);
+   }
+};
+
+TEST_F(PollerBaseShimTest, RejectsUnknownOperations) {
+   SessionBase session("localhost", "11161", "2c", "public");
+   PollerBase poller;
+
+   EXPECT_THROW(poller._submit(session, "get_bulk", {".1"}), GenericErrorBase);
+   EXPECT_THROW(poller._submit(session, "walk", {".1", ".2"}), GenericErrorBase);
+   EXPECT_EQ(poller._pending(), 0u);
+}
+
+TEST_F(PollerBaseShimTest, ReturnsNothingWhenNoJobIsLeft) {
+   PollerBase poller;
+   EXPECT_TRUE(poller._poll().empty());
+   EXPECT_TRUE(poller._poll(0).empty());
+}
+
+TEST_F(PollerBaseShimTest, LimitsJobsInFlight) {
+   SessionBase first("localhost", "11161", "2c", "public");
+   SessionBase second("localhost", "11162", "2c", "public");
+   PollerBase poller(2);
+   EXPECT_EQ(poller._get_max_in_flight(), 2u);
+
+   int const a = poller._submit(first, "get", {"a"});
+   int const b = poller._submit(second, "get_next", {"b"});
+   int const c = poller._submit(first, "set", {"c", "s", "value"});
+   EXPECT_EQ(poller._pending(), 3u);
+
+   EXPECT_TRUE(poller._poll(0).empty());
+   EXPECT_EQ(poller._in_flight(), 2u);
+   EXPECT_EQ(g_started, 2);
+
+   respond(second);
+   std::vector<AsyncCompletion> completions = poller._poll(1);
+   ASSERT_EQ(completions.size(), 1u);
+   EXPECT_EQ(completions[0].request_id, b);
+   ASSERT_EQ(completions[0].results.size(), 1u);
+   EXPECT_EQ(completions[0].results[0].oid, "b");
+
+   // The freed slot is used by the queued job right away
+   EXPECT_EQ(g_started, 3);
+   EXPECT_EQ(poller._in_flight(), 2u);
+
+   respond(first);
+   completions = poller._poll(1);
+   ASSERT_EQ(completions.size(), 2u);
+   EXPECT_EQ(completions[0].request_id, a);
+   EXPECT_EQ(completions[1].request_id, c);
+   EXPECT_EQ(poller._pending(), 0u);
+}
+
+TEST_F(PollerBaseShimTest, TimesOutOnlyTheSlowTarget) {
+   SessionBase fast("localhost", "11161", "2c", "public");
+   SessionBase slow("localhost", "11162", "2c", "public");
+   PollerBase poller;
+
+   int const answered = poller._submit(fast, "get", {"a"});
+   int const timed_out = poller._submit(slow, "get", {"timeout"});
+
+   auto const start = std::chrono::steady_clock::now();
+   std::vector<AsyncCompletion> completions = poller._poll();
+   EXPECT_LT(std::chrono::steady_clock::now() - start, std::chrono::seconds(5));
+   ASSERT_EQ(completions.size(), 1u);
+   EXPECT_EQ(completions[0].request_id, timed_out);
+   EXPECT_THROW(completions[0].rethrow(), TimeoutErrorBase);
+
+   // The fast target is still waiting for its response
+   EXPECT_TRUE(poller._poll(0.01).empty());
+   respond(fast);
+   completions = poller._poll();
+   ASSERT_EQ(completions.size(), 1u);
+   EXPECT_EQ(completions[0].request_id, answered);
+   EXPECT_NO_THROW(completions[0].rethrow());
+}
+
+TEST_F(PollerBaseShimTest, ReportsJobsThatFailToStart) {
+   SessionBase session("localhost", "11161", "2c", "public");
+   PollerBase poller;
+
+   int const failed = poller._submit(session, "get", {"fail"});
+   std::vector<AsyncCompletion> const completions = poller._poll(0);
+   ASSERT_EQ(completions.size(), 1u);
+   EXPECT_EQ(completions[0].request_id, failed);
+   EXPECT_THROW(completions[0].rethrow(), GenericErrorBase);
+   EXPECT_EQ(poller._in_flight(), 0u);
+}
+
+TEST_F(PollerBaseShimTest, AppliesMaxRepeatersToBulkJobsOnly) {
+   SessionBase session("localhost", "11161", "2c", "public");
+   session._set_max_repeaters_to_num("7");
+   PollerBase poller;
+
+   poller._submit(session, "bulk_walk", {"a"}, "25");
+   EXPECT_TRUE(poller._poll(0).empty());
+   EXPECT_EQ(g_last_max_repetitions, 25);
+   EXPECT_EQ(session._get_set_max_repeaters_to_num(), "7");
+}
+
+TEST_F(PollerBaseShimTest, ReopenedSessionsFailTheirJobs) {
+   SessionBase session("localhost", "11161", "2c", "public");
+   PollerBase poller;
+
+   int const cancelled = poller._submit(session, "get", {"a"});
+   EXPECT_TRUE(poller._poll(0).empty());
+   session._set_timeout("5");
+
+   int const started = poller._submit(session, "get", {"b"});
+   std::vector<AsyncCompletion> completions = poller._poll(1);
+   ASSERT_EQ(completions.size(), 1u);
+   EXPECT_EQ(completions[0].request_id, cancelled);
+   EXPECT_EQ(poller._in_flight(), 1u);
+
+   respond(session);
+   completions = poller._poll(1);
+   ASSERT_EQ(completions.size(), 1u);
+   EXPECT_EQ(completions[0].request_id, started);
+}
@@ -1,7 +1,9 @@
 #include <gtest/gtest.h>
+#include <poll.h>
 
 #include <algorithm>
 #include <iostream>
+#include <map>
 #include <set>
 #include <string>
 
@@ -37,6 +39,21 @@ void VerifyMibDescriptions(std::vector<Result> const& result,
    }
 }
 
+// Drives the asynchronous operations of a session until none is left in flight
+std::map<int, AsyncCompletion> CollectAsyncCompletions(SessionBase& session) {
+   std::map<int, AsyncCompletion> completions;
+   double timeout = session._async_next_timeout();
+   while (timeout >= 0) {
+      struct pollfd pfd = {session._async_fd(), POLLIN, 0};
+      int const ready = poll(&pfd, 1, static_cast<int>(timeout * 1000) + 1);
+      for (auto& completion : ready > 0 ? session._async_read() : session._async_timeout()) {
+         completions[completion.request_id] = completion;
+      }
+      timeout = session._async_next_timeout();
+   }
+   return completions;
+}
+
 TEST_F(SessionBaseTest, TestGetNextSingleMibStringOverload) {
    SessionBase session("localhost", "11161", "2c", "public", "", "", "", "", "", "", "", "", "", "",
                        "3", "5");
@@ -593,9 +610,9 @@ TEST_F(SessionBaseTest, TestGetSingleMib) {
    // Check if the SET was accepted by verifying the value changed OR stayed the same
    // On some systems (e.g., CentOS 8), sysLocation might be read-only despite SET appearing to
    // succeed
-   std::string final_value = final_result[0].value;
+   std::string final_value = final_result[0].get_value();
    bool set_persisted = (final_value == "my newer location");
-   bool set_ignored = (final_value == initial_result[0].value);
+   bool set_ignored = (final_value == initial_result[0].get_value());
    EXPECT_TRUE(set_persisted || set_ignored)
        << "Expected either 'my newer location' (SET persisted) or initial value (SET ignored), "
        << "but got: " << final_value;
@@ -736,7 +753,7 @@ TEST_F(SessionBaseTest, TestGetMultipleMibs) {
    for (size_t i = 0; i < results.size(); ++i) {
       EXPECT_TRUE(results[i].oid.find("sysORDescr") != std::string::npos);
       EXPECT_EQ(results[i].type, "STRING");
-      EXPECT_FALSE(results[i].value.empty());
+      EXPECT_FALSE(results[i].get_value().empty());
       EXPECT_EQ(results[i].index, std::to_string(i + 1));
    }
 
@@ -772,7 +789,7 @@ TEST_F(SessionBaseTest, TestGetNext) {
    for (size_t i = 0; i < results.size(); ++i) {
       EXPECT_TRUE(results[i].oid.find("sysORDescr") != std::string::npos);
       EXPECT_EQ(results[i].type, "STRING");
-      EXPECT_FALSE(results[i].value.empty());
+      EXPECT_FALSE(results[i].get_value().empty());
       EXPECT_EQ(results[i].index, std::to_string(i + 2));
    }
 
@@ -1310,3 +1327,43 @@ TEST_F(SessionBaseTest, TestBulkGetEmptyMib) {
       // Any other error still means the empty-mib branch was exercised
    }
 }
+
+TEST_F(SessionBaseTest, TestAsyncOperationsMatchSynchronousOnes) {
+   SessionBase session("localhost", "11161", "2c", "public", "", "", "", "", "", "", "", "", "", "",
+                       "3", "5");
+
+   std::vector<Result> expected_get;
+   try {
+      expected_get = session.get(".1.3.6.1.2.1.1.4.0");
+   } catch (TimeoutErrorBase const&) {
+      GTEST_SKIP() << "SNMP agent is not reachable in this environment";
+   }
+   std::vector<Result> const expected_walk = session.walk(".1.3.6.1.2.1.1");
+
+   int const get_id = session._async_get({".1.3.6.1.2.1.1.4.0"});
+   int const walk_id = session._async_walk(".1.3.6.1.2.1.1");
+   int const bulk_walk_id = session._async_bulk_walk({".1.3.6.1.2.1.1"});
+   std::map<int, AsyncCompletion> completions = CollectAsyncCompletions(session);
+   ASSERT_EQ(completions.size(), 3u);
+
+   auto const to_strings = [](std::vector<Result> const& results) {
+      std::vector<std::string> strings;
+      for (auto const& result : results) {
+         strings.push_back(result._to_string());
+      }
+      return strings;
+   };
+   EXPECT_NO_THROW(completions[get_id].rethrow());
+   EXPECT_EQ(to_strings(completions[get_id].results), to_strings(expected_get));
+   EXPECT_EQ(to_strings(completions[walk_id].results), to_strings(expected_walk));
+   EXPECT_EQ(to_strings(completions[bulk_walk_id].results), to_strings(expected_walk));
+}
+
+TEST_F(SessionBaseTest, TestAsyncGetReportsErrors) {
+   SessionBase session("localhost", "11161", "2c", "public", "", "", "", "", "", "", "", "", "", "",
+                       "3", "5");
+
+   EXPECT_THROW(session._async_get({}), GenericErrorBase);
+   EXPECT_THROW(session._async_get({"NOT-A-MIB::nothing.0"}), GenericErrorBase);
+   EXPECT_EQ(session._async_next_timeout(), -1);
+}
@@ -115,11 +115,11 @@ TEST(SessionBaseParametersIntegration, TimeticksNumericFlagChangesValueFormat) {
    auto r_text = *r_text_opt;
    EXPECT_NE(r_text.type.find("Timeticks"), std::string::npos);
    // Heuristic: textual timeticks usually contain a space or comma
-   bool looks_textual = (r_text.value.find(" ") != std::string::npos) ||
-                        (r_text.value.find(",") != std::string::npos) ||
-                        (r_text.value.find("milli-seconds") != std::string::npos);
+   bool looks_textual = (r_text.get_value().find(" ") != std::string::npos) ||
+                        (r_text.get_value().find(",") != std::string::npos) ||
+                        (r_text.get_value().find("milli-seconds") != std::string::npos);
    EXPECT_TRUE(looks_textual) << "Expected non-numeric timeticks representation, got: "
-                              << r_text.value;
+                              << r_text.get_value();
 
    // With print_timeticks_numerically = true: value should be purely numeric
    auto r_num_opt = GetSingleOidOrSkip(/*enums*/ false, /*full*/ false, /*oids_num*/ false,
@@ -131,9 +131,10 @@ TEST(SessionBaseParametersIntegration, TimeticksNumericFlagChangesValueFormat) {
    auto r_num = *r_num_opt;
    EXPECT_NE(r_num.type.find("Timeticks"), std::string::npos);
    // Check value is digits only
+   std::string const& num_value = r_num.get_value();
    bool all_digits =
-       !r_num.value.empty() && std::all_of(r_num.value.begin(), r_num.value.end(), ::isdigit);
-   EXPECT_TRUE(all_digits) << "Expected numeric timeticks, got: " << r_num.value;
+       !num_value.empty() && std::all_of(num_value.begin(), num_value.end(), ::isdigit);
+   EXPECT_TRUE(all_digits) << "Expected numeric timeticks, got: " << num_value;
 }
 
 TEST(SessionBaseParametersIntegration, OidsNumericFlagChangesOidFormat) {
@@ -3,6 +3,7 @@
 #include <algorithm>
 #include <chrono>
 #include <condition_variable>
+#include <cstdint>
 #include <future>
 #include <mutex>
 #include <stdexcept>
@@ -10,29 +11,61 @@
 #include <utility>
 #include <vector>
 
+#include "exceptionsbase.h"
 #include "sessionbase.h"
+#include "sessionhandle.h"
+#include "thread_safety.h"
 
 namespace {
 
-enum class GetBehavior { Return, Throw, Block };
+enum class GetBehavior { Return, Throw, Block, StaleEngine };
 
 std::mutex g_state_mutex;
 std::condition_variable g_state_changed;
 GetBehavior g_get_behavior = GetBehavior::Return;
+bool g_fail_open = false;
 bool g_release_get = false;
 int g_entered_gets = 0;
 int g_active_gets = 0;
 int g_max_active_gets = 0;
-std::vector<std::pair<std::string, std::string>> g_cache_removals;
+int g_closed_handles = 0;
+int g_forgotten_users = 0;
+int g_last_max_repetitions = 0;
+bool g_last_adaptive = false;
+int g_walk_steps = 0;
+int g_walks = 0;
+bool g_has_sentinel = false;
+uint64_t g_uptime = 0;
+uint64_t g_sentinel = 0;
+std::vector<std::string> g_sampled_points;
+BatchLimits g_batch_limits;
+std::size_t g_pipelined_outstanding = 0;
+bool g_empty_ranges = false;
+std::vector<std::vector<std::string>> g_opened_handles;
 
 void reset_shim_state() {
    std::lock_guard<std::mutex> lock(g_state_mutex);
    g_get_behavior = GetBehavior::Return;
+   g_fail_open = false;
    g_release_get = false;
    g_entered_gets = 0;
    g_active_gets = 0;
    g_max_active_gets = 0;
-   g_cache_removals.clear();
+   g_closed_handles = 0;
+   g_forgotten_users = 0;
+   g_last_max_repetitions = 0;
+   g_last_adaptive = false;
+   g_walk_steps = 0;
+   g_walks = 0;
+   g_has_sentinel = false;
+   g_uptime = 0;
+   g_sentinel = 0;
+   g_sampled_points.clear();
+   g_batch_limits = BatchLimits();
+   g_pipelined_outstanding = 0;
+   g_empty_ranges = false;
+   SessionBase::_clear_walk_snapshots();
+   g_opened_handles.clear();
 }
 
 void release_blocked_gets() {
@@ -64,29 +97,51 @@ SessionBase make_v3_session(std::string const &username, std::string const &cont
                       "", username);
 }
 
-std::vector<Result> empty_result(std::vector<std::string> const &, std::string const &) {
-   return {};
-}
-
 } // namespace
 
-void remove_v3_user_from_cache(std::string const &security_name,
-                               std::string const &context_engine_id) {
+SessionHandle::SessionHandle(std::vector<std::string> const &args, std::string const &init_app_name)
+    : m_init_name(init_app_name) {
    std::lock_guard<std::mutex> lock(g_state_mutex);
-   g_cache_removals.emplace_back(security_name, context_engine_id);
+   if (g_fail_open) {
+      throw std::runtime_error("shim open failure");
+   }
+   g_opened_handles.push_back(args);
+
+   // The shim has no engine discovery, the context engine ID stands in for the discovered one
+   for (std::size_t i = 0; i + 1 < args.size(); ++i) {
+      if (args[i] == "-u") {
+         m_security_name = args[i + 1];
+      } else if (args[i] == "-E") {
+         m_security_engine_id = args[i + 1];
+      }
+   }
 }
 
-std::vector<Result> snmpwalk(std::vector<std::string> const &args,
-                             std::string const &init_app_name) {
-   return empty_result(args, init_app_name);
+SessionHandle::~SessionHandle() {
+   std::lock_guard<std::mutex> lock(g_state_mutex);
+   ++g_closed_handles;
 }
 
-std::vector<Result> snmpbulkwalk(std::vector<std::string> const &args,
-                                 std::string const &init_app_name) {
-   return empty_result(args, init_app_name);
+std::string const &SessionHandle::security_name() const { return m_security_name; }
+
+std::string const &SessionHandle::security_engine_id() const { return m_security_engine_id; }
+
+std::string const &SessionHandle::engine_cache_key() const { return m_engine_cache_key; }
+
+bool SessionHandle::engine_stale() const { return m_engine_stale; }
+
+void SessionHandle::set_batch_limits(BatchLimits const &limits) {
+   std::lock_guard<std::mutex> lock(g_state_mutex);
+   m_batch_limits = limits;
+   g_batch_limits = limits;
 }
 
-std::vector<Result> snmpget(std::vector<std::string> const &, std::string const &) {
+void SessionHandle::forget_usm_user() {
+   std::lock_guard<std::mutex> lock(g_state_mutex);
+   ++g_forgotten_users;
+}
+
+std::vector<Result> SessionHandle::get(std::vector<std::string> const &) {
    std::unique_lock<std::mutex> lock(g_state_mutex);
    ++g_entered_gets;
    ++g_active_gets;
@@ -97,6 +152,11 @@ std::vector<Result> snmpget(std::vector<std::string> const &, std::string const
       --g_active_gets;
       throw std::runtime_error("shim failure");
    }
+   if (g_get_behavior == GetBehavior::StaleEngine) {
+      --g_active_gets;
+      m_engine_stale = true;
+      throw std::runtime_error("shim unknown engine ID");
+   }
    if (g_get_behavior == GetBehavior::Block) {
       g_state_changed.wait(lock, [] { return g_release_get; });
    }
@@ -105,42 +165,541 @@ std::vector<Result> snmpget(std::vector<std::string> const &, std::string const
    return {};
 }
 
-std::vector<Result> snmpgetnext(std::vector<std::string> const &args,
-                                std::string const &init_app_name) {
-   return empty_result(args, init_app_name);
+std::vector<Result> SessionHandle::get_next(std::vector<std::string> const &) { return {}; }
+
+std::vector<Result> SessionHandle::bulk_get(std::vector<std::string> const &,
+                                            int,
+                                            int max_repetitions) {
+   std::lock_guard<std::mutex> lock(g_state_mutex);
+   g_last_max_repetitions = max_repetitions;
+   return {};
+}
+
+std::vector<Result> SessionHandle::set(std::vector<std::string> const &) { return {}; }
+
+std::vector<Result> SessionHandle::walk(std::string const &) {
+   std::lock_guard<std::mutex> lock(g_state_mutex);
+   ++g_walks;
+   return {Result()};
+}
+
+std::vector<Result> SessionHandle::bulk_walk(std::vector<std::string> const &,
+                                             int max_repetitions,
+                                             bool adaptive) {
+   std::lock_guard<std::mutex> lock(g_state_mutex);
+   g_last_max_repetitions = max_repetitions;
+   g_last_adaptive = adaptive;
+   return {};
+}
+
+std::vector<std::vector<Result>> SessionHandle::bulk_walk_table(
+    std::vector<std::string> const &columns, int) {
+   return std::vector<std::vector<Result>>(columns.size());
+}
+
+TableRows SessionHandle::get_table(std::string const &, bool, int) { return {}; }
+
+// A GET of sysUpTime.0 and a sentinel returns both as TimeTicks.
+ResultTable SessionHandle::get_columnar(std::vector<std::string> const &oids) {
+   std::lock_guard<std::mutex> lock(g_state_mutex);
+   ResultTable table;
+   if (oids.size() == 2 && g_has_sentinel) {
+      uint32_t const subid = 0;
+      table.append(&subid, 1, 0, ASN_TIMETICKS, g_uptime, "");
+      table.append(&subid, 1, 0, ASN_TIMETICKS, g_sentinel, "");
+   }
+   return table;
+}
+
+ResultTable SessionHandle::walk_columnar(std::string const &) { return {}; }
+
+ResultTable SessionHandle::bulk_walk_columnar(std::vector<std::string> const &,
+                                              int max_repetitions,
+                                              bool adaptive) {
+   std::lock_guard<std::mutex> lock(g_state_mutex);
+   g_last_max_repetitions = max_repetitions;
+   g_last_adaptive = adaptive;
+   return {};
+}
+
+// Every walk takes three requests, each returning a single variable.
+std::vector<Result> SessionHandle::walk_step(WalkState &state) {
+   std::lock_guard<std::mutex> lock(g_state_mutex);
+   g_last_max_repetitions = state.max_repetitions;
+   state.done = ++g_walk_steps == 3;
+   return {Result()};
+}
+
+std::string SessionHandle::change_indicator(std::string const &root) const {
+   return root == ".1.3.6.1.2.1.1.9" ? ".1.3.6.1.2.1.1.8.0" : "";
+}
+
+// A range walk returns a single variable naming its bounds, or none for an empty subtree.
+std::vector<Result> SessionHandle::run_walk(WalkState &state) {
+   if (g_empty_ranges) {
+      return {};
+   }
+   Result result;
+   result.oid = state.start_after + "-" + state.stop_after;
+   return {result};
+}
+
+// Pipelined walks run the ranges in order like run_walk(), recording the number in flight.
+std::vector<std::vector<Result>> SessionHandle::pipelined_walks(
+    std::vector<WalkState> const &states, std::size_t max_outstanding) {
+   g_pipelined_outstanding = max_outstanding;
+   std::vector<std::vector<Result>> results;
+   for (WalkState state : states) {
+      results.push_back(run_walk(state));
+   }
+   return results;
 }
 
-std::vector<Result> snmpbulkget(std::vector<std::string> const &args,
-                                std::string const &init_app_name) {
-   return empty_result(args, init_app_name);
+// A resumable walk returns a single variable and fails like get().
+ResumableWalk SessionHandle::resumable_walk(std::vector<std::string> const &,
+                                            std::string const &start_after,
+                                            bool,
+                                            int max_repetitions,
+                                            bool adaptive) {
+   std::lock_guard<std::mutex> lock(g_state_mutex);
+   g_last_max_repetitions = max_repetitions;
+   g_last_adaptive = adaptive;
+
+   ResumableWalk walk;
+   walk.results.push_back(Result());
+   walk.resume_token = start_after + ".1";
+   if (g_get_behavior == GetBehavior::Throw) {
+      walk.error = std::make_exception_ptr(TimeoutErrorBase("shim timeout"));
+   }
+   return walk;
 }
 
-std::vector<Result> snmpset(std::vector<std::string> const &args,
-                            std::string const &init_app_name) {
-   return empty_result(args, init_app_name);
+std::vector<std::string> SessionHandle::sample_split_points(std::string const &,
+                                                            std::size_t max_points) {
+   std::lock_guard<std::mutex> lock(g_state_mutex);
+   std::vector<std::string> points = g_sampled_points;
+   points.resize(std::min(points.size(), max_points));
+   return points;
 }
 
+// The shim keeps no request objects, the declaration only has to be complete.
+class SessionHandle::Request {
+  public:
+   virtual ~Request() = default;
+};
+
+// Asynchronous operations stay in flight until async_read(), which completes all of them with a
+// single variable each.
+int SessionHandle::async_get(std::vector<std::string> const &) {
+   int const id = s_async_next_id++;
+   m_async_reqids[id] = id;
+   return id;
+}
+
+int SessionHandle::async_get_next(std::vector<std::string> const &oids) { return async_get(oids); }
+
+int SessionHandle::async_bulk_get(std::vector<std::string> const &oids, int, int max_repetitions) {
+   {
+      std::lock_guard<std::mutex> lock(g_state_mutex);
+      g_last_max_repetitions = max_repetitions;
+   }
+   return async_get(oids);
+}
+
+int SessionHandle::async_set(std::vector<std::string> const &oid_type_values) {
+   return async_get(oid_type_values);
+}
+
+int SessionHandle::async_walk(WalkState const &state) {
+   {
+      std::lock_guard<std::mutex> lock(g_state_mutex);
+      g_last_max_repetitions = state.max_repetitions;
+   }
+   return async_get(state.roots);
+}
+
+std::vector<AsyncCompletion> SessionHandle::async_read() {
+   std::vector<AsyncCompletion> completions;
+   for (auto const &entry : m_async_reqids) {
+      AsyncCompletion completion;
+      completion.request_id = entry.first;
+      completion.results.push_back(Result());
+      completions.push_back(completion);
+   }
+   m_async_reqids.clear();
+   return completions;
+}
+
+std::vector<AsyncCompletion> SessionHandle::async_timeout() { return {}; }
+
+std::vector<AsyncCompletion> SessionHandle::async_cancel(std::string const &reason) {
+   std::vector<AsyncCompletion> completions;
+   for (auto const &entry : m_async_reqids) {
+      AsyncCompletion completion;
+      completion.request_id = entry.first;
+      completion.error = std::make_exception_ptr(GenericErrorBase(reason));
+      completions.push_back(completion);
+   }
+   m_async_reqids.clear();
+   return completions;
+}
+
+int SessionHandle::async_fd() { return 42; }
+
+double SessionHandle::async_next_timeout() { return m_async_reqids.empty() ? -1 : 1; }
+
 class SessionBaseV3GuardShimTest : public ::testing::Test {
   protected:
    void SetUp() override { reset_shim_state(); }
 };
 
-TEST_F(SessionBaseV3GuardShimTest, CleansCacheBeforeAndAfterException) {
-   // Real SNMPv3 engine IDs are opaque binary data, so include NUL and non-ASCII bytes.
-   std::string const binary_context_engine_id("\x80\x00\xff", 3);
-   SessionBase session = make_v3_session("alice", binary_context_engine_id);
+TEST_F(SessionBaseV3GuardShimTest, OpensSessionOnceAndReusesIt) {
+   SessionBase session("localhost", "11161", "2c", "public");
+
+   (void)session.get(".1.3.6.1.2.1.1.1.0");
+   (void)session.get_next(".1.3.6.1.2.1.1.1.0");
+   (void)session.walk(".1.3.6.1.2.1.1");
+
+   ASSERT_EQ(g_opened_handles.size(), 1u);
+   EXPECT_EQ(g_closed_handles, 0);
+
+   std::vector<std::string> const expected_args = {
+       "-c", "public", "-r", "3", "-t", "1", "-v", "2c", "localhost:11161"};
+   EXPECT_EQ(g_opened_handles[0], expected_args);
+
+   // The operation OIDs are still reported by _get_args(), but only for the last operation.
+   std::vector<std::string> expected_session_args = expected_args;
+   expected_session_args.push_back(".1.3.6.1.2.1.1");
+   EXPECT_EQ(session._get_args(), expected_session_args);
+}
+
+TEST_F(SessionBaseV3GuardShimTest, ReopensSessionAfterConnectionSetter) {
+   SessionBase session("localhost", "11161", "2c", "public");
+
+   (void)session.get(".1");
+   session._set_timeout("5");
+   EXPECT_EQ(g_closed_handles, 1);
+   (void)session.get(".1");
+
+   ASSERT_EQ(g_opened_handles.size(), 2u);
+   EXPECT_NE(std::find(g_opened_handles[1].begin(), g_opened_handles[1].end(), "5"),
+             g_opened_handles[1].end());
+   EXPECT_EQ(g_forgotten_users, 0);
+}
+
+TEST_F(SessionBaseV3GuardShimTest, ColumnarWalksReuseTheSessionHandle) {
+   SessionBase session("localhost", "11161", "2c", "public");
+   session._set_max_repeaters_to_num("30");
+
+   EXPECT_EQ(session._bulk_walk_columnar({".1"}).size(), 0u);
+   EXPECT_EQ(g_last_max_repetitions, 30);
+   EXPECT_EQ(session._walk_columnar(".1").size(), 0u);
+
+   ASSERT_EQ(g_opened_handles.size(), 1u);
+   EXPECT_EQ(g_closed_handles, 0);
+}
+
+TEST_F(SessionBaseV3GuardShimTest, AdaptiveWalksStartFromMaxRepeaters) {
+   SessionBase session("localhost", "11161", "2c", "public");
+   session._set_max_repeaters_to_num("30");
+
+   (void)session._bulk_walk_adaptive({".1"});
+   EXPECT_EQ(g_last_max_repetitions, 30);
+   EXPECT_TRUE(g_last_adaptive);
+
+   (void)session._bulk_walk_columnar({".1"});
+   EXPECT_FALSE(g_last_adaptive);
+   (void)session._bulk_walk_columnar({".1"}, true);
+   EXPECT_TRUE(g_last_adaptive);
+
+   EXPECT_EQ(session._get_learned_max_repetitions(), 0);
+   ASSERT_EQ(g_opened_handles.size(), 1u);
+}
+
+TEST_F(SessionBaseV3GuardShimTest, TableWalksReuseTheSessionHandle) {
+   SessionBase session("localhost", "11161", "2c", "public");
+
+   EXPECT_EQ(session._bulk_walk_table({".1.3.6.1.2.1.2.2.1.2", ".1.3.6.1.2.1.2.2.1.10"}).size(),
+             2u);
+   EXPECT_EQ(session._get_table(".1.3.6.1.2.1.2.2").cells.size(), 0u);
+   ASSERT_EQ(g_opened_handles.size(), 1u);
+}
+
+TEST_F(SessionBaseV3GuardShimTest, DeltaWalksReuseTheLastWalkUntilTheSentinelMoves) {
+   SessionBase session("localhost", "11161", "2c", "public");
+   g_has_sentinel = true;
+   g_uptime = 100;
+   g_sentinel = 5;
+
+   EXPECT_EQ(session._delta_walk(".1.3.6.1.2.1.1.9").size(), 1u);
+   EXPECT_EQ(session._delta_walk(".1.3.6.1.2.1.1.9").size(), 1u);
+   EXPECT_EQ(g_walks, 1);
+   EXPECT_EQ(SessionBase::_get_walk_snapshot_count(), 1u);
+
+   g_uptime = 200;
+   (void)session._delta_walk(".1.3.6.1.2.1.1.9");
+   EXPECT_EQ(g_walks, 1);
+
+   g_sentinel = 6;
+   (void)session._delta_walk(".1.3.6.1.2.1.1.9");
+   EXPECT_EQ(g_walks, 2);
+
+   // The agent restarted
+   g_uptime = 50;
+   (void)session._delta_walk(".1.3.6.1.2.1.1.9");
+   EXPECT_EQ(g_walks, 3);
+   (void)session._delta_walk(".1.3.6.1.2.1.1.9");
+   EXPECT_EQ(g_walks, 3);
+
+   // Another sentinel keeps a walk of its own
+   (void)session._delta_walk(".1.3.6.1.2.1.1.9", ".1.3.6.1.4.1.1.0");
+   EXPECT_EQ(g_walks, 4);
+   EXPECT_EQ(SessionBase::_get_walk_snapshot_count(), 2u);
+
+   EXPECT_THROW((void)session._delta_walk(".1.3.6.1.2.1.4"), GenericErrorBase);
+
+   // Without the sentinel every delta walk walks
+   g_has_sentinel = false;
+   (void)session._delta_walk(".1.3.6.1.2.1.4", ".1.3.6.1.4.1.1.0");
+   (void)session._delta_walk(".1.3.6.1.2.1.4", ".1.3.6.1.4.1.1.0");
+   EXPECT_EQ(g_walks, 6);
+   EXPECT_EQ(SessionBase::_get_walk_snapshot_count(), 2u);
+
+   SessionBase::_clear_walk_snapshots();
+   EXPECT_EQ(SessionBase::_get_walk_snapshot_count(), 0u);
+   ASSERT_EQ(g_opened_handles.size(), 1u);
+}
+
+TEST_F(SessionBaseV3GuardShimTest, ResumableWalksReportFailuresWithTheirResults) {
+   SessionBase session("localhost", "11161", "2c", "public");
+   session._set_max_repeaters_to_num("30");
+
+   ResumableWalk const walk = session._resumable_walk({".1.3.6.1.2.1.2"}, ".1.3", true, true);
+   EXPECT_NO_THROW(walk.rethrow());
+   EXPECT_EQ(walk.resume_token, ".1.3.1");
+   EXPECT_EQ(g_last_max_repetitions, 30);
+   EXPECT_TRUE(g_last_adaptive);
+
+   g_get_behavior = GetBehavior::Throw;
+   ResumableWalk const failed = session._resumable_walk({".1.3.6.1.2.1.2"}, "");
+   EXPECT_THROW(failed.rethrow(), TimeoutErrorBase);
+   EXPECT_EQ(failed.results.size(), 1u);
+   EXPECT_EQ(failed.resume_token, ".1");
+   EXPECT_EQ(g_last_max_repetitions, 0);
+
+   ASSERT_EQ(g_opened_handles.size(), 1u);
+   EXPECT_EQ(g_closed_handles, 0);
+}
+
+TEST_F(SessionBaseV3GuardShimTest, ParallelWalksConcatenateTheRangesInOrder) {
+   SessionBase session("localhost", "11161", "2c", "public");
+
+   std::vector<Result> const results =
+       session._parallel_walk(".1.3.6.1.2.1", 2, {".1.3.6.1.2.1.1", ".1.3.6.1.2.1.2"});
+   ASSERT_EQ(results.size(), 3u);
+   EXPECT_EQ(results[0].oid, "-.1.3.6.1.2.1.1");
+   EXPECT_EQ(results[1].oid, ".1.3.6.1.2.1.1-.1.3.6.1.2.1.2");
+   EXPECT_EQ(results[2].oid, ".1.3.6.1.2.1.2-");
+
+   // At most one handle per worker, all of them closed again except the session's own
+   EXPECT_LE(g_opened_handles.size(), 2u);
+   EXPECT_EQ(g_closed_handles, static_cast<int>(g_opened_handles.size()) - 1);
+}
+
+TEST_F(SessionBaseV3GuardShimTest, PipelinedParallelWalksShareTheSessionsSocket) {
+   SessionBase session("localhost", "11161", "2c", "public");
+
+   std::vector<Result> const results =
+       session._parallel_walk(".1.3.6.1.2.1", 3, {".1.3.6.1.2.1.1", ".1.3.6.1.2.1.2"}, false, true);
+   ASSERT_EQ(results.size(), 3u);
+   EXPECT_EQ(results[0].oid, "-.1.3.6.1.2.1.1");
+   EXPECT_EQ(results[2].oid, ".1.3.6.1.2.1.2-");
+   EXPECT_EQ(g_pipelined_outstanding, 3u);
+   EXPECT_EQ(g_opened_handles.size(), 1u);
+}
+
+TEST_F(SessionBaseV3GuardShimTest, PipelinedV3ParallelWalksOfEmptyRangesWalkTheRoot) {
+   SessionBase session = make_v3_session("alice", "engine-a");
+   g_empty_ranges = true;
+
+   // The root walk takes the user's guard after the ranges released it
+   std::vector<Result> const results = session._parallel_walk(
+       ".1.3.6.1.2.1.1.1.0", 3, {".1.3.6.1.2.1.1", ".1.3.6.1.2.1.2"}, false, true);
+   EXPECT_EQ(results.size(), 1u);
+   EXPECT_EQ(g_walks, 1);
+   EXPECT_EQ(g_pipelined_outstanding, 3u);
+}
+
+TEST_F(SessionBaseV3GuardShimTest, V3ParallelWalksKeepSeveralRangesInFlight) {
+   SessionBase session = make_v3_session("alice", "engine-a");
+
+   // Not pipelined, the ranges would queue for the user's guard one after another
+   std::vector<Result> const results =
+       session._parallel_walk(".1.3.6.1.2.1", 3, {".1.3.6.1.2.1.1", ".1.3.6.1.2.1.2"});
+   ASSERT_EQ(results.size(), 3u);
+   EXPECT_EQ(results[0].oid, "-.1.3.6.1.2.1.1");
+   EXPECT_EQ(results[1].oid, ".1.3.6.1.2.1.1-.1.3.6.1.2.1.2");
+   EXPECT_EQ(results[2].oid, ".1.3.6.1.2.1.2-");
+   EXPECT_EQ(g_pipelined_outstanding, 3u);
+   EXPECT_EQ(g_opened_handles.size(), 1u);
+
+   // Without results in any range, e.g. for a single instance, the root is walked instead
+   g_empty_ranges = true;
+   EXPECT_EQ(session._parallel_walk(".1.3.6.1.2.1.1.1.0", 3, {".1.3.6.1.2.1.1"}).size(), 1u);
+   EXPECT_EQ(g_walks, 1);
+}
+
+TEST_F(SessionBaseV3GuardShimTest, ParallelWalksSplitTheSampledBranchesEvenly) {
+   SessionBase session("localhost", "11161", "2c", "public");
+   g_sampled_points = {".1", ".2", ".3", ".4", ".5", ".6", ".7"};
+
+   std::vector<Result> const results = session._parallel_walk(".1.3.6.1.2.1", 4, {});
+   ASSERT_EQ(results.size(), 4u);
+   EXPECT_EQ(results[0].oid, "-.2");
+   EXPECT_EQ(results[1].oid, ".2-.4");
+   EXPECT_EQ(results[2].oid, ".4-.6");
+   EXPECT_EQ(results[3].oid, ".6-");
+
+   // Fewer branches than workers give a range per branch
+   g_sampled_points = {".1"};
+   EXPECT_EQ(session._parallel_walk(".1.3.6.1.2.1", 4, {}).size(), 2u);
+   g_sampled_points.clear();
+   EXPECT_EQ(session._parallel_walk(".1.3.6.1.2.1", 4, {}).size(), 1u);
+}
+
+TEST_F(SessionBaseV3GuardShimTest, MaxRepeatersSetterKeepsSessionOpen) {
+   SessionBase session("localhost", "11161", "2c", "public");
+
+   (void)session.bulk_walk(".1");
+   EXPECT_EQ(g_last_max_repetitions, 10);
+
+   session._set_max_repeaters_to_num("25");
+   (void)session.bulk_get(".1");
+   EXPECT_EQ(g_last_max_repetitions, 25);
+
+   session._set_max_repeaters_to_num("");
+   (void)session.bulk_walk(".1");
+   EXPECT_EQ(g_last_max_repetitions, 10);
+
+   ASSERT_EQ(g_opened_handles.size(), 1u);
+   EXPECT_EQ(g_closed_handles, 0);
+   for (auto const &arg : g_opened_handles[0]) {
+      EXPECT_NE(arg.rfind("-C", 0), 0u) << arg;
+   }
+}
+
+TEST_F(SessionBaseV3GuardShimTest, CredentialSetterForgetsCachedUser) {
+   SessionBase session = make_v3_session("alice", "engine-a");
+
+   (void)session.get(".1");
+   session._set_security_username("bob");
+   EXPECT_EQ(g_forgotten_users, 1);
+   EXPECT_EQ(g_closed_handles, 1);
+
+   // Without an open session there is no cached user to forget.
+   session._set_security_username("carol");
+   EXPECT_EQ(g_forgotten_users, 1);
+
+   (void)session.get(".1");
+   ASSERT_EQ(g_opened_handles.size(), 2u);
+   EXPECT_NE(std::find(g_opened_handles[1].begin(), g_opened_handles[1].end(), "carol"),
+             g_opened_handles[1].end());
+}
+
+TEST_F(SessionBaseV3GuardShimTest, FailedOpenIsRetriedByTheNextOperation) {
+   SessionBase session = make_v3_session("alice", "engine-a");
+   g_fail_open = true;
+
+   EXPECT_THROW((void)session.get(".1"), std::runtime_error);
+   EXPECT_TRUE(g_opened_handles.empty());
+
+   g_fail_open = false;
+   (void)session.get(".1");
+   EXPECT_EQ(g_opened_handles.size(), 1u);
+}
+
+TEST_F(SessionBaseV3GuardShimTest, OperationFailureKeepsSessionOpen) {
+   SessionBase session = make_v3_session("alice", "engine-a");
    g_get_behavior = GetBehavior::Throw;
 
    EXPECT_THROW((void)session.get(".1.3.6.1.2.1.1.1.0"), std::runtime_error);
+   EXPECT_THROW((void)session.get(".1.3.6.1.2.1.1.1.0"), std::runtime_error);
+
+   EXPECT_EQ(g_opened_handles.size(), 1u);
+   EXPECT_EQ(g_closed_handles, 0);
+   EXPECT_EQ(g_forgotten_users, 0);
+}
+
+TEST_F(SessionBaseV3GuardShimTest, StaleEngineReopensTheSession) {
+   SessionBase session = make_v3_session("alice", "engine-a");
+
+   g_get_behavior = GetBehavior::StaleEngine;
+   EXPECT_THROW(session.get(".1"), std::runtime_error);
+   EXPECT_EQ(g_opened_handles.size(), 1u);
+
+   g_get_behavior = GetBehavior::Return;
+   (void)session.get(".1");
+   EXPECT_EQ(g_opened_handles.size(), 2u);
+   EXPECT_EQ(g_closed_handles, 1);
+   EXPECT_EQ(g_forgotten_users, 1);
+}
+
+TEST_F(SessionBaseV3GuardShimTest, CloseReleasesTheSession) {
+   SessionBase session("localhost", "11161", "2c", "public");
+
+   (void)session.get(".1");
+   session._close();
+   EXPECT_EQ(g_closed_handles, 1);
 
-   std::vector<std::pair<std::string, std::string>> const expected = {
-       {"alice", binary_context_engine_id}, {"alice", binary_context_engine_id}};
-   EXPECT_EQ(g_cache_removals, expected);
+   (void)session.get(".1");
+   EXPECT_EQ(g_opened_handles.size(), 2u);
 }
 
-TEST_F(SessionBaseV3GuardShimTest, SerializesConcurrentV3OperationsAndTheirCleanup) {
+TEST_F(SessionBaseV3GuardShimTest, RunsV3OperationsOfDifferentUsersInParallel) {
    SessionBase first = make_v3_session("alice", "engine-a");
-   SessionBase second = make_v3_session("bob", "engine-b");
+   SessionBase second = make_v3_session("alice", "engine-b");
+   SessionBase third = make_v3_session("bob", "engine-a");
+   g_get_behavior = GetBehavior::Block;
+
+   auto first_get = std::async(std::launch::async, [&first] { return first.get(".1"); });
+   auto second_get = std::async(std::launch::async, [&second] { return second.get(".1"); });
+   auto third_get = std::async(std::launch::async, [&third] { return third.get(".1"); });
+   bool all_entered;
+   {
+      std::unique_lock<std::mutex> lock(g_state_mutex);
+      all_entered = g_state_changed.wait_for(lock, std::chrono::seconds(2),
+                                             [] { return g_active_gets == 3; });
+   }
+   release_blocked_gets();
+
+   EXPECT_TRUE(all_entered);
+   EXPECT_TRUE(first_get.get().empty());
+   EXPECT_TRUE(second_get.get().empty());
+   EXPECT_TRUE(third_get.get().empty());
+   EXPECT_EQ(g_max_active_gets, 3);
+}
+
+TEST_F(SessionBaseV3GuardShimTest, WaitingV3OperationsLeaveTheUserListFree) {
+   SessionBase session = make_v3_session("alice", "engine-a");
+   g_get_behavior = GetBehavior::Block;
+
+   auto blocked_get = std::async(std::launch::async, [&session] { return session.get(".1"); });
+   ASSERT_TRUE(wait_for_first_get_or_release());
+
+   // Opening another SNMPv3 session takes the user list while the agent has yet to answer
+   auto open = std::async(std::launch::async, [] {
+      std::lock_guard<WriterPreferringSharedMutex> usm_lock(g_netsnmp_usm_mutex);
+   });
+   bool const opened = open.wait_for(std::chrono::seconds(2)) == std::future_status::ready;
+   release_blocked_gets();
+
+   EXPECT_TRUE(opened);
+   EXPECT_TRUE(blocked_get.get().empty());
+}
+
+TEST_F(SessionBaseV3GuardShimTest, SerializesV3OperationsOfTheSameUser) {
+   SessionBase first = make_v3_session("alice", "engine-a");
+   SessionBase second = make_v3_session("alice", "engine-a");
    g_get_behavior = GetBehavior::Block;
 
    auto first_get = std::async(std::launch::async, [&first] { return first.get(".1"); });
@@ -159,13 +718,9 @@ TEST_F(SessionBaseV3GuardShimTest, SerializesConcurrentV3OperationsAndTheirClean
    EXPECT_TRUE(second_get.get().empty());
    EXPECT_EQ(g_entered_gets, 2);
    EXPECT_EQ(g_max_active_gets, 1);
-
-   std::vector<std::pair<std::string, std::string>> const expected = {
-       {"alice", "engine-a"}, {"alice", "engine-a"}, {"bob", "engine-b"}, {"bob", "engine-b"}};
-   EXPECT_EQ(g_cache_removals, expected);
 }
 
-TEST_F(SessionBaseV3GuardShimTest, SerializesContextEngineIdSetterAndCleanup) {
+TEST_F(SessionBaseV3GuardShimTest, SerializesContextEngineIdSetterWithOperation) {
    SessionBase session = make_v3_session("alice", "engine-old");
    g_get_behavior = GetBehavior::Block;
 
@@ -189,8 +744,8 @@ TEST_F(SessionBaseV3GuardShimTest, SerializesContextEngineIdSetterAndCleanup) {
    EXPECT_TRUE(setter.wait_for(std::chrono::milliseconds(100)) == std::future_status::timeout);
    {
       std::lock_guard<std::mutex> lock(g_state_mutex);
-      std::vector<std::pair<std::string, std::string>> const expected = {{"alice", "engine-old"}};
-      EXPECT_EQ(g_cache_removals, expected);
+      EXPECT_EQ(g_forgotten_users, 0);
+      EXPECT_EQ(g_closed_handles, 0);
    }
 
    release_blocked_gets();
@@ -198,7 +753,115 @@ TEST_F(SessionBaseV3GuardShimTest, SerializesContextEngineIdSetterAndCleanup) {
    setter.get();
 
    EXPECT_EQ(session._get_context_engine_id(), "engine-new");
-   std::vector<std::pair<std::string, std::string>> const expected = {
-       {"alice", "engine-old"}, {"alice", "engine-old"}, {"alice", "engine-new"}};
-   EXPECT_EQ(g_cache_removals, expected);
+   EXPECT_EQ(g_forgotten_users, 1);
+   EXPECT_EQ(g_closed_handles, 1);
+}
+
+TEST_F(SessionBaseV3GuardShimTest, WalkCursorSendsOneRequestPerBatch) {
+   SessionBase session("localhost", "11161", "2c", "public");
+   session._set_max_repeaters_to_num("25");
+
+   WalkCursor cursor = session._bulk_walk_cursor({".1.3.6.1.2.1.2"});
+   session._set_max_repeaters_to_num("");
+   EXPECT_TRUE(g_opened_handles.empty());
+   EXPECT_FALSE(cursor.done());
+
+   int batches = 0;
+   while (!cursor.done()) {
+      EXPECT_EQ(cursor.next_batch().size(), 1u);
+      EXPECT_EQ(g_walk_steps, ++batches);
+   }
+   EXPECT_EQ(batches, 3);
+   EXPECT_EQ(g_last_max_repetitions, 25);
+
+   // A finished cursor sends nothing
+   EXPECT_TRUE(cursor.next_batch().empty());
+   EXPECT_EQ(g_walk_steps, 3);
+
+   ASSERT_EQ(g_opened_handles.size(), 1u);
+   EXPECT_EQ(g_closed_handles, 0);
+}
+
+TEST_F(SessionBaseV3GuardShimTest, BatchLimitsApplyToTheOpenAndReopenedSession) {
+   SessionBase session("localhost", "161", "2c", "public");
+   session._set_max_varbinds_per_pdu(10);
+   EXPECT_EQ(session._get_max_varbinds_per_pdu(), 10u);
+
+   // Passed to the session once it opens, without reopening it afterwards
+   (void)session.get(".1.3.6.1.2.1.1.1.0");
+   EXPECT_EQ(g_batch_limits.max_varbinds, 10u);
+   session._set_max_pdu_size(1400);
+   EXPECT_EQ(g_batch_limits.max_size, 1400u);
+   EXPECT_EQ(g_batch_limits.max_outstanding, 1u);
+   session._set_max_outstanding_requests(8);
+   EXPECT_EQ(g_batch_limits.max_outstanding, 8u);
+   EXPECT_EQ(g_closed_handles, 0);
+
+   session._set_hostname("otherhost");
+   g_batch_limits = BatchLimits();
+   (void)session.get(".1.3.6.1.2.1.1.1.0");
+   EXPECT_EQ(g_batch_limits.max_varbinds, 10u);
+   EXPECT_EQ(g_batch_limits.max_size, 1400u);
+}
+
+TEST_F(SessionBaseV3GuardShimTest, SessionsInheritedAcrossForkAreReopened) {
+   SessionBase session("localhost", "161", "2c", "public");
+   (void)session.get(".1.3.6.1.2.1.1.1.0");
+   ASSERT_EQ(g_opened_handles.size(), 1u);
+
+   // What the fork handlers do in the child, without forking the test
+   SessionBase::_prepare_fork();
+   SessionBase::_after_fork_in_child();
+   (void)session.get(".1.3.6.1.2.1.1.1.0");
+   EXPECT_EQ(g_opened_handles.size(), 2u);
+   EXPECT_EQ(g_closed_handles, 1);
+
+   (void)session.get(".1.3.6.1.2.1.1.1.0");
+   EXPECT_EQ(g_opened_handles.size(), 2u);
+}
+
+TEST_F(SessionBaseV3GuardShimTest, AsyncOperationsCompleteOnRead) {
+   SessionBase session("localhost", "11161", "2c", "public");
+   EXPECT_EQ(session._async_next_timeout(), -1);
+   EXPECT_TRUE(session._async_read().empty());
+   EXPECT_TRUE(g_opened_handles.empty());
+
+   int const get_id = session._async_get({".1.3.6.1.2.1.1.1.0"});
+   session._set_max_repeaters_to_num("25");
+   int const walk_id = session._async_bulk_walk({".1.3.6.1.2.1.2"});
+   EXPECT_NE(get_id, walk_id);
+   EXPECT_EQ(g_last_max_repetitions, 25);
+   EXPECT_EQ(session._async_fd(), 42);
+   EXPECT_EQ(session._async_next_timeout(), 1);
+
+   std::vector<AsyncCompletion> const completions = session._async_read();
+   ASSERT_EQ(completions.size(), 2u);
+   EXPECT_EQ(completions[0].request_id, get_id);
+   EXPECT_EQ(completions[1].request_id, walk_id);
+   for (auto const &completion : completions) {
+      EXPECT_NO_THROW(completion.rethrow());
+      EXPECT_EQ(completion.results.size(), 1u);
+   }
+   EXPECT_EQ(session._async_next_timeout(), -1);
+   ASSERT_EQ(g_opened_handles.size(), 1u);
+}
+
+TEST_F(SessionBaseV3GuardShimTest, ReopeningSessionCancelsAsyncOperations) {
+   SessionBase session("localhost", "11161", "2c", "public");
+
+   int const id = session._async_get({".1.3.6.1.2.1.1.1.0"});
+   session._set_timeout("5");
+   EXPECT_EQ(g_closed_handles, 1);
+
+   // The cancellation is reported right away, without reopening the session
+   EXPECT_EQ(session._async_next_timeout(), 0);
+   std::vector<AsyncCompletion> const completions = session._async_timeout();
+   ASSERT_EQ(completions.size(), 1u);
+   EXPECT_EQ(completions[0].request_id, id);
+   EXPECT_TRUE(completions[0].results.empty());
+   EXPECT_THROW(completions[0].rethrow(), GenericErrorBase);
+   EXPECT_EQ(g_opened_handles.size(), 1u);
+
+   EXPECT_TRUE(session._async_timeout().empty());
+   EXPECT_EQ(session._async_next_timeout(), -1);
 }
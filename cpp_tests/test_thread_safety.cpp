@@ -1,6 +1,11 @@
 #include <gtest/gtest.h>
+#include <sys/wait.h>
+#include <unistd.h>
 
 #include <atomic>
+#include <chrono>
+#include <mutex>
+#include <shared_mutex>
 #include <thread>
 #include <vector>
 
@@ -12,7 +17,11 @@ class ThreadSafetyTest : public ::testing::Test {
       // Reset globals for test
       g_netsnmp_init_count.store(0);
       g_netsnmp_initialized.store(false);
+      // The reference-counted lifecycle, where the last cleanup shuts Net-SNMP down
+      g_netsnmp_keep_alive.store(false);
    }
+
+   void TearDown() override { g_netsnmp_keep_alive.store(true); }
 };
 
 TEST_F(ThreadSafetyTest, TestInitAndCleanup) {
@@ -69,4 +78,138 @@ TEST_F(ThreadSafetyTest, TestConcurrentInitCleanup) {
    // After every init is matched by a cleanup the count must be back to zero
    EXPECT_EQ(g_netsnmp_init_count.load(), 0);
    EXPECT_FALSE(g_netsnmp_initialized.load());
-}
\ No newline at end of file
+}
+
+TEST_F(ThreadSafetyTest, KeepAliveSkipsTheShutdownOfTheLastCleanup) {
+   netsnmp_library_init("test_app", true);
+   EXPECT_TRUE(g_netsnmp_keep_alive.load());
+   EXPECT_TRUE(g_netsnmp_initialized.load());
+   EXPECT_EQ(g_netsnmp_init_count.load(), 0);
+
+   netsnmp_thread_init("test_app_1");
+   netsnmp_thread_cleanup("test_app_1");
+   netsnmp_thread_init("test_app_2");
+   netsnmp_thread_cleanup("test_app_2");
+   EXPECT_EQ(g_netsnmp_init_count.load(), 0);
+   EXPECT_TRUE(g_netsnmp_initialized.load());
+
+   // Turning it off shuts the unused library down
+   netsnmp_library_init("test_app", false);
+   EXPECT_FALSE(g_netsnmp_keep_alive.load());
+   EXPECT_FALSE(g_netsnmp_initialized.load());
+}
+
+TEST_F(ThreadSafetyTest, LibraryShutdownWaitsForTheLastReference) {
+   g_netsnmp_keep_alive.store(true);
+   netsnmp_thread_init("test_app");
+
+   netsnmp_library_shutdown();
+   EXPECT_FALSE(g_netsnmp_keep_alive.load());
+   EXPECT_TRUE(g_netsnmp_initialized.load());
+
+   netsnmp_thread_cleanup("test_app");
+   EXPECT_FALSE(g_netsnmp_initialized.load());
+
+   // Nothing left to shut down
+   netsnmp_library_shutdown();
+   EXPECT_FALSE(g_netsnmp_initialized.load());
+}
+
+TEST_F(ThreadSafetyTest, MibLoadingAppliesToTheNextInitialization) {
+   netsnmp_thread_init("test_app");
+   EXPECT_EQ(g_netsnmp_mib_loading.load(), MIB_LOADING_EAGER);
+
+   // Not while a reference is held
+   netsnmp_library_set_mib_loading(MIB_LOADING_NUMERIC);
+   EXPECT_TRUE(g_netsnmp_initialized.load());
+   EXPECT_EQ(g_netsnmp_mib_loading.load(), MIB_LOADING_EAGER);
+   netsnmp_thread_cleanup("test_app");
+
+   unsigned const generation = g_netsnmp_mib_generation.load();
+   netsnmp_thread_init("test_app");
+   EXPECT_EQ(g_netsnmp_mib_loading.load(), MIB_LOADING_NUMERIC);
+   EXPECT_NE(g_netsnmp_mib_generation.load(), generation);
+
+   // Shuts the unused library down
+   netsnmp_thread_cleanup("test_app");
+   netsnmp_library_init("test_app", true);
+   netsnmp_library_set_mib_loading(MIB_LOADING_EAGER);
+   EXPECT_FALSE(g_netsnmp_initialized.load());
+}
+
+// Readers share the mutex, but once a writer waits new readers queue behind it, so a steady
+// stream of overlapping readers cannot starve it.
+TEST(WriterPreferringSharedMutexTest, WaitingWriterBlocksNewReaders) {
+   WriterPreferringSharedMutex mutex;
+   std::atomic<bool> writer_done(false);
+   std::atomic<bool> reader_done(false);
+
+   std::shared_lock<WriterPreferringSharedMutex> first_reader(mutex);
+   std::shared_lock<WriterPreferringSharedMutex> second_reader(mutex);
+
+   std::thread writer([&] {
+      std::unique_lock<WriterPreferringSharedMutex> lock(mutex);
+      EXPECT_FALSE(reader_done.load());
+      writer_done.store(true);
+   });
+   std::this_thread::sleep_for(std::chrono::milliseconds(50));
+
+   std::thread reader([&] {
+      std::shared_lock<WriterPreferringSharedMutex> lock(mutex);
+      EXPECT_TRUE(writer_done.load());
+      reader_done.store(true);
+   });
+   std::this_thread::sleep_for(std::chrono::milliseconds(50));
+   EXPECT_FALSE(writer_done.load());
+   EXPECT_FALSE(reader_done.load());
+
+   first_reader.unlock();
+   second_reader.unlock();
+   writer.join();
+   reader.join();
+   EXPECT_TRUE(reader_done.load());
+}
+
+// A lock held by a thread that does not survive the fork is taken over by the fork handlers:
+// the child can use every global lock, and runs in a new fork generation.
+TEST(ForkTest, ChildCanTakeTheGlobalLocks) {
+   std::atomic<bool> holding(false);
+   std::atomic<bool> release(false);
+   std::thread holder([&] {
+      std::lock_guard<std::mutex> lock(g_netsnmp_mib_mutex);
+      holding.store(true);
+      while (!release.load()) {
+         std::this_thread::sleep_for(std::chrono::milliseconds(1));
+      }
+   });
+   while (!holding.load()) {
+      std::this_thread::yield();
+   }
+
+   std::thread forker([] {
+      unsigned const generation = g_netsnmp_fork_generation.load();
+      netsnmp_prepare_fork();
+      pid_t const pid = fork();
+      if (pid == 0) {
+         netsnmp_after_fork_in_child();
+         bool const locked = g_netsnmp_mib_mutex.try_lock() && g_netsnmp_setup_mutex.try_lock() &&
+                             g_netsnmp_lifecycle_mutex.try_lock();
+         {
+            std::shared_lock<WriterPreferringSharedMutex> usm_lock(g_netsnmp_usm_mutex);
+         }
+         _exit(locked && g_netsnmp_fork_generation.load() == generation + 1 ? 0 : 1);
+      }
+      netsnmp_after_fork_in_parent();
+      int status = 0;
+      ASSERT_EQ(waitpid(pid, &status, 0), pid);
+      EXPECT_TRUE(WIFEXITED(status));
+      EXPECT_EQ(WEXITSTATUS(status), 0);
+      EXPECT_EQ(g_netsnmp_fork_generation.load(), generation);
+   });
+
+   // The fork waits for the holder to release the lock
+   std::this_thread::sleep_for(std::chrono::milliseconds(50));
+   release.store(true);
+   holder.join();
+   forker.join();
+}
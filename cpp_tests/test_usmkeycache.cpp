@@ -0,0 +1,78 @@
+#include <gtest/gtest.h>
+
+#include <string>
+
+#include "usmkeycache.h"
+
+class UsmKeyCacheTest : public ::testing::Test {
+  protected:
+   void SetUp() override {
+      usm_key_cache_set_capacity(1024);
+      usm_key_cache_clear();
+   }
+
+   void TearDown() override {
+      usm_key_cache_set_capacity(1024);
+      usm_key_cache_clear();
+   }
+};
+
+TEST_F(UsmKeyCacheTest, ReturnsStoredKeys) {
+   std::string const key = usm_key_cache_key("auth", "SHA-512", "digest");
+   usm_key_cache_store(key, std::string("\x01\x00\x02", 3));
+
+   std::string master_key;
+   ASSERT_TRUE(usm_key_cache_lookup(key, master_key));
+   EXPECT_EQ(master_key, std::string("\x01\x00\x02", 3));
+   EXPECT_EQ(usm_key_cache_size(), 1u);
+
+   EXPECT_FALSE(usm_key_cache_lookup(usm_key_cache_key("priv", "SHA-512", "digest"), master_key));
+   EXPECT_FALSE(usm_key_cache_lookup(usm_key_cache_key("auth", "SHA", "digest"), master_key));
+   EXPECT_FALSE(usm_key_cache_lookup(usm_key_cache_key("auth", "SHA-512", "other"), master_key));
+}
+
+TEST_F(UsmKeyCacheTest, IgnoresTheCaseOfProtocols) {
+   EXPECT_EQ(usm_key_cache_key("auth", "sha-512", "digest"),
+             usm_key_cache_key("auth", "SHA-512", "digest"));
+}
+
+TEST_F(UsmKeyCacheTest, EvictsLeastRecentlyUsedKeys) {
+   usm_key_cache_set_capacity(2);
+   usm_key_cache_store("a", "key a");
+   usm_key_cache_store("b", "key b");
+
+   std::string master_key;
+   ASSERT_TRUE(usm_key_cache_lookup("a", master_key));
+   usm_key_cache_store("c", "key c");
+
+   EXPECT_EQ(usm_key_cache_size(), 2u);
+   EXPECT_TRUE(usm_key_cache_lookup("a", master_key));
+   EXPECT_FALSE(usm_key_cache_lookup("b", master_key));
+   EXPECT_TRUE(usm_key_cache_lookup("c", master_key));
+
+   usm_key_cache_set_capacity(1);
+   EXPECT_EQ(usm_key_cache_size(), 1u);
+   EXPECT_TRUE(usm_key_cache_lookup("c", master_key));
+}
+
+TEST_F(UsmKeyCacheTest, ZeroCapacityDisablesTheCache) {
+   usm_key_cache_store("a", "key a");
+   usm_key_cache_set_capacity(0);
+   EXPECT_EQ(usm_key_cache_get_capacity(), 0u);
+   EXPECT_EQ(usm_key_cache_size(), 0u);
+
+   usm_key_cache_store("a", "key a");
+   std::string master_key;
+   EXPECT_FALSE(usm_key_cache_lookup("a", master_key));
+}
+
+TEST_F(UsmKeyCacheTest, ClearDropsEveryKey) {
+   usm_key_cache_store("a", "key a");
+   usm_key_cache_store("b", "key b");
+   usm_key_cache_clear();
+
+   std::string master_key;
+   EXPECT_EQ(usm_key_cache_size(), 0u);
+   EXPECT_FALSE(usm_key_cache_lookup("a", master_key));
+   EXPECT_EQ(usm_key_cache_get_capacity(), 1024u);
+}
@@ -0,0 +1,275 @@
+#include <gtest/gtest.h>
+
+#include <atomic>
+#include <cstddef>
+#include <cstdint>
+#include <cstdlib>
+#include <new>
+#include <string>
+#include <variant>
+#include <vector>
+
+#include "helpers.h"
+#include "varbind.h"
+
+namespace {
+
+oid const SYS_DESCR_0[] = {1, 3, 6, 1, 2, 1, 1, 1, 0};
+oid const IF_IN_OCTETS_1[] = {1, 3, 6, 1, 2, 1, 2, 2, 1, 10, 1};
+
+OutputFormat numeric_output_format() {
+   OutputFormat format;
+   format.oid_output_format = NETSNMP_OID_OUTPUT_NUMERIC;
+   return format;
+}
+
+// Counts the calls to operator new made while g_count_allocations is set.
+std::atomic<bool> g_count_allocations{false};
+std::atomic<int> g_allocations{0};
+
+} // namespace
+
+void *operator new(std::size_t size) {
+   if (g_count_allocations) {
+      g_allocations++;
+   }
+   if (void *p = std::malloc(size == 0 ? 1 : size)) {
+      return p;
+   }
+   throw std::bad_alloc();
+}
+
+void operator delete(void *p) noexcept { std::free(p); }
+
+void operator delete(void *p, std::size_t) noexcept { std::free(p); }
+
+class DecodeVariableTest : public ::testing::Test {
+  protected:
+   void TearDown() override { snmp_free_varbind(m_vars); }
+
+   netsnmp_variable_list *add(
+       oid const *name, size_t name_length, u_char type, void const *value, size_t len) {
+      return snmp_varlist_add_variable(&m_vars, name, name_length, type, value, len);
+   }
+
+   netsnmp_variable_list *m_vars = nullptr;
+};
+
+TEST(SplitOidIndexTest, MatchesParseResult) {
+   std::vector<std::string> const names = {
+       "SNMPv2-MIB::sysDescr.0",
+       "SNMPv2-MIB::sysDescr",
+       "IF-MIB::ifDescr.1",
+       "IP-MIB::ipNetToPhysicalPhysAddress.16.ipv4.\"192.168.1.181\"",
+       "RFC1213-MIB::atPhysAddress.2.1.192.168.1.1",
+       "NET-SNMP-AGENT-MIB::nsCacheStatus.1.3.6.1.2.1.4.24.4",
+       "SNMPv2::mib-2.17.7.1.4.3.1.2.300",
+       ".1.3.6.1.2.1.1.1.0",
+       ".1.3.6.1.2.1.",
+       ".iso.org.dod.internet.mgmt.mib-2.system.sysContact.0",
+       ".",
+   };
+
+   for (auto const &name : names) {
+      Result const expected = parse_result(name + " = STRING: value");
+      std::string oid_str;
+      std::string index;
+      split_oid_index(name, oid_str, index);
+      EXPECT_EQ(oid_str, expected.oid) << name;
+      EXPECT_EQ(index, expected.index) << name;
+   }
+}
+
+TEST_F(DecodeVariableTest, DecodesNumericTypesFromValue) {
+   long const integer = -5;
+   long const counter = 4000000000L;
+   struct counter64 counter64_value;
+   counter64_value.high = 1;
+   counter64_value.low = 2;
+
+   auto *int_vars =
+       add(SYS_DESCR_0, OID_LENGTH(SYS_DESCR_0), ASN_INTEGER, &integer, sizeof(integer));
+   auto *counter_vars =
+       add(IF_IN_OCTETS_1, OID_LENGTH(IF_IN_OCTETS_1), ASN_COUNTER, &counter, sizeof(counter));
+   auto *counter64_vars = add(IF_IN_OCTETS_1, OID_LENGTH(IF_IN_OCTETS_1), ASN_COUNTER64,
+                              &counter64_value, sizeof(counter64_value));
+
+   Result int_result = decode_variable(int_vars, numeric_output_format());
+   EXPECT_EQ(int_result.oid, ".1.3.6.1.2.1.1.1");
+   EXPECT_EQ(int_result.index, "0");
+   EXPECT_EQ(int_result.type, "INTEGER");
+   ASSERT_TRUE(std::holds_alternative<int>(int_result.converted_value));
+   EXPECT_EQ(std::get<int>(int_result.converted_value), -5);
+
+   Result counter_result = decode_variable(counter_vars, numeric_output_format());
+   EXPECT_EQ(counter_result.oid, ".1.3.6.1.2.1.2.2.1.10");
+   EXPECT_EQ(counter_result.index, "1");
+   EXPECT_EQ(counter_result.type, "Counter32");
+   ASSERT_TRUE(std::holds_alternative<uint32_t>(counter_result.converted_value));
+   EXPECT_EQ(std::get<uint32_t>(counter_result.converted_value), 4000000000U);
+
+   Result counter64_result = decode_variable(counter64_vars, numeric_output_format());
+   EXPECT_EQ(counter64_result.type, "Counter64");
+   ASSERT_TRUE(std::holds_alternative<uint64_t>(counter64_result.converted_value));
+   EXPECT_EQ(std::get<uint64_t>(counter64_result.converted_value), (uint64_t{1} << 32) + 2);
+}
+
+TEST_F(DecodeVariableTest, RendersValueOnlyWhenRead) {
+   long const counter = 1234;
+   auto *vars =
+       add(IF_IN_OCTETS_1, OID_LENGTH(IF_IN_OCTETS_1), ASN_COUNTER, &counter, sizeof(counter));
+
+   Result result = decode_variable(vars, numeric_output_format());
+   EXPECT_TRUE(result.value.empty());
+   ASSERT_NE(result._lazy_value, nullptr);
+   EXPECT_EQ(result.get_value(), "1234");
+   EXPECT_EQ(result._lazy_value->get(), "1234");
+}
+
+TEST_F(DecodeVariableTest, KeepsOnlyTheValueForLaterRendering) {
+   long const counter = 1234;
+   auto *vars =
+       add(IF_IN_OCTETS_1, OID_LENGTH(IF_IN_OCTETS_1), ASN_COUNTER, &counter, sizeof(counter));
+
+   g_allocations = 0;
+   g_count_allocations = true;
+   Result result = decode_variable(vars, numeric_output_format());
+   g_count_allocations = false;
+
+   // The dotted name, its OID part and the pending value; the index, the type and the copy of
+   // the variable's OID and value fit in objects that are already there
+   EXPECT_LE(g_allocations, 3);
+   EXPECT_EQ(result.get_value(), "1234");
+}
+
+TEST_F(DecodeVariableTest, RendersLongOidsAndCounter64) {
+   oid long_name[24];
+   for (size_t i = 0; i < OID_LENGTH(long_name); i++) {
+      long_name[i] = i + 1;
+   }
+   long const integer = -5;
+   struct counter64 const counter64 = {1, 2};
+   auto *integer_vars =
+       add(long_name, OID_LENGTH(long_name), ASN_INTEGER, &integer, sizeof(integer));
+   auto *counter64_vars = add(IF_IN_OCTETS_1, OID_LENGTH(IF_IN_OCTETS_1), ASN_COUNTER64, &counter64,
+                              sizeof(counter64));
+
+   Result integer_result = decode_variable(integer_vars, numeric_output_format());
+   EXPECT_EQ(integer_result.oid, ".1.2.3.4.5.6.7.8.9.10.11.12.13.14.15.16.17.18.19.20.21.22.23");
+   EXPECT_EQ(integer_result.get_value(), "-5");
+
+   Result counter64_result = decode_variable(counter64_vars, numeric_output_format());
+   EXPECT_EQ(counter64_result.get_value(), "4294967298");
+}
+
+TEST_F(DecodeVariableTest, DecodesStringsAndAddresses) {
+   std::string const text = "Linux \"box\"";
+   unsigned char const bytes[] = {0x00, 0x0c, 0x29, 0xff};
+   unsigned char const address[] = {192, 168, 1, 181};
+
+   auto *string_vars =
+       add(SYS_DESCR_0, OID_LENGTH(SYS_DESCR_0), ASN_OCTET_STR, text.data(), text.size());
+   auto *hex_vars = add(SYS_DESCR_0, OID_LENGTH(SYS_DESCR_0), ASN_OCTET_STR, bytes, sizeof(bytes));
+   auto *ip_vars =
+       add(SYS_DESCR_0, OID_LENGTH(SYS_DESCR_0), ASN_IPADDRESS, address, sizeof(address));
+
+   Result string_result = decode_variable(string_vars, numeric_output_format());
+   EXPECT_EQ(string_result.type, "STRING");
+   ASSERT_TRUE(std::holds_alternative<std::string>(string_result.converted_value));
+   EXPECT_EQ(std::get<std::string>(string_result.converted_value), "Linux \\\"box\\\"");
+   EXPECT_EQ(string_result.get_value(), "Linux \\\"box\\\"");
+
+   Result hex_result = decode_variable(hex_vars, numeric_output_format());
+   EXPECT_EQ(hex_result.type, "Hex-STRING");
+   ASSERT_TRUE(std::holds_alternative<std::vector<unsigned char>>(hex_result.converted_value));
+   EXPECT_EQ(std::get<std::vector<unsigned char>>(hex_result.converted_value),
+             std::vector<unsigned char>(bytes, bytes + sizeof(bytes)));
+
+   Result ip_result = decode_variable(ip_vars, numeric_output_format());
+   EXPECT_EQ(ip_result.type, "IpAddress");
+   ASSERT_TRUE(std::holds_alternative<std::string>(ip_result.converted_value));
+   EXPECT_EQ(std::get<std::string>(ip_result.converted_value), "192.168.1.181");
+   EXPECT_EQ(ip_result.get_value(), "192.168.1.181");
+}
+
+TEST_F(DecodeVariableTest, DecodesExceptionValues) {
+   auto *vars = add(SYS_DESCR_0, OID_LENGTH(SYS_DESCR_0), SNMP_NOSUCHINSTANCE, nullptr, 0);
+
+   Result result = decode_variable(vars, numeric_output_format());
+   EXPECT_EQ(result.type, "NOSUCHINSTANCE");
+   EXPECT_EQ(result.get_value(), "No Such Instance currently exists at this OID");
+}
+
+TEST_F(DecodeVariableTest, MatchesPrintedVariable) {
+   long const ticks = 123456;
+   auto *vars = add(SYS_DESCR_0, OID_LENGTH(SYS_DESCR_0), ASN_TIMETICKS, &ticks, sizeof(ticks));
+
+   std::string printed;
+   {
+      size_t buf_len = 256, out_len = 0;
+      u_char *buf = static_cast<u_char *>(calloc(buf_len, 1));
+      ASSERT_NE(buf, nullptr);
+      ASSERT_TRUE(sprint_realloc_variable(&buf, &buf_len, &out_len, 1, vars->name,
+                                          vars->name_length, vars));
+      printed.assign(reinterpret_cast<char *>(buf), out_len);
+      SNMP_FREE(buf);
+   }
+   Result expected = parse_result(printed);
+
+   Result result = decode_variable(vars, read_output_format());
+   EXPECT_EQ(result.oid, expected.oid);
+   EXPECT_EQ(result.index, expected.index);
+   EXPECT_EQ(result.type, expected.type);
+   EXPECT_EQ(result.get_value(), expected.get_value());
+   EXPECT_EQ(std::get<uint32_t>(result.converted_value),
+             std::get<uint32_t>(expected.converted_value));
+}
+
+TEST_F(DecodeVariableTest, BuildsResultTables) {
+   long const integer = -5;
+   long const counter = 4000000000L;
+   struct counter64 counter64_value;
+   counter64_value.high = 1;
+   counter64_value.low = 2;
+   unsigned char const address[] = {192, 168, 1, 181};
+   oid const object_id[] = {1, 3, 6, 1, 4, 1, 8072};
+
+   add(SYS_DESCR_0, OID_LENGTH(SYS_DESCR_0), ASN_INTEGER, &integer, sizeof(integer));
+   add(IF_IN_OCTETS_1, OID_LENGTH(IF_IN_OCTETS_1), ASN_COUNTER, &counter, sizeof(counter));
+   add(IF_IN_OCTETS_1, OID_LENGTH(IF_IN_OCTETS_1), ASN_COUNTER64, &counter64_value,
+       sizeof(counter64_value));
+   add(SYS_DESCR_0, OID_LENGTH(SYS_DESCR_0), ASN_OCTET_STR, "a\0b", 3);
+   add(SYS_DESCR_0, OID_LENGTH(SYS_DESCR_0), ASN_IPADDRESS, address, sizeof(address));
+   add(SYS_DESCR_0, OID_LENGTH(SYS_DESCR_0), ASN_OBJECT_ID, object_id, sizeof(object_id));
+   add(SYS_DESCR_0, OID_LENGTH(SYS_DESCR_0), SNMP_NOSUCHINSTANCE, nullptr, 0);
+
+   ResultTable table;
+   ResultTableBuilder builder(table);
+   for (auto vars = m_vars; vars; vars = vars->next_variable) {
+      builder.append(vars);
+   }
+
+   ASSERT_EQ(table.size(), 7u);
+   EXPECT_EQ(builder.size(), 7u);
+   EXPECT_EQ(table.oid(0), ".1.3.6.1.2.1.1.1");
+   EXPECT_EQ(table.index(0), "0");
+   EXPECT_EQ(table.type(0), "INTEGER");
+   EXPECT_EQ(static_cast<int64_t>(table.integer_values[0]), -5);
+
+   EXPECT_EQ(table.oid(1), ".1.3.6.1.2.1.2.2.1.10");
+   EXPECT_EQ(table.index(1), "1");
+   EXPECT_EQ(table.type(1), "Counter32");
+   EXPECT_EQ(table.integer_values[1], 4000000000u);
+
+   EXPECT_EQ(table.type(2), "Counter64");
+   EXPECT_EQ(table.integer_values[2], (uint64_t{1} << 32) | 2);
+
+   EXPECT_EQ(table.type(3), "STRING");
+   EXPECT_EQ(table.text_value(3), std::string("a\0b", 3));
+   EXPECT_EQ(table.text_value(4), "192.168.1.181");
+   EXPECT_EQ(table.text_value(5), ".1.3.6.1.4.1.8072");
+
+   EXPECT_EQ(table.type(6), "NOSUCHINSTANCE");
+   EXPECT_FALSE(table.has_integer_value(6));
+   EXPECT_EQ(table.text_value(6), "");
+}
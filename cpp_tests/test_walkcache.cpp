@@ -0,0 +1,42 @@
+#include <gtest/gtest.h>
+
+#include "walkcache.h"
+
+namespace {
+
+WalkSnapshot make_snapshot(uint64_t uptime, std::string const& sentinel, std::size_t results) {
+   WalkSnapshot snapshot;
+   snapshot.uptime = uptime;
+   snapshot.sentinel = sentinel;
+   snapshot.results.resize(results);
+   return snapshot;
+}
+
+} // namespace
+
+TEST(WalkCacheTest, RemembersTheLastWalkPerKey) {
+   walk_snapshot_clear();
+
+   WalkSnapshot snapshot;
+   EXPECT_FALSE(walk_snapshot_lookup("localhost:161 ifTable", snapshot));
+
+   walk_snapshot_store("localhost:161 ifTable", make_snapshot(100, "67:5", 3));
+   walk_snapshot_store("localhost:161 entPhysicalTable", make_snapshot(100, "67:7", 1));
+   EXPECT_EQ(walk_snapshot_count(), 2u);
+
+   ASSERT_TRUE(walk_snapshot_lookup("localhost:161 ifTable", snapshot));
+   EXPECT_EQ(snapshot.uptime, 100u);
+   EXPECT_EQ(snapshot.sentinel, "67:5");
+   EXPECT_EQ(snapshot.results.size(), 3u);
+
+   // A new walk replaces the previous one
+   walk_snapshot_store("localhost:161 ifTable", make_snapshot(200, "67:9", 4));
+   ASSERT_TRUE(walk_snapshot_lookup("localhost:161 ifTable", snapshot));
+   EXPECT_EQ(snapshot.sentinel, "67:9");
+   EXPECT_EQ(snapshot.results.size(), 4u);
+   EXPECT_EQ(walk_snapshot_count(), 2u);
+
+   walk_snapshot_clear();
+   EXPECT_FALSE(walk_snapshot_lookup("localhost:161 ifTable", snapshot));
+   EXPECT_EQ(walk_snapshot_count(), 0u);
+}
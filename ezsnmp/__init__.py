@@ -2,9 +2,15 @@
 EzSnmp — a Python/C++ SNMP library wrapping Net-SNMP.
 
 Provides a high-level :class:`~ezsnmp.session.Session` class for SNMP v1,
-v2c, and v3 operations (GET, GETNEXT, WALK, BULKGET, BULKWALK, SET), as well
-as low-level functional wrappers (:func:`snmpget`, :func:`snmpwalk`, etc.)
-that accept raw Net-SNMP command-line argument lists.
+v2c, and v3 operations (GET, GETNEXT, WALK, BULKGET, BULKWALK, SET), an
+:class:`~ezsnmp.async_session.AsyncSession` class with asyncio versions of the
+same operations, a :class:`~ezsnmp.poller.Poller` running jobs on many targets
+from a single thread and a :class:`~ezsnmp.poller.ProcessPoller` sharding them over
+several processes, as well as low-level functional wrappers (:func:`snmpget`,
+:func:`snmpwalk`, etc.) that accept raw Net-SNMP command-line argument lists.
+Net-SNMP is initialized once per process; :func:`init` and :func:`shutdown`
+control how long it stays so, and :func:`translate` and :func:`translate_oids`
+convert OIDs between their symbolic and numeric forms.
 
 Typical usage::
 
@@ -16,6 +22,7 @@ Typical usage::
             print(item.oid, item.value)
 """
 
+from .async_session import AsyncSession
 from .datatypes import Result
 from .exceptions import (
     ConnectionError,
@@ -39,4 +46,5 @@ from .netsnmp import (
     snmptrap,
     snmpwalk,
 )
-from .session import Session
+from .poller import Poller, PollResult, ProcessPoller
+from .session import Session, init, shutdown, translate, translate_oids
@@ -0,0 +1,395 @@
+import asyncio
+
+from .exceptions import _handle_error
+from .session import Session
+
+
+class AsyncSession(Session):
+    """
+    Asyncio flavour of :class:`~ezsnmp.session.Session`.
+
+    Takes the same parameters as :class:`~ezsnmp.session.Session`, but :meth:`get`,
+    :meth:`get_next`, :meth:`bulk_get`, :meth:`set`, :meth:`walk` and :meth:`bulk_walk` are
+    coroutines. A request is handed to Net-SNMP without waiting for its response; the session
+    socket is watched with ``loop.add_reader()`` and the Net-SNMP retransmission timer with
+    ``loop.call_later()``, so many requests can be in flight on one session while the event loop
+    keeps running. The remaining methods, including :meth:`iter_walk` and :meth:`iter_bulk_walk`,
+    are inherited unchanged and block.
+
+    All requests of a session must be awaited on the same event loop. Changing a connection
+    parameter or closing the session fails the requests still in flight with
+    :class:`~ezsnmp.exceptions.GenericError`.
+
+    Example::
+
+        import asyncio
+        from ezsnmp import AsyncSession
+
+        async def main():
+            async with AsyncSession(hostname='localhost', community='public', version=2) as session:
+                descr, contact = await asyncio.gather(
+                    session.get('sysDescr.0'), session.get('sysContact.0')
+                )
+                print(descr[0].value, contact[0].value)
+
+        asyncio.run(main())
+    """
+
+    def __init__(self, *args, **kwargs):
+        """Initialize the AsyncSession object, see :class:`~ezsnmp.session.Session`."""
+        super().__init__(*args, **kwargs)
+        self._futures = {}
+        self._loop = None
+        self._reader_fd = None
+        self._timer = None
+
+    async def __aenter__(self):
+        """Enter the async context manager, returning the session object."""
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        """Exit the async context manager, automatically closing the session."""
+        self.close()
+        return None
+
+    def close(self):
+        """Close the SNMP session, failing the requests still in flight, and release resources."""
+        super().close()
+        if self._futures:
+            self._dispatch(super()._async_timeout)
+
+    async def get(self, oids=None):
+        """
+        Performs an SNMP GET operation to retrieve values for one or more OIDs.
+
+        :param oids: A single OID string or a list of OID strings. Defaults to ``None``, which is
+            treated as an empty list.
+        :type oids: Union[str, list[str], None]
+        :return: A tuple of Result objects containing SNMP variable bindings with attributes:
+            oid (str), index (str), value (str), and type (str)
+        :rtype: tuple[Result]
+
+        :raises ConnectionError: If the exception type is `ConnectionErrorBase`.
+        :raises GenericError: If the exception type is `GenericErrorBase`.
+        :raises NoSuchInstanceError: If the exception type is `NoSuchInstanceErrorBase`.
+        :raises NoSuchNameError: If the exception type is `NoSuchNameErrorBase`.
+        :raises NoSuchObjectError: If the exception type is `NoSuchObjectErrorBase`.
+        :raises PacketError: If the exception type is `PacketErrorBase`.
+        :raises ParseError: If the exception type is `ParseErrorBase`.
+        :raises TimeoutError: If the exception type is `TimeoutErrorBase`.
+        :raises UndeterminedTypeError: If the exception type is `UndeterminedTypeErrorBase`.
+        :raises UnknownObjectIDError: If the exception type is `UnknownObjectIDErrorBase`.
+        :raises Exception: If the exception type does not match any of the above, the original
+            exception `e` is raised.
+
+        Example:
+            >>> from ezsnmp import AsyncSession
+            >>> session = AsyncSession(hostname="localhost", community="public", version="2")
+            >>> results = await session.get(["sysDescr.0", "sysContact.0"])
+            >>> print("Value:", results[0].value)
+        """
+
+        oids = _oid_list(oids)
+        if not oids:
+            return ()
+        return await self._submit(super()._async_get, oids)
+
+    async def get_next(self, oids=None):
+        """
+        Performs an SNMP GETNEXT operation to retrieve the next values after the given OIDs.
+
+        :param oids: A single OID string or a list of OID strings. Defaults to ``None``, which is
+            treated as an empty list.
+        :type oids: Union[str, list[str], None]
+        :return: A tuple of Result objects containing SNMP variable bindings with attributes:
+            oid (str), index (str), value (str), and type (str)
+        :rtype: tuple[Result]
+
+        :raises ConnectionError: If the exception type is `ConnectionErrorBase`.
+        :raises GenericError: If the exception type is `GenericErrorBase`.
+        :raises NoSuchInstanceError: If the exception type is `NoSuchInstanceErrorBase`.
+        :raises NoSuchNameError: If the exception type is `NoSuchNameErrorBase`.
+        :raises NoSuchObjectError: If the exception type is `NoSuchObjectErrorBase`.
+        :raises PacketError: If the exception type is `PacketErrorBase`.
+        :raises ParseError: If the exception type is `ParseErrorBase`.
+        :raises TimeoutError: If the exception type is `TimeoutErrorBase`.
+        :raises UndeterminedTypeError: If the exception type is `UndeterminedTypeErrorBase`.
+        :raises UnknownObjectIDError: If the exception type is `UnknownObjectIDErrorBase`.
+        :raises Exception: If the exception type does not match any of the above, the original
+            exception `e` is raised.
+
+        Example:
+            >>> from ezsnmp import AsyncSession
+            >>> session = AsyncSession(hostname="localhost", community="public", version="2")
+            >>> results = await session.get_next("sysDescr.0")
+            >>> print("OID:", results[0].oid)
+        """
+
+        oids = _oid_list(oids)
+        if not oids:
+            return ()
+        return await self._submit(super()._async_get_next, oids)
+
+    async def bulk_get(self, oids=None):
+        """
+        Performs an SNMP GETBULK operation to retrieve multiple values in a single request.
+
+        Requires SNMPv2c or SNMPv3. GETBULK is not supported in SNMPv1.
+
+        :param oids: A single OID string or a list of OID strings. Defaults to ``None``, which is
+            treated as an empty list.
+        :type oids: Union[str, list[str], None]
+        :return: A tuple of Result objects containing SNMP variable bindings with attributes:
+            oid (str), index (str), value (str), and type (str)
+        :rtype: tuple[Result]
+
+        :raises ConnectionError: If the exception type is `ConnectionErrorBase`.
+        :raises GenericError: If the exception type is `GenericErrorBase`.
+        :raises NoSuchInstanceError: If the exception type is `NoSuchInstanceErrorBase`.
+        :raises NoSuchNameError: If the exception type is `NoSuchNameErrorBase`.
+        :raises NoSuchObjectError: If the exception type is `NoSuchObjectErrorBase`.
+        :raises PacketError: If the exception type is `PacketErrorBase`.
+        :raises ParseError: If the exception type is `ParseErrorBase`.
+        :raises TimeoutError: If the exception type is `TimeoutErrorBase`.
+        :raises UndeterminedTypeError: If the exception type is `UndeterminedTypeErrorBase`.
+        :raises UnknownObjectIDError: If the exception type is `UnknownObjectIDErrorBase`.
+        :raises Exception: If the exception type does not match any of the above, the original
+            exception `e` is raised.
+
+        Example:
+            >>> from ezsnmp import AsyncSession
+            >>> session = AsyncSession(hostname="localhost", community="public", version="2")
+            >>> results = await session.bulk_get(["1.3.6.1.2.1.1"])
+            >>> print("OID:", results[0].oid)
+        """
+
+        return await self._submit(super()._async_bulk_get, _oid_list(oids), bulk=True)
+
+    async def set(self, oids=None):
+        """
+        Performs an SNMP SET operation to set values for one or more OIDs.
+
+        :param oids: A flat list of OID/type/value triples, see :meth:`Session.set`. Defaults to
+            ``None``, treated as an empty list.
+        :type oids: list
+        :return: A tuple of Result objects containing SNMP variable bindings with attributes:
+            oid (str), index (str), value (str), and type (str)
+        :rtype: tuple[Result]
+
+        :raises GenericError: If the exception type is `GenericErrorBase`.
+        :raises ConnectionError: If the exception type is `ConnectionErrorBase`.
+        :raises NoSuchInstanceError: If the exception type is `NoSuchInstanceErrorBase`.
+        :raises NoSuchNameError: If the exception type is `NoSuchNameErrorBase`.
+        :raises NoSuchObjectError: If the exception type is `NoSuchObjectErrorBase`.
+        :raises PacketError: If the exception type is `PacketErrorBase`.
+        :raises ParseError: If the exception type is `ParseErrorBase`.
+        :raises TimeoutError: If the exception type is `TimeoutErrorBase`.
+        :raises UndeterminedTypeError: If the exception type is `UndeterminedTypeErrorBase`.
+        :raises UnknownObjectIDError: If the exception type is `UnknownObjectIDErrorBase`.
+        :raises Exception: If the exception type does not match any of the above, the original
+            exception `e` is raised.
+
+        Example:
+            >>> from ezsnmp import AsyncSession
+            >>> session = AsyncSession(hostname="localhost", community="public", version="2")
+            >>> results = await session.set(["sysLocation.0", "s", "my new location"])
+        """
+
+        if oids is None:
+            oids = []
+        return await self._submit(super()._async_set, oids)
+
+    async def walk(self, oid="."):
+        """
+        Walks through the SNMP tree starting from the given OID.
+
+        The GETNEXT requests of the walk are sent one after the other, each as soon as the
+        previous response has been handled, without blocking the event loop in between.
+
+        :param oid: The starting OID for the SNMP walk. Defaults to ``"."``
+                which starts the walk from the top of the OID tree.
+        :type oid: str
+        :return: A tuple of Result objects containing SNMP variable bindings with attributes:
+            oid (str), index (str), value (str), and type (str)
+        :rtype: tuple[Result]
+
+        :raises ConnectionError: If the exception type is `ConnectionErrorBase`.
+        :raises GenericError: If the exception type is `GenericErrorBase`.
+        :raises NoSuchInstanceError: If the exception type is `NoSuchInstanceErrorBase`.
+        :raises NoSuchNameError: If the exception type is `NoSuchNameErrorBase`.
+        :raises NoSuchObjectError: If the exception type is `NoSuchObjectErrorBase`.
+        :raises PacketError: If the exception type is `PacketErrorBase`.
+        :raises ParseError: If the exception type is `ParseErrorBase`.
+        :raises TimeoutError: If the exception type is `TimeoutErrorBase`.
+        :raises UndeterminedTypeError: If the exception type is `UndeterminedTypeErrorBase`.
+        :raises UnknownObjectIDError: If the exception type is `UnknownObjectIDErrorBase`.
+        :raises Exception: If the exception type does not match any of the above, the original
+            exception `e` is raised.
+
+        Example:
+            >>> from ezsnmp import AsyncSession
+            >>> session = AsyncSession(hostname="localhost", community="public", version="2")
+            >>> results = await session.walk("system")
+            >>> for item in results:
+            ...     print("OID:", item.oid, "Value:", item.value)
+        """
+
+        return await self._submit(super()._async_walk, oid)
+
+    async def bulk_walk(self, oids=None):
+        """
+        Performs a bulk SNMP walk (GETBULK-based) operation to retrieve a collection of values.
+
+        Requires SNMPv2c or SNMPv3. GETBULK is not supported in SNMPv1.
+
+        :param oids: A single OID string or a list of base OIDs to start the walks from.
+            Defaults to ``None``, which is treated as an empty list.
+        :type oids: Union[str, list[str], None]
+        :return: A tuple of Result objects containing SNMP variable bindings with attributes:
+            oid (str), index (str), value (str), and type (str)
+        :rtype: tuple[Result]
+
+        :raises ConnectionError: If the exception type is `ConnectionErrorBase`.
+        :raises GenericError: If the exception type is `GenericErrorBase`.
+        :raises NoSuchInstanceError: If the exception type is `NoSuchInstanceErrorBase`.
+        :raises NoSuchNameError: If the exception type is `NoSuchNameErrorBase`.
+        :raises NoSuchObjectError: If the exception type is `NoSuchObjectErrorBase`.
+        :raises PacketError: If the exception type is `PacketErrorBase`.
+        :raises ParseError: If the exception type is `ParseErrorBase`.
+        :raises TimeoutError: If the exception type is `TimeoutErrorBase`.
+        :raises UndeterminedTypeError: If the exception type is `UndeterminedTypeErrorBase`.
+        :raises UnknownObjectIDError: If the exception type is `UnknownObjectIDErrorBase`.
+        :raises Exception: If the exception type does not match any of the above, the original
+            exception `e` is raised.
+
+        Example:
+            >>> from ezsnmp import AsyncSession
+            >>> session = AsyncSession(hostname="localhost", community="public", version="2")
+            >>> results = await session.bulk_walk(["1.3.6.1.2.1.1", "1.3.6.1.2.1.2"])
+            >>> print("OID:", results[0].oid)
+        """
+
+        return await self._submit(super()._async_bulk_walk, _oid_list(oids), bulk=True)
+
+    def _submit(self, start, *args, bulk=False):
+        """
+        Start an operation and return the future its results are delivered to.
+
+        :param start: The ``SessionBase._async_*`` method starting the operation.
+        :param args: Arguments of ``start``.
+        :param bulk: Whether the operation uses the max-repeaters setting.
+        :return: A future resolving to the tuple of Result objects of the operation.
+        :rtype: asyncio.Future
+        """
+
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            if self._futures:
+                raise RuntimeError(
+                    "AsyncSession requests are in flight on another event loop"
+                )
+            self._unwatch()
+            self._loop = loop
+
+        try:
+            if bulk:
+                # Same handling as the blocking bulk methods of Session
+                self.set_max_repeaters_to_num = self._max_repeaters_to_num
+            request_id = start(*args)
+        except Exception as e:
+            _handle_error(e)
+        finally:
+            if bulk:
+                self.set_max_repeaters_to_num = ""
+
+        future = loop.create_future()
+        self._futures[request_id] = future
+        self._watch()
+        return future
+
+    def _dispatch(self, poll):
+        """
+        Collect the finished operations and resolve their futures.
+
+        :param poll: ``SessionBase._async_read`` or ``SessionBase._async_timeout``.
+        """
+
+        try:
+            completions = poll()
+        except Exception as e:
+            # Nothing can be told apart any more, so every operation in flight fails
+            try:
+                _handle_error(e)
+            except Exception as error:
+                futures, self._futures = self._futures, {}
+                for future in futures.values():
+                    if not future.done():
+                        future.set_exception(error)
+            completions = ()
+
+        for completion in completions:
+            future = self._futures.pop(completion.request_id, None)
+            if future is None or future.done():
+                # Cancelled by the caller
+                continue
+            try:
+                completion.rethrow()
+                future.set_result(tuple(completion.results))
+            except Exception as e:
+                try:
+                    _handle_error(e)
+                except Exception as error:
+                    future.set_exception(error)
+
+        self._watch()
+
+    def _watch(self):
+        """Keep the reader on the session socket and the timer on the next Net-SNMP timeout."""
+
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if self._loop is None or self._loop.is_closed():
+            return
+        if not self._futures:
+            self._unwatch()
+            return
+
+        # The socket changes whenever the session has been reopened
+        fd = super()._async_fd()
+        if fd != self._reader_fd:
+            self._unwatch()
+            if fd >= 0:
+                self._loop.add_reader(fd, self._dispatch, super()._async_read)
+                self._reader_fd = fd
+
+        timeout = super()._async_next_timeout()
+        if timeout >= 0:
+            self._timer = self._loop.call_later(
+                timeout, self._dispatch, super()._async_timeout
+            )
+
+    def _unwatch(self):
+        """Stop watching the session socket."""
+
+        if self._reader_fd is not None:
+            if not self._loop.is_closed():
+                self._loop.remove_reader(self._reader_fd)
+            self._reader_fd = None
+
+
+def _oid_list(oids):
+    """
+    Normalize the OID argument of the async operations to a list.
+
+    :param oids: A single OID string, a list of OID strings or ``None``.
+    :type oids: Union[str, list[str], None]
+    :return: The OIDs as a list.
+    :rtype: list[str]
+    """
+
+    if oids is None:
+        return []
+    if isinstance(oids, str):
+        return [oids]
+    return oids
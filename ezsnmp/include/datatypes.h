@@ -1,7 +1,10 @@
 #ifndef DATATYPES_H
 #define DATATYPES_H
 
+#include <cstddef>
 #include <cstdint>
+#include <memory>
+#include <mutex>
 #include <optional>
 #include <string>
 #include <variant>
@@ -22,9 +25,56 @@ struct Result {
    std::string oid = "";                ///< Object Identifier (OID) of the retrieved data.
    std::string index = "";              ///< Index of the retrieved data (if applicable).
    std::string type = "";               ///< Data type of the retrieved value.
-   std::string value = "";              ///< Actual value of the retrieved data.
+   std::string value = "";              ///< Actual value, read it through get_value().
    ConvertedValue converted_value = ""; ///< Converted value of the type,value data.
 
+   /**
+    * @brief A textual value that is rendered the first time it is read.
+    *
+    * get() renders the value exactly once, even when several threads read it at the same time
+    * (wrapped calls run without the GIL), and every copy of the Result shares the rendered text.
+    */
+   class LazyValue {
+     public:
+      virtual ~LazyValue() = default;
+
+      /**
+       * @brief Returns the textual value, rendering it on the first call.
+       *
+       * @return The rendered value.
+       */
+      std::string const& get();
+
+     private:
+      /**
+       * @brief Renders the textual value; called at most once.
+       *
+       * @return The textual value.
+       */
+      virtual std::string render() const = 0;
+
+      std::once_flag m_rendered;
+      std::string m_text;
+   };
+
+   /// Value rendered on first access; only set for results decoded straight from a received
+   /// variable, see decode_variable().
+   std::shared_ptr<LazyValue> _lazy_value;
+
+   /**
+    * @brief Returns the textual value, rendering it first if it has not been rendered yet.
+    *
+    * @return The textual value of the retrieved data.
+    */
+   std::string const& get_value() const;
+
+   /**
+    * @brief Sets the textual value and drops any pending lazy value.
+    *
+    * @param new_value The textual value.
+    */
+   void set_value(std::string const& new_value);
+
    /**
     * @brief Converts the Result object to a string representation.
     *
@@ -72,4 +122,134 @@ struct Result {
    void update_converted_value();
 };
 
+/**
+ * @brief Columnar results of a walk: one row per retrieved variable, stored as parallel arrays.
+ *
+ * A walk of many variables fills a few contiguous arrays instead of one Result (and its strings)
+ * per variable. Row i has the numeric OID oid_subids[oid_offsets[i], oid_offsets[i + 1]), whose
+ * last index_lengths[i] subidentifiers form its index, the ASN.1 type type_codes[i] and either an
+ * integer value (integer_values[i]) or a textual one (text_values between text_offsets[i] and
+ * text_offsets[i + 1]).
+ */
+struct ResultTable {
+   std::vector<uint32_t> oid_subids;        ///< Numeric OIDs of every row, back to back.
+   std::vector<uint64_t> oid_offsets = {0}; ///< Start of the OID of each row, plus the end.
+   std::vector<uint32_t> index_lengths;     ///< Number of trailing subidentifiers in the index.
+   std::vector<uint8_t> type_codes;         ///< ASN.1 type of each row, e.g. 0x41 for Counter32.
+   /// Value of the INTEGER, Counter32, Gauge32, TimeTicks, Counter64 and UInteger32 rows
+   /// (INTEGER in two's complement), 0 for the other rows.
+   std::vector<uint64_t> integer_values;
+   /// Values of the other rows, back to back: the raw octets of strings, dotted IpAddress and
+   /// OBJECT IDENTIFIER values.
+   std::string text_values;
+   std::vector<uint64_t> text_offsets = {0}; ///< Start of the text of each row, plus the end.
+
+   /**
+    * @brief Returns the number of rows.
+    *
+    * @return The number of variables in the table.
+    */
+   std::size_t size() const { return type_codes.size(); }
+
+   /**
+    * @brief Appends a row.
+    *
+    * @param subids Numeric OID of the variable.
+    * @param subids_length Number of subidentifiers in the OID.
+    * @param index_length Number of trailing subidentifiers that form the index.
+    * @param type_code ASN.1 type of the variable.
+    * @param integer_value Value of an integer row, 0 otherwise.
+    * @param text Value of a textual row, empty otherwise.
+    */
+   template <typename Subid>
+   void append(Subid const* subids,
+               std::size_t subids_length,
+               std::size_t index_length,
+               uint8_t type_code,
+               uint64_t integer_value,
+               std::string const& text) {
+      oid_subids.insert(oid_subids.end(), subids, subids + subids_length);
+      oid_offsets.push_back(oid_subids.size());
+      index_lengths.push_back(static_cast<uint32_t>(index_length));
+      type_codes.push_back(type_code);
+      integer_values.push_back(integer_value);
+      text_values += text;
+      text_offsets.push_back(text_values.size());
+   }
+
+   /**
+    * @brief Returns the dotted numeric OID of a row, without its index.
+    *
+    * @param row The row number.
+    * @return The OID, e.g. ".1.3.6.1.2.1.2.2.1.10".
+    */
+   std::string oid(std::size_t row) const;
+
+   /**
+    * @brief Returns the dotted numeric index of a row.
+    *
+    * @param row The row number.
+    * @return The index, e.g. "1"; empty if the OID has no index.
+    */
+   std::string index(std::size_t row) const;
+
+   /**
+    * @brief Returns the index of a row as a number.
+    *
+    * @param row The row number.
+    * @return The last subidentifier of the OID, which is the whole index of one-dimensional
+    * tables such as ifTable; 0 if the row has no index.
+    */
+   uint32_t index_number(std::size_t row) const;
+
+   /**
+    * @brief Returns the name of the type of a row, as found in Result::type.
+    *
+    * @param row The row number.
+    * @return The type name, e.g. "Counter32" or "STRING".
+    */
+   std::string type(std::size_t row) const;
+
+   /**
+    * @brief Returns whether the value of a row is held in integer_values.
+    *
+    * @param row The row number.
+    * @return Whether the row has an integer value.
+    */
+   bool has_integer_value(std::size_t row) const;
+
+   /**
+    * @brief Returns the textual value of a row.
+    *
+    * @param row The row number.
+    * @return The raw text of the row; empty for integer rows.
+    */
+   std::string text_value(std::size_t row) const;
+
+   /**
+    * @brief Returns whether an ASN.1 type is held in integer_values.
+    *
+    * @param type_code The ASN.1 type.
+    * @return Whether values of the type are integers.
+    */
+   static bool is_integer_type(uint8_t type_code);
+};
+
+/**
+ * @brief A conceptual table (e.g. ifXTable) split into its columns and rows.
+ *
+ * Every variable of the table is a cell of cells. Cell i belongs to the column
+ * column_names[cell_columns[i]] and to the row indexed by the subidentifiers of its OID from
+ * index_offset on, both taken from the numeric OID. Cells outside of any column (e.g. the
+ * noSuchObject of an empty table) have the column NO_COLUMN.
+ */
+struct TableRows {
+   static constexpr uint32_t NO_COLUMN = 0xffffffff; ///< Column of cells outside of the table.
+
+   ResultTable cells;                     ///< The variables, in the order they were retrieved.
+   std::vector<uint32_t> cell_columns;    ///< Position in column_names of the column of each cell.
+   std::vector<std::string> column_names; ///< MIB labels of the columns, e.g. "ifName".
+   std::size_t index_offset = 0;          ///< Number of subidentifiers before the index of a cell.
+};
+
 #endif // DATATYPES_H
\ No newline at end of file
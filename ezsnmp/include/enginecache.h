@@ -0,0 +1,86 @@
+#ifndef ENGINECACHE_H
+#define ENGINECACHE_H
+
+#include <string>
+
+/**
+ * @brief Snapshot of the engine discovery cache entry of one transport address.
+ */
+struct EngineCacheInfo {
+   bool cached = false;           ///< Whether a fresh entry exists for the address.
+   std::string address;           ///< Transport address the entry is keyed on, e.g. "host:161".
+   std::string engine_id;         ///< Authoritative engine ID as lowercase hex digits.
+   unsigned int engine_boots = 0; ///< Engine boots reported at discovery.
+   unsigned int engine_time = 0;  ///< Engine time now, estimated from the time at discovery.
+   double age = 0;                ///< Seconds since the engine was discovered.
+   double ttl = 0;                ///< Seconds an entry is used for after its discovery.
+};
+
+/**
+ * @brief Records the SNMPv3 engine discovered at a transport address.
+ *
+ * Sessions opened later for the same address start from the cached engine ID, boots and time
+ * instead of probing the agent, until the entry is older than the TTL. Nothing is stored while
+ * the TTL is 0.
+ *
+ * @param address Transport address of the agent, as given to the session (e.g. "host:161").
+ * @param engine_id Raw authoritative engine ID bytes.
+ * @param engine_boots Engine boots reported by the agent.
+ * @param engine_time Engine time reported by the agent.
+ */
+void engine_cache_store(std::string const& address,
+                        std::string const& engine_id,
+                        unsigned int engine_boots,
+                        unsigned int engine_time);
+
+/**
+ * @brief Looks up the engine cached for a transport address.
+ *
+ * Entries older than the TTL are dropped and not returned.
+ *
+ * @param address Transport address of the agent.
+ * @param engine_id Set to the raw engine ID bytes on success.
+ * @param engine_boots Set to the cached engine boots on success.
+ * @param engine_time Set to the current engine time, estimated from the cached one, on success.
+ * @return Whether a fresh entry was found.
+ */
+bool engine_cache_lookup(std::string const& address,
+                         std::string& engine_id,
+                         unsigned int& engine_boots,
+                         unsigned int& engine_time);
+
+/**
+ * @brief Drops the entry of a transport address, e.g. after an unknownEngineID report.
+ *
+ * @param address Transport address of the agent.
+ */
+void engine_cache_forget(std::string const& address);
+
+/**
+ * @brief Drops every entry.
+ */
+void engine_cache_clear();
+
+/**
+ * @brief Sets how long entries are used for after their discovery.
+ *
+ * @param seconds The TTL in seconds; 0 disables the cache and drops every entry.
+ */
+void engine_cache_set_ttl(double seconds);
+
+/**
+ * @brief Returns how long entries are used for after their discovery.
+ *
+ * @return The TTL in seconds (default: 300).
+ */
+double engine_cache_get_ttl();
+
+/**
+ * @brief Describes the entry of a transport address.
+ *
+ * @param address Transport address of the agent.
+ * @return The entry; EngineCacheInfo::cached is false if there is no fresh entry.
+ */
+EngineCacheInfo engine_cache_info(std::string const& address);
+
+#endif // ENGINECACHE_H
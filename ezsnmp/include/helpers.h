@@ -107,6 +107,18 @@ struct SnmpSingleSessionCloser {
    }
 };
 
+/**
+ * @struct SnmpPduDeleter
+ * @brief RAII deleter for netsnmp_pdu pointers.
+ */
+struct SnmpPduDeleter {
+   void operator()(netsnmp_pdu *pdu) const {
+      if (pdu) {
+         snmp_free_pdu(pdu);
+      }
+   }
+};
+
 /**
  * @brief Creates an array of C-style strings from a vector of strings.
  *
@@ -153,6 +165,19 @@ std::vector<Result> parse_results(std::vector<std::string> const &inputs);
 void remove_v3_user_from_cache(std::string const &security_name_str,
                                std::string const &context_engine_id_str);
 
+/**
+ * @brief Removes a single SNMP v3 user from the cache.
+ *
+ * Unlike remove_v3_user_from_cache(), only the user matching both the security
+ * name and the (raw) security engine ID is removed, so other sessions that share
+ * the same user name against different agents keep their localized keys.
+ *
+ * @param security_name_str The security name of the user.
+ * @param security_engine_id_str The raw security engine ID bytes of the user.
+ */
+void remove_v3_user_for_engine(std::string const &security_name_str,
+                               std::string const &security_engine_id_str);
+
 /**
  * @brief Converts an OID to its string representation.
  *
@@ -0,0 +1,87 @@
+#ifndef MAXREPETITIONS_H
+#define MAXREPETITIONS_H
+
+#include <cstddef>
+#include <string>
+
+/**
+ * @brief Adapts the max-repetitions of the GETBULK requests of a walk to the agent.
+ *
+ * The value doubles while the responses come back full, about as fast as the fastest response
+ * seen so far and small enough to fit a single Ethernet frame. It shrinks to what fits when a
+ * response is larger than that, and halves when the agent answers tooBig or stops answering.
+ */
+class MaxRepetitionsTuner {
+  public:
+   static constexpr int LIMIT = 1000;                   ///< Largest max-repetitions used.
+   static constexpr std::size_t RESPONSE_BUDGET = 1400; ///< Response size kept within, in bytes.
+
+   /**
+    * @brief Starts from a given value.
+    *
+    * @param max_repetitions The max-repetitions of the first request, clamped to [1, LIMIT].
+    */
+   explicit MaxRepetitionsTuner(int max_repetitions);
+
+   /**
+    * @brief Returns the max-repetitions of the next request.
+    *
+    * @return The current value.
+    */
+   int max_repetitions() const;
+
+   /**
+    * @brief Accounts for a successful response.
+    *
+    * @param varbinds Number of variables in the response.
+    * @param response_size Encoded size of the response in bytes (an estimate is enough).
+    * @param latency Seconds between sending the request and receiving the response.
+    */
+   void response_received(std::size_t varbinds, std::size_t response_size, double latency);
+
+   /**
+    * @brief Accounts for a tooBig response.
+    *
+    * @return Whether the request is worth retrying with the reduced value.
+    */
+   bool too_big();
+
+   /**
+    * @brief Accounts for a request that timed out.
+    *
+    * Only a timeout following a response is blamed on the request size, so an agent that is
+    * down fails the walk after one timeout as usual.
+    *
+    * @return Whether the request is worth retrying with the reduced value.
+    */
+   bool timed_out();
+
+  private:
+   int m_max_repetitions;
+   double m_min_latency = -1; ///< Fastest response seen, negative until the first one.
+   bool m_answered = false;   ///< Whether the agent answered since the last timeout.
+};
+
+/**
+ * @brief Records the max-repetitions an adaptive walk settled on for a transport address.
+ *
+ * @param address Transport address of the agent, as given to the session (e.g. "host:161").
+ * @param max_repetitions The value to start the next adaptive walks of the address from.
+ */
+void max_repetitions_cache_store(std::string const& address, int max_repetitions);
+
+/**
+ * @brief Looks up the max-repetitions learned for a transport address.
+ *
+ * @param address Transport address of the agent.
+ * @param max_repetitions Set to the learned value on success.
+ * @return Whether a value was learned for the address.
+ */
+bool max_repetitions_cache_lookup(std::string const& address, int& max_repetitions);
+
+/**
+ * @brief Forgets every learned value.
+ */
+void max_repetitions_cache_clear();
+
+#endif // MAXREPETITIONS_H
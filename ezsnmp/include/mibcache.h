@@ -0,0 +1,226 @@
+#ifndef MIBCACHE_H
+#define MIBCACHE_H
+
+#include <net-snmp/net-snmp-config.h>
+#include <net-snmp/net-snmp-includes.h>
+
+#include <cstddef>
+#include <cstdint>
+#include <memory>
+#include <string>
+#include <utility>
+
+/**
+ * @brief An immutable OID tree compiled from the MIBs parsed by Net-SNMP.
+ *
+ * The nodes, their enumerations, INDEX names and strings are stored in flat arrays of a single
+ * buffer, which is written to disk as it is and memory-mapped back: loading a compiled tree
+ * parses nothing. A tree is never modified once built, so any thread can read it without locks.
+ */
+class MibTree {
+  public:
+   static constexpr uint32_t NONE = 0xFFFFFFFF; ///< No node, or no string.
+
+   /**
+    * @brief A node of the tree. Strings are offsets into the string table, NONE if absent.
+    */
+   struct Node {
+      uint32_t subid;       ///< Subidentifier of the node below its parent.
+      uint32_t parent;      ///< Parent node, NONE for a top-level node.
+      uint32_t first_child; ///< First child node, NONE for a leaf.
+      uint32_t next_peer;   ///< Next node with the same parent, NONE for the last one.
+      uint32_t label;       ///< Name of the node, e.g. "ifDescr".
+      uint32_t module;      ///< MIB module defining the node, e.g. "IF-MIB".
+      uint32_t hint;        ///< DISPLAY-HINT of the node's syntax.
+      int32_t type;         ///< Net-SNMP TYPE_* of the node's syntax.
+      uint32_t enums;       ///< Position of the node's first enumeration.
+      uint32_t enum_count;  ///< Number of enumerations of the node's syntax.
+      uint32_t indexes;     ///< Position of the node's first INDEX object name.
+      uint32_t index_count; ///< Number of INDEX objects of the node.
+   };
+
+   /**
+    * @brief A named number of an enumerated INTEGER or BITS syntax.
+    */
+   struct Enumeration {
+      int32_t value;  ///< The number.
+      uint32_t label; ///< Its name.
+   };
+
+   /**
+    * @brief Compiles the tree Net-SNMP has parsed.
+    *
+    * The caller must hold g_netsnmp_mib_mutex, and Net-SNMP must be initialized.
+    *
+    * @param key Identifies the MIB files the tree is compiled from, see mib_files_key().
+    * @return The compiled tree.
+    */
+   static std::shared_ptr<MibTree const> compile(std::string const& key);
+
+   /**
+    * @brief Loads a tree saved by save(), memory-mapping the file where possible.
+    *
+    * @param path The file to load.
+    * @param key The key the tree must have been compiled with.
+    * @return The tree, nullptr if the file is missing, invalid or has another key.
+    */
+   static std::shared_ptr<MibTree const> load(std::string const& path, std::string const& key);
+
+   /**
+    * @brief Writes the tree to a file, replacing it atomically.
+    *
+    * @param path The file to write.
+    * @return Whether the file was written.
+    */
+   bool save(std::string const& path) const;
+
+   /**
+    * @brief Returns the key the tree was compiled with.
+    *
+    * @return The key.
+    */
+   std::string key() const;
+
+   /**
+    * @brief Returns the number of nodes.
+    *
+    * @return The number of nodes; the first one, if any, is the first top-level node.
+    */
+   std::size_t size() const { return m_node_count; }
+
+   /**
+    * @brief Returns a node.
+    *
+    * @param node The position of the node, less than size().
+    * @return The node.
+    */
+   Node const& node(uint32_t node) const { return m_nodes[node]; }
+
+   /**
+    * @brief Returns a string of the string table.
+    *
+    * @param offset The offset of the string, or NONE.
+    * @return The string, empty for NONE.
+    */
+   char const* string(uint32_t offset) const { return offset == NONE ? "" : m_strings + offset; }
+
+   /**
+    * @brief Returns an enumeration.
+    *
+    * @param position Node::enums plus a number less than Node::enum_count.
+    * @return The enumeration.
+    */
+   Enumeration const& enumeration(uint32_t position) const { return m_enums[position]; }
+
+   /**
+    * @brief Returns the name of an INDEX object.
+    *
+    * @param position Node::indexes plus a number less than Node::index_count.
+    * @return The name.
+    */
+   char const* index_name(uint32_t position) const { return string(m_index_names[position]); }
+
+   /**
+    * @brief Finds the deepest node an OID goes through.
+    *
+    * @param name The OID.
+    * @param name_length The number of subidentifiers of the OID.
+    * @param depth Set to the number of subidentifiers leading to the node, 0 if none.
+    * @return The node, NONE if the first subidentifier is not in the tree.
+    */
+   uint32_t find(oid const* name, std::size_t name_length, std::size_t& depth) const;
+
+   /**
+    * @brief Returns the nodes with a label.
+    *
+    * @param label The label, e.g. "sysDescr".
+    * @return The range of their positions; empty if no node has the label.
+    */
+   std::pair<uint32_t const*, uint32_t const*> nodes_labelled(char const* label) const;
+
+   /**
+    * @brief Returns the OID of a node.
+    *
+    * @param node The position of the node.
+    * @param name Receives the subidentifiers; must hold MAX_OID_LEN of them.
+    * @return The number of subidentifiers.
+    */
+   std::size_t oid_of(uint32_t node, oid* name) const;
+
+  private:
+   struct Header;
+
+   static std::shared_ptr<MibTree const> from_buffer(std::shared_ptr<char const> buffer,
+                                                     std::size_t size,
+                                                     std::string const* key);
+
+   std::shared_ptr<char const> m_buffer; ///< The serialized tree, allocated or mapped.
+   std::size_t m_size = 0;               ///< Bytes of m_buffer.
+   char const* m_key = nullptr;
+   std::size_t m_key_size = 0;
+   Node const* m_nodes = nullptr;
+   std::size_t m_node_count = 0;
+   Enumeration const* m_enums = nullptr;
+   uint32_t const* m_index_names = nullptr;
+   uint32_t const* m_labelled = nullptr; ///< Node positions sorted by label.
+   char const* m_strings = nullptr;
+};
+
+/**
+ * @brief Describes a set of MIB files, so that a tree compiled from other files is not reused.
+ *
+ * @param directories The MIB directories, separated as in the MIBDIRS environment variable.
+ * @param modules The MIB modules loaded, as in the MIBS environment variable.
+ * @return The directories, the modules and the path, size and modification time of every file
+ *     in the directories.
+ */
+std::string mib_files_key(std::string const& directories, std::string const& modules);
+
+/**
+ * @brief Loads MIB modules into the tree Net-SNMP parsed, unless they are loaded already.
+ *
+ * The modules are loaded into the tree shared by every session, once per initialization of
+ * Net-SNMP; loading is additive, so the directories extend the MIB search path rather than
+ * replace it. Under MIB_LOADING_LAZY the MIBS modules are loaded first; under
+ * MIB_LOADING_NUMERIC nothing is. The caller must hold g_netsnmp_mib_mutex, and Net-SNMP must be
+ * initialized.
+ *
+ * @param directories The directories to search, separated as in the MIBDIRS environment variable
+ *     or by commas.
+ * @param modules The modules, or "ALL", separated as in the MIBS environment variable or by
+ *     commas.
+ */
+void mib_load_modules(std::string const& directories, std::string const& modules);
+
+/**
+ * @brief Sets the directory compiled MIB trees are saved in and loaded from.
+ *
+ * @param directory The directory; empty disables the cache on disk.
+ */
+void mib_cache_set_directory(std::string const& directory);
+
+/**
+ * @brief Returns the directory compiled MIB trees are saved in and loaded from.
+ *
+ * @return The directory; empty if the cache on disk is disabled.
+ */
+std::string mib_cache_get_directory();
+
+/**
+ * @brief Returns the compiled tree of the MIBs Net-SNMP loads.
+ *
+ * The tree is loaded from the cache directory if it holds one compiled from the same MIB files,
+ * without Net-SNMP parsing them. Otherwise it is compiled from the tree Net-SNMP parses, and saved
+ * to the cache directory. It is built again once the MIB tree of Net-SNMP changes. Must not be
+ * called with g_netsnmp_mib_mutex held.
+ *
+ * @return The tree.
+ */
+std::shared_ptr<MibTree const> mib_tree();
+
+/**
+ * @brief Forgets the tree returned by mib_tree(), so that the next call builds it again.
+ */
+void mib_tree_reset();
+
+#endif // MIBCACHE_H
@@ -0,0 +1,81 @@
+#ifndef OIDTRANSLATION_H
+#define OIDTRANSLATION_H
+
+#include <net-snmp/net-snmp-config.h>
+#include <net-snmp/net-snmp-includes.h>
+
+#include <cstddef>
+#include <string>
+#include <vector>
+
+#include "varbind.h"
+
+/**
+ * @brief Translates a name to its numeric OID, as snmp_parse_oid() does.
+ *
+ * Translations are remembered by the calling thread, so translating a name again neither takes
+ * g_netsnmp_mib_mutex nor searches the MIB tree. A thread remembers up to 4096 translations in
+ * each direction, forgetting the least recently used ones first, and forgets them all whenever the
+ * MIB tree changes. Must not be called with g_netsnmp_mib_mutex held;
+ * initializes Net-SNMP for the call if needed. A symbolic name loads the MIB modules first when
+ * they are loaded on demand, see mib_load_modules().
+ *
+ * @param name The name, e.g. "IF-MIB::ifHCInOctets.1", "sysUpTime.0" or ".1.3.6.1.2.1.1.3.0".
+ * @param objid Receives the OID; must hold MAX_OID_LEN subidentifiers.
+ * @param objid_len Receives the number of subidentifiers.
+ *
+ * @throws GenericErrorBase If Net-SNMP cannot parse the name.
+ */
+void translate_name(std::string const& name, oid* objid, size_t* objid_len);
+
+/**
+ * @brief Prints an OID, as sprint_realloc_objid() does with an output format.
+ *
+ * Translations are remembered by the calling thread, like those of translate_name(). Must not
+ * be called with g_netsnmp_mib_mutex held; initializes Net-SNMP for the call if needed.
+ *
+ * @param name The OID.
+ * @param name_length The number of subidentifiers of the OID.
+ * @param format The output format, whose OID format decides between e.g.
+ *     "SNMPv2-MIB::sysUpTime.0", "sysUpTime.0" and ".1.3.6.1.2.1.1.3.0".
+ * @return The printed OID.
+ */
+std::string translate_oid(oid const* name, size_t name_length, OutputFormat const& format);
+
+/**
+ * @brief Translates names to OIDs and prints them, as translate_name() then translate_oid() do.
+ *
+ * The names the calling thread does not remember are all translated under a single hold of
+ * g_netsnmp_mib_mutex. Must not be called with g_netsnmp_mib_mutex held; initializes Net-SNMP for
+ * the call if needed.
+ *
+ * @param names The names, e.g. "IF-MIB::ifHCInOctets.1" or ".1.3.6.1.2.1.1.3.0".
+ * @param format The output format of the printed OIDs.
+ * @return The printed OIDs, in the order of the names.
+ *
+ * @throws GenericErrorBase If Net-SNMP cannot parse one of the names.
+ */
+std::vector<std::string> translate_names(std::vector<std::string> const& names,
+                                         OutputFormat const& format);
+
+/**
+ * @brief Returns whether a name is a numeric OID, which is parsed without any MIB module.
+ *
+ * @param name The name, e.g. ".1.3.6.1.2.1.1.3.0" or "sysUpTime.0".
+ * @return Whether the name only holds subidentifiers and dots.
+ */
+bool is_numeric_oid(std::string const& name);
+
+/**
+ * @brief Forgets the translations remembered by every thread.
+ */
+void translation_cache_clear();
+
+/**
+ * @brief Returns the number of translations remembered by the calling thread.
+ *
+ * @return The number of names and OIDs the thread translates without the MIB tree.
+ */
+std::size_t translation_cache_size();
+
+#endif // OIDTRANSLATION_H
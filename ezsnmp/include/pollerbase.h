@@ -0,0 +1,137 @@
+#ifndef POLLERBASE_H
+#define POLLERBASE_H
+
+#include <cstddef>
+#include <deque>
+#include <exception>
+#include <map>
+#include <mutex>
+#include <string>
+#include <utility>
+#include <vector>
+
+#include "datatypes.h"
+#include "sessionbase.h"
+
+/**
+ * @brief Drives asynchronous operations on many sessions from a single poll() loop.
+ *
+ * Jobs (a session, an operation and its OIDs) are queued with _submit() and started on their
+ * session with the SessionBase::_async_* methods, at most max_in_flight at a time. _poll()
+ * waits on the sockets of every session with an operation in flight, reads the responses,
+ * handles the retransmissions and timeouts of each session (using the retries and timeout of
+ * that session) and returns the jobs that have finished, in the order they finish.
+ *
+ * The sessions are referenced, not owned, and must outlive the jobs submitted for them.
+ */
+class PollerBase {
+  private:
+   /// A job that has not been started yet.
+   struct Job {
+      int id;                        ///< Identifier returned by _submit().
+      SessionBase* session;          ///< Session the operation is sent on.
+      std::string operation;         ///< get, get_next, bulk_get, set, walk or bulk_walk.
+      std::vector<std::string> oids; ///< OIDs (or OID, type, value triples) of the operation.
+      std::string max_repeaters;     ///< Max-repeaters of bulk operations, "" for the default.
+   };
+
+   std::size_t m_max_in_flight; ///< Maximum number of jobs started and not finished.
+   int m_next_job_id = 1;
+   std::deque<Job> m_queue; ///< Jobs waiting for a free in-flight slot.
+   std::map<std::pair<SessionBase*, int>, int>
+       m_in_flight; ///< Job id of each started operation by (session, operation id).
+   std::vector<AsyncCompletion> m_completed; ///< Finished jobs not returned by _poll() yet.
+   std::mutex m_mutex;                       ///< Serializes _submit() and _poll().
+
+   /**
+    * @brief Starts queued jobs until max_in_flight are in flight. Must be called with m_mutex
+    * held.
+    */
+   void start_jobs();
+
+   /**
+    * @brief Starts the operation of a job on its session.
+    *
+    * @param job The job to start.
+    * @return The operation id returned by the session.
+    */
+   static int start_job(Job const& job);
+
+   /**
+    * @brief Records the operations of a session that have finished as finished jobs. Must be
+    * called with m_mutex held.
+    *
+    * @param session The session the operations were started on.
+    * @param completions The completions returned by the session.
+    */
+   void finish_jobs(SessionBase* session, std::vector<AsyncCompletion>& completions);
+
+   /**
+    * @brief Fails every job in flight on a session. Must be called with m_mutex held.
+    *
+    * @param session The session whose jobs fail.
+    * @param error The exception the jobs fail with.
+    */
+   void fail_session_jobs(SessionBase* session, std::exception_ptr error);
+
+  public:
+   /**
+    * @brief Constructor for PollerBase.
+    *
+    * @param max_in_flight Maximum number of jobs in flight at once (default: 64, at least 1).
+    */
+   explicit PollerBase(int max_in_flight = 64);
+
+   /**
+    * @brief Queues a job.
+    *
+    * The job is started by a later call to _poll() once fewer than max_in_flight jobs are in
+    * flight.
+    *
+    * @param session The session to send the operation on.
+    * @param operation One of "get", "get_next", "bulk_get", "set", "walk" or "bulk_walk".
+    * @param oids The OIDs of the operation; a flat list of OID, type and value triples for "set"
+    * and at most one OID for "walk".
+    * @param max_repeaters Max-repeaters of "bulk_get" and "bulk_walk" (default: "", i.e. 10).
+    * @return The identifier of the job, reported back as AsyncCompletion::request_id.
+    * @throws GenericErrorBase if the operation is unknown or a walk is given several OIDs.
+    */
+   int _submit(SessionBase& session,
+               std::string const& operation,
+               std::vector<std::string> const& oids,
+               std::string const& max_repeaters = "");
+
+   /**
+    * @brief Starts queued jobs and waits until at least one job finishes.
+    *
+    * A job that fails to start or fails on the wire is returned as finished, with the error
+    * stored in its AsyncCompletion.
+    *
+    * @param timeout Maximum time to wait in seconds; negative waits until a job finishes.
+    * @return The jobs that have finished; empty if the timeout expired first or no job is left.
+    */
+   std::vector<AsyncCompletion> _poll(double timeout = -1);
+
+   /**
+    * @brief Returns the number of jobs that have not been returned by _poll() yet.
+    *
+    * @return The number of queued, in-flight and finished but uncollected jobs.
+    */
+   std::size_t _pending();
+
+   /**
+    * @brief Returns the number of jobs in flight.
+    *
+    * @return The number of jobs started and not finished yet.
+    */
+   std::size_t _in_flight();
+
+   /**
+    * @brief Returns the maximum number of jobs in flight at once.
+    *
+    * @return The max_in_flight given to the constructor.
+    */
+   std::size_t _get_max_in_flight() const;
+};
+
+#endif // POLLERBASE_H
@@ -1,10 +1,82 @@
 #ifndef SESSIONBASE_H
 #define SESSIONBASE_H
 
+#include <cstddef>
+#include <exception>
+#include <memory>
+#include <mutex>
 #include <string>
 #include <vector>
 
 #include "datatypes.h"
+#include "enginecache.h"
+
+class SessionBase;
+class SessionHandle;
+struct BatchLimits;
+struct WalkState;
+
+/**
+ * @brief A walk that is advanced one request at a time.
+ *
+ * Returned by SessionBase::_walk_cursor() and SessionBase::_bulk_walk_cursor(). Each call to
+ * next_batch() sends one GETNEXT or GETBULK request and returns the results of its response,
+ * so a large subtree is never held in memory as a whole and the walk can be abandoned at any
+ * point. A cursor refers to the session that created it and must not outlive it.
+ */
+class WalkCursor {
+  private:
+   friend class SessionBase;
+
+   SessionBase* m_session;             ///< Session the requests are sent on.
+   std::shared_ptr<WalkState> m_state; ///< Progress of the walk.
+
+   WalkCursor(SessionBase* session, std::shared_ptr<WalkState> state);
+
+  public:
+   /**
+    * @brief Sends the next request of the walk.
+    *
+    * @return The Result objects of one response; may be empty while the walk moves on to the
+    * next OID. Returns an empty vector once the walk is done.
+    */
+   std::vector<Result> next_batch();
+
+   /**
+    * @brief Checks whether the walk is over.
+    *
+    * @return True once every subtree has been walked.
+    */
+   bool done() const;
+};
+
+/**
+ * @brief Outcome of an operation started with one of the SessionBase::_async_* methods.
+ */
+struct AsyncCompletion {
+   int request_id = 0;          ///< Identifier returned when the operation was started.
+   std::vector<Result> results; ///< Results of the operation, empty if it failed.
+   std::exception_ptr error;    ///< Exception the operation failed with, null on success.
+
+   /**
+    * @brief Throws the exception the operation failed with; does nothing if it succeeded.
+    */
+   void rethrow() const;
+};
+
+/**
+ * @brief Outcome of a walk started with SessionBase::_resumable_walk().
+ */
+struct ResumableWalk {
+   std::vector<Result> results; ///< Results retrieved, also those before a failure.
+   std::string resume_token;    ///< Numeric OID to continue a failed walk after, see start_after.
+   std::exception_ptr error;    ///< Exception the walk failed with, null on success.
+
+   /**
+    * @brief Throws the exception the walk failed with; does nothing if it succeeded.
+    */
+   void rethrow() const;
+};
 
 /**
  * @brief Base class for managing SNMP sessions.
@@ -44,10 +116,21 @@ class SessionBase {
    bool m_print_hex_strings =
        false; ///< Print OCTET STRINGs as hex strings when appropriate (-O x).
    std::string m_set_max_repeaters_to_num = ""; ///< Set max-repeaters to <NUM> (-C r<NUM>).
+   std::size_t m_max_varbinds_per_pdu = 0; ///< Maximum variables per GET/GETNEXT/SET, 0 for any.
+   std::size_t m_max_pdu_size = 0; ///< Maximum estimated GET/GETNEXT/SET size in bytes, 0 for any.
+   std::size_t m_max_outstanding_requests = 1; ///< Maximum GET/GETNEXT batches in flight at once.
 
    std::string
        m_init_name; ///< Application name for net-snmp initialization (shared by all operations).
 
+   std::size_t m_connection_args_size = 0; ///< Number of m_args entries before appended OIDs.
+   std::unique_ptr<SessionHandle>
+       m_session_handle;                     ///< Persistent Net-SNMP session, opened on first use.
+   unsigned m_session_handle_generation = 0; ///< Fork generation m_session_handle was opened in.
+   std::mutex m_session_mutex; ///< Serializes operations, setters and (re)opening the session.
+   std::vector<AsyncCompletion>
+       m_async_cancelled; ///< Operations cancelled by closing the session, not yet collected.
+
    /**
     * @brief Populates the m_args vector with SNMP command arguments.
     *
@@ -57,9 +140,82 @@ class SessionBase {
    void populate_args();
 
    /**
-    * @brief Clears the cached SNMPv3 user for the current session parameters.
+    * @brief Resets m_args to the connection arguments and appends the given OIDs.
+    *
+    * @param mibs The OIDs (or OID, type, value triples) of the current operation.
     */
-   void check_and_clear_v3_user();
+   void append_args(std::vector<std::string> const& mibs);
+
+   /**
+    * @brief Returns the arguments a session handle is opened with.
+    *
+    * Application options (-C) are applied per request, a handle only needs the connection and
+    * output options.
+    *
+    * @return The connection arguments of m_args.
+    */
+   std::vector<std::string> connection_args() const;
+
+   /**
+    * @brief Returns the request size limits to apply to the persistent session.
+    *
+    * @return m_max_varbinds_per_pdu, m_max_pdu_size and m_max_outstanding_requests.
+    */
+   BatchLimits batch_limits() const;
+
+   /**
+    * @brief Joins the results of the ranges of a parallel walk.
+    *
+    * @param handle The session's persistent handle.
+    * @param mibs The root of the walk, if any.
+    * @param max_repetitions The max-repetitions of a bulk walk.
+    * @param bulk Whether the ranges were walked with GETBULK requests.
+    * @param range_results The Result objects of each range, moved from.
+    * @param errors The failure of each range, if any.
+    * @return The Result objects of the whole subtree; walks it whole if the ranges are empty.
+    * @throws The failure of the first range that failed.
+    */
+   std::vector<Result> concatenate_ranges(SessionHandle& handle,
+                                          std::vector<std::string> const& mibs,
+                                          int max_repetitions,
+                                          bool bulk,
+                                          std::vector<std::vector<Result>>& range_results,
+                                          std::vector<std::exception_ptr> const& errors);
+
+   /**
+    * @brief Closes the persistent session if it was opened before the process forked.
+    *
+    * Its asynchronous operations are cancelled like when the session is reopened.
+    */
+   void drop_inherited_session_handle();
+
+   /**
+    * @brief Returns the persistent session, opening it from the current arguments if needed.
+    *
+    * Must be called with m_session_mutex held.
+    *
+    * @return The open session handle.
+    */
+   SessionHandle& session_handle();
+
+   /**
+    * @brief Closes the persistent session so the next operation reopens it.
+    *
+    * Must be called with m_session_mutex held and before the connection parameters change.
+    *
+    * @param credentials_changed Also drop the cached SNMPv3 user so new keys get localized.
+    */
+   void reset_session_handle(bool credentials_changed = false);
+
+   /**
+    * @brief Sends the next request of a walk started by _walk_cursor() or _bulk_walk_cursor().
+    *
+    * @param state Progress of the walk, updated in place.
+    * @return The Result objects of one response.
+    */
+   std::vector<Result> walk_step(WalkState& state);
+
+   friend class WalkCursor;
 
   public:
    /**
@@ -127,8 +283,7 @@ class SessionBase {
    /**
     * @brief Closes the SNMP session and releases resources via the snmp snmp_shutdown function.
     * It use the initialization name to identify the session to close.
-    * A unique initialization name is generated for each net-snmp function to avoid conflicts.
-    * i.e bulkwalk, bulkget, get, getnext, set, walk...
+    * The persistent Net-SNMP session is closed as well; a later operation reopens it.
     */
    void _close();
 
@@ -162,6 +317,225 @@ class SessionBase {
     */
    std::vector<Result> bulk_walk(std::vector<std::string> const& mibs);
 
+   /**
+    * @brief Performs an SNMP WALK operation, returning the results as a table.
+    *
+    * @param mib The OID (Object Identifier) to start the walk from (default: "").
+    * @return A ResultTable with one row per retrieved variable.
+    */
+   ResultTable _walk_columnar(std::string const& mib = "");
+
+   /**
+    * @brief Performs an SNMP BULK WALK operation on multiple OIDs, returning the results as a
+    * table.
+    *
+    * @param mibs A vector of OIDs to start the walks from.
+    * @param adaptive Tune the maximum repetitions to the agent (default: false).
+    * @return A ResultTable with one row per retrieved variable.
+    */
+   ResultTable _bulk_walk_columnar(std::vector<std::string> const& mibs, bool adaptive = false);
+
+   /**
+    * @brief Performs an SNMP BULK WALK operation on multiple OIDs, tuning the maximum
+    * repetitions to the agent.
+    *
+    * The walk starts from the value learned by the previous adaptive walks of the same transport
+    * address, or from set_max_repeaters_to_num. The value grows while the responses are full,
+    * fast and fit a single Ethernet frame, and shrinks on tooBig responses and timeouts; the
+    * value reached is remembered for the next adaptive walks.
+    *
+    * @param mibs A vector of OIDs to start the walks from.
+    * @return A vector of Result objects containing the retrieved data.
+    */
+   std::vector<Result> _bulk_walk_adaptive(std::vector<std::string> const& mibs);
+
+   /**
+    * @brief Walks table columns together, with one variable per column in every GETBULK
+    * request.
+    *
+    * The columns advance in lock-step, set_max_repeaters_to_num rows per request, which takes
+    * as many round trips as the longest column instead of the sum of all of them.
+    *
+    * @param columns A vector of column OIDs.
+    * @return The Result objects of each column, in the order of columns.
+    */
+   std::vector<std::vector<Result>> _bulk_walk_table(std::vector<std::string> const& columns);
+
+   /**
+    * @brief Walks a conceptual table, splitting its variables into columns and rows.
+    *
+    * The table is walked with GETBULK requests (GETNEXT for SNMPv1) and every variable is
+    * assigned to its column and row from its numeric OID, without building a Result for it.
+    *
+    * @param table OID of the table (e.g. "IF-MIB::ifXTable") or of its entry.
+    * @return The cells of the table.
+    */
+   TableRows _get_table(std::string const& table);
+
+   /**
+    * @brief Performs an SNMP WALK or BULK WALK that can be continued after a failure.
+    *
+    * Instead of throwing, a failed walk returns the results retrieved so far along with a
+    * resume token. Passing the token back as @p start_after walks the rest of the roots: the
+    * roots before the one holding the token are skipped and that one continues after it.
+    *
+    * @param mibs The OIDs to walk; empty walks mib-2.
+    * @param start_after The resume token of a failed walk of the same OIDs, or "" to start over.
+    * @param bulk Walk with GETBULK requests instead of GETNEXT.
+    * @param adaptive Adapt max-repetitions to the agent, see _bulk_walk_adaptive().
+    * @return The results, the resume token and the failure of the walk, if any.
+    */
+   ResumableWalk _resumable_walk(std::vector<std::string> const& mibs,
+                                 std::string const& start_after,
+                                 bool bulk = false,
+                                 bool adaptive = false);
+
+   /**
+    * @brief Walks a subtree only if it changed since the last delta walk of the target.
+    *
+    * sysUpTime.0 and the change indicator are read with a single GET first. The last walk of
+    * the subtree on the same target is returned again if the indicator kept its value and the
+    * agent did not restart; otherwise the subtree is walked and the new walk is remembered.
+    * Nothing is remembered while the indicator does not exist.
+    *
+    * @param mib The OID to walk (default: "", which walks mib-2).
+    * @param sentinel OID whose value changes with the subtree; empty uses the indicator of the
+    * standard MIB, see SessionHandle::change_indicator().
+    * @param bulk Walk with GETBULK requests instead of GETNEXT.
+    * @return The Result objects of the subtree.
+    * @throws GenericErrorBase If no sentinel is given and none is known for the subtree.
+    */
+   std::vector<Result> _delta_walk(std::string const& mib,
+                                   std::string const& sentinel = "",
+                                   bool bulk = false);
+
+   /**
+    * @brief Walks a subtree as consecutive OID ranges, several of them at a time.
+    *
+    * Range i holds the OIDs after split point i - 1 and up to split point i; the first range
+    * starts at the root and the last one runs to the end of the subtree. Every range after the
+    * first runs on its own session, opened with the same parameters, so up to @p workers
+    * requests are outstanding at a time. Pipelined, the ranges all share this session's socket
+    * instead, see SessionHandle::pipelined_walks(). Without split points the session samples
+    * the first branches of the subtree and splits it evenly between them. SNMPv3 ranges are
+    * always pipelined: Net-SNMP keeps a single copy of each user, so sessions of their own would
+    * walk them one at a time.
+    *
+    * @param mib The OID to walk (default: "", which walks mib-2).
+    * @param workers Maximum number of ranges walked at the same time.
+    * @param split_points Ascending OIDs ending a range each; empty samples them.
+    * @param bulk Walk the ranges with GETBULK requests instead of GETNEXT.
+    * @param pipelined Keep the requests of the ranges in flight on this session's socket
+    *        (always for SNMPv3).
+    * @return The Result objects of the whole subtree, in OID order.
+    */
+   std::vector<Result> _parallel_walk(std::string const& mib,
+                                      int workers,
+                                      std::vector<std::string> const& split_points,
+                                      bool bulk = false,
+                                      bool pipelined = false);
+
+   /**
+    * @brief Starts an SNMP WALK that is advanced one request at a time.
+    *
+    * No request is sent until WalkCursor::next_batch() is called.
+    *
+    * @param mib The OID (Object Identifier) to start the walk from (default: "").
+    * @return A WalkCursor yielding the results of one GETNEXT response per batch.
+    */
+   WalkCursor _walk_cursor(std::string const& mib = "");
+
+   /**
+    * @brief Starts an SNMP BULK WALK on multiple OIDs that is advanced one request at a time.
+    *
+    * No request is sent until WalkCursor::next_batch() is called. The current max-repeaters
+    * setting is used for every request of the walk.
+    *
+    * @param mibs A vector of OIDs to start the walks from.
+    * @return A WalkCursor yielding the results of one GETBULK response per batch.
+    */
+   WalkCursor _bulk_walk_cursor(std::vector<std::string> const& mibs);
+
+   /**
+    * @brief Starts an SNMP GET operation without waiting for the response.
+    *
+    * @param mibs A vector of OIDs to retrieve.
+    * @return The identifier of the operation, reported back in its AsyncCompletion.
+    */
+   int _async_get(std::vector<std::string> const& mibs);
+
+   /**
+    * @brief Starts an SNMP GETNEXT operation without waiting for the response.
+    *
+    * @param mibs A vector of OIDs to retrieve the successors of.
+    * @return The identifier of the operation, reported back in its AsyncCompletion.
+    */
+   int _async_get_next(std::vector<std::string> const& mibs);
+
+   /**
+    * @brief Starts an SNMP GETBULK operation without waiting for the response.
+    *
+    * @param mibs A vector of OIDs to retrieve.
+    * @return The identifier of the operation, reported back in its AsyncCompletion.
+    */
+   int _async_bulk_get(std::vector<std::string> const& mibs);
+
+   /**
+    * @brief Starts an SNMP SET operation without waiting for the response.
+    *
+    * @param mibs A vector of OID, type and value triples.
+    * @return The identifier of the operation, reported back in its AsyncCompletion.
+    */
+   int _async_set(std::vector<std::string> const& mibs);
+
+   /**
+    * @brief Starts an SNMP WALK operation without waiting for the responses.
+    *
+    * @param mib The OID (Object Identifier) to start the walk from (default: "").
+    * @return The identifier of the operation, reported back in its AsyncCompletion.
+    */
+   int _async_walk(std::string const& mib = "");
+
+   /**
+    * @brief Starts an SNMP BULK WALK operation on multiple OIDs without waiting for the responses.
+    *
+    * @param mibs A vector of OIDs to start the walks from.
+    * @return The identifier of the operation, reported back in its AsyncCompletion.
+    */
+   int _async_bulk_walk(std::vector<std::string> const& mibs);
+
+   /**
+    * @brief Reads the responses waiting on _async_fd() and advances the operations in flight.
+    *
+    * @return The operations that have finished, successfully or not.
+    */
+   std::vector<AsyncCompletion> _async_read();
+
+   /**
+    * @brief Retransmits or times out the requests whose timeout has expired.
+    *
+    * @return The operations that have finished, successfully or not.
+    */
+   std::vector<AsyncCompletion> _async_timeout();
+
+   /**
+    * @brief Returns the socket the responses to asynchronous operations arrive on.
+    *
+    * The socket changes whenever the session is reopened, e.g. after a connection parameter
+    * has been changed.
+    *
+    * @return The file descriptor to watch for readability.
+    */
+   int _async_fd();
+
+   /**
+    * @brief Returns how long until _async_timeout() has work to do.
+    *
+    * @return Seconds until the next retransmission or timeout; 0 if finished operations are
+    * waiting to be collected; -1 if no operation is in flight.
+    */
+   double _async_next_timeout();
+
    /**
     * @brief Performs an SNMP GET operation.
     *
@@ -182,6 +556,14 @@ class SessionBase {
     */
    std::vector<Result> get(std::vector<std::string> const& mibs);
 
+   /**
+    * @brief Performs an SNMP GET operation on multiple OIDs, returning the results as a table.
+    *
+    * @param mibs A vector of OIDs to retrieve.
+    * @return A ResultTable with one row per retrieved variable.
+    */
+   ResultTable _get_columnar(std::vector<std::string> const& mibs);
+
    /**
     * @brief Performs an SNMP GET NEXT operation.
     *
@@ -232,6 +614,191 @@ class SessionBase {
     */
    std::vector<Result> set(std::vector<std::string> const& mibs);
 
+   /**
+    * @brief Describes the engine discovery cache entry of the session's transport address.
+    *
+    * @return The entry; EngineCacheInfo::cached is false if the engine is not cached.
+    */
+   EngineCacheInfo _get_engine_cache_info();
+
+   /**
+    * @brief Sets how long discovered SNMPv3 engines are reused, for every session.
+    *
+    * @param seconds The TTL in seconds; 0 disables the cache.
+    */
+   static void _set_engine_cache_ttl(double seconds);
+
+   /**
+    * @brief Returns how long discovered SNMPv3 engines are reused.
+    *
+    * @return The TTL in seconds.
+    */
+   static double _get_engine_cache_ttl();
+
+   /**
+    * @brief Forgets every discovered SNMPv3 engine.
+    */
+   static void _clear_engine_cache();
+
+   /**
+    * @brief Returns the maximum repetitions learned by the adaptive walks of the session's
+    * transport address.
+    *
+    * @return The learned value; 0 if no adaptive walk of the address has tuned it yet.
+    */
+   int _get_learned_max_repetitions() const;
+
+   /**
+    * @brief Forgets the maximum repetitions learned by adaptive walks, for every address.
+    */
+   static void _clear_max_repetitions_cache();
+
+   /**
+    * @brief Returns the number of walks remembered by delta walks, for every target.
+    *
+    * @return The number of remembered walks.
+    */
+   static std::size_t _get_walk_snapshot_count();
+
+   /**
+    * @brief Forgets the walks remembered by delta walks, for every target.
+    */
+   static void _clear_walk_snapshots();
+
+   /**
+    * @brief Translates an OID between its symbolic and numeric forms.
+    *
+    * Translations are remembered by the calling thread, so repeating one neither takes the
+    * global MIB mutex nor searches the MIB tree.
+    *
+    * @param name The OID, symbolic (e.g. "IF-MIB::ifHCInOctets.1", "sysUpTime.0") or numeric.
+    * @param numeric Whether to return the numeric form rather than the symbolic one.
+    * @return The OID, e.g. ".1.3.6.1.2.1.1.3.0" or "SNMPv2-MIB::sysUpTime.0".
+    */
+   static std::string _translate(std::string const& name, bool numeric);
+
+   /**
+    * @brief Translates OIDs between their symbolic and numeric forms, as _translate() does.
+    *
+    * The OIDs the calling thread does not remember are all translated under one hold of the
+    * global MIB mutex, rather than taking it once per OID.
+    *
+    * @param names The OIDs, symbolic or numeric.
+    * @param numeric Whether to return the numeric forms rather than the symbolic ones.
+    * @return The translated OIDs, in the order of the names.
+    */
+   static std::vector<std::string> _translate_oids(std::vector<std::string> const& names,
+                                                   bool numeric);
+
+   /**
+    * @brief Forgets the OID translations remembered by every thread.
+    */
+   static void _clear_translation_cache();
+
+   /**
+    * @brief Sets whether Net-SNMP stays initialized when no session uses it.
+    *
+    * Kept alive (the default), Net-SNMP is initialized, and the MIBs parsed, once per process.
+    * Otherwise it is shut down whenever the last session closes and initialized again by the
+    * next one.
+    *
+    * @param keep_alive Whether to keep Net-SNMP initialized; if so, it is initialized now.
+    */
+   static void _init_library(bool keep_alive);
+
+   /**
+    * @brief Sets which MIB modules Net-SNMP loads when it is next initialized.
+    *
+    * Eagerly, the MIBS modules are parsed by the initialization. Lazily, none are until a session
+    * or a translation first needs a MIB. Numeric-only, none ever are: OIDs must be numeric, and
+    * sessions print them numerically by default. Net-SNMP is shut down now if it was initialized
+    * with another setting and no session is open.
+    *
+    * @param mib_loading MIB_LOADING_EAGER (the default), MIB_LOADING_LAZY or MIB_LOADING_NUMERIC.
+    */
+   static void _set_mib_loading(int mib_loading);
+
+   /**
+    * @brief Shuts Net-SNMP down and stops keeping it alive.
+    *
+    * The shutdown happens now if no session is open, otherwise when the last one closes.
+    */
+   static void _shutdown_library();
+
+   /**
+    * @brief Sets the directory compiled MIB trees are saved in and loaded from.
+    *
+    * A tree compiled from the MIBs Net-SNMP parsed is saved there, keyed by the MIB files it
+    * was compiled from, and memory-mapped by the next processes loading the same unchanged files.
+    *
+    * @param directory The directory; empty disables the cache on disk.
+    */
+   static void _set_mib_cache_directory(std::string const& directory);
+
+   /**
+    * @brief Returns the directory compiled MIB trees are saved in and loaded from.
+    *
+    * @return The directory; empty if the cache on disk is disabled.
+    */
+   static std::string _get_mib_cache_directory();
+
+   /**
+    * @brief Loads or compiles the MIB tree now, see _set_mib_cache_directory().
+    *
+    * @return The number of nodes of the tree.
+    */
+   static std::size_t _load_mib_tree();
+
+   /**
+    * @brief Prepares the library for the process to fork.
+    *
+    * Takes the global Net-SNMP locks (waiting for the SNMPv3 operations in progress) so that
+    * the child does not inherit them held by a thread that only exists in the parent. Must be
+    * followed by _after_fork_in_parent() in the parent and _after_fork_in_child() in the child.
+    */
+   static void _prepare_fork();
+
+   /**
+    * @brief Releases the locks taken by _prepare_fork() in the parent process.
+    */
+   static void _after_fork_in_parent();
+
+   /**
+    * @brief Releases the locks taken by _prepare_fork() in the child process.
+    *
+    * Also invalidates every session inherited from the parent: its socket is shared with the
+    * parent, so each session opens a new one on its next operation, and its asynchronous
+    * operations in flight fail. Sessions another thread was using while the process forked
+    * must not be used in the child.
+    */
+   static void _after_fork_in_child();
+
+   /**
+    * @brief Sets how many SNMPv3 master keys derived from passphrases are kept, for every session.
+    *
+    * @param capacity The maximum number of keys; 0 disables the cache.
+    */
+   static void _set_usm_key_cache_capacity(std::size_t capacity);
+
+   /**
+    * @brief Returns how many SNMPv3 master keys derived from passphrases are kept.
+    *
+    * @return The maximum number of keys.
+    */
+   static std::size_t _get_usm_key_cache_capacity();
+
+   /**
+    * @brief Returns the number of SNMPv3 master keys currently cached.
+    *
+    * @return The number of keys.
+    */
+   static std::size_t _get_usm_key_cache_size();
+
+   /**
+    * @brief Forgets every cached SNMPv3 master key.
+    */
+   static void _clear_usm_key_cache();
+
    // Const getters
 
    /**
@@ -409,6 +976,27 @@ class SessionBase {
     */
    std::string const& _get_set_max_repeaters_to_num() const;
 
+   /**
+    * @brief Returns the maximum number of variables sent in one GET, GETNEXT or SET request.
+    *
+    * @return The maximum number of variables, 0 if unlimited.
+    */
+   std::size_t _get_max_varbinds_per_pdu() const;
+
+   /**
+    * @brief Returns the maximum estimated size of one GET, GETNEXT or SET request.
+    *
+    * @return The maximum size in bytes, 0 if unlimited.
+    */
+   std::size_t _get_max_pdu_size() const;
+
+   /**
+    * @brief Returns the maximum number of GET or GETNEXT batches awaiting a response at once.
+    *
+    * @return The maximum number of outstanding requests, 1 when batches are not pipelined.
+    */
+   std::size_t _get_max_outstanding_requests() const;
+
    // Setters
 
    /**
@@ -578,6 +1166,37 @@ class SessionBase {
     * @param set_max_repeaters_to_num The new value for max-repeaters.
     */
    void _set_max_repeaters_to_num(std::string const& set_max_repeaters_to_num);
+
+   /**
+    * @brief Sets the maximum number of variables sent in one GET, GETNEXT or SET request.
+    *
+    * Longer lists of OIDs are sent in several requests, one after another, and their results
+    * are merged in order. A SET split this way is no longer atomic.
+    *
+    * @param max_varbinds_per_pdu The maximum number of variables, 0 for no limit.
+    */
+   void _set_max_varbinds_per_pdu(std::size_t max_varbinds_per_pdu);
+
+   /**
+    * @brief Sets the maximum estimated size of one GET, GETNEXT or SET request.
+    *
+    * Like _set_max_varbinds_per_pdu(), for the BER-encoded size of the request.
+    *
+    * @param max_pdu_size The maximum size in bytes, 0 for no limit.
+    */
+   void _set_max_pdu_size(std::size_t max_pdu_size);
+
+   /**
+    * @brief Sets the maximum number of GET or GETNEXT batches awaiting a response at once.
+    *
+    * Above 1, the batches of a GET or GETNEXT split by _set_max_varbinds_per_pdu() or
+    * _set_max_pdu_size() are sent without waiting for the responses to the previous ones, each
+    * with its own request ID, so a slow round trip is paid once per @p max_outstanding_requests
+    * batches instead of once per batch.
+    *
+    * @param max_outstanding_requests The maximum number of requests in flight; 0 counts as 1.
+    */
+   void _set_max_outstanding_requests(std::size_t max_outstanding_requests);
 };
 
 #endif // SESSIONBASE_H
\ No newline at end of file
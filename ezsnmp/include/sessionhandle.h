@@ -0,0 +1,479 @@
+#ifndef SESSIONHANDLE_H
+#define SESSIONHANDLE_H
+
+#include <net-snmp/net-snmp-config.h>
+#include <net-snmp/net-snmp-includes.h>
+
+#include <atomic>
+#include <cstddef>
+#include <exception>
+#include <map>
+#include <memory>
+#include <mutex>
+#include <optional>
+#include <string>
+#include <vector>
+
+#include "datatypes.h"
+#include "helpers.h"
+#include "maxrepetitions.h"
+#include "sessionbase.h"
+#include "varbind.h"
+
+/**
+ * @brief Progress of a walk that is advanced one request at a time.
+ *
+ * Filled in by the caller (bulk, max_repetitions, roots and optionally start_after and
+ * stop_after) and then passed to SessionHandle::walk_step() until done is set.
+ */
+struct WalkState {
+   bool bulk = false;              ///< Walk with GETBULK requests instead of GETNEXT.
+   int max_repetitions = 0;        ///< Maximum repetitions per GETBULK request.
+   std::vector<std::string> roots; ///< Root OIDs to walk in order; empty walks mib-2.
+   std::size_t next_root = 0;      ///< Index in roots of the next subtree to start.
+   /// Only walk the OIDs after this one; empty starts at the root. The roots before the one
+   /// holding it are skipped.
+   std::string start_after;
+   std::string stop_after;     ///< Only walk the OIDs up to this one; empty walks to the end.
+   oid root[MAX_OID_LEN] = {}; ///< Root of the subtree being walked.
+   size_t rootlen = 0;
+   oid end_oid[MAX_OID_LEN] = {}; ///< First OID past the subtree being walked.
+   size_t end_len = 0;
+   oid name[MAX_OID_LEN] = {}; ///< OID the next request continues from.
+   size_t name_length = 0;
+   oid stop_oid[MAX_OID_LEN] = {}; ///< Parsed stop_after.
+   size_t stop_len = 0;
+   oid last_oid[MAX_OID_LEN] = {}; ///< OID of the last variable returned.
+   size_t last_len = 0;
+   bool walking = false;       ///< Whether a subtree has been started and not finished yet.
+   bool found = false;         ///< Whether the current subtree returned any variable.
+   bool partial = false;       ///< Whether the current subtree is bounded by start/stop_after.
+   bool fetching_root = false; ///< Whether the next request is the GET of an empty subtree root.
+   bool done = false;          ///< Whether every subtree has been walked.
+   /// Adapts max_repetitions to the agent, if set.
+   std::optional<MaxRepetitionsTuner> tuner;
+   /// Transport address the tuned max_repetitions is recorded for.
+   std::string tuner_address;
+};
+
+/**
+ * @brief Size limits of the GET, GETNEXT and SET requests of a session.
+ *
+ * Larger requests are split into batches; 0 means no limit. Up to max_outstanding batches of a
+ * GET or GETNEXT are in flight at once, each with its own request ID.
+ */
+struct BatchLimits {
+   std::size_t max_varbinds = 0;    ///< Maximum number of variables per request.
+   std::size_t max_size = 0;        ///< Maximum estimated size of a request, in bytes.
+   std::size_t max_outstanding = 1; ///< Maximum number of requests awaiting a response.
+};
+
+/**
+ * @brief A persistent Net-SNMP single-session handle.
+ *
+ * Parses the connection arguments once with snmp_parse_args(), opens the
+ * session once with snmp_sess_open() and then reuses the same socket,
+ * transport and (for SNMPv3) localized USM user for every request until the
+ * handle is destroyed. The request methods mirror the behaviour of the patched
+ * snmpget/snmpgetnext/snmpbulkget/snmpset/snmpwalk/snmpbulkwalk tools.
+ *
+ * Requests can also be sent without waiting for their responses (async_get() and friends); the
+ * caller then watches async_fd() and calls async_read() and async_timeout() to collect them.
+ *
+ * A handle serializes its own requests; it is safe to share between threads.
+ */
+class SessionHandle {
+  public:
+   class Request;
+
+   /**
+    * @brief Parses the connection arguments and opens the session.
+    *
+    * @param args Connection arguments (no OIDs), e.g. {"-v", "2c", "-c", "public", "host:161"}.
+    * @param init_app_name Application name used for the reference-counted init_snmp() call.
+    * @throws ParseErrorBase if the arguments cannot be parsed.
+    * @throws ConnectionErrorBase/GenericErrorBase if the session cannot be opened.
+    */
+   SessionHandle(std::vector<std::string> const &args, std::string const &init_app_name);
+
+   /**
+    * @brief Closes the session and releases the Net-SNMP library reference.
+    */
+   ~SessionHandle();
+
+   SessionHandle(SessionHandle const &) = delete;
+   SessionHandle &operator=(SessionHandle const &) = delete;
+
+   /**
+    * @brief Limits the size of the GET, GETNEXT and SET requests sent from now on.
+    *
+    * Without limits a request carries every OID given, up to SNMP_MAX_CMDLINE_OIDS of them.
+    * With limits any number of OIDs is accepted and split into batches, whose results are
+    * returned in the order of the OIDs. Either way a GET or GETNEXT the agent answers tooBig
+    * is split in two and sent again. The batches of a GET or GETNEXT are pipelined up to
+    * limits.max_outstanding at a time; those of a SET are always sent one after another.
+    *
+    * @param limits The new limits.
+    */
+   void set_batch_limits(BatchLimits const &limits);
+
+   /**
+    * @brief Performs an SNMP GET for the given OIDs.
+    *
+    * @param oids OIDs to retrieve.
+    * @return A vector of Result objects.
+    */
+   std::vector<Result> get(std::vector<std::string> const &oids);
+
+   /**
+    * @brief Performs an SNMP GET for the given OIDs, collecting the variables into a table.
+    *
+    * @param oids OIDs to retrieve.
+    * @return The variables, one row each.
+    */
+   ResultTable get_columnar(std::vector<std::string> const &oids);
+
+   /**
+    * @brief Performs an SNMP GETNEXT for the given OIDs.
+    *
+    * @param oids OIDs to retrieve the successors of.
+    * @return A vector of Result objects.
+    */
+   std::vector<Result> get_next(std::vector<std::string> const &oids);
+
+   /**
+    * @brief Performs an SNMP GETBULK for the given OIDs.
+    *
+    * @param oids OIDs to retrieve.
+    * @param non_repeaters Number of non-repeating varbinds.
+    * @param max_repetitions Maximum repetitions for the repeating varbinds.
+    * @return A vector of Result objects.
+    */
+   std::vector<Result> bulk_get(std::vector<std::string> const &oids,
+                                int non_repeaters,
+                                int max_repetitions);
+
+   /**
+    * @brief Performs an SNMP SET.
+    *
+    * @param oid_type_values Flat list of OID, type and value triples.
+    * @return A vector of Result objects.
+    */
+   std::vector<Result> set(std::vector<std::string> const &oid_type_values);
+
+   /**
+    * @brief Walks a subtree with GETNEXT requests.
+    *
+    * @param root Root OID of the walk; empty walks mib-2.
+    * @return A vector of Result objects.
+    */
+   std::vector<Result> walk(std::string const &root);
+
+   /**
+    * @brief Walks one or more subtrees with GETBULK requests.
+    *
+    * @param roots Root OIDs of the walks; empty walks mib-2.
+    * @param max_repetitions Maximum repetitions per GETBULK request.
+    * @param adaptive Tune the maximum repetitions to the agent, starting from the value learned
+    * by the previous adaptive walks of the same address, or from max_repetitions.
+    * @return A vector of Result objects.
+    */
+   std::vector<Result> bulk_walk(std::vector<std::string> const &roots,
+                                 int max_repetitions,
+                                 bool adaptive = false);
+
+   /**
+    * @brief Walks a subtree with GETNEXT requests, collecting the variables into a table.
+    *
+    * @param root Root OID of the walk; empty walks mib-2.
+    * @return The variables, one row each.
+    */
+   ResultTable walk_columnar(std::string const &root);
+
+   /**
+    * @brief Walks one or more subtrees with GETBULK requests, collecting the variables into a
+    * table.
+    *
+    * @param roots Root OIDs of the walks; empty walks mib-2.
+    * @param max_repetitions Maximum repetitions per GETBULK request.
+    * @param adaptive Tune the maximum repetitions to the agent, starting from the value learned
+    * by the previous adaptive walks of the same address, or from max_repetitions.
+    * @return The variables, one row each.
+    */
+   ResultTable bulk_walk_columnar(std::vector<std::string> const &roots,
+                                  int max_repetitions,
+                                  bool adaptive = false);
+
+   /**
+    * @brief Walks table columns together, with one variable per column in every GETBULK request.
+    *
+    * The columns advance in lock-step, one row per repetition, and a column is left out of the
+    * following requests once it leaves its subtree.
+    *
+    * @param columns OIDs of the columns.
+    * @param max_repetitions Rows per GETBULK request.
+    * @return The variables of each column, in the order of columns.
+    */
+   std::vector<std::vector<Result>> bulk_walk_table(std::vector<std::string> const &columns,
+                                                    int max_repetitions);
+
+   /**
+    * @brief Walks a conceptual table and splits its variables into columns and rows.
+    *
+    * @param table OID of the table (e.g. ifXTable) or of its entry (e.g. ifXEntry).
+    * @param bulk Walk with GETBULK requests instead of GETNEXT.
+    * @param max_repetitions Maximum repetitions per GETBULK request.
+    * @return The cells of the table.
+    */
+   TableRows get_table(std::string const &table, bool bulk, int max_repetitions);
+
+   /**
+    * @brief Performs a whole walk described by a state, e.g. one range of a subtree.
+    *
+    * @param state Walk to perform, filled in like for walk_step().
+    * @return A vector of Result objects.
+    */
+   std::vector<Result> run_walk(WalkState &state);
+
+   /**
+    * @brief Performs several whole walks at once, pipelined on the session's socket.
+    *
+    * Up to max_outstanding walks have a request awaiting its response at any time; responses
+    * are matched to their walk by request ID, so the walks share one socket instead of each
+    * opening its own.
+    *
+    * @param states Walks to perform, filled in like for walk_step().
+    * @param max_outstanding Maximum number of requests in flight.
+    * @return The Result objects of each walk, in the order of the states.
+    * @throws The first failure of a walk, once every walk is over.
+    */
+   std::vector<std::vector<Result>> pipelined_walks(std::vector<WalkState> const &states,
+                                                    std::size_t max_outstanding);
+
+   /**
+    * @brief Performs a whole walk, keeping the variables retrieved before a failure.
+    *
+    * @param roots Root OIDs to walk in order; empty walks mib-2.
+    * @param start_after Resume token of a failed walk of the same roots, or empty.
+    * @param bulk Walk with GETBULK requests instead of GETNEXT.
+    * @param max_repetitions Maximum repetitions per GETBULK request.
+    * @param adaptive Adapt max_repetitions to the agent, see bulk_walk().
+    * @return The results, the resume token and the failure of the walk, if any.
+    */
+   ResumableWalk resumable_walk(std::vector<std::string> const &roots,
+                                std::string const &start_after,
+                                bool bulk,
+                                int max_repetitions,
+                                bool adaptive = false);
+
+   /**
+    * @brief Finds OIDs that split a subtree into ranges along its branches.
+    *
+    * The subtree is probed with GETNEXT requests that skip a branch at a time, one request per
+    * point, at the first level below the root that has more than one branch (e.g. the columns
+    * of a table, or the first index subidentifier of a single column).
+    *
+    * @param root Root OID of the subtree.
+    * @param max_points Maximum number of points, and of requests.
+    * @return Dotted numeric OIDs in increasing order, each one the last OID of a branch.
+    */
+   std::vector<std::string> sample_split_points(std::string const &root, std::size_t max_points);
+
+   /**
+    * @brief Returns the standard object that tells when a subtree last changed.
+    *
+    * Known for ifStackTable (ifStackLastChange), sysORTable (sysORLastChange) and the ENTITY-MIB
+    * tables (entLastChangeTime). Not for subtrees with counters or gauges, such as the interfaces
+    * group and ifXTable, whose values change without their ...LastChange object moving.
+    *
+    * @param root Root OID of the subtree.
+    * @return The numeric OID of the indicator, or an empty string if none is known.
+    */
+   std::string change_indicator(std::string const &root) const;
+
+   /**
+    * @brief Sends the next request of a walk and returns the variables of its response.
+    *
+    * Each call sends one GETNEXT (or GETBULK) request. The batch may be empty while the walk
+    * moves on to the next root; the walk is over once state.done is set.
+    *
+    * @param state Progress of the walk, updated in place.
+    * @return The Result objects of one response.
+    */
+   std::vector<Result> walk_step(WalkState &state);
+
+   /**
+    * @brief Starts an SNMP GET without waiting for the response.
+    *
+    * @param oids OIDs to retrieve.
+    * @return The identifier of the operation, reported back in its AsyncCompletion.
+    */
+   int async_get(std::vector<std::string> const &oids);
+
+   /**
+    * @brief Starts an SNMP GETNEXT without waiting for the response.
+    *
+    * @param oids OIDs to retrieve the successors of.
+    * @return The identifier of the operation, reported back in its AsyncCompletion.
+    */
+   int async_get_next(std::vector<std::string> const &oids);
+
+   /**
+    * @brief Starts an SNMP GETBULK without waiting for the response.
+    *
+    * @param oids OIDs to retrieve.
+    * @param non_repeaters Number of non-repeating varbinds.
+    * @param max_repetitions Maximum repetitions for the repeating varbinds.
+    * @return The identifier of the operation, reported back in its AsyncCompletion.
+    */
+   int async_bulk_get(std::vector<std::string> const &oids, int non_repeaters, int max_repetitions);
+
+   /**
+    * @brief Starts an SNMP SET without waiting for the response.
+    *
+    * @param oid_type_values Flat list of OID, type and value triples.
+    * @return The identifier of the operation, reported back in its AsyncCompletion.
+    */
+   int async_set(std::vector<std::string> const &oid_type_values);
+
+   /**
+    * @brief Starts a walk without waiting for its responses.
+    *
+    * Every response is handled as it arrives and the next request of the walk is sent right
+    * away; the operation completes once the whole walk is done.
+    *
+    * @param state Walk to perform, filled in like for walk_step().
+    * @return The identifier of the operation, reported back in its AsyncCompletion.
+    */
+   int async_walk(WalkState const &state);
+
+   /**
+    * @brief Reads the responses waiting on async_fd() and advances the operations they belong to.
+    *
+    * @return The operations that have finished, successfully or not.
+    */
+   std::vector<AsyncCompletion> async_read();
+
+   /**
+    * @brief Retransmits or times out the requests whose timeout has expired.
+    *
+    * @return The operations that have finished, successfully or not.
+    */
+   std::vector<AsyncCompletion> async_timeout();
+
+   /**
+    * @brief Fails every operation that has not finished yet.
+    *
+    * @param reason Message of the GenericErrorBase the operations fail with.
+    * @return The cancelled operations.
+    */
+   std::vector<AsyncCompletion> async_cancel(std::string const &reason);
+
+   /**
+    * @brief Returns the socket the responses to asynchronous requests arrive on.
+    *
+    * @return The file descriptor of the session transport, -1 if there is none.
+    */
+   int async_fd();
+
+   /**
+    * @brief Returns how long until async_timeout() has work to do.
+    *
+    * @return Seconds until the next retransmission or timeout; 0 if finished operations are
+    * waiting to be collected; -1 if no operation is in flight.
+    */
+   double async_next_timeout();
+
+   /**
+    * @brief Returns the security name of the localized USM user held by the session.
+    *
+    * @return The SNMPv3 security name, empty for SNMPv1/v2c.
+    */
+   std::string const &security_name() const;
+
+   /**
+    * @brief Returns the authoritative engine ID discovered for (or configured on) the session.
+    *
+    * @return The raw engine ID bytes, empty for SNMPv1/v2c.
+    */
+   std::string const &security_engine_id() const;
+
+   /**
+    * @brief Returns the transport address the engine of the session is cached under.
+    *
+    * @return The peer name of an SNMPv3 session, empty for SNMPv1/v2c.
+    */
+   std::string const &engine_cache_key() const;
+
+   /**
+    * @brief Returns whether the agent reported an unknown engine ID or a time window error.
+    *
+    * The engine is then dropped from the engine discovery cache and the handle must be replaced
+    * by a new one, which discovers the engine again.
+    *
+    * @return Whether the engine the session was opened with is stale.
+    */
+   bool engine_stale() const;
+
+   /**
+    * @brief Removes the localized USM user of this session from the Net-SNMP cache right away.
+    *
+    * Net-SNMP reuses a cached (security name, engine ID) user instead of localizing new keys,
+    * so this must be called when the credentials of a session change. Without it the user is
+    * only removed once the last handle sharing it is destroyed.
+    */
+   void forget_usm_user();
+
+  private:
+   using PduPtr = std::unique_ptr<netsnmp_pdu, SnmpPduDeleter>;
+
+   void run(Request &request);
+   bool exchange(Request &request);
+   std::string timeout_message() const;
+   int async_start(std::unique_ptr<Request> request);
+   void async_send(int id);
+   void async_complete(int id, std::exception_ptr error);
+   std::vector<AsyncCompletion> async_collect();
+   void async_wait();
+   std::vector<std::vector<Result>> pipeline(std::vector<std::unique_ptr<Request>> requests,
+                                             std::size_t max_outstanding);
+   std::vector<Result> pipelined_get(int command,
+                                     std::vector<std::string> const &oids,
+                                     char const *prog_name);
+   static int async_callback(
+       int operation, netsnmp_session *session, int reqid, netsnmp_pdu *pdu, void *magic);
+   WalkState bulk_walk_state(std::vector<std::string> const &roots,
+                             int max_repetitions,
+                             bool adaptive) const;
+   Result format_variable(netsnmp_variable_list const *vars) const;
+   void parse_oid(std::string const &name, oid *objid, size_t *objid_len) const;
+   void load_mibs() const;
+   void release_usm_user(bool force);
+   void check_engine_report();
+
+   std::string m_init_name;          ///< Application name passed to netsnmp_thread_init().
+   std::string m_peername;           ///< Peer name used in timeout messages.
+   std::string m_security_name;      ///< SNMPv3 security name, empty for SNMPv1/v2c.
+   std::string m_security_engine_id; ///< Raw SNMPv3 security engine ID, empty for SNMPv1/v2c.
+   bool m_holds_usm_user = false;    ///< Whether this handle holds a USM user reference.
+   bool m_usm = false;               ///< Whether requests read Net-SNMP's USM user list (SNMPv3).
+   std::string m_engine_cache_key;   ///< Engine discovery cache key, empty for SNMPv1/v2c.
+   std::atomic<bool> m_engine_stale{false}; ///< Whether the agent reported a stale engine.
+   OutputFormat m_output_format;
+   std::string m_mib_directories; ///< Directories of the -M option, searched once MIBs are needed.
+   std::string m_mib_modules;     ///< Modules of the -m option, loaded once MIBs are needed.
+   mutable std::atomic<unsigned> m_mibs_loaded{0}; ///< Initialization the modules were loaded in.
+   std::unique_ptr<void, SnmpSingleSessionCloser> m_sessp; ///< Opaque single-session pointer.
+   std::mutex m_mutex;         ///< Serializes requests on the single socket.
+   BatchLimits m_batch_limits; ///< Size limits of the GET, GETNEXT and SET requests.
+
+   std::map<int, std::unique_ptr<Request>> m_async_requests; ///< Unfinished operations by id.
+   std::map<int, int> m_async_reqids; ///< Operation id of each outstanding request by reqid.
+   std::vector<int> m_async_ready;    ///< Operations whose next request is due.
+   std::vector<AsyncCompletion> m_async_completed; ///< Finished, not yet collected operations.
+   /// Next operation id, shared by all handles so that the ids a SessionBase reports stay unique
+   /// when it reopens its handle.
+   inline static std::atomic<int> s_async_next_id{1};
+};
+
+#endif // SESSIONHANDLE_H
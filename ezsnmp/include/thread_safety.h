@@ -2,6 +2,7 @@
 #define THREAD_SAFETY_H
 
 #include <atomic>
+#include <condition_variable>
 #include <mutex>
 
 // Global mutex to protect Net-SNMP MIB parsing operations
@@ -20,20 +21,98 @@ extern std::mutex g_netsnmp_setup_mutex;
 // (last call) so that concurrent threads block instead of spin-waiting.
 extern std::mutex g_netsnmp_lifecycle_mutex;
 
+// Shared mutex that lets waiting exclusive owners go first: once lock() is waiting, new
+// lock_shared() calls block until it has been released. Meets the SharedMutex requirements, so
+// it works with std::unique_lock and std::shared_lock.
+class WriterPreferringSharedMutex {
+  public:
+   void lock();
+   void unlock();
+   void lock_shared();
+   void unlock_shared();
+
+   // Drops the lock() calls that were waiting when the process forked: in the child, the threads
+   // that made them are gone. Must be called by the exclusive owner.
+   void forget_waiting_writers();
+
+  private:
+   std::mutex m_mutex;
+   std::condition_variable m_changed;
+   int m_readers = 0;         // Shared owners
+   int m_waiting_writers = 0; // lock() calls waiting for the readers or the writer to leave
+   bool m_writer = false;     // Whether an exclusive owner holds the mutex
+};
+
+// Guards Net-SNMP's global SNMPv3 USM user list. SNMPv3 operations hold it shared while Net-SNMP
+// builds or parses a message, which looks their localized user up, but not while they wait for
+// the agent; adding a user to open an SNMPv3 session and removing one hold it exclusively, after
+// the engine ID was probed. Operations on the same user are serialized separately, so SNMPv3
+// sessions with different security names or engine IDs run in parallel.
+extern WriterPreferringSharedMutex g_netsnmp_usm_mutex;
+
 // Reference counter to track how many sessions are active
 // Only the first thread to use snmp will call init_snmp
-// Only the last thread to finish will call snmp_shutdown
+// Unless Net-SNMP is kept alive, the last thread to finish will call snmp_shutdown
 extern std::atomic<int> g_netsnmp_init_count;
 
 // Flag to track if init_snmp has been called
 extern std::atomic<bool> g_netsnmp_initialized;
 
+// Whether Net-SNMP stays initialized once the last reference is released (the default). Then
+// init_snmp, which parses every MIB on disk, runs once per process instead of once per burst of
+// sessions, and only netsnmp_library_shutdown() calls snmp_shutdown.
+extern std::atomic<bool> g_netsnmp_keep_alive;
+
+// Number of times init_snmp has been called.
+extern std::atomic<unsigned> g_netsnmp_init_generation;
+
+// Changes whenever the MIB tree Net-SNMP parsed changes: when init_snmp is called, and when MIB
+// modules are loaded afterwards. Data derived from the tree is out of date once it changes.
+extern std::atomic<unsigned> g_netsnmp_mib_generation;
+
+// The MIB modules init_snmp loads
+enum MibLoading {
+   MIB_LOADING_EAGER = 0,   // The MIBS modules (Net-SNMP's default list), when it is initialized
+   MIB_LOADING_LAZY = 1,    // None; each session loads them when it first needs a MIB
+   MIB_LOADING_NUMERIC = 2, // None at all, not even the MIB directories: numeric OIDs only
+};
+
+// The MibLoading Net-SNMP was last initialized with
+extern std::atomic<int> g_netsnmp_mib_loading;
+
 #include <string>
 
 // Increment reference count and initialize snmp if needed
 void netsnmp_thread_init(std::string const& app_name);
 
-// Decrement reference count and cleanup snmp if last thread
+// Decrement reference count and cleanup snmp if last thread and not kept alive
 void netsnmp_thread_cleanup(std::string const& app_name);
 
+// Sets whether Net-SNMP is kept alive. Keeping it alive initializes it now if needed; not keeping
+// it alive shuts it down now if it has no references left.
+void netsnmp_library_init(std::string const& app_name, bool keep_alive);
+
+// Sets the MibLoading of the next initialization. Shuts Net-SNMP down now if it was initialized
+// with another one and has no references left.
+void netsnmp_library_set_mib_loading(int mib_loading);
+
+// Stops keeping Net-SNMP alive and shuts it down: now if it has no references left, otherwise
+// when the last one is released.
+void netsnmp_library_shutdown();
+
+// Number of times this process is a fork child. Sessions opened in an earlier generation share
+// their socket with the parent process and must be reopened before use.
+extern std::atomic<unsigned> g_netsnmp_fork_generation;
+
+// Takes the global Net-SNMP locks before the process forks, so that the child does not inherit
+// them held by a thread that only exists in the parent. Waits for the running SNMPv3 operations.
+void netsnmp_prepare_fork();
+
+// Releases the locks taken by netsnmp_prepare_fork() in the parent.
+void netsnmp_after_fork_in_parent();
+
+// Releases the locks taken by netsnmp_prepare_fork() in the child and starts a new generation.
+// The Net-SNMP library state (MIB tree, USM users, reference count) is a valid copy and kept.
+void netsnmp_after_fork_in_child();
+
 #endif // THREAD_SAFETY_H
@@ -0,0 +1,68 @@
+#ifndef USMKEYCACHE_H
+#define USMKEYCACHE_H
+
+#include <cstddef>
+#include <string>
+
+/**
+ * @brief Builds the key a USM master key (Ku) is cached under.
+ *
+ * Ku only depends on the passphrase and on the hash of the authentication protocol, not on the
+ * engine ID, so one entry serves every agent sharing the credentials. The passphrase itself is
+ * not kept, only a digest of it.
+ *
+ * @param kind "auth" for the authentication key, "priv" for the privacy key.
+ * @param auth_protocol The authentication protocol as given to the session (e.g. "SHA-512").
+ * @param passphrase_digest Digest of the passphrase the key is derived from.
+ * @return The cache key.
+ */
+std::string usm_key_cache_key(std::string const& kind,
+                              std::string const& auth_protocol,
+                              std::string const& passphrase_digest);
+
+/**
+ * @brief Looks up a cached master key and marks it as the most recently used.
+ *
+ * @param key The cache key, see usm_key_cache_key().
+ * @param master_key Set to the raw Ku bytes on success.
+ * @return Whether the key was cached.
+ */
+bool usm_key_cache_lookup(std::string const& key, std::string& master_key);
+
+/**
+ * @brief Caches a master key, evicting the least recently used entry when the cache is full.
+ *
+ * Nothing is stored while the capacity is 0.
+ *
+ * @param key The cache key, see usm_key_cache_key().
+ * @param master_key The raw Ku bytes.
+ */
+void usm_key_cache_store(std::string const& key, std::string const& master_key);
+
+/**
+ * @brief Drops every cached key.
+ */
+void usm_key_cache_clear();
+
+/**
+ * @brief Sets the maximum number of cached keys, evicting the least recently used ones if needed.
+ *
+ * @param capacity The maximum number of entries; 0 disables the cache and drops every entry.
+ */
+void usm_key_cache_set_capacity(std::size_t capacity);
+
+/**
+ * @brief Returns the maximum number of cached keys.
+ *
+ * @return The capacity (default: 1024).
+ */
+std::size_t usm_key_cache_get_capacity();
+
+/**
+ * @brief Returns the number of cached keys.
+ *
+ * @return The number of entries.
+ */
+std::size_t usm_key_cache_size();
+
+#endif // USMKEYCACHE_H
@@ -0,0 +1,133 @@
+#ifndef VARBIND_H
+#define VARBIND_H
+
+#include <net-snmp/net-snmp-config.h>
+#include <net-snmp/net-snmp-includes.h>
+
+#include <cstddef>
+#include <memory>
+#include <string>
+#include <vector>
+
+#include "datatypes.h"
+#include "mibcache.h"
+
+/**
+ * @brief Output formatting captured from the -O options of a parsed argument list.
+ *
+ * Net-SNMP keeps output options in global default-store flags. A SessionHandle
+ * captures the values produced by its own arguments once and re-applies them
+ * only while formatting its own variables, so sessions with different options
+ * do not leak formatting into each other.
+ */
+struct OutputFormat {
+   int oid_output_format = 0;       ///< NETSNMP_DS_LIB_OID_OUTPUT_FORMAT (-O f / -O n).
+   int string_output_format = 0;    ///< NETSNMP_DS_LIB_STRING_OUTPUT_FORMAT (-O x).
+   bool print_numeric_enum = false; ///< NETSNMP_DS_LIB_PRINT_NUMERIC_ENUM (-O e).
+   bool numeric_timeticks = false;  ///< NETSNMP_DS_LIB_NUMERIC_TIMETICKS (-O t).
+};
+
+/**
+ * @brief Reads the output format currently set in the Net-SNMP default store.
+ *
+ * The caller must hold g_netsnmp_mib_mutex.
+ *
+ * @return The current output format.
+ */
+OutputFormat read_output_format();
+
+/**
+ * @brief Writes an output format to the Net-SNMP default store.
+ *
+ * The caller must hold g_netsnmp_mib_mutex.
+ *
+ * @param format The output format to apply.
+ */
+void apply_output_format(OutputFormat const &format);
+
+/**
+ * @brief Applies an output format for the lifetime of the scope and restores the previous one.
+ *
+ * The caller must hold g_netsnmp_mib_mutex for the whole lifetime of the scope.
+ */
+class OutputFormatScope {
+  public:
+   explicit OutputFormatScope(OutputFormat const &format);
+   ~OutputFormatScope();
+
+   OutputFormatScope(OutputFormatScope const &) = delete;
+   OutputFormatScope &operator=(OutputFormatScope const &) = delete;
+
+  private:
+   OutputFormat m_saved;
+};
+
+/**
+ * @brief Splits a printed OID into its base OID and index.
+ *
+ * Produces the same split as the OID_INDEX_RE* regular expressions used by parse_result(),
+ * without running them.
+ *
+ * @param name The printed OID, e.g. "IF-MIB::ifDescr.1" or ".1.3.6.1.2.1.2.2.1.2.1".
+ * @param oid Receives the base OID, e.g. "IF-MIB::ifDescr".
+ * @param index Receives the index, e.g. "1"; empty if the OID has no index.
+ */
+void split_oid_index(std::string const &name, std::string &oid, std::string &index);
+
+/**
+ * @brief Builds a Result straight from a received variable.
+ *
+ * The type is taken from vars->type and the converted value from vars->val, so the variable
+ * does not need to be printed and re-parsed. The OID is only printed through the MIB tree
+ * when symbolic output is requested. For the common types the textual value is rendered
+ * the first time it is read (see Result::get_value()); types whose converted value depends
+ * on the MIB (display hints, BITS, OIDs, ...) are printed right away and parsed with
+ * parse_result() as before.
+ *
+ * @param vars The variable to decode.
+ * @param format The output format of the session the variable was received on.
+ * @return The decoded Result.
+ */
+Result decode_variable(netsnmp_variable_list const *vars, OutputFormat const &format);
+
+/**
+ * @brief Appends received variables to a ResultTable.
+ *
+ * Values are copied from the variables as they are, without printing them. The index of a
+ * variable is made of the subidentifiers below the MIB leaf its OID belongs to (e.g. "1" for
+ * ifDescr.1, "2.192.168.1.1" for ipNetToMediaPhysAddress.2.192.168.1.1); if the OID is not below
+ * a leaf, only its last subidentifier. The last leaf is remembered, so the compiled MIB tree
+ * (see mib_tree()) is only searched when a walk moves on to another column.
+ */
+class ResultTableBuilder {
+  public:
+   /**
+    * @brief Constructor for ResultTableBuilder.
+    *
+    * @param table The table to append to; it must outlive the builder.
+    */
+   explicit ResultTableBuilder(ResultTable &table) : m_table(table) {}
+
+   /**
+    * @brief Appends a variable as a new row.
+    *
+    * @param vars The variable to append.
+    */
+   void append(netsnmp_variable_list const *vars);
+
+   /**
+    * @brief Returns the number of rows of the table.
+    *
+    * @return The number of rows.
+    */
+   std::size_t size() const { return m_table.size(); }
+
+  private:
+   std::size_t index_length(netsnmp_variable_list const *vars);
+
+   ResultTable &m_table;
+   std::vector<oid> m_leaf;               ///< OID of the last MIB leaf found, empty if none.
+   std::shared_ptr<MibTree const> m_tree; ///< The MIB tree, once a lookup needed it.
+};
+
+#endif // VARBIND_H
@@ -0,0 +1,49 @@
+#ifndef WALKCACHE_H
+#define WALKCACHE_H
+
+#include <cstddef>
+#include <cstdint>
+#include <string>
+#include <vector>
+
+#include "datatypes.h"
+
+/**
+ * @brief The last walk of a subtree, with the change indicator read right before it.
+ */
+struct WalkSnapshot {
+   uint64_t uptime = 0;         ///< sysUpTime.0 of the agent before the walk, in ticks.
+   std::string sentinel;        ///< Type and value of the change indicator before the walk.
+   std::vector<Result> results; ///< Results of the walk.
+};
+
+/**
+ * @brief Records the last walk of a subtree.
+ *
+ * @param key Identifies the target, the subtree and the change indicator of the walk.
+ * @param snapshot The walk, replacing any previous one of the key.
+ */
+void walk_snapshot_store(std::string const& key, WalkSnapshot const& snapshot);
+
+/**
+ * @brief Looks up the last walk of a subtree.
+ *
+ * @param key Identifies the target, the subtree and the change indicator of the walk.
+ * @param snapshot Set to the recorded walk on success.
+ * @return Whether a walk was recorded for the key.
+ */
+bool walk_snapshot_lookup(std::string const& key, WalkSnapshot& snapshot);
+
+/**
+ * @brief Forgets every recorded walk.
+ */
+void walk_snapshot_clear();
+
+/**
+ * @brief Returns the number of recorded walks.
+ *
+ * @return The number of keys with a recorded walk.
+ */
+std::size_t walk_snapshot_count();
+
+#endif // WALKCACHE_H
@@ -14,6 +14,7 @@
 %include <std_string.i>
 %include <std_vector.i>
 %include <typemaps.i>
+%include <attribute.i>
 
 %{
 #include <optional>
@@ -21,6 +22,8 @@
 #include <string>
 #include <vector>
 #include <type_traits>
+#include <cstring>
+#include <climits>
 #include "datatypes.h"
 
 // Forward-declare the SWIG helper function for std::string conversion
@@ -115,11 +118,394 @@ template<typename... Ts> class std::variant {};
   }
 }
 
+// Typemap for assigning a variant by POINTER, as the setter of Result.converted_value does.
+// Python ints take the narrowest alternative holding them; they read back the same either way.
+%typemap(in) std::variant<int, uint32_t, uint64_t, double, std::string, std::vector<unsigned char>>*
+    (std::variant<int, uint32_t, uint64_t, double, std::string, std::vector<unsigned char>> temp) {
+  if (PyBytes_Check($input)) {
+    char* data = nullptr;
+    Py_ssize_t size = 0;
+    PyBytes_AsStringAndSize($input, &data, &size);
+    temp = std::vector<unsigned char>(data, data + size);
+  } else if (PyFloat_Check($input)) {
+    temp = PyFloat_AsDouble($input);
+  } else if (PyLong_Check($input)) {
+    int overflow = 0;
+    long long const number = PyLong_AsLongLongAndOverflow($input, &overflow);
+    if (!overflow && number >= INT_MIN && number <= INT_MAX) {
+      temp = static_cast<int>(number);
+    } else if (!overflow && number >= 0 && number <= UINT32_MAX) {
+      temp = static_cast<uint32_t>(number);
+    } else {
+      unsigned long long const unsigned_number = PyLong_AsUnsignedLongLong($input);
+      if (PyErr_Occurred()) {
+        SWIG_fail;
+      }
+      temp = static_cast<uint64_t>(unsigned_number);
+    }
+  } else if (PyUnicode_Check($input)) {
+    Py_ssize_t size = 0;
+    char const* data = PyUnicode_AsUTF8AndSize($input, &size);
+    if (!data) {
+      SWIG_fail;
+    }
+    temp = std::string(data, size);
+  } else {
+    SWIG_exception_fail(SWIG_TypeError, "Expected an int, float, str or bytes converted value.");
+  }
+  $1 = &temp;
+}
+
 // Tell SWIG to generate the wrapper for our specific variant instantiation.
 %template(ConvertedValue) std::variant<int, uint32_t, uint64_t, double, std::string, std::vector<unsigned char>>;
 
 // ---- END: ROBUST VARIANT SUPPORT ----
 
+// Expose `value` as a property so results decoded straight from a variable only
+// render their textual value when Python reads it.
+%ignore Result::value;
+%ignore Result::LazyValue;
+%ignore Result::_lazy_value;
+%attributestring(Result, std::string, value, get_value, set_value);
+
+// ---- START: RESULT TABLE COLUMNS ----
+// The columns of a ResultTable reach Python through the list accessors below, built in one call
+// per column instead of one wrapped object per row.
+%ignore ResultTable::oid_subids;
+%ignore ResultTable::oid_offsets;
+%ignore ResultTable::index_lengths;
+%ignore ResultTable::type_codes;
+%ignore ResultTable::integer_values;
+%ignore ResultTable::text_values;
+%ignore ResultTable::text_offsets;
+%ignore ResultTable::append;
+%ignore ResultTable::is_integer_type;
+
+%{
+// Builds a list holding one item per row of a table.
+template <typename MakeItem>
+PyObject* result_table_list(ResultTable const& table, MakeItem make_item) {
+    PyObject* list = PyList_New(table.size());
+    if (list == NULL) {
+        return NULL;
+    }
+    for (size_t row = 0; row < table.size(); ++row) {
+        PyObject* item = make_item(row);
+        if (item == NULL) {
+            Py_DECREF(list);
+            return NULL;
+        }
+        PyList_SET_ITEM(list, row, item);
+    }
+    return list;
+}
+
+PyObject* result_table_string(std::string const& text) {
+    return PyUnicode_FromStringAndSize(text.data(), text.size());
+}
+
+// The value of a row: int for the integer types, str for IpAddress and OBJECT IDENTIFIER, None
+// for NULL and the exception values, bytes (the raw octets) for everything else.
+PyObject* result_table_value(ResultTable const& table, size_t row) {
+    uint8_t const type_code = table.type_codes[row];
+    if (table.has_integer_value(row)) {
+        if (type_code == 0x02) { // INTEGER
+            return PyLong_FromLongLong(static_cast<int64_t>(table.integer_values[row]));
+        }
+        return PyLong_FromUnsignedLongLong(table.integer_values[row]);
+    }
+
+    char const* text = table.text_values.data() + table.text_offsets[row];
+    Py_ssize_t const length = table.text_offsets[row + 1] - table.text_offsets[row];
+    switch (type_code) {
+        case 0x05: // NULL
+        case 0x80: // noSuchObject
+        case 0x81: // noSuchInstance
+        case 0x82: // endOfMibView
+            Py_RETURN_NONE;
+
+        case 0x06: // OBJECT IDENTIFIER
+        case 0x40: // IpAddress
+            return PyUnicode_FromStringAndSize(text, length);
+
+        default:
+            return PyBytes_FromStringAndSize(text, length);
+    }
+}
+
+// Wraps a freshly filled bytes object into a memoryview of the given struct format, without
+// copying it. The view is the only reference left to the bytes object.
+PyObject* result_table_view(PyObject* bytes, char const* format) {
+    if (bytes == NULL) {
+        return NULL;
+    }
+    PyObject* view = PyMemoryView_FromObject(bytes);
+    Py_DECREF(bytes);
+    if (view == NULL) {
+        return NULL;
+    }
+    PyObject* cast = PyObject_CallMethod(view, "cast", "s", format);
+    Py_DECREF(view);
+    return cast;
+}
+
+// The integer rows of a table as three parallel arrays: values (uint64, INTEGER in two's
+// complement), ASN.1 type codes (uint8) and index numbers (uint64).
+PyObject* result_table_numeric_arrays(ResultTable const& table) {
+    size_t count = 0;
+    for (size_t row = 0; row < table.size(); ++row) {
+        count += table.has_integer_value(row) ? 1 : 0;
+    }
+
+    PyObject* values = PyBytes_FromStringAndSize(NULL, count * sizeof(uint64_t));
+    PyObject* type_codes = PyBytes_FromStringAndSize(NULL, count);
+    PyObject* indexes = PyBytes_FromStringAndSize(NULL, count * sizeof(uint64_t));
+    if (values == NULL || type_codes == NULL || indexes == NULL) {
+        Py_XDECREF(values);
+        Py_XDECREF(type_codes);
+        Py_XDECREF(indexes);
+        return NULL;
+    }
+
+    char* value_data = PyBytes_AS_STRING(values);
+    char* type_code_data = PyBytes_AS_STRING(type_codes);
+    char* index_data = PyBytes_AS_STRING(indexes);
+    size_t item = 0;
+    for (size_t row = 0; row < table.size(); ++row) {
+        if (!table.has_integer_value(row)) {
+            continue;
+        }
+        uint64_t const index = table.index_number(row);
+        std::memcpy(value_data + item * sizeof(uint64_t), &table.integer_values[row],
+                    sizeof(uint64_t));
+        type_code_data[item] = static_cast<char>(table.type_codes[row]);
+        std::memcpy(index_data + item * sizeof(uint64_t), &index, sizeof(uint64_t));
+        ++item;
+    }
+
+    PyObject* value_view = result_table_view(values, "Q");
+    PyObject* type_code_view = result_table_view(type_codes, "B");
+    PyObject* index_view = result_table_view(indexes, "Q");
+    if (value_view == NULL || type_code_view == NULL || index_view == NULL) {
+        Py_XDECREF(value_view);
+        Py_XDECREF(type_code_view);
+        Py_XDECREF(index_view);
+        return NULL;
+    }
+    return Py_BuildValue("(NNN)", value_view, type_code_view, index_view);
+}
+%}
+
+// The accessors build Python objects and must keep the GIL
+%nothread ResultTable::oids;
+%nothread ResultTable::indexes;
+%nothread ResultTable::types;
+%nothread ResultTable::values;
+%nothread ResultTable::integers;
+%nothread ResultTable::type_code_bytes;
+%nothread ResultTable::numeric_arrays;
+
+%feature("python:slot", "sq_length", functype="lenfunc") ResultTable::__len__;
+
+%extend ResultTable {
+    /// Number of rows, so that len() works on a table.
+    size_t __len__() const {
+        return $self->size();
+    }
+
+    /// Dotted numeric OIDs of the rows, without their indexes.
+    PyObject* oids() const {
+        return result_table_list(*$self, [$self](size_t row) {
+            return result_table_string($self->oid(row));
+        });
+    }
+
+    /// Dotted numeric indexes of the rows.
+    PyObject* indexes() const {
+        return result_table_list(*$self, [$self](size_t row) {
+            return result_table_string($self->index(row));
+        });
+    }
+
+    /// Type names of the rows, as in Result.type.
+    PyObject* types() const {
+        return result_table_list(*$self, [$self](size_t row) {
+            return result_table_string($self->type(row));
+        });
+    }
+
+    /// Values of the rows, see result_table_value().
+    PyObject* values() const {
+        return result_table_list(*$self, [$self](size_t row) {
+            return result_table_value(*$self, row);
+        });
+    }
+
+    /// Integer column: the value of the integer rows (INTEGER signed), 0 for the others.
+    PyObject* integers() const {
+        return result_table_list(*$self, [$self](size_t row) {
+            if ($self->type_codes[row] == 0x02) {
+                return PyLong_FromLongLong(static_cast<int64_t>($self->integer_values[row]));
+            }
+            return PyLong_FromUnsignedLongLong($self->integer_values[row]);
+        });
+    }
+
+    /// ASN.1 type of every row, one byte per row.
+    PyObject* type_code_bytes() const {
+        return PyBytes_FromStringAndSize(reinterpret_cast<char const*>($self->type_codes.data()),
+                                         $self->type_codes.size());
+    }
+
+    /// Integer rows as (values, type_codes, indexes) memoryviews, see
+    /// result_table_numeric_arrays().
+    PyObject* numeric_arrays() const {
+        return result_table_numeric_arrays(*$self);
+    }
+}
+// ---- END: RESULT TABLE COLUMNS ----
+
+// ---- START: RESULT LISTS ----
+%{
+// Builds the tuple of a returned list of results in one pass once the call is over, moving each
+// Result into the object wrapping it instead of copying it.
+PyObject* result_list_tuple(std::vector<Result>& results, swig_type_info* result_type) {
+    PyObject* tuple = PyTuple_New(results.size());
+    if (tuple == NULL) {
+        return NULL;
+    }
+    for (size_t i = 0; i < results.size(); ++i) {
+        PyObject* item = SWIG_NewPointerObj(new Result(std::move(results[i])), result_type,
+                                            SWIG_POINTER_OWN);
+        if (item == NULL) {
+            Py_DECREF(tuple);
+            return NULL;
+        }
+        PyTuple_SET_ITEM(tuple, i, item);
+    }
+    return tuple;
+}
+%}
+
+// Applied after %template(_result_list), which otherwise converts a returned list by copying
+// every Result.
+%define RESULT_LIST_OUT_TYPEMAP
+%typemap(out) std::vector<Result>, std::vector<Result, std::allocator<Result> > {
+    $result = result_list_tuple($1, $descriptor(Result *));
+    if ($result == NULL) {
+        SWIG_fail;
+    }
+}
+%enddef
+// ---- END: RESULT LISTS ----
+
+// ---- START: TABLE ROWS ----
+// A TableRows reaches Python as a dictionary of rows, built in one pass over its cells.
+%ignore TableRows::cells;
+%ignore TableRows::cell_columns;
+%ignore TableRows::column_names;
+%ignore TableRows::index_offset;
+%ignore TableRows::NO_COLUMN;
+
+%{
+// The rows of a table, {index tuple: {column name: value}}; see result_table_value() for the
+// values.
+PyObject* table_rows_dict(TableRows const& table) {
+    ResultTable const& cells = table.cells;
+    PyObject* names = PyList_New(table.column_names.size());
+    PyObject* rows = PyDict_New();
+    if (names == NULL || rows == NULL) {
+        Py_XDECREF(names);
+        Py_XDECREF(rows);
+        return NULL;
+    }
+    for (size_t column = 0; column < table.column_names.size(); ++column) {
+        PyObject* name = result_table_string(table.column_names[column]);
+        if (name == NULL) {
+            goto fail;
+        }
+        PyList_SET_ITEM(names, column, name);
+    }
+
+    for (size_t cell = 0; cell < cells.size(); ++cell) {
+        uint32_t const column = table.cell_columns[cell];
+        size_t const begin = cells.oid_offsets[cell] + table.index_offset;
+        size_t const end = cells.oid_offsets[cell + 1];
+        if (column == TableRows::NO_COLUMN || begin >= end) {
+            continue;
+        }
+
+        PyObject* index = PyTuple_New(end - begin);
+        if (index == NULL) {
+            goto fail;
+        }
+        for (size_t i = begin; i < end; ++i) {
+            PyObject* subid = PyLong_FromUnsignedLong(cells.oid_subids[i]);
+            if (subid == NULL) {
+                Py_DECREF(index);
+                goto fail;
+            }
+            PyTuple_SET_ITEM(index, i - begin, subid);
+        }
+
+        PyObject* row = PyDict_GetItemWithError(rows, index);
+        if (row == NULL) {
+            row = PyErr_Occurred() ? NULL : PyDict_New();
+            if (row == NULL || PyDict_SetItem(rows, index, row) < 0) {
+                Py_XDECREF(row);
+                Py_DECREF(index);
+                goto fail;
+            }
+            Py_DECREF(row);
+        }
+        Py_DECREF(index);
+
+        PyObject* value = result_table_value(cells, cell);
+        if (value == NULL || PyDict_SetItem(row, PyList_GET_ITEM(names, column), value) < 0) {
+            Py_XDECREF(value);
+            goto fail;
+        }
+        Py_DECREF(value);
+    }
+
+    Py_DECREF(names);
+    return rows;
+
+fail:
+    Py_DECREF(names);
+    Py_DECREF(rows);
+    return NULL;
+}
+%}
+
+%nothread TableRows::rows;
+%nothread TableRows::columns;
+
+%extend TableRows {
+    /// Rows keyed by index tuple, see table_rows_dict().
+    PyObject* rows() const {
+        return table_rows_dict(*$self);
+    }
+
+    /// Names of the columns, in the order they were first retrieved.
+    PyObject* columns() const {
+        PyObject* list = PyList_New($self->column_names.size());
+        if (list == NULL) {
+            return NULL;
+        }
+        for (size_t column = 0; column < $self->column_names.size(); ++column) {
+            PyObject* name = result_table_string($self->column_names[column]);
+            if (name == NULL) {
+                Py_DECREF(list);
+                return NULL;
+            }
+            PyList_SET_ITEM(list, column, name);
+        }
+        return list;
+    }
+}
+// ---- END: TABLE ROWS ----
+
 // Include the header file
 %include "../include/datatypes.h"
 
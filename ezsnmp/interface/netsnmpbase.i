@@ -7,9 +7,13 @@
 
 %feature("python:annotations", "c");
 
+// Every call runs without the GIL (-threads), see sessionbase.i.
+%thread;
+
 // Tell SWIG how to handle our special return type(s) from C++
 %template(_string_list) std::vector<std::string>;
 %template(_result_list) std::vector<Result>;
+RESULT_LIST_OUT_TYPEMAP
 
 %include "snmpbulkget.i"
 %include "snmpbulkwalk.i"
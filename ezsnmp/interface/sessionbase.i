@@ -8,13 +8,40 @@
 %feature("kwargs") SessionBase::SessionBase;
 %feature("python:annotations", "c");
 
+// Every call runs without the GIL (-threads): the requests, the waits on the socket and the
+// decoding of the responses. Only the argument conversion and the final conversion of the
+// results hold it; the few calls building Python objects themselves are marked %nothread.
+%thread;
+
 // Tell SWIG how to handle our special return type(s) from C++
 %template(_string_list) std::vector<std::string>;
 %template(_result_list) std::vector<Result>;
+RESULT_LIST_OUT_TYPEMAP
+%template(_result_list_list) std::vector<std::vector<Result>>;
 
 %{
+#include "enginecache.h"
 #include "sessionbase.h"
+#include "pollerbase.h"
 %}
 
+// The failure of an asynchronous operation or resumable walk reaches Python through rethrow()
+%ignore AsyncCompletion::error;
+%ignore ResumableWalk::error;
+
+// Only the EngineCacheInfo struct is wrapped, the cache is reached through SessionBase
+%ignore engine_cache_store;
+%ignore engine_cache_lookup;
+%ignore engine_cache_forget;
+%ignore engine_cache_clear;
+%ignore engine_cache_set_ttl;
+%ignore engine_cache_get_ttl;
+%ignore engine_cache_info;
+
 // Now list ANSI C/C++ declarations
-%include "../include/sessionbase.h"
\ No newline at end of file
+%include "../include/enginecache.h"
+%include "../include/sessionbase.h"
+
+%template(_async_completion_list) std::vector<AsyncCompletion>;
+
+%include "../include/pollerbase.h"
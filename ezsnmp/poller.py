@@ -0,0 +1,426 @@
+import multiprocessing
+import os
+import time
+import zlib
+from collections import namedtuple
+from queue import Empty
+
+from .datatypes import Result
+from .exceptions import _handle_error, GenericError
+from .session import Session
+from .sessionbase import PollerBase
+
+PollResult = namedtuple(
+    "PollResult", ["job_id", "target", "operation", "results", "error"]
+)
+PollResult.__doc__ = """
+Outcome of a :class:`Poller` job.
+
+:ivar job_id: The identifier returned by :meth:`Poller.submit`.
+:ivar target: The target the job was submitted for, as given to :meth:`Poller.submit`.
+:ivar operation: The operation of the job, e.g. ``"get"`` or ``"bulk_walk"``.
+:ivar results: A tuple of Result objects, empty if the job failed.
+:ivar error: ``None``, or the ezsnmp exception the job failed with (e.g.
+    :class:`~ezsnmp.exceptions.TimeoutError`).
+"""
+
+# Longest time spent in C++ at once, so that KeyboardInterrupt is not held back for long
+_POLL_INTERVAL = 0.5
+
+
+class Poller(PollerBase):
+    """
+    Runs SNMP operations on many targets at once from a single thread.
+
+    Jobs (a target, an operation and its OIDs) are sent without waiting for their responses,
+    at most ``max_in_flight`` at a time. A single ``poll()`` loop in C++ waits on the sockets of
+    all the targets, handles the retransmissions and timeouts of each target using the
+    ``retries`` and ``timeout`` of its session, and starts queued jobs as slots free up. Results
+    are returned as they complete, without one Python thread per device.
+
+    A target is a :class:`~ezsnmp.session.Session`, a hostname or a dict of
+    :class:`~ezsnmp.session.Session` parameters (e.g. to give one device its own timeout). The
+    poller opens one session per hostname or dict, using the keyword arguments given to the
+    poller as defaults, and closes them in :meth:`close`. A job that fails does not stop the
+    others; its :class:`PollResult` carries the exception instead.
+
+    Sessions passed in must not be used with :class:`~ezsnmp.async_session.AsyncSession`
+    methods while they have jobs in flight.
+
+    Example::
+
+        from ezsnmp import Poller
+
+        jobs = [(host, "get", ["sysDescr.0", "sysUpTime.0"]) for host in hosts]
+        with Poller(max_in_flight=100, community="public", version=2, timeout=2) as poller:
+            for result in poller.run(jobs):
+                if result.error is None:
+                    print(result.target, result.results[0].value)
+    """
+
+    def __init__(self, max_in_flight=64, **session_kwargs):
+        """
+        Initialize the Poller object.
+
+        :param max_in_flight: Maximum number of jobs in flight at once. Defaults to ``64``.
+        :type max_in_flight: int
+        :param session_kwargs: Default :class:`~ezsnmp.session.Session` parameters of the
+            sessions opened for hostname and dict targets.
+        """
+        super().__init__(int(max_in_flight))
+        self._session_kwargs = session_kwargs
+        self._sessions = {}
+        self._jobs = {}
+
+    def __enter__(self):
+        """Enter the context manager, returning the poller object."""
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        """Exit the context manager, automatically closing the poller."""
+        self.close()
+        return None
+
+    @property
+    def max_in_flight(self):
+        """Maximum number of jobs in flight at once."""
+        return super()._get_max_in_flight()
+
+    @property
+    def pending(self):
+        """Number of jobs submitted and not returned yet."""
+        return super()._pending()
+
+    @property
+    def in_flight(self):
+        """Number of jobs sent and waiting for their responses."""
+        return super()._in_flight()
+
+    def submit(self, target, operation, oids=None):
+        """
+        Queue a job. It is sent by a later :meth:`poll` or :meth:`run` once a slot is free.
+
+        :param target: A Session, a hostname or a dict of Session parameters.
+        :type target: Union[Session, str, dict]
+        :param operation: One of ``"get"``, ``"get_next"``, ``"bulk_get"``, ``"set"``,
+            ``"walk"`` or ``"bulk_walk"``.
+        :type operation: str
+        :param oids: A single OID string or a list of OID strings; a flat list of OID, type and
+            value triples for ``"set"`` and a single OID for ``"walk"``. Defaults to ``None``,
+            which walks from ``"."`` for ``"walk"`` and is treated as an empty list otherwise.
+        :type oids: Union[str, list[str], None]
+        :return: The identifier of the job, reported back in its :class:`PollResult`.
+        :rtype: int
+
+        :raises GenericError: If the operation is unknown or a walk is given several OIDs.
+        :raises TypeError: If the target is not a Session, a hostname or a dict.
+
+        Example:
+            >>> from ezsnmp import Poller
+            >>> poller = Poller(community="public", version="2")
+            >>> job_id = poller.submit("localhost", "bulk_walk", "ifTable")
+        """
+
+        session = self._session(target)
+        if oids is None:
+            oids = ["."] if operation == "walk" else []
+        elif isinstance(oids, str):
+            oids = [oids]
+        max_repeaters = ""
+        if operation in ("bulk_get", "bulk_walk"):
+            max_repeaters = session._max_repeaters_to_num
+        try:
+            job_id = super()._submit(session, operation, list(oids), max_repeaters)
+        except Exception as e:
+            _handle_error(e)
+        # Keeps the session alive while the C++ poller refers to it
+        self._jobs[job_id] = (target, operation, session)
+        return job_id
+
+    def poll(self, timeout=None):
+        """
+        Send queued jobs and wait until at least one job has finished.
+
+        :param timeout: Maximum time to wait in seconds. Defaults to ``None``, which waits until a
+            job finishes; ``0`` only collects the jobs that have already finished.
+        :type timeout: Union[float, None]
+        :return: The results of the jobs that have finished, in the order they finished; empty if
+            the timeout expired first or no job is pending.
+        :rtype: list[PollResult]
+
+        Example:
+            >>> for result in poller.poll(timeout=1):
+            ...     print(result.job_id, result.error or result.results)
+        """
+
+        deadline = None if timeout is None else time.monotonic() + max(timeout, 0)
+        while True:
+            wait = _POLL_INTERVAL
+            if deadline is not None:
+                wait = min(wait, max(deadline - time.monotonic(), 0))
+            try:
+                completions = super()._poll(wait)
+            except Exception as e:
+                _handle_error(e)
+            if completions or not super()._pending():
+                return [self._result(completion) for completion in completions]
+            if deadline is not None and time.monotonic() >= deadline:
+                return []
+
+    def run(self, jobs=()):
+        """
+        Submit jobs and yield the result of every pending job as it finishes.
+
+        Every job ends, successfully or with an error, within the timeout and retries of its
+        target, so the generator always terminates.
+
+        :param jobs: ``(target, operation, oids)`` tuples, see :meth:`submit`. Defaults to no
+            new job.
+        :type jobs: Iterable[tuple]
+        :return: A generator of results, in the order the jobs finish.
+        :rtype: Iterator[PollResult]
+
+        Example:
+            >>> jobs = [("10.0.0.1", "get", "sysUpTime.0"), ("10.0.0.2", "walk", "system")]
+            >>> for result in poller.run(jobs):
+            ...     print(result.target, result.results)
+        """
+
+        for target, operation, oids in jobs:
+            self.submit(target, operation, oids)
+        while super()._pending():
+            yield from self.poll()
+
+    def close(self):
+        """Close the sessions opened by the poller. Their jobs in flight fail."""
+        for session in self._sessions.values():
+            session.close()
+        self._sessions.clear()
+
+    def _session(self, target):
+        """
+        Return the session of a target, opening it on first use.
+
+        :param target: A Session, a hostname or a dict of Session parameters.
+        :type target: Union[Session, str, dict]
+        :return: The session to send the jobs of the target on.
+        :rtype: Session
+        """
+
+        if isinstance(target, Session):
+            return target
+        key = _target_key(target)
+        session = self._sessions.get(key)
+        if session is None:
+            if isinstance(target, str):
+                kwargs = {**self._session_kwargs, "hostname": target}
+            else:
+                kwargs = {**self._session_kwargs, **target}
+            session = self._sessions[key] = Session(**kwargs)
+        return session
+
+    def _result(self, completion):
+        """
+        Turn a finished job into a PollResult.
+
+        :param completion: The AsyncCompletion of the job.
+        :return: The result of the job.
+        :rtype: PollResult
+        """
+
+        target, operation, _ = self._jobs.pop(completion.request_id)
+        try:
+            try:
+                completion.rethrow()
+            except Exception as e:
+                _handle_error(e)
+        except Exception as error:
+            return PollResult(completion.request_id, target, operation, (), error)
+        return PollResult(
+            completion.request_id, target, operation, tuple(completion.results), None
+        )
+
+
+def _target_key(target):
+    """
+    Return a hashable key identifying a hostname or dict target.
+
+    :param target: A hostname or a dict of Session parameters.
+    :type target: Union[str, dict]
+    :return: The key, equal for targets the poller opens the same session for.
+    """
+
+    if isinstance(target, str):
+        return target
+    if isinstance(target, dict):
+        return tuple(sorted((name, str(value)) for name, value in target.items()))
+    raise TypeError(f"Unsupported poller target: {target!r}")
+
+
+def _result_fields(result):
+    """Return the fields a Result is rebuilt from in another process."""
+    return (result.oid, result.index, result.type, result.value, result.converted_value)
+
+
+def _rebuild_result(fields):
+    """Rebuild a Result from the fields returned by :func:`_result_fields`."""
+    result = Result()
+    result.oid, result.index, result.type, result.value, result.converted_value = fields
+    return result
+
+
+def _process_poller_worker(jobs, max_in_flight, session_kwargs, queue):
+    """
+    Run a shard of ProcessPoller jobs with a Poller and stream the outcomes back.
+
+    :param jobs: ``(job_id, target, operation, oids)`` tuples.
+    :param max_in_flight: Maximum number of jobs in flight at once.
+    :param session_kwargs: Default Session parameters.
+    :param queue: Receives ``(job_id, result fields, error)`` for every job, then ``None``.
+    """
+
+    try:
+        with Poller(max_in_flight, **session_kwargs) as poller:
+            job_ids = {}
+            for job_id, target, operation, oids in jobs:
+                try:
+                    job_ids[poller.submit(target, operation, oids)] = job_id
+                except Exception as error:
+                    queue.put((job_id, (), error))
+            for result in poller.run():
+                fields = tuple(_result_fields(item) for item in result.results)
+                queue.put((job_ids[result.job_id], fields, result.error))
+    finally:
+        queue.put(None)
+
+
+class ProcessPoller:
+    """
+    Runs :class:`Poller` jobs in several worker processes at once.
+
+    The targets are sharded across ``processes`` worker processes, each running a
+    :class:`Poller` on its share; all jobs of a target go to the same process, which opens one
+    session for it. The responses are decoded in the workers, so the decoding of large polls
+    uses several CPUs, and the results are streamed back to this process as they complete.
+
+    Targets are hostnames or dicts of :class:`~ezsnmp.session.Session` parameters; sessions
+    cannot be passed to other processes. Every :meth:`run` starts its own worker processes.
+
+    Example::
+
+        from ezsnmp import ProcessPoller
+
+        jobs = [(host, "bulk_walk", "ifTable") for host in hosts]
+        with ProcessPoller(processes=8, community="public", version=2) as poller:
+            for result in poller.run(jobs):
+                if result.error is None:
+                    print(result.target, len(result.results))
+    """
+
+    def __init__(
+        self, processes=None, max_in_flight=64, start_method=None, **session_kwargs
+    ):
+        """
+        Initialize the ProcessPoller object.
+
+        :param processes: Number of worker processes. Defaults to ``None``, which uses
+            ``os.cpu_count()``.
+        :type processes: Union[int, None]
+        :param max_in_flight: Maximum number of jobs in flight at once in each worker. Defaults
+            to ``64``.
+        :type max_in_flight: int
+        :param start_method: The :mod:`multiprocessing` start method of the workers, e.g.
+            ``"spawn"``. Defaults to ``None``, which uses the default of the platform.
+        :type start_method: Union[str, None]
+        :param session_kwargs: Default :class:`~ezsnmp.session.Session` parameters of the
+            sessions the workers open.
+        """
+        self._processes = max(int(processes or os.cpu_count() or 1), 1)
+        self._max_in_flight = int(max_in_flight)
+        self._context = multiprocessing.get_context(start_method)
+        self._session_kwargs = session_kwargs
+        self._workers = []
+
+    def __enter__(self):
+        """Enter the context manager, returning the process poller object."""
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        """Exit the context manager, stopping any remaining worker process."""
+        self.close()
+        return None
+
+    @property
+    def processes(self):
+        """Number of worker processes."""
+        return self._processes
+
+    def run(self, jobs):
+        """
+        Run jobs in the worker processes and yield the result of each job as it finishes.
+
+        :param jobs: ``(target, operation, oids)`` tuples, see :meth:`Poller.submit`. The
+            targets are hostnames or dicts.
+        :type jobs: Iterable[tuple]
+        :return: A generator of results, in the order the jobs finish. The ``job_id`` of a
+            result is the position of its job in ``jobs``.
+        :rtype: Iterator[PollResult]
+
+        :raises TypeError: If a target is not a hostname or a dict.
+        :raises GenericError: If a worker process exits without reporting all its jobs.
+
+        Example:
+            >>> jobs = [("10.0.0.1", "get", "sysUpTime.0"), ("10.0.0.2", "walk", "system")]
+            >>> for result in poller.run(jobs):
+            ...     print(result.target, result.results)
+        """
+
+        jobs = list(jobs)
+        shards = [[] for _ in range(self._processes)]
+        for job_id, (target, operation, oids) in enumerate(jobs):
+            key = repr(_target_key(target)).encode()
+            shards[zlib.crc32(key) % self._processes].append(
+                (job_id, target, operation, oids)
+            )
+
+        queue = self._context.Queue()
+        self._workers = [
+            self._context.Process(
+                target=_process_poller_worker,
+                args=(shard, self._max_in_flight, self._session_kwargs, queue),
+                daemon=True,
+            )
+            for shard in shards
+            if shard
+        ]
+        for worker in self._workers:
+            worker.start()
+
+        try:
+            running = len(self._workers)
+            while running:
+                try:
+                    message = queue.get(timeout=_POLL_INTERVAL)
+                except Empty:
+                    if not any(worker.is_alive() for worker in self._workers):
+                        raise GenericError("A ProcessPoller worker exited unexpectedly")
+                    continue
+                if message is None:
+                    running -= 1
+                    continue
+                job_id, fields, error = message
+                target, operation, _ = jobs[job_id]
+                results = tuple(_rebuild_result(item) for item in fields)
+                yield PollResult(job_id, target, operation, results, error)
+            for worker in self._workers:
+                worker.join()
+        finally:
+            self.close()
+
+    def close(self):
+        """Stop the worker processes still running."""
+        for worker in self._workers:
+            if worker.is_alive():
+                worker.terminate()
+            worker.join()
+        self._workers = []
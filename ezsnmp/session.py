@@ -1,7 +1,167 @@
-from .sessionbase import SessionBase
+import os
+
+from .sessionbase import ResultTable, SessionBase
 from .exceptions import _handle_error, GenericError
 from typing import Union
 
+# Keep the Net-SNMP locks consistent across os.fork() (and multiprocessing's "fork" start
+# method), and make the sessions inherited by a child open sockets of their own.
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(
+        before=SessionBase._prepare_fork,
+        after_in_parent=SessionBase._after_fork_in_parent,
+        after_in_child=SessionBase._after_fork_in_child,
+    )
+
+
+# Values of the MibLoading enumeration of thread_safety.h
+_MIB_LOADING = {"eager": 0, "lazy": 1, "numeric": 2}
+
+
+def init(keep_alive=True, mib_cache_dir=None, mib_loading=None):
+    """
+    Initialize Net-SNMP for the process and set whether it stays initialized between sessions.
+
+    Net-SNMP parses the MIBs when it is initialized, unless told otherwise by ``mib_loading``.
+    Kept alive, which is the default even without calling this function, it is initialized once
+    per process and stays so until :func:`shutdown`, so that opening a session per device in a
+    loop does not parse the MIBs again for every device. Otherwise it is shut down whenever the
+    last session closes.
+
+    The MIB lookups ezsnmp makes itself (table columns, the indexes of walked variables) use a
+    compiled copy of the MIB tree. With ``mib_cache_dir``, the compiled tree is saved in that
+    directory, keyed by the sizes and modification times of the MIB files, and later processes
+    loading the same unchanged MIBs memory-map it instead of compiling it again.
+
+    ``mib_loading`` decides which MIB modules the initialization parses. ``"eager"`` parses the
+    modules of the ``MIBS`` environment variable (Net-SNMP's default list if unset). ``"lazy"``
+    parses none, and loads them the first time a session parses a symbolic OID or formats a
+    response with names, enumerations or display hints. ``"numeric"`` never loads any, nor scans
+    the MIB directories, for pollers using numeric OIDs only; sessions then print OIDs
+    numerically unless told otherwise. In every mode, the ``load_mibs`` and ``mib_directories`` of
+    a session are loaded on demand too, once per process, into the MIB tree all sessions share.
+
+    :param keep_alive: Whether to keep Net-SNMP initialized when no session uses it. If so, it
+        is initialized now rather than by the first session. Defaults to ``True``.
+    :type keep_alive: bool
+    :param mib_cache_dir: Directory of the compiled MIB tree cache, created if needed; ``""``
+        disables the cache on disk. Defaults to ``None``, which leaves the setting unchanged
+        (disabled until set).
+    :type mib_cache_dir: Union[str, None]
+    :param mib_loading: ``"eager"``, ``"lazy"`` or ``"numeric"``. Takes effect the next time
+        Net-SNMP is initialized, which is now unless a session is open. Defaults to ``None``,
+        which leaves the setting unchanged (``"eager"`` until set).
+    :type mib_loading: Union[str, None]
+    :raises ValueError: If ``mib_loading`` is not one of the above.
+
+    Example::
+
+        import ezsnmp
+
+        ezsnmp.init(mib_cache_dir="/var/cache/ezsnmp")
+        for host in hosts:
+            with ezsnmp.Session(hostname=host, community="public", version=2) as session:
+                print(session.get("sysUpTime.0")[0].value)
+        ezsnmp.shutdown()
+    """
+    if mib_loading is not None and mib_loading not in _MIB_LOADING:
+        raise ValueError(
+            f"mib_loading must be one of {', '.join(map(repr, _MIB_LOADING))}, not {mib_loading!r}"
+        )
+    try:
+        if mib_cache_dir is not None:
+            SessionBase._set_mib_cache_directory(os.fspath(mib_cache_dir))
+        if mib_loading is not None:
+            SessionBase._set_mib_loading(_MIB_LOADING[mib_loading])
+        SessionBase._init_library(bool(keep_alive))
+        if mib_cache_dir:
+            SessionBase._load_mib_tree()
+    except Exception as e:
+        _handle_error(e)
+
+
+def shutdown():
+    """
+    Shut Net-SNMP down, freeing its MIB tree, and stop keeping it initialized between sessions.
+
+    The shutdown happens now if no session is open, otherwise when the last one closes. A
+    session opened afterwards initializes Net-SNMP again; call :func:`init` to keep it alive
+    again.
+    """
+    try:
+        SessionBase._shutdown_library()
+    except Exception as e:
+        _handle_error(e)
+
+
+def translate(name, numeric=True):
+    """
+    Translate an OID between its symbolic and numeric forms, without a session.
+
+    Net-SNMP is initialized for the call if needed. Each thread remembers the OIDs it has
+    translated, so translating one again does not search the MIB tree nor wait for other threads
+    using it; the remembered translations are forgotten when Net-SNMP is initialized again.
+
+    :param name: The OID, symbolic (e.g. ``"IF-MIB::ifHCInOctets.1"``, ``"sysUpTime.0"``) or
+        numeric (e.g. ``".1.3.6.1.2.1.1.3.0"``).
+    :type name: str
+    :param numeric: Whether to return the numeric form rather than the symbolic one. Defaults
+        to ``True``.
+    :type numeric: bool
+    :return: The translated OID, e.g. ``".1.3.6.1.2.1.1.3.0"`` or ``"SNMPv2-MIB::sysUpTime.0"``.
+    :rtype: str
+    :raises GenericError: If the OID cannot be parsed.
+
+    Example::
+
+        import ezsnmp
+
+        ezsnmp.translate("sysUpTime.0")  # ".1.3.6.1.2.1.1.3.0"
+        ezsnmp.translate(".1.3.6.1.2.1.1.3.0", numeric=False)  # "SNMPv2-MIB::sysUpTime.0"
+    """
+    try:
+        return SessionBase._translate(str(name), bool(numeric))
+    except Exception as e:
+        _handle_error(e)
+
+
+def translate_oids(names, numeric=True):
+    """
+    Translate many OIDs between their symbolic and numeric forms, without a session.
+
+    The whole list is translated by a single call that runs without the GIL, and the OIDs the
+    calling thread has not translated before are looked up under one hold of the MIB lock, so
+    translating a long list costs little more than the MIB lookups themselves. With
+    ``numeric=True`` symbolic names are resolved to numeric OIDs, and with ``numeric=False``
+    numeric OIDs are named; either form is accepted in both directions. The results can be
+    passed as they are to :meth:`Session.get`, :meth:`Session.walk` and the other operations.
+
+    :param names: The OIDs, symbolic (e.g. ``"IF-MIB::ifHCInOctets.1"``) or numeric (e.g.
+        ``".1.3.6.1.2.1.31.1.1.1.6.1"``). A single string is translated as a list of one.
+    :type names: Union[List[str], str]
+    :param numeric: Whether to return the numeric forms rather than the symbolic ones. Defaults
+        to ``True``.
+    :type numeric: bool
+    :return: The translated OIDs, in the order of ``names``.
+    :rtype: List[str]
+    :raises GenericError: If one of the OIDs cannot be parsed.
+
+    Example::
+
+        import ezsnmp
+
+        oids = ezsnmp.translate_oids([f"ifHCInOctets.{i}" for i in range(1, 49)])
+        names = ezsnmp.translate_oids(oids, numeric=False)  # ["IF-MIB::ifHCInOctets.1", ...]
+    """
+    if isinstance(names, str):
+        names = [names]
+    try:
+        return list(
+            SessionBase._translate_oids([str(name) for name in names], bool(numeric))
+        )
+    except Exception as e:
+        _handle_error(e)
+
 
 class Session(SessionBase):
     """
@@ -21,6 +181,10 @@ class Session(SessionBase):
     - :meth:`bulk_walk` — SNMP bulk WALK (v2c/v3 only)
     - :meth:`set` — SNMP SET
 
+    A session inherited by a child process through ``os.fork()`` opens a socket of its own on
+    its next operation, and its asynchronous operations in flight fail in the child. A session
+    another thread is using while the process forks must not be used in the child.
+
     Example::
 
         from ezsnmp import Session
@@ -57,6 +221,9 @@ class Session(SessionBase):
         print_timeticks_numerically: bool = False,
         print_hex_strings: bool = False,
         set_max_repeaters_to_num: Union[str, int] = "10",
+        max_varbinds_per_pdu: int = 0,
+        max_pdu_size: int = 0,
+        max_outstanding_requests: int = 1,
     ):
         """Initialize the Session object with NetSNMP session parameters.
 
@@ -102,9 +269,11 @@ class Session(SessionBase):
         :type retries: Union[str, int]
         :param timeout: The timeout value in seconds.
         :type timeout: Union[str, int]
-        :param load_mibs: Comma-separated string of MIB modules to load.
+        :param load_mibs: Comma-separated string of MIB modules to load, or ``"ALL"``. They are
+            loaded when the session first needs a MIB, into the MIB tree shared by all sessions.
         :type load_mibs: str
-        :param mib_directories: Comma-separated string of directories to search for MIB files.
+        :param mib_directories: Comma-separated string of directories to search for MIB files,
+            in addition to the default ones.
         :type mib_directories: str
         :param print_enums_numerically: Whether to print enums numerically.
         :type print_enums_numerically: bool
@@ -118,6 +287,15 @@ class Session(SessionBase):
         :type print_hex_strings: bool
         :param set_max_repeaters_to_num: The maximum number of repeaters for GETBULK PDUs. Defaults to 10. Only applies to :meth:`bulk_get` and :meth:`bulk_walk`.
         :type set_max_repeaters_to_num: Union[str, int]
+        :param max_varbinds_per_pdu: The maximum number of OIDs sent in one GET, GETNEXT or SET
+            request; longer lists are split into several requests. Defaults to 0 (no limit).
+        :type max_varbinds_per_pdu: int
+        :param max_pdu_size: The maximum estimated size of one GET, GETNEXT or SET request in
+            bytes. Defaults to 0 (no limit).
+        :type max_pdu_size: int
+        :param max_outstanding_requests: The maximum number of GET or GETNEXT batches awaiting
+            a response at once, see :attr:`max_outstanding_requests`. Defaults to 1.
+        :type max_outstanding_requests: int
 
         """
 
@@ -165,6 +343,12 @@ class Session(SessionBase):
             # Track the closed state for __del__ and multiple closes
             self._closed = False
             self.__set_max_repeaters_to_num = str(set_max_repeaters_to_num)
+            if max_varbinds_per_pdu:
+                super()._set_max_varbinds_per_pdu(int(max_varbinds_per_pdu))
+            if max_pdu_size:
+                super()._set_max_pdu_size(int(max_pdu_size))
+            if int(max_outstanding_requests) != 1:
+                super()._set_max_outstanding_requests(int(max_outstanding_requests))
 
         except Exception as e:
             _handle_error(e)
@@ -609,6 +793,80 @@ class Session(SessionBase):
         """
         super()._set_max_repeaters_to_num(value)
 
+    @property
+    def _max_repeaters_to_num(self):
+        """Get the maximum number of repeaters the session was created with, which the bulk
+        requests apply before they are sent.
+
+        :type: str
+        """
+        return self.__set_max_repeaters_to_num
+
+    @property
+    def max_varbinds_per_pdu(self):
+        """Get the maximum number of OIDs sent in one GET, GETNEXT or SET request.
+
+        :type: int
+        """
+        return super()._get_max_varbinds_per_pdu()
+
+    @max_varbinds_per_pdu.setter
+    def max_varbinds_per_pdu(self, value):
+        """Set the maximum number of OIDs sent in one GET, GETNEXT or SET request.
+
+        Longer lists of OIDs are sent in several requests, one after another, and their results
+        are returned in the order of the OIDs as if a single request had been sent. This also
+        lifts the limit of 128 OIDs per call. A SET split this way is no longer atomic: the
+        requests sent before a failing one stay applied.
+
+        :param value: The maximum number of OIDs, ``0`` for no limit.
+        :type value: int
+        """
+        super()._set_max_varbinds_per_pdu(int(value))
+
+    @property
+    def max_pdu_size(self):
+        """Get the maximum estimated size of one GET, GETNEXT or SET request in bytes.
+
+        :type: int
+        """
+        return super()._get_max_pdu_size()
+
+    @max_pdu_size.setter
+    def max_pdu_size(self, value):
+        """Set the maximum estimated size of one GET, GETNEXT or SET request in bytes.
+
+        Like :attr:`max_varbinds_per_pdu`, for the encoded size of the request, e.g. to keep
+        requests within one Ethernet frame.
+
+        :param value: The maximum size in bytes, ``0`` for no limit.
+        :type value: int
+        """
+        super()._set_max_pdu_size(int(value))
+
+    @property
+    def max_outstanding_requests(self):
+        """Get the maximum number of GET or GETNEXT batches awaiting a response at once.
+
+        :type: int
+        """
+        return super()._get_max_outstanding_requests()
+
+    @max_outstanding_requests.setter
+    def max_outstanding_requests(self, value):
+        """Set the maximum number of GET or GETNEXT batches awaiting a response at once.
+
+        Above 1, the batches of a GET or GETNEXT split by :attr:`max_varbinds_per_pdu` or
+        :attr:`max_pdu_size` are pipelined on the session's socket: each is sent with its own
+        request ID without waiting for the responses to the previous ones, so a slow round trip
+        is paid once per ``value`` batches rather than once per batch. The results are still
+        returned in the order of the OIDs. The batches of a SET are always sent one at a time.
+
+        :param value: The maximum number of requests in flight; ``0`` counts as ``1``.
+        :type value: int
+        """
+        super()._set_max_outstanding_requests(int(value))
+
     def close(self):
         """Close the SNMP session and release resources."""
         if not self._closed:
@@ -618,6 +876,127 @@ class Session(SessionBase):
             except Exception as e:
                 _handle_error(e)
 
+    def engine_cache_info(self):
+        """
+        Describe the cached SNMPv3 engine of the session's target.
+
+        The engine ID, boots and time an SNMPv3 session discovers are cached per transport address
+        for the whole process. Sessions opened later for the same address reuse them instead of
+        probing the agent again, until the entry is older than the TTL (see
+        :meth:`set_engine_cache_ttl`) or the agent reports an unknown engine ID or a time window
+        error.
+
+        :return: ``None`` if no engine is cached for the target, otherwise a dictionary with the
+            keys ``address`` (str), ``engine_id`` (hex str), ``engine_boots`` (int),
+            ``engine_time`` (int, estimated for now), ``age`` (float, seconds since discovery)
+            and ``ttl`` (float, seconds).
+        :rtype: Union[dict, None]
+
+        Example:
+            >>> from ezsnmp import Session
+            >>> session = Session(hostname="localhost", version=3, security_username="initial")
+            >>> session.get("sysDescr.0")
+            >>> print(session.engine_cache_info()["engine_id"])
+        """
+
+        try:
+            info = super()._get_engine_cache_info()
+        except Exception as e:
+            _handle_error(e)
+        if not info.cached:
+            return None
+        return {
+            "address": info.address,
+            "engine_id": info.engine_id,
+            "engine_boots": info.engine_boots,
+            "engine_time": info.engine_time,
+            "age": info.age,
+            "ttl": info.ttl,
+        }
+
+    @staticmethod
+    def set_engine_cache_ttl(seconds):
+        """
+        Set how long discovered SNMPv3 engines are reused, for every session of the process.
+
+        :param seconds: The TTL in seconds. Defaults to 300 until set; ``0`` disables the cache.
+        :type seconds: float
+        """
+        SessionBase._set_engine_cache_ttl(float(seconds))
+
+    @staticmethod
+    def get_engine_cache_ttl():
+        """
+        Return how long discovered SNMPv3 engines are reused.
+
+        :return: The TTL in seconds.
+        :rtype: float
+        """
+        return SessionBase._get_engine_cache_ttl()
+
+    @staticmethod
+    def clear_engine_cache():
+        """Forget every discovered SNMPv3 engine, so the next sessions probe their agents again."""
+        SessionBase._clear_engine_cache()
+
+    def learned_max_repetitions(self):
+        """
+        Return the GETBULK max-repetitions the adaptive walks of the session's target settled on.
+
+        :return: ``None`` until an adaptive :meth:`bulk_walk` of the target has changed the
+            value, otherwise the max-repetitions the next adaptive walks start from.
+        :rtype: Union[int, None]
+        """
+        max_repetitions = super()._get_learned_max_repetitions()
+        return max_repetitions if max_repetitions > 0 else None
+
+    @staticmethod
+    def clear_max_repetitions_cache():
+        """Forget the max-repetitions learned by adaptive walks, for every target."""
+        SessionBase._clear_max_repetitions_cache()
+
+    @staticmethod
+    def set_usm_key_cache_capacity(capacity):
+        """
+        Set how many SNMPv3 master keys derived from passphrases are kept, for every session of
+        the process.
+
+        Deriving a key from a passphrase hashes a megabyte of it. The keys are cached per
+        passphrase and authentication protocol, so sessions opened with credentials seen before
+        skip the derivation whatever their target. The least recently used keys are dropped
+        first.
+
+        :param capacity: The maximum number of keys. Defaults to 1024 until set; ``0`` disables
+            the cache.
+        :type capacity: int
+        """
+        SessionBase._set_usm_key_cache_capacity(int(capacity))
+
+    @staticmethod
+    def get_usm_key_cache_capacity():
+        """
+        Return how many SNMPv3 master keys derived from passphrases are kept.
+
+        :return: The maximum number of keys.
+        :rtype: int
+        """
+        return SessionBase._get_usm_key_cache_capacity()
+
+    @staticmethod
+    def get_usm_key_cache_size():
+        """
+        Return the number of SNMPv3 master keys currently cached.
+
+        :return: The number of keys.
+        :rtype: int
+        """
+        return SessionBase._get_usm_key_cache_size()
+
+    @staticmethod
+    def clear_usm_key_cache():
+        """Forget every cached SNMPv3 master key, e.g. after passphrases were rotated."""
+        SessionBase._clear_usm_key_cache()
+
     def __repr__(self):
         """Return detailed string representation for debugging."""
         return (
@@ -672,6 +1051,9 @@ class Session(SessionBase):
             "print_timeticks_numerically",
             "print_hex_strings",
             "set_max_repeaters_to_num",
+            "max_varbinds_per_pdu",
+            "max_pdu_size",
+            "max_outstanding_requests",
         ]
 
         for prop in optional_props:
@@ -683,7 +1065,7 @@ class Session(SessionBase):
 
         return result
 
-    def walk(self, oid="."):
+    def walk(self, oid=".", as_columns=False, start_after=None, resumable=False):
         """
         Walks through the SNMP tree starting from the given OID.
         This method performs an SNMP walk operation, which retrieves a subtree of
@@ -692,10 +1074,22 @@ class Session(SessionBase):
         :param oid: The starting OID for the SNMP walk. Defaults to ``"."``
                 which starts the walk from the top of the OID tree.
         :type oid: str
+        :param as_columns: Return a ResultTable instead of Result objects, see
+            :meth:`bulk_walk`. Defaults to ``False``.
+        :type as_columns: bool
+        :param start_after: The ``resume_token`` of a failed resumable walk of the same OID, to
+            walk only the rest of it. Defaults to ``None``, which walks the whole subtree.
+        :type start_after: Union[str, None]
+        :param resumable: Keep what was retrieved when the walk fails: the exception raised has
+            a ``partial_results`` attribute holding the Result objects retrieved so far and a
+            ``resume_token`` attribute to pass as ``start_after`` to walk the rest. Implied by
+            ``start_after`` and ignored with ``as_columns``. Defaults to ``False``.
+        :type resumable: bool
 
         :return: A tuple of Result objects containing SNMP variable bindings. Each Result object has
-            attributes: oid (str), index (str), value (str), and type (str)
-        :rtype: tuple[Result]
+            attributes: oid (str), index (str), value (str), and type (str). A ResultTable if
+            ``as_columns`` is set.
+        :rtype: Union[tuple[Result], ResultTable]
 
         :raises ConnectionError: If the exception type is `ConnectionErrorBase`.
         :raises GenericError: If the exception type is `GenericErrorBase`.
@@ -720,14 +1114,33 @@ class Session(SessionBase):
             ...     print("Value:", item.value)
             ...     print("Type:", item.type)
             ...     print("---")
+
+        Example (resuming a failed walk):
+            >>> from ezsnmp.exceptions import TimeoutError
+            >>> try:
+            ...     results = session.walk("IF-MIB::ifTable", resumable=True)
+            ... except TimeoutError as e:
+            ...     rest = session.walk("IF-MIB::ifTable", start_after=e.resume_token)
+            ...     results = e.partial_results + rest
         """
 
+        if (resumable or start_after) and not as_columns:
+            return self._walk_resumably([oid] if oid else [], start_after)
         try:
+            if as_columns:
+                return super()._walk_columnar(oid)
             return super().walk(oid)
         except Exception as e:
             _handle_error(e)
 
-    def bulk_walk(self, oids=None):
+    def bulk_walk(
+        self,
+        oids=None,
+        as_columns=False,
+        adaptive=False,
+        start_after=None,
+        resumable=False,
+    ):
         """
         Performs a bulk SNMP walk (GETBULK-based) operation to retrieve a collection of values.
         The bulk walk operation is designed to return multiple OIDs in a single request,
@@ -737,12 +1150,50 @@ class Session(SessionBase):
 
         Accepts either a single OID string or a list of OID strings.
 
+        With ``as_columns=True`` the variables are returned as a ResultTable: the numeric OIDs,
+        indexes, types and values of all the rows are kept in a few contiguous C++ arrays
+        instead of one Result object per variable, and each accessor builds a whole column in
+        one call: ``len(table)``, ``table.oids()`` and ``table.indexes()`` (dotted numeric
+        strings), ``table.types()`` (the type names of Result.type), ``table.values()`` (int for
+        the integer types, str for IpAddress and OBJECT IDENTIFIER, bytes for octet strings,
+        ``None`` for NULL and the exception values), ``table.integers()`` (the integer column,
+        0 for other rows) and ``table.type_code_bytes()`` (one ASN.1 type byte per row). The
+        index of a variable is made of the subidentifiers below its MIB column (its last
+        subidentifier if the MIB is unknown).
+
+        ``table.numeric_arrays()`` returns the rows of the integer types (INTEGER, Counter32,
+        Gauge32, TimeTicks, Counter64 and UInteger32) as three parallel buffer-protocol
+        memoryviews, which ``numpy.frombuffer`` wraps without copying: ``values`` (uint64,
+        format ``"Q"``; INTEGER values in two's complement, so view them as int64),
+        ``type_codes`` (uint8, format ``"B"``, e.g. ``0x46`` for Counter64) and ``indexes``
+        (uint64, format ``"Q"``; the last subidentifier of each OID, which is the whole index of
+        tables such as ifTable, 0 for scalars).
+
+        With ``adaptive=True`` the max-repetitions of the GETBULK requests is tuned to the agent
+        during the walk instead of staying at :attr:`set_max_repeaters_to_num`: it doubles while
+        the responses come back full, fast and small enough for a single Ethernet frame, shrinks
+        to what fits when they get larger, and halves when the agent answers tooBig or stops
+        answering. The value reached is remembered per target for the whole process, and the
+        next adaptive walks of the target start from it (see :meth:`learned_max_repetitions`).
+
         :param oids: A single OID string or a list of base OIDs to start the walks from.
             Defaults to ``None``, which is treated as an empty list.
         :type oids: Union[str, list[str], None]
+        :param as_columns: Return a ResultTable instead of Result objects. Defaults to ``False``.
+        :type as_columns: bool
+        :param adaptive: Tune the max-repetitions to the agent. Defaults to ``False``.
+        :type adaptive: bool
+        :param start_after: The ``resume_token`` of a failed resumable walk of the same OIDs:
+            the OIDs before the one it belongs to are skipped and that one is walked after it.
+            Defaults to ``None``, which walks everything.
+        :type start_after: Union[str, None]
+        :param resumable: Keep what was retrieved when the walk fails, see :meth:`walk`.
+            Implied by ``start_after`` and ignored with ``as_columns``. Defaults to ``False``.
+        :type resumable: bool
         :return: A tuple of Result objects containing SNMP variable bindings. Each Result object has
-            attributes: oid (str), index (str), value (str), and type (str)
-        :rtype: tuple[Result]
+            attributes: oid (str), index (str), value (str), and type (str). A ResultTable if
+            ``as_columns`` is set.
+        :rtype: Union[tuple[Result], ResultTable]
 
         :raises ConnectionError: If the exception type is `ConnectionErrorBase`.
         :raises GenericError: If the exception type is `GenericErrorBase`.
@@ -771,19 +1222,399 @@ class Session(SessionBase):
             ...     print("Value:", item.value)
             ...     print("Type:", item.type)
             ...     print("---")
+
+        Example (columns):
+            >>> table = session.bulk_walk("IF-MIB::ifHCInOctets", as_columns=True)
+            >>> octets = dict(zip(table.indexes(), table.integers()))
+
+        Example (counter rates with NumPy):
+            >>> import numpy as np
+            >>> values, type_codes, indexes = table.numeric_arrays()
+            >>> before = np.frombuffer(values, dtype=np.uint64)
+            >>> table = session.bulk_walk("IF-MIB::ifHCInOctets", as_columns=True)
+            >>> after = np.frombuffer(table.numeric_arrays()[0], dtype=np.uint64)
+            >>> rates = (after - before) / interval
+
+        Example (adaptive max-repetitions):
+            >>> results = session.bulk_walk("IF-MIB::ifTable", adaptive=True)
+            >>> print(session.learned_max_repetitions())
         """
 
+        if (resumable or start_after) and not as_columns:
+            if oids is None:
+                oids = []
+            elif isinstance(oids, str):
+                oids = [oids]
+            return self._walk_resumably(oids, start_after, bulk=True, adaptive=adaptive)
         try:
             if oids is None:
                 oids = []
             self.set_max_repeaters_to_num = self.__set_max_repeaters_to_num
+            if as_columns:
+                if isinstance(oids, str):
+                    oids = [oids]
+                return super()._bulk_walk_columnar(oids, adaptive)
+            if adaptive:
+                if isinstance(oids, str):
+                    oids = [oids]
+                return super()._bulk_walk_adaptive(oids)
             return super().bulk_walk(oids)
         except Exception as e:
             _handle_error(e)
         finally:
             self.set_max_repeaters_to_num = ""
 
-    def get(self, oids=None):
+    def _walk_resumably(self, oids, start_after, bulk=False, adaptive=False):
+        """
+        Runs a resumable walk and returns its results, or raises its error with the results
+        retrieved so far as ``partial_results`` and the point to resume from as
+        ``resume_token``.
+        """
+
+        walk = None
+        try:
+            if bulk:
+                self.set_max_repeaters_to_num = self.__set_max_repeaters_to_num
+            walk = super()._resumable_walk(oids, start_after or "", bulk, adaptive)
+            walk.rethrow()
+            return tuple(walk.results)
+        except Exception as e:
+            try:
+                _handle_error(e)
+            except Exception as error:
+                error.partial_results = tuple(walk.results) if walk is not None else ()
+                error.resume_token = (
+                    walk.resume_token if walk is not None else start_after or ""
+                )
+                raise
+        finally:
+            if bulk:
+                self.set_max_repeaters_to_num = ""
+
+    def bulk_walk_table(self, columns):
+        """
+        Walks the columns of a table together and returns its rows.
+
+        Unlike :meth:`bulk_walk`, which walks its OIDs one after another, every GETBULK request
+        carries one variable per column, so all the columns advance in lock-step and a table
+        takes as many round trips as its longest column instead of the sum of all of them. Each
+        request returns :attr:`set_max_repeaters_to_num` rows (10 by default); a column is left
+        out of the following requests once it leaves its subtree.
+
+        Requires SNMPv2c or SNMPv3. GETBULK is not supported in SNMPv1.
+
+        :param columns: A single column OID string or a list of column OIDs.
+        :type columns: Union[str, list[str]]
+        :return: The rows keyed by index, in the order they were retrieved. Each row maps the
+            columns, as given in ``columns``, to their Result object; a column missing from a
+            row has no entry.
+        :rtype: dict[str, dict[str, Result]]
+
+        :raises ConnectionError: If the exception type is `ConnectionErrorBase`.
+        :raises GenericError: If the exception type is `GenericErrorBase`.
+        :raises PacketError: If the exception type is `PacketErrorBase`.
+        :raises ParseError: If the exception type is `ParseErrorBase`.
+        :raises TimeoutError: If the exception type is `TimeoutErrorBase`.
+        :raises Exception: If the exception type does not match any of the above, the original
+            exception `e` is raised.
+
+        Example:
+            >>> from ezsnmp import Session
+            >>> session = Session(hostname="localhost", community="public", version="2")
+            >>> rows = session.bulk_walk_table(["ifDescr", "ifHCInOctets", "ifHCOutOctets"])
+            >>> for index, row in rows.items():
+            ...     print(index, row["ifDescr"].value, row["ifHCInOctets"].value)
+        """
+
+        if isinstance(columns, str):
+            columns = [columns]
+        try:
+            self.set_max_repeaters_to_num = self.__set_max_repeaters_to_num
+            column_results = super()._bulk_walk_table(columns)
+        except Exception as e:
+            _handle_error(e)
+        finally:
+            self.set_max_repeaters_to_num = ""
+
+        rows = {}
+        for column, results in zip(columns, column_results):
+            for result in results:
+                rows.setdefault(result.index, {})[column] = result
+        return rows
+
+    def get_table(self, table_oid):
+        """
+        Walks a conceptual table and returns its rows keyed by index.
+
+        The table is walked with GETBULK requests (GETNEXT for SNMPv1, see
+        :attr:`set_max_repeaters_to_num`) and the rows are assembled in C++ from the numeric
+        OIDs of the variables, without building a Result object for each of them. The index of
+        a row is the tuple of the subidentifiers following the column in the OID, e.g. ``(1,)``
+        for ``ifName.1`` or ``(1, 4, 192, 168, 1, 1)`` for an ``ipAddressTable`` row; the
+        columns are named by their MIB labels, or by their numbers if the MIB is not loaded.
+
+        Values are int for the integer types, str for IpAddress and OBJECT IDENTIFIER, bytes for
+        octet strings (e.g. ``b"eth0"``) and ``None`` for NULL, like ``ResultTable.values()``.
+
+        :param table_oid: OID of the table (e.g. ``"IF-MIB::ifXTable"``) or of its entry
+            (e.g. ``"IF-MIB::ifXEntry"``).
+        :type table_oid: str
+        :return: The rows in the order they were retrieved, each mapping column names to values;
+            a column missing from a row has no entry.
+        :rtype: dict[tuple[int, ...], dict[str, Union[int, str, bytes, None]]]
+
+        :raises ConnectionError: If the exception type is `ConnectionErrorBase`.
+        :raises GenericError: If the exception type is `GenericErrorBase`.
+        :raises PacketError: If the exception type is `PacketErrorBase`.
+        :raises ParseError: If the exception type is `ParseErrorBase`.
+        :raises TimeoutError: If the exception type is `TimeoutErrorBase`.
+        :raises Exception: If the exception type does not match any of the above, the original
+            exception `e` is raised.
+
+        Example:
+            >>> from ezsnmp import Session
+            >>> session = Session(hostname="localhost", community="public", version="2")
+            >>> rows = session.get_table("IF-MIB::ifXTable")
+            >>> for (if_index,), row in rows.items():
+            ...     print(if_index, row["ifName"].decode(), row["ifHCInOctets"])
+        """
+
+        try:
+            self.set_max_repeaters_to_num = self.__set_max_repeaters_to_num
+            return super()._get_table(table_oid).rows()
+        except Exception as e:
+            _handle_error(e)
+        finally:
+            self.set_max_repeaters_to_num = ""
+
+    def delta_walk(self, oid, sentinel=None, bulk=False):
+        """
+        Walks a subtree only if it changed since the last delta walk of the same target.
+
+        A single GET of ``sysUpTime.0`` and of a change indicator comes first. As long as the
+        indicator keeps its value and the agent has not restarted, the results of the last walk
+        are returned again without walking; otherwise the subtree is walked and the new results
+        are kept for the next delta walk. The results are kept per target, subtree and
+        indicator for the whole process, see :meth:`clear_walk_snapshots`.
+
+        Without ``sentinel`` the indicator of the standard MIB is used: ``sysORLastChange`` for
+        sysORTable, ``ifStackLastChange`` for ifStackTable and ``entLastChangeTime`` for the
+        ENTITY-MIB tables. No indicator is assumed for subtrees with counters or gauges: the
+        interfaces group and ifXTable, for one, need a ``sentinel``, since
+        ``ifTableLastChange`` does not move when ``ifInOctets`` does.
+
+        :param oid: The OID to walk.
+        :type oid: str
+        :param sentinel: An OID whose value changes whenever the subtree does. Defaults to
+            ``None``, which uses the indicator of the standard MIB.
+        :type sentinel: Union[str, None]
+        :param bulk: Walk with GETBULK requests (see :meth:`bulk_walk`) instead of GETNEXT.
+            Defaults to ``False``.
+        :type bulk: bool
+        :return: The Result objects of the subtree, like :meth:`walk`.
+        :rtype: tuple[Result]
+
+        :raises ConnectionError: If the exception type is `ConnectionErrorBase`.
+        :raises GenericError: If no sentinel is given and no indicator is known for ``oid``, or
+            if the exception type is `GenericErrorBase`.
+        :raises PacketError: If the exception type is `PacketErrorBase`.
+        :raises ParseError: If the exception type is `ParseErrorBase`.
+        :raises TimeoutError: If the exception type is `TimeoutErrorBase`.
+        :raises Exception: If the exception type does not match any of the above, the original
+            exception `e` is raised.
+
+        Example:
+            >>> from ezsnmp import Session
+            >>> session = Session(hostname="localhost", community="public", version="2")
+            >>> inventory = session.delta_walk("ENTITY-MIB::entPhysicalTable", bulk=True)
+            >>> aliases = session.delta_walk("IF-MIB::ifAlias", sentinel="myConfigVersion.0")
+        """
+
+        try:
+            self.set_max_repeaters_to_num = self.__set_max_repeaters_to_num
+            return super()._delta_walk(oid, sentinel or "", bulk)
+        except Exception as e:
+            _handle_error(e)
+        finally:
+            self.set_max_repeaters_to_num = ""
+
+    @staticmethod
+    def clear_walk_snapshots():
+        """Forget the results kept by :meth:`delta_walk`, for every target."""
+        SessionBase._clear_walk_snapshots()
+
+    @staticmethod
+    def get_walk_snapshot_count():
+        """
+        Return the number of walks kept by :meth:`delta_walk`.
+
+        :return: The number of (target, subtree, indicator) combinations with kept results.
+        :rtype: int
+        """
+        return SessionBase._get_walk_snapshot_count()
+
+    def parallel_walk(
+        self, oid=".", workers=4, split_points=None, bulk=False, pipelined=False
+    ):
+        """
+        Walks a subtree as several consecutive OID ranges at the same time.
+
+        The subtree is split at ``split_points``: each range holds the OIDs after one split
+        point and up to the next, the first one starting at ``oid`` and the last one running to
+        the end of the subtree. Up to ``workers`` ranges are walked at a time, each on its own
+        session opened with the same parameters, which cuts the time of a large walk on agents
+        that answer several requests at once. Without split points the first branches of the
+        subtree are sampled with GETNEXT requests and split evenly between the workers.
+
+        Net-SNMP keeps a single copy of each SNMPv3 user, which sessions of their own would
+        take turns with, so SNMPv3 ranges are always pipelined.
+
+        Pipelined, the ranges are all walked on this session's socket instead: up to
+        ``workers`` of them have a request in flight at a time, and the responses are matched
+        to their range by request ID. This needs no extra sessions or threads.
+
+        :param oid: The OID to walk. Defaults to ``"."`` like :meth:`walk`.
+        :type oid: str
+        :param workers: The maximum number of ranges walked at the same time; values below 1
+            walk one range at a time. Defaults to ``4``.
+        :type workers: int
+        :param split_points: Ascending OIDs within ``oid``, each ending a range (e.g.
+            ``["ifInOctets", "ifOutOctets"]``). Defaults to ``None``, which samples them.
+        :type split_points: Union[list[str], None]
+        :param bulk: Walk the ranges with GETBULK requests (see :meth:`bulk_walk`) instead of
+            GETNEXT. Defaults to ``False``.
+        :type bulk: bool
+        :param pipelined: Walk the ranges with outstanding requests on this session's socket
+            rather than on sessions of their own. Defaults to ``False``; SNMPv3 ranges are
+            pipelined either way.
+        :type pipelined: bool
+        :return: The Result objects of the whole subtree in OID order, like :meth:`walk`.
+        :rtype: tuple[Result]
+
+        :raises ConnectionError: If the exception type is `ConnectionErrorBase`.
+        :raises GenericError: If the exception type is `GenericErrorBase`.
+        :raises PacketError: If the exception type is `PacketErrorBase`.
+        :raises ParseError: If the exception type is `ParseErrorBase`.
+        :raises TimeoutError: If the exception type is `TimeoutErrorBase`.
+        :raises Exception: If the exception type does not match any of the above, the original
+            exception `e` is raised.
+
+        Example:
+            >>> from ezsnmp import Session
+            >>> session = Session(hostname="localhost", community="public", version="2")
+            >>> results = session.parallel_walk("1.3.6.1.2.1", workers=8, bulk=True)
+            >>> print(len(results))
+        """
+
+        try:
+            self.set_max_repeaters_to_num = self.__set_max_repeaters_to_num
+            return super()._parallel_walk(
+                oid, workers, list(split_points or []), bulk, pipelined
+            )
+        except Exception as e:
+            _handle_error(e)
+        finally:
+            self.set_max_repeaters_to_num = ""
+
+    def iter_walk(self, oid="."):
+        """
+        Walks through the SNMP tree starting from the given OID, yielding results as they arrive.
+        Unlike :meth:`walk`, which returns once the whole subtree has been retrieved, each
+        GETNEXT response is yielded as soon as it is received. Only one response is held in
+        memory at a time and breaking out of the loop stops the walk without further requests.
+
+        :param oid: The starting OID for the SNMP walk. Defaults to ``"."``
+                which starts the walk from the top of the OID tree.
+        :type oid: str
+
+        :return: A generator of Result objects containing SNMP variable bindings, in the same
+            order :meth:`walk` returns them.
+        :rtype: Iterator[Result]
+
+        :raises ConnectionError: If the exception type is `ConnectionErrorBase`.
+        :raises GenericError: If the exception type is `GenericErrorBase`.
+        :raises NoSuchInstanceError: If the exception type is `NoSuchInstanceErrorBase`.
+        :raises NoSuchNameError: If the exception type is `NoSuchNameErrorBase`.
+        :raises NoSuchObjectError: If the exception type is `NoSuchObjectErrorBase`.
+        :raises PacketError: If the exception type is `PacketErrorBase`.
+        :raises ParseError: If the exception type is `ParseErrorBase`.
+        :raises TimeoutError: If the exception type is `TimeoutErrorBase`.
+        :raises UndeterminedTypeError: If the exception type is `UndeterminedTypeErrorBase`.
+        :raises UnknownObjectIDError: If the exception type is `UnknownObjectIDErrorBase`.
+        :raises Exception: If the exception type does not match any of the above, the original
+            exception `e` is raised.
+
+        Example:
+            >>> from ezsnmp import Session
+            >>> session = Session(hostname="localhost", community="public", version="2")
+            >>> for item in session.iter_walk("1.3.6.1.2.1.4.21"):
+            ...     print("OID:", item.oid, "Value:", item.value)
+            ...     if item.index == "10.0.0.0":
+            ...         break
+        """
+
+        try:
+            cursor = super()._walk_cursor(oid)
+            while not cursor.done():
+                yield from cursor.next_batch()
+        except Exception as e:
+            _handle_error(e)
+
+    def iter_bulk_walk(self, oids=None):
+        """
+        Performs a bulk SNMP walk (GETBULK-based), yielding results as they arrive.
+        Unlike :meth:`bulk_walk`, which returns once every subtree has been retrieved, the
+        variables of each GETBULK response are yielded as soon as it is received. Only one
+        response is held in memory at a time and breaking out of the loop stops the walk
+        without further requests.
+
+        Requires SNMPv2c or SNMPv3. GETBULK is not supported in SNMPv1.
+
+        Accepts either a single OID string or a list of OID strings.
+
+        :param oids: A single OID string or a list of base OIDs to start the walks from.
+            Defaults to ``None``, which is treated as an empty list.
+        :type oids: Union[str, list[str], None]
+        :return: A generator of Result objects containing SNMP variable bindings, in the same
+            order :meth:`bulk_walk` returns them.
+        :rtype: Iterator[Result]
+
+        :raises ConnectionError: If the exception type is `ConnectionErrorBase`.
+        :raises GenericError: If the exception type is `GenericErrorBase`.
+        :raises NoSuchInstanceError: If the exception type is `NoSuchInstanceErrorBase`.
+        :raises NoSuchNameError: If the exception type is `NoSuchNameErrorBase`.
+        :raises NoSuchObjectError: If the exception type is `NoSuchObjectErrorBase`.
+        :raises PacketError: If the exception type is `PacketErrorBase`.
+        :raises ParseError: If the exception type is `ParseErrorBase`.
+        :raises TimeoutError: If the exception type is `TimeoutErrorBase`.
+        :raises UndeterminedTypeError: If the exception type is `UndeterminedTypeErrorBase`.
+        :raises UnknownObjectIDError: If the exception type is `UnknownObjectIDErrorBase`.
+        :raises Exception: If the exception type does not match any of the above, the original
+            exception `e` is raised.
+
+        Example:
+            >>> from ezsnmp import Session
+            >>> session = Session(hostname="localhost", community="public", version="2")
+            >>> for item in session.iter_bulk_walk(["1.3.6.1.2.1.2.2.1.2", "1.3.6.1.2.1.31"]):
+            ...     print("OID:", item.oid, "Value:", item.value)
+        """
+
+        try:
+            if oids is None:
+                oids = []
+            elif isinstance(oids, str):
+                oids = [oids]
+            self.set_max_repeaters_to_num = self.__set_max_repeaters_to_num
+            try:
+                cursor = super()._bulk_walk_cursor(oids)
+            finally:
+                self.set_max_repeaters_to_num = ""
+            while not cursor.done():
+                yield from cursor.next_batch()
+        except Exception as e:
+            _handle_error(e)
+
+    def get(self, oids=None, as_columns=False):
         """
         Performs an SNMP GET operation to retrieve values for one or more OIDs.
 
@@ -792,9 +1623,13 @@ class Session(SessionBase):
         :param oids: A single OID string or a list of Object Identifiers (OIDs) to retrieve
             values from. Defaults to ``None``, which is treated as an empty list.
         :type oids: Union[str, list[str], None]
+        :param as_columns: Return a ResultTable instead of Result objects, see
+            :meth:`bulk_walk`. Defaults to ``False``.
+        :type as_columns: bool
         :return: A tuple of Result objects containing SNMP variable bindings with attributes:
-            oid (str), index (str), value (str), and type (str)
-        :rtype: tuple[Result]
+            oid (str), index (str), value (str), and type (str). A ResultTable if
+            ``as_columns`` is set.
+        :rtype: Union[tuple[Result], ResultTable]
 
         :raises GenericError: If the exception type is `GenericErrorBase`.
         :raises ConnectionError: If the exception type is `ConnectionErrorBase`.
@@ -829,7 +1664,11 @@ class Session(SessionBase):
             if oids is None:
                 oids = []
             if not oids:
-                return ()
+                return ResultTable() if as_columns else ()
+            if as_columns:
+                if isinstance(oids, str):
+                    oids = [oids]
+                return super()._get_columnar(oids)
             return super().get(oids)
         except Exception as e:
             _handle_error(e)
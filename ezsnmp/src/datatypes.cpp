@@ -140,9 +140,112 @@ std::string Result::_converted_value_to_string() const {
 
 std::string Result::_to_string() const {
    return "oid: " + this->oid + ", index: " + this->index + ", type: " + this->type +
-          ", value: " + this->value + ", converted_value: " + _converted_value_to_string();
+          ", value: " + get_value() + ", converted_value: " + _converted_value_to_string();
+}
+
+std::string const& Result::LazyValue::get() {
+   std::call_once(m_rendered, [this]() { m_text = render(); });
+   return m_text;
+}
+
+std::string const& Result::get_value() const {
+   return _lazy_value ? _lazy_value->get() : this->value;
+}
+
+void Result::set_value(std::string const& new_value) {
+   this->value = new_value;
+   _lazy_value.reset();
 }
 
 void Result::update_converted_value() {
-   this->converted_value = _make_converted_value(this->type, this->value);
-}
\ No newline at end of file
+   this->converted_value = _make_converted_value(this->type, get_value());
+}
+
+namespace {
+
+// Prints the subidentifiers [begin, end) as dotted text, each preceded by a dot.
+std::string dotted_subids(std::vector<uint32_t> const& subids, uint64_t begin, uint64_t end) {
+   std::string text;
+   text.reserve((end - begin) * 4);
+   for (uint64_t i = begin; i < end; ++i) {
+      text += '.';
+      text += std::to_string(subids[i]);
+   }
+   return text;
+}
+
+} // namespace
+
+std::string ResultTable::oid(std::size_t row) const {
+   return dotted_subids(oid_subids, oid_offsets[row], oid_offsets[row + 1] - index_lengths[row]);
+}
+
+std::string ResultTable::index(std::size_t row) const {
+   uint64_t const end = oid_offsets[row + 1];
+   std::string const text = dotted_subids(oid_subids, end - index_lengths[row], end);
+   return text.empty() ? text : text.substr(1);
+}
+
+uint32_t ResultTable::index_number(std::size_t row) const {
+   return index_lengths[row] == 0 ? 0 : oid_subids[oid_offsets[row + 1] - 1];
+}
+
+std::string ResultTable::type(std::size_t row) const {
+   // ASN.1 and SMI tags, see asn1.h of Net-SNMP
+   switch (type_codes[row]) {
+      case 0x02:
+         return "INTEGER";
+      case 0x03:
+         return "BITS";
+      case 0x04:
+         return "STRING";
+      case 0x05:
+         return "NULL";
+      case 0x06:
+         return "OID";
+      case 0x40:
+         return "IpAddress";
+      case 0x41:
+         return "Counter32";
+      case 0x42:
+         return "Gauge32";
+      case 0x43:
+         return "Timeticks";
+      case 0x44:
+         return "Opaque";
+      case 0x46:
+         return "Counter64";
+      case 0x47:
+         return "UInteger32";
+      case 0x80:
+         return "NOSUCHOBJECT";
+      case 0x81:
+         return "NOSUCHINSTANCE";
+      case 0x82:
+         return "ENDOFMIBVIEW";
+      default:
+         return "UNKNOWN";
+   }
+}
+
+bool ResultTable::has_integer_value(std::size_t row) const {
+   return is_integer_type(type_codes[row]);
+}
+
+std::string ResultTable::text_value(std::size_t row) const {
+   return text_values.substr(text_offsets[row], text_offsets[row + 1] - text_offsets[row]);
+}
+
+bool ResultTable::is_integer_type(uint8_t type_code) {
+   switch (type_code) {
+      case 0x02: // INTEGER
+      case 0x41: // Counter32
+      case 0x42: // Gauge32
+      case 0x43: // TimeTicks
+      case 0x46: // Counter64
+      case 0x47: // UInteger32
+         return true;
+      default:
+         return false;
+   }
+}
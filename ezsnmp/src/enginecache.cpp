@@ -0,0 +1,112 @@
+#include "enginecache.h"
+
+#include <algorithm>
+#include <chrono>
+#include <cstdio>
+#include <map>
+#include <mutex>
+#include <string>
+
+namespace {
+
+using Clock = std::chrono::steady_clock;
+
+struct Entry {
+   std::string engine_id;
+   unsigned int engine_boots;
+   unsigned int engine_time;
+   Clock::time_point discovered;
+};
+
+std::mutex g_engine_cache_mutex;
+std::map<std::string, Entry> g_engine_cache;
+double g_engine_cache_ttl = 300;
+
+// Returns the fresh entry of an address, dropping a stale one. Must be called with
+// g_engine_cache_mutex held.
+Entry const* find_entry(std::string const& address, double& age) {
+   auto const entry = g_engine_cache.find(address);
+   if (entry == g_engine_cache.end()) {
+      return nullptr;
+   }
+   age = std::chrono::duration<double>(Clock::now() - entry->second.discovered).count();
+   if (age >= g_engine_cache_ttl) {
+      g_engine_cache.erase(entry);
+      return nullptr;
+   }
+   return &entry->second;
+}
+
+} // namespace
+
+void engine_cache_store(std::string const& address,
+                        std::string const& engine_id,
+                        unsigned int engine_boots,
+                        unsigned int engine_time) {
+   std::lock_guard<std::mutex> lock(g_engine_cache_mutex);
+   if (g_engine_cache_ttl <= 0 || engine_id.empty()) {
+      return;
+   }
+   g_engine_cache[address] = Entry{engine_id, engine_boots, engine_time, Clock::now()};
+}
+
+bool engine_cache_lookup(std::string const& address,
+                         std::string& engine_id,
+                         unsigned int& engine_boots,
+                         unsigned int& engine_time) {
+   std::lock_guard<std::mutex> lock(g_engine_cache_mutex);
+   double age = 0;
+   Entry const* entry = find_entry(address, age);
+   if (entry == nullptr) {
+      return false;
+   }
+   engine_id = entry->engine_id;
+   engine_boots = entry->engine_boots;
+   engine_time = entry->engine_time + static_cast<unsigned int>(age);
+   return true;
+}
+
+void engine_cache_forget(std::string const& address) {
+   std::lock_guard<std::mutex> lock(g_engine_cache_mutex);
+   g_engine_cache.erase(address);
+}
+
+void engine_cache_clear() {
+   std::lock_guard<std::mutex> lock(g_engine_cache_mutex);
+   g_engine_cache.clear();
+}
+
+void engine_cache_set_ttl(double seconds) {
+   std::lock_guard<std::mutex> lock(g_engine_cache_mutex);
+   g_engine_cache_ttl = std::max(seconds, 0.0);
+   if (g_engine_cache_ttl == 0) {
+      g_engine_cache.clear();
+   }
+}
+
+double engine_cache_get_ttl() {
+   std::lock_guard<std::mutex> lock(g_engine_cache_mutex);
+   return g_engine_cache_ttl;
+}
+
+EngineCacheInfo engine_cache_info(std::string const& address) {
+   std::lock_guard<std::mutex> lock(g_engine_cache_mutex);
+   EngineCacheInfo info;
+   info.address = address;
+   info.ttl = g_engine_cache_ttl;
+
+   double age = 0;
+   Entry const* entry = find_entry(address, age);
+   if (entry != nullptr) {
+      info.cached = true;
+      for (unsigned char const byte : entry->engine_id) {
+         char digits[3];
+         std::snprintf(digits, sizeof(digits), "%02x", byte);
+         info.engine_id += digits;
+      }
+      info.engine_boots = entry->engine_boots;
+      info.engine_time = entry->engine_time + static_cast<unsigned int>(age);
+      info.age = age;
+   }
+   return info;
+}
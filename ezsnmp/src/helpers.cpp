@@ -322,6 +322,36 @@ void remove_v3_user_from_cache(std::string const &security_name_str,
    }
 }
 
+// This is a helper to remove the V3 user owned by a single persistent session
+void remove_v3_user_for_engine(std::string const &security_name_str,
+                               std::string const &security_engine_id_str) {
+   std::lock_guard<std::mutex> lock(g_netsnmp_mib_mutex);
+   struct usmUser *actUser = usm_get_userList();
+
+   while (actUser != NULL) {
+      struct usmUser *next_user = actUser->next;
+      std::string const act_user_sec_name =
+          actUser->secName != NULL ? std::string(actUser->secName) : std::string();
+      std::string const act_user_engine_id =
+          actUser->engineID != NULL
+              ? std::string(reinterpret_cast<char const *>(actUser->engineID), actUser->engineIDLen)
+              : std::string();
+
+      if (!act_user_sec_name.empty() && security_name_str == act_user_sec_name &&
+          security_engine_id_str == act_user_engine_id) {
+         if (actUser->engineID != NULL && actUser->engineIDLen > 0) {
+            free_enginetime(actUser->engineID, actUser->engineIDLen);
+         }
+         usm_remove_user(actUser);
+         actUser->next = NULL;
+         actUser->prev = NULL;
+         usm_free_user(actUser);
+      }
+
+      actUser = next_user;
+   }
+}
+
 std::string print_objid_to_string(oid const *objid, size_t objidlen) {
    /* number of subidentifiers */
    u_char *buf = NULL;
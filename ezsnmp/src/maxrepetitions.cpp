@@ -0,0 +1,84 @@
+#include "maxrepetitions.h"
+
+#include <algorithm>
+#include <cstddef>
+#include <map>
+#include <mutex>
+#include <string>
+
+namespace {
+
+std::mutex g_max_repetitions_cache_mutex;
+std::map<std::string, int> g_max_repetitions_cache;
+
+} // namespace
+
+constexpr int MaxRepetitionsTuner::LIMIT;
+constexpr std::size_t MaxRepetitionsTuner::RESPONSE_BUDGET;
+
+MaxRepetitionsTuner::MaxRepetitionsTuner(int max_repetitions)
+    : m_max_repetitions(std::min(std::max(max_repetitions, 1), LIMIT)) {}
+
+int MaxRepetitionsTuner::max_repetitions() const { return m_max_repetitions; }
+
+void MaxRepetitionsTuner::response_received(std::size_t varbinds,
+                                            std::size_t response_size,
+                                            double latency) {
+   m_answered = true;
+   bool const fast = m_min_latency < 0 || latency <= 2 * m_min_latency;
+   if (m_min_latency < 0 || latency < m_min_latency) {
+      m_min_latency = latency;
+   }
+   if (varbinds == 0 || response_size == 0) {
+      return;
+   }
+
+   // How many variables of this size fit the budget
+   std::size_t const variable_size = std::max<std::size_t>(response_size / varbinds, 1);
+   int const fitting = static_cast<int>(
+       std::min<std::size_t>(std::max<std::size_t>(RESPONSE_BUDGET / variable_size, 1), LIMIT));
+
+   if (response_size > RESPONSE_BUDGET) {
+      m_max_repetitions = std::min(m_max_repetitions, fitting);
+   } else if (fast && varbinds >= static_cast<std::size_t>(m_max_repetitions)) {
+      // A short response means the walk or the agent's own limit was reached, not ours
+      m_max_repetitions = std::max(m_max_repetitions, std::min(2 * m_max_repetitions, fitting));
+   }
+}
+
+bool MaxRepetitionsTuner::too_big() {
+   if (m_max_repetitions <= 1) {
+      return false;
+   }
+   m_max_repetitions /= 2;
+   return true;
+}
+
+bool MaxRepetitionsTuner::timed_out() {
+   if (!m_answered || m_max_repetitions <= 1) {
+      return false;
+   }
+   m_answered = false;
+   m_max_repetitions /= 2;
+   return true;
+}
+
+void max_repetitions_cache_store(std::string const& address, int max_repetitions) {
+   std::lock_guard<std::mutex> lock(g_max_repetitions_cache_mutex);
+   g_max_repetitions_cache[address] = max_repetitions;
+}
+
+bool max_repetitions_cache_lookup(std::string const& address, int& max_repetitions) {
+   std::lock_guard<std::mutex> lock(g_max_repetitions_cache_mutex);
+   auto const entry = g_max_repetitions_cache.find(address);
+   if (entry == g_max_repetitions_cache.end()) {
+      return false;
+   }
+   max_repetitions = entry->second;
+   return true;
+}
+
+void max_repetitions_cache_clear() {
+   std::lock_guard<std::mutex> lock(g_max_repetitions_cache_mutex);
+   g_max_repetitions_cache.clear();
+}
@@ -0,0 +1,560 @@
+#include "mibcache.h"
+
+#include <algorithm>
+#include <atomic>
+#include <cstdio>
+#include <cstdlib>
+#include <cstring>
+#include <filesystem>
+#include <fstream>
+#include <iterator>
+#include <mutex>
+#include <random>
+#include <string>
+#include <system_error>
+#include <unordered_map>
+#include <vector>
+
+#ifndef _WIN32
+#include <fcntl.h>
+#include <sys/mman.h>
+#include <sys/stat.h>
+#include <unistd.h>
+#endif
+
+#include "thread_safety.h"
+
+namespace {
+
+char const MAGIC[8] = {'E', 'Z', 'M', 'I', 'B', 'T', 'R', 'E'};
+constexpr uint32_t FORMAT_VERSION = 1;
+
+// Directory of the cache on disk, and the tree mib_tree() returns with the g_netsnmp_mib_generation
+// it was built for
+std::mutex g_mib_tree_mutex;
+std::string g_mib_cache_directory;
+std::shared_ptr<MibTree const> g_mib_tree;
+std::atomic<unsigned> g_mib_tree_generation(0);
+
+std::size_t padded(std::size_t size) { return (size + 3) & ~std::size_t(3); }
+
+template <typename T>
+void append(std::vector<char>& buffer, T const* items, std::size_t count) {
+   char const* bytes = reinterpret_cast<char const*>(items);
+   buffer.insert(buffer.end(), bytes, bytes + count * sizeof(T));
+}
+
+// FNV-1a, stable across processes unlike std::hash
+uint64_t stable_hash(std::string const& text) {
+   uint64_t hash = 14695981039346656037ULL;
+   for (unsigned char c : text) {
+      hash = (hash ^ c) * 1099511628211ULL;
+   }
+   return hash;
+}
+
+// Gathers the nodes, enumerations, INDEX names and strings of a tree being compiled
+class Compiler {
+  public:
+   void add_peers(struct tree* peers, uint32_t parent) {
+      uint32_t previous = MibTree::NONE;
+      for (struct tree* peer = peers; peer != nullptr; peer = peer->next_peer) {
+         uint32_t const position = static_cast<uint32_t>(nodes.size());
+         if (previous != MibTree::NONE) {
+            nodes[previous].next_peer = position;
+         } else if (parent != MibTree::NONE) {
+            nodes[parent].first_child = position;
+         }
+         previous = position;
+
+         MibTree::Node node{};
+         node.subid = static_cast<uint32_t>(peer->subid);
+         node.parent = parent;
+         node.first_child = MibTree::NONE;
+         node.next_peer = MibTree::NONE;
+         node.label = add_string(peer->label);
+         char module[1024] = "";
+         node.module = add_string(module_name(peer->modid, module));
+         node.hint = add_string(peer->hint);
+         node.type = peer->type;
+         node.enums = static_cast<uint32_t>(enums.size());
+         for (struct enum_list* item = peer->enums; item != nullptr; item = item->next) {
+            enums.push_back({item->value, add_string(item->label)});
+         }
+         node.enum_count = static_cast<uint32_t>(enums.size()) - node.enums;
+         node.indexes = static_cast<uint32_t>(index_names.size());
+         for (struct index_list* item = peer->indexes; item != nullptr; item = item->next) {
+            index_names.push_back(add_string(item->ilabel));
+         }
+         node.index_count = static_cast<uint32_t>(index_names.size()) - node.indexes;
+         nodes.push_back(node);
+
+         add_peers(peer->child_list, position);
+      }
+   }
+
+   std::vector<MibTree::Node> nodes;
+   std::vector<MibTree::Enumeration> enums;
+   std::vector<uint32_t> index_names;
+   std::vector<char> strings;
+
+  private:
+   uint32_t add_string(char const* text) {
+      if (text == nullptr) {
+         return MibTree::NONE;
+      }
+      auto const known = m_offsets.find(text);
+      if (known != m_offsets.end()) {
+         return known->second;
+      }
+      uint32_t const offset = static_cast<uint32_t>(strings.size());
+      strings.insert(strings.end(), text, text + std::strlen(text) + 1);
+      m_offsets.emplace(text, offset);
+      return offset;
+   }
+
+   std::unordered_map<std::string, uint32_t> m_offsets;
+};
+
+// The MIB directories and modules mib_load_modules() loaded since Net-SNMP was initialized,
+// guarded by g_netsnmp_mib_mutex
+struct LoadedMibs {
+   unsigned init_generation = 0;
+   std::vector<std::string> directories;
+   std::vector<std::string> modules;
+};
+
+LoadedMibs g_loaded_mibs;
+
+// The caller must hold g_netsnmp_mib_mutex
+LoadedMibs& loaded_on_demand() {
+   unsigned const generation = g_netsnmp_init_generation.load();
+   if (g_loaded_mibs.init_generation != generation) {
+      g_loaded_mibs = LoadedMibs();
+      g_loaded_mibs.init_generation = generation;
+   }
+   return g_loaded_mibs;
+}
+
+// The items of a list separated as in MIBDIRS and MIBS, or by commas. A leading '+', which adds
+// the items to the default ones, is dropped.
+std::vector<std::string> split_list(std::string const& list) {
+   char const SEPARATORS[] = {ENV_SEPARATOR_CHAR, ',', '\0'};
+   std::vector<std::string> items;
+   std::size_t start = list.empty() || list[0] != '+' ? 0 : 1;
+   while (start < list.size()) {
+      std::size_t end = list.find_first_of(SEPARATORS, start);
+      if (end == std::string::npos) {
+         end = list.size();
+      }
+      if (end > start) {
+         items.push_back(list.substr(start, end - start));
+      }
+      start = end + 1;
+   }
+   return items;
+}
+
+// The modules MIBS names, or those Net-SNMP loads by default
+std::string default_modules() {
+   char const* const mibs = std::getenv("MIBS");
+#ifdef NETSNMP_DEFAULT_MIBS
+   return mibs != nullptr ? mibs : NETSNMP_DEFAULT_MIBS;
+#else
+   return mibs != nullptr ? mibs : "";
+#endif
+}
+
+// The MIB directories and modules Net-SNMP loads
+void loaded_mibs(std::string& directories, std::string& modules) {
+   std::lock_guard<std::mutex> lock(g_netsnmp_mib_mutex);
+   char const* const mib_directories = netsnmp_get_mib_directory();
+   directories = mib_directories != nullptr ? mib_directories : "";
+   modules = g_netsnmp_mib_loading.load() == MIB_LOADING_EAGER ? default_modules() : "";
+   LoadedMibs const& loaded = loaded_on_demand();
+   for (std::string const& directory : loaded.directories) {
+      directories += (directories.empty() ? "" : std::string(1, ENV_SEPARATOR_CHAR)) + directory;
+   }
+   for (std::string const& module : loaded.modules) {
+      modules += (modules.empty() ? "" : std::string(1, ENV_SEPARATOR_CHAR)) + module;
+   }
+}
+
+} // namespace
+
+struct MibTree::Header {
+   char magic[8];
+   uint32_t version;
+   uint32_t key_size;
+   uint32_t node_count;
+   uint32_t enum_count;
+   uint32_t index_count;
+   uint32_t string_size;
+};
+
+constexpr uint32_t MibTree::NONE;
+
+std::shared_ptr<MibTree const> MibTree::compile(std::string const& key) {
+   Compiler compiler;
+   compiler.add_peers(get_tree_head(), NONE);
+
+   std::vector<uint32_t> labelled;
+   labelled.reserve(compiler.nodes.size());
+   for (uint32_t node = 0; node < compiler.nodes.size(); ++node) {
+      if (compiler.nodes[node].label != NONE) {
+         labelled.push_back(node);
+      }
+   }
+   char const* const strings = compiler.strings.data();
+   std::stable_sort(labelled.begin(), labelled.end(), [&](uint32_t left, uint32_t right) {
+      return std::strcmp(strings + compiler.nodes[left].label,
+                         strings + compiler.nodes[right].label) < 0;
+   });
+   // Unlabelled nodes last, so that every node has a slot
+   for (uint32_t node = 0; node < compiler.nodes.size(); ++node) {
+      if (compiler.nodes[node].label == NONE) {
+         labelled.push_back(node);
+      }
+   }
+
+   Header header{};
+   std::memcpy(header.magic, MAGIC, sizeof(MAGIC));
+   header.version = FORMAT_VERSION;
+   header.key_size = static_cast<uint32_t>(key.size());
+   header.node_count = static_cast<uint32_t>(compiler.nodes.size());
+   header.enum_count = static_cast<uint32_t>(compiler.enums.size());
+   header.index_count = static_cast<uint32_t>(compiler.index_names.size());
+   header.string_size = static_cast<uint32_t>(compiler.strings.size());
+
+   auto buffer = std::make_shared<std::vector<char>>();
+   append(*buffer, &header, 1);
+   append(*buffer, key.data(), key.size());
+   buffer->resize(padded(buffer->size()));
+   append(*buffer, compiler.nodes.data(), compiler.nodes.size());
+   append(*buffer, compiler.enums.data(), compiler.enums.size());
+   append(*buffer, compiler.index_names.data(), compiler.index_names.size());
+   append(*buffer, labelled.data(), labelled.size());
+   append(*buffer, compiler.strings.data(), compiler.strings.size());
+
+   std::shared_ptr<char const> bytes(buffer, buffer->data());
+   return from_buffer(bytes, buffer->size(), nullptr);
+}
+
+std::shared_ptr<MibTree const> MibTree::load(std::string const& path, std::string const& key) {
+   std::shared_ptr<char const> buffer;
+   std::size_t size = 0;
+#ifndef _WIN32
+   int const fd = ::open(path.c_str(), O_RDONLY);
+   if (fd < 0) {
+      return nullptr;
+   }
+   struct stat status;
+   if (::fstat(fd, &status) != 0 || status.st_size < static_cast<off_t>(sizeof(Header))) {
+      ::close(fd);
+      return nullptr;
+   }
+   size = static_cast<std::size_t>(status.st_size);
+   void* const mapped = ::mmap(nullptr, size, PROT_READ, MAP_PRIVATE, fd, 0);
+   ::close(fd);
+   if (mapped == MAP_FAILED) {
+      return nullptr;
+   }
+   buffer.reset(static_cast<char const*>(mapped),
+                [size](char const* bytes) { ::munmap(const_cast<char*>(bytes), size); });
+#else
+   std::ifstream file(path, std::ios::binary);
+   if (!file) {
+      return nullptr;
+   }
+   auto bytes = std::make_shared<std::vector<char>>(std::istreambuf_iterator<char>(file),
+                                                    std::istreambuf_iterator<char>());
+   size = bytes->size();
+   buffer = std::shared_ptr<char const>(bytes, bytes->data());
+#endif
+   return from_buffer(buffer, size, &key);
+}
+
+std::shared_ptr<MibTree const> MibTree::from_buffer(std::shared_ptr<char const> buffer,
+                                                    std::size_t size,
+                                                    std::string const* key) {
+   if (size < sizeof(Header)) {
+      return nullptr;
+   }
+   Header header;
+   std::memcpy(&header, buffer.get(), sizeof(Header));
+   if (std::memcmp(header.magic, MAGIC, sizeof(MAGIC)) != 0 || header.version != FORMAT_VERSION) {
+      return nullptr;
+   }
+
+   std::size_t const nodes = sizeof(Header) + padded(header.key_size);
+   std::size_t const enums = nodes + std::size_t(header.node_count) * sizeof(Node);
+   std::size_t const index_names = enums + std::size_t(header.enum_count) * sizeof(Enumeration);
+   std::size_t const labelled = index_names + std::size_t(header.index_count) * sizeof(uint32_t);
+   std::size_t const strings = labelled + std::size_t(header.node_count) * sizeof(uint32_t);
+   if (strings + header.string_size != size) {
+      return nullptr;
+   }
+   char const* const base = buffer.get();
+   if (key != nullptr && (key->size() != header.key_size ||
+                          std::memcmp(key->data(), base + sizeof(Header), key->size()) != 0)) {
+      return nullptr;
+   }
+
+   auto tree = std::make_shared<MibTree>();
+   tree->m_buffer = std::move(buffer);
+   tree->m_size = size;
+   tree->m_key = base + sizeof(Header);
+   tree->m_key_size = header.key_size;
+   tree->m_nodes = reinterpret_cast<Node const*>(base + nodes);
+   tree->m_node_count = header.node_count;
+   tree->m_enums = reinterpret_cast<Enumeration const*>(base + enums);
+   tree->m_index_names = reinterpret_cast<uint32_t const*>(base + index_names);
+   tree->m_labelled = reinterpret_cast<uint32_t const*>(base + labelled);
+   tree->m_strings = base + strings;
+
+   // A damaged file must not send a lookup out of the buffer
+   uint32_t const string_size = header.string_size;
+   auto valid_node = [&](uint32_t node) { return node == NONE || node < header.node_count; };
+   auto valid_string = [&](uint32_t offset) { return offset == NONE || offset < string_size; };
+   if (string_size > 0 && tree->m_strings[string_size - 1] != '\0') {
+      return nullptr;
+   }
+   for (std::size_t position = 0; position < header.node_count; ++position) {
+      Node const& node = tree->m_nodes[position];
+      if (!valid_node(node.parent) || !valid_node(node.first_child) ||
+          !valid_node(node.next_peer) || !valid_string(node.label) || !valid_string(node.module) ||
+          !valid_string(node.hint) ||
+          node.enums + std::size_t(node.enum_count) > header.enum_count ||
+          node.indexes + std::size_t(node.index_count) > header.index_count ||
+          tree->m_labelled[position] >= header.node_count) {
+         return nullptr;
+      }
+   }
+   for (std::size_t position = 0; position < header.enum_count; ++position) {
+      if (!valid_string(tree->m_enums[position].label)) {
+         return nullptr;
+      }
+   }
+   for (std::size_t position = 0; position < header.index_count; ++position) {
+      if (!valid_string(tree->m_index_names[position])) {
+         return nullptr;
+      }
+   }
+   return tree;
+}
+
+bool MibTree::save(std::string const& path) const {
+   std::error_code error;
+   std::filesystem::path const target(path);
+   if (target.has_parent_path()) {
+      std::filesystem::create_directories(target.parent_path(), error);
+   }
+   // Written aside and renamed, so that other processes never load a partial file
+   std::string const temporary = path + ".tmp" + std::to_string(std::random_device()());
+   {
+      std::ofstream file(temporary, std::ios::binary | std::ios::trunc);
+      if (!file.write(m_buffer.get(), static_cast<std::streamsize>(m_size)) || !file.flush()) {
+         file.close();
+         std::filesystem::remove(temporary, error);
+         return false;
+      }
+   }
+   std::filesystem::rename(temporary, target, error);
+   if (error) {
+      std::filesystem::remove(temporary, error);
+      return false;
+   }
+   return true;
+}
+
+std::string MibTree::key() const { return std::string(m_key, m_key_size); }
+
+uint32_t MibTree::find(oid const* name, std::size_t name_length, std::size_t& depth) const {
+   uint32_t found = NONE;
+   depth = 0;
+   uint32_t peer = m_node_count > 0 ? 0 : NONE;
+   while (depth < name_length && peer != NONE) {
+      while (peer != NONE && m_nodes[peer].subid != name[depth]) {
+         peer = m_nodes[peer].next_peer;
+      }
+      if (peer == NONE) {
+         break;
+      }
+      found = peer;
+      ++depth;
+      peer = m_nodes[peer].first_child;
+   }
+   return found;
+}
+
+std::pair<uint32_t const*, uint32_t const*> MibTree::nodes_labelled(char const* label) const {
+   uint32_t const* const end = m_labelled + m_node_count;
+   // The unlabelled nodes sort after every label
+   uint32_t const* const labelled_end = std::partition_point(
+       m_labelled, end, [this](uint32_t node) { return m_nodes[node].label != NONE; });
+   uint32_t const* const first =
+       std::lower_bound(m_labelled, labelled_end, label, [this](uint32_t node, char const* text) {
+          return std::strcmp(m_strings + m_nodes[node].label, text) < 0;
+       });
+   uint32_t const* const last =
+       std::upper_bound(first, labelled_end, label, [this](char const* text, uint32_t node) {
+          return std::strcmp(text, m_strings + m_nodes[node].label) < 0;
+       });
+   return {first, last};
+}
+
+std::size_t MibTree::oid_of(uint32_t node, oid* name) const {
+   std::size_t length = 0;
+   for (uint32_t ancestor = node; ancestor != NONE && length < MAX_OID_LEN;
+        ancestor = m_nodes[ancestor].parent) {
+      name[length++] = m_nodes[ancestor].subid;
+   }
+   std::reverse(name, name + length);
+   return length;
+}
+
+std::string mib_files_key(std::string const& directories, std::string const& modules) {
+   std::string key = directories + "\n" + modules + "\n";
+   char const separator = ENV_SEPARATOR_CHAR;
+   std::size_t start = 0;
+   while (start <= directories.size()) {
+      std::size_t end = directories.find(separator, start);
+      if (end == std::string::npos) {
+         end = directories.size();
+      }
+      // A leading '+' adds the directory to the default ones
+      std::string directory = directories.substr(start, end - start);
+      if (!directory.empty() && directory[0] == '+') {
+         directory.erase(0, 1);
+      }
+      start = end + 1;
+
+      std::error_code error;
+      std::vector<std::string> files;
+      for (std::filesystem::directory_iterator entry(directory, error), last;
+           !error && entry != last; entry.increment(error)) {
+         std::error_code status_error;
+         if (!entry->is_regular_file(status_error)) {
+            continue;
+         }
+         auto const size = entry->file_size(status_error);
+         auto const modified = entry->last_write_time(status_error);
+         if (status_error) {
+            continue;
+         }
+         files.push_back(entry->path().string() + " " + std::to_string(size) + " " +
+                         std::to_string(modified.time_since_epoch().count()));
+      }
+      std::sort(files.begin(), files.end());
+      for (std::string const& file : files) {
+         key += file + "\n";
+      }
+   }
+   return key;
+}
+
+void mib_load_modules(std::string const& directories, std::string const& modules) {
+   int const mib_loading = g_netsnmp_mib_loading.load();
+   if (mib_loading == MIB_LOADING_NUMERIC) {
+      return;
+   }
+   std::vector<std::string> wanted = split_list(modules);
+   if (mib_loading == MIB_LOADING_LAZY) {
+      std::vector<std::string> const defaults = split_list(default_modules());
+      wanted.insert(wanted.begin(), defaults.begin(), defaults.end());
+   }
+
+   LoadedMibs& loaded = loaded_on_demand();
+   bool changed = false;
+   for (std::string const& directory : split_list(directories)) {
+      if (std::find(loaded.directories.begin(), loaded.directories.end(), directory) ==
+          loaded.directories.end()) {
+         add_mibdir(directory.c_str());
+         loaded.directories.push_back(directory);
+         changed = true;
+      }
+   }
+   for (std::string const& module : wanted) {
+      if (std::find(loaded.modules.begin(), loaded.modules.end(), module) == loaded.modules.end()) {
+         if (module == "ALL") {
+            read_all_mibs();
+         } else {
+            netsnmp_read_module(module.c_str());
+         }
+         loaded.modules.push_back(module);
+         changed = true;
+      }
+   }
+   if (changed) {
+      ++g_netsnmp_mib_generation;
+   }
+}
+
+void mib_cache_set_directory(std::string const& directory) {
+   std::lock_guard<std::mutex> lock(g_mib_tree_mutex);
+   g_mib_cache_directory = directory;
+   std::atomic_store(&g_mib_tree, std::shared_ptr<MibTree const>());
+}
+
+std::string mib_cache_get_directory() {
+   std::lock_guard<std::mutex> lock(g_mib_tree_mutex);
+   return g_mib_cache_directory;
+}
+
+std::shared_ptr<MibTree const> mib_tree() {
+   std::shared_ptr<MibTree const> tree = std::atomic_load(&g_mib_tree);
+   if (tree != nullptr && g_mib_tree_generation.load() == g_netsnmp_mib_generation.load()) {
+      return tree;
+   }
+
+   std::lock_guard<std::mutex> lock(g_mib_tree_mutex);
+   tree = std::atomic_load(&g_mib_tree);
+   unsigned generation = g_netsnmp_mib_generation.load();
+   if (tree != nullptr && g_mib_tree_generation.load() == generation) {
+      return tree;
+   }
+
+   std::string directories;
+   std::string modules;
+   loaded_mibs(directories, modules);
+   std::string const key = mib_files_key(directories, modules);
+   std::string path;
+   if (!g_mib_cache_directory.empty()) {
+      char name[32];
+      std::snprintf(name, sizeof(name), "mibtree-%016llx.bin",
+                    static_cast<unsigned long long>(stable_hash(directories + "\n" + modules)));
+      path = (std::filesystem::path(g_mib_cache_directory) / name).string();
+      tree = MibTree::load(path, key);
+   } else {
+      tree = nullptr;
+   }
+
+   if (tree == nullptr) {
+      std::unique_lock<std::mutex> mib_lock(g_netsnmp_mib_mutex);
+      // Without a session, hold a reference so that the MIBs are parsed while compiling them
+      bool const referenced = !g_netsnmp_initialized.load(std::memory_order_acquire);
+      if (referenced) {
+         mib_lock.unlock();
+         netsnmp_thread_init("ezsnmp");
+         mib_lock.lock();
+      }
+      tree = MibTree::compile(key);
+      generation = g_netsnmp_mib_generation.load();
+      mib_lock.unlock();
+      if (referenced) {
+         netsnmp_thread_cleanup("ezsnmp");
+      }
+      if (!path.empty()) {
+         tree->save(path);
+      }
+   }
+
+   g_mib_tree_generation.store(generation);
+   std::atomic_store(&g_mib_tree, tree);
+   return tree;
+}
+
+void mib_tree_reset() {
+   std::lock_guard<std::mutex> lock(g_mib_tree_mutex);
+   std::atomic_store(&g_mib_tree, std::shared_ptr<MibTree const>());
+}
@@ -0,0 +1,262 @@
+#include "oidtranslation.h"
+
+#include <algorithm>
+#include <atomic>
+#include <cstdlib>
+#include <cstring>
+#include <list>
+#include <mutex>
+#include <string>
+#include <unordered_map>
+#include <utility>
+#include <vector>
+
+#include "helpers.h"
+#include "mibcache.h"
+#include "thread_safety.h"
+
+namespace {
+
+// Translations a thread remembers, per direction, before it forgets the least recently used ones
+constexpr std::size_t CAPACITY = 4096;
+
+// Translations in one direction, most recently used first; the index points into the list. A
+// long walk only pushes out the translations that were not used since, rather than all of them.
+template <typename Value>
+class RecentTranslations {
+  public:
+   // Returns the translation of a key and marks it as the most recently used, nullptr if unknown
+   Value const* find(std::string const& key) {
+      auto const entry = m_index.find(key);
+      if (entry == m_index.end()) {
+         return nullptr;
+      }
+      m_entries.splice(m_entries.begin(), m_entries, entry->second);
+      return &entry->second->second;
+   }
+
+   void insert(std::string key, Value value) {
+      if (find(key) != nullptr) {
+         return;
+      }
+      if (m_entries.size() >= CAPACITY) {
+         m_index.erase(m_entries.back().first);
+         m_entries.pop_back();
+      }
+      m_entries.emplace_front(key, std::move(value));
+      m_index.emplace(std::move(key), m_entries.begin());
+   }
+
+   void clear() {
+      m_index.clear();
+      m_entries.clear();
+   }
+
+   std::size_t size() const { return m_entries.size(); }
+
+  private:
+   using Entries = std::list<std::pair<std::string, Value>>;
+
+   Entries m_entries;
+   std::unordered_map<std::string, typename Entries::iterator> m_index;
+};
+
+// Bumped by translation_cache_clear(), so that every thread forgets its translations
+std::atomic<unsigned> g_translation_epoch(0);
+
+// The translations of one thread. Only that thread reads or writes them, so no lock is needed;
+// they are dropped whenever the MIB tree of Net-SNMP changes.
+struct TranslationCache {
+   unsigned generation = 0;
+   unsigned epoch = 0;
+   bool valid = false;
+   RecentTranslations<std::vector<oid>> oids; ///< Name to OID.
+   RecentTranslations<std::string> names;     ///< Output format and OID to name.
+
+   void validate() {
+      unsigned const current_generation = g_netsnmp_mib_generation.load();
+      unsigned const current_epoch = g_translation_epoch.load();
+      if (!valid || generation != current_generation || epoch != current_epoch) {
+         oids.clear();
+         names.clear();
+         generation = current_generation;
+         epoch = current_epoch;
+         valid = true;
+      }
+   }
+};
+
+thread_local TranslationCache t_translation_cache;
+
+// Runs a function with g_netsnmp_mib_mutex held and the MIBs parsed, loading the MIB modules first
+// if it needs them and they are loaded on demand. Without a session, holds a reference to
+// Net-SNMP for the call.
+template <typename Function>
+void with_mib_tree(bool needs_mibs, Function function) {
+   std::unique_lock<std::mutex> lock(g_netsnmp_mib_mutex);
+   bool const referenced = !g_netsnmp_initialized.load(std::memory_order_acquire);
+   if (referenced) {
+      lock.unlock();
+      netsnmp_thread_init("ezsnmp");
+      lock.lock();
+   }
+   struct Release {
+      std::unique_lock<std::mutex>& lock;
+      bool referenced;
+      ~Release() {
+         lock.unlock();
+         if (referenced) {
+            netsnmp_thread_cleanup("ezsnmp");
+         }
+      }
+   } release{lock, referenced};
+   if (needs_mibs) {
+      mib_load_modules("", "");
+   }
+   function();
+}
+
+std::string oid_key(oid const* name, size_t name_length, OutputFormat const& format) {
+   int const fields[] = {format.oid_output_format, format.string_output_format,
+                         format.print_numeric_enum, format.numeric_timeticks};
+   std::string key(reinterpret_cast<char const*>(fields), sizeof(fields));
+   key.append(reinterpret_cast<char const*>(name), name_length * sizeof(oid));
+   return key;
+}
+
+// The caller must hold g_netsnmp_mib_mutex
+void parse_name(std::string const& name, oid* objid, size_t* objid_len) {
+   *objid_len = MAX_OID_LEN;
+   if (snmp_parse_oid(name.c_str(), objid, objid_len) == NULL) {
+      snmp_perror_exception(name.c_str());
+   }
+}
+
+// The caller must hold g_netsnmp_mib_mutex, with the output format applied
+std::string print_oid(oid const* name, size_t name_length) {
+   u_char* buf = static_cast<u_char*>(calloc(256, 1));
+   size_t buf_len = 256;
+   size_t out_len = 0;
+   if (buf == nullptr) {
+      return "[TRUNCATED]";
+   }
+   std::string text;
+   if (sprint_realloc_objid(&buf, &buf_len, &out_len, 1, name, name_length)) {
+      text.assign(reinterpret_cast<char*>(buf), out_len);
+   } else {
+      text = std::string(reinterpret_cast<char*>(buf)) + " [TRUNCATED]";
+   }
+   SNMP_FREE(buf);
+   return text;
+}
+
+void remember_oid(TranslationCache& cache,
+                  std::string const& name,
+                  oid const* objid,
+                  size_t objid_len) {
+   cache.oids.insert(name, std::vector<oid>(objid, objid + objid_len));
+}
+
+void remember_name(TranslationCache& cache, std::string key, std::string const& text) {
+   cache.names.insert(std::move(key), text);
+}
+
+} // namespace
+
+void translate_name(std::string const& name, oid* objid, size_t* objid_len) {
+   TranslationCache& cache = t_translation_cache;
+   cache.validate();
+   std::vector<oid> const* const known = cache.oids.find(name);
+   if (known != nullptr) {
+      std::copy(known->begin(), known->end(), objid);
+      *objid_len = known->size();
+      return;
+   }
+
+   with_mib_tree(!is_numeric_oid(name), [&] { parse_name(name, objid, objid_len); });
+   // The MIB tree may have changed during the call
+   cache.validate();
+   remember_oid(cache, name, objid, *objid_len);
+}
+
+std::string translate_oid(oid const* name, size_t name_length, OutputFormat const& format) {
+   TranslationCache& cache = t_translation_cache;
+   cache.validate();
+   std::string key = oid_key(name, name_length, format);
+   std::string const* const known = cache.names.find(key);
+   if (known != nullptr) {
+      return *known;
+   }
+
+   std::string text;
+   with_mib_tree(format.oid_output_format != NETSNMP_OID_OUTPUT_NUMERIC, [&] {
+      OutputFormatScope output_format(format);
+      text = print_oid(name, name_length);
+   });
+   cache.validate();
+   remember_name(cache, std::move(key), text);
+   return text;
+}
+
+std::vector<std::string> translate_names(std::vector<std::string> const& names,
+                                         OutputFormat const& format) {
+   TranslationCache& cache = t_translation_cache;
+   cache.validate();
+   std::vector<std::string> translated(names.size());
+   std::vector<std::size_t> missing;
+   for (std::size_t i = 0; i < names.size(); ++i) {
+      std::vector<oid> const* const known_oid = cache.oids.find(names[i]);
+      if (known_oid != nullptr) {
+         std::string const* const known_name =
+             cache.names.find(oid_key(known_oid->data(), known_oid->size(), format));
+         if (known_name != nullptr) {
+            translated[i] = *known_name;
+            continue;
+         }
+      }
+      missing.push_back(i);
+   }
+   if (missing.empty()) {
+      return translated;
+   }
+
+   // Everything the thread does not remember is translated under a single hold of the mutex
+   bool needs_mibs = format.oid_output_format != NETSNMP_OID_OUTPUT_NUMERIC;
+   for (std::size_t i = 0; i < missing.size() && !needs_mibs; ++i) {
+      needs_mibs = !is_numeric_oid(names[missing[i]]);
+   }
+   std::vector<std::vector<oid>> objids(missing.size());
+   with_mib_tree(needs_mibs, [&] {
+      OutputFormatScope output_format(format);
+      oid objid[MAX_OID_LEN];
+      size_t objid_len = 0;
+      for (std::size_t i = 0; i < missing.size(); ++i) {
+         parse_name(names[missing[i]], objid, &objid_len);
+         objids[i].assign(objid, objid + objid_len);
+         translated[missing[i]] = print_oid(objid, objid_len);
+      }
+   });
+   cache.validate();
+   for (std::size_t i = 0; i < missing.size(); ++i) {
+      std::vector<oid> const& objid = objids[i];
+      remember_oid(cache, names[missing[i]], objid.data(), objid.size());
+      remember_name(cache, oid_key(objid.data(), objid.size(), format), translated[missing[i]]);
+   }
+   return translated;
+}
+
+bool is_numeric_oid(std::string const& name) {
+   if (name.empty()) {
+      return false;
+   }
+   return std::all_of(name.begin(), name.end(),
+                      [](char c) { return c == '.' || (c >= '0' && c <= '9'); });
+}
+
+void translation_cache_clear() { ++g_translation_epoch; }
+
+std::size_t translation_cache_size() {
+   TranslationCache& cache = t_translation_cache;
+   cache.validate();
+   return cache.oids.size() + cache.names.size();
+}
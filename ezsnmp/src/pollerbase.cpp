@@ -0,0 +1,223 @@
+#include "pollerbase.h"
+
+#ifdef _WIN32
+#include <winsock2.h>
+#define poll WSAPoll
+#else
+#include <poll.h>
+#endif
+
+#include <algorithm>
+#include <cerrno>
+#include <chrono>
+#include <cmath>
+#include <cstring>
+#include <exception>
+#include <mutex>
+#include <string>
+#include <utility>
+#include <vector>
+
+#include "exceptionsbase.h"
+
+namespace {
+
+using Clock = std::chrono::steady_clock;
+
+char const* const OPERATIONS[] = {"get", "get_next", "bulk_get", "set", "walk", "bulk_walk"};
+
+Clock::time_point after(Clock::time_point start, double seconds) {
+   return start +
+          std::chrono::duration_cast<Clock::duration>(std::chrono::duration<double>(seconds));
+}
+
+// Applies the max-repeaters of a bulk job while it is started, like the bulk methods of the
+// Python Session do around each call.
+class MaxRepeatersScope {
+  public:
+   MaxRepeatersScope(SessionBase& session, std::string const& max_repeaters)
+       : m_session(session), m_saved(session._get_set_max_repeaters_to_num()) {
+      m_session._set_max_repeaters_to_num(max_repeaters);
+   }
+
+   ~MaxRepeatersScope() { m_session._set_max_repeaters_to_num(m_saved); }
+
+   MaxRepeatersScope(MaxRepeatersScope const&) = delete;
+   MaxRepeatersScope& operator=(MaxRepeatersScope const&) = delete;
+
+  private:
+   SessionBase& m_session;
+   std::string m_saved;
+};
+
+} // namespace
+
+PollerBase::PollerBase(int max_in_flight)
+    : m_max_in_flight(static_cast<std::size_t>(std::max(max_in_flight, 1))) {}
+
+int PollerBase::_submit(SessionBase& session,
+                        std::string const& operation,
+                        std::vector<std::string> const& oids,
+                        std::string const& max_repeaters) {
+   if (std::none_of(std::begin(OPERATIONS), std::end(OPERATIONS),
+                    [&operation](char const* name) { return operation == name; })) {
+      throw GenericErrorBase("Unknown operation: " + operation + "\n");
+   }
+   if (operation == "walk" && oids.size() > 1) {
+      throw GenericErrorBase("A walk job takes a single OID\n");
+   }
+
+   std::lock_guard<std::mutex> lock(m_mutex);
+   int const id = m_next_job_id++;
+   m_queue.push_back(Job{id, &session, operation, oids, max_repeaters});
+   return id;
+}
+
+std::vector<AsyncCompletion> PollerBase::_poll(double timeout) {
+   std::lock_guard<std::mutex> lock(m_mutex);
+   Clock::time_point const deadline = after(Clock::now(), std::max(timeout, 0.0));
+
+   start_jobs();
+   while (m_completed.empty() && !m_in_flight.empty()) {
+      // Watch the socket of every session with an operation in flight and wake up for the
+      // earliest retransmission or timeout among them
+      std::vector<SessionBase*> sessions;
+      std::vector<struct pollfd> fds;
+      std::vector<Clock::time_point> expiries;
+      Clock::time_point const now = Clock::now();
+      Clock::time_point wake_up = timeout < 0 ? Clock::time_point::max() : std::max(deadline, now);
+      for (auto const& entry : m_in_flight) {
+         SessionBase* session = entry.first.first;
+         if (!sessions.empty() && sessions.back() == session) {
+            continue;
+         }
+         try {
+            struct pollfd pfd;
+            pfd.fd = session->_async_fd();
+            pfd.events = POLLIN;
+            pfd.revents = 0;
+            double const next_timeout = session->_async_next_timeout();
+            Clock::time_point const expiry =
+                next_timeout < 0 ? Clock::time_point::max() : after(now, next_timeout);
+            sessions.push_back(session);
+            fds.push_back(pfd);
+            expiries.push_back(expiry);
+            wake_up = std::min(wake_up, expiry);
+         } catch (...) {
+            fail_session_jobs(session, std::current_exception());
+            break;
+         }
+      }
+      if (!m_completed.empty()) {
+         break;
+      }
+
+      int wait_ms = -1;
+      if (wake_up != Clock::time_point::max()) {
+         auto const wait = std::chrono::duration<double, std::milli>(wake_up - now).count();
+         wait_ms = static_cast<int>(std::ceil(std::max(wait, 0.0)));
+      }
+      int const ready = poll(fds.data(), fds.size(), wait_ms);
+      if (ready < 0 && errno != EINTR) {
+         throw GenericErrorBase(std::string("poll: ") + std::strerror(errno) + "\n");
+      }
+
+      Clock::time_point const polled = Clock::now();
+      for (std::size_t i = 0; i < sessions.size(); i++) {
+         bool const readable = ready > 0 && (fds[i].revents & (POLLIN | POLLERR | POLLHUP)) != 0;
+         if (!readable && expiries[i] > polled) {
+            continue;
+         }
+         try {
+            std::vector<AsyncCompletion> completions =
+                readable ? sessions[i]->_async_read() : sessions[i]->_async_timeout();
+            finish_jobs(sessions[i], completions);
+         } catch (...) {
+            fail_session_jobs(sessions[i], std::current_exception());
+         }
+      }
+
+      start_jobs();
+      if (timeout >= 0 && polled >= deadline) {
+         break;
+      }
+   }
+
+   std::vector<AsyncCompletion> completions;
+   completions.swap(m_completed);
+   return completions;
+}
+
+std::size_t PollerBase::_pending() {
+   std::lock_guard<std::mutex> lock(m_mutex);
+   return m_queue.size() + m_in_flight.size() + m_completed.size();
+}
+
+std::size_t PollerBase::_in_flight() {
+   std::lock_guard<std::mutex> lock(m_mutex);
+   return m_in_flight.size();
+}
+
+std::size_t PollerBase::_get_max_in_flight() const { return m_max_in_flight; }
+
+void PollerBase::start_jobs() {
+   while (!m_queue.empty() && m_in_flight.size() < m_max_in_flight) {
+      Job const job = std::move(m_queue.front());
+      m_queue.pop_front();
+      try {
+         int const operation_id = start_job(job);
+         m_in_flight[{job.session, operation_id}] = job.id;
+      } catch (...) {
+         AsyncCompletion completion;
+         completion.request_id = job.id;
+         completion.error = std::current_exception();
+         m_completed.push_back(std::move(completion));
+      }
+   }
+}
+
+int PollerBase::start_job(Job const& job) {
+   SessionBase& session = *job.session;
+   if (job.operation == "get") {
+      return session._async_get(job.oids);
+   }
+   if (job.operation == "get_next") {
+      return session._async_get_next(job.oids);
+   }
+   if (job.operation == "set") {
+      return session._async_set(job.oids);
+   }
+   if (job.operation == "walk") {
+      return session._async_walk(job.oids.empty() ? "" : job.oids[0]);
+   }
+
+   MaxRepeatersScope max_repeaters(session, job.max_repeaters);
+   if (job.operation == "bulk_get") {
+      return session._async_bulk_get(job.oids);
+   }
+   return session._async_bulk_walk(job.oids);
+}
+
+void PollerBase::finish_jobs(SessionBase* session, std::vector<AsyncCompletion>& completions) {
+   for (auto& completion : completions) {
+      auto const entry = m_in_flight.find({session, completion.request_id});
+      if (entry == m_in_flight.end()) {
+         // Not started by this poller
+         continue;
+      }
+      completion.request_id = entry->second;
+      m_in_flight.erase(entry);
+      m_completed.push_back(std::move(completion));
+   }
+}
+
+void PollerBase::fail_session_jobs(SessionBase* session, std::exception_ptr error) {
+   auto entry = m_in_flight.lower_bound({session, 0});
+   while (entry != m_in_flight.end() && entry->first.first == session) {
+      AsyncCompletion completion;
+      completion.request_id = entry->second;
+      completion.error = error;
+      m_completed.push_back(std::move(completion));
+      entry = m_in_flight.erase(entry);
+   }
+}
@@ -1,26 +1,33 @@
 #include "sessionbase.h"
 
 #include <algorithm>
+#include <atomic>
 #include <cassert>
 #include <cstddef>
+#include <cstdlib>
 #include <cstring>
+#include <exception>
+#include <iterator>
 #include <map>
+#include <memory>
 #include <mutex>
 #include <regex>
 #include <sstream>
 #include <stdexcept>
 #include <string>
+#include <thread>
+#include <utility>
 #include <vector>
 
+#include "enginecache.h"
 #include "exceptionsbase.h"
-#include "helpers.h"
-#include "snmpbulkget.h"
-#include "snmpbulkwalk.h"
-#include "snmpget.h"
-#include "snmpgetnext.h"
-#include "snmpset.h"
-#include "snmpwalk.h"
+#include "maxrepetitions.h"
+#include "mibcache.h"
+#include "oidtranslation.h"
+#include "sessionhandle.h"
 #include "thread_safety.h"
+#include "usmkeycache.h"
+#include "walkcache.h"
 
 // Take all the SessionBase class inputs and map them to:
 // OPTIONS:
@@ -83,52 +90,74 @@ static std::map<std::string, std::string> CML_PARAM_LOOKUP = {
 
 namespace {
 
-std::mutex g_snmpv3_operation_mutex;
-
-class SnmpV3OperationGuard {
-  public:
-   SnmpV3OperationGuard(bool enabled,
-                        std::string const& security_name,
-                        std::string const& context_engine_id)
-       : m_enabled(enabled),
-         m_security_name(security_name),
-         m_context_engine_id(context_engine_id) {
-      if (m_enabled) {
-         m_lock = std::unique_lock<std::mutex>(g_snmpv3_operation_mutex);
-         remove_v3_user_from_cache(m_security_name, m_context_engine_id);
+// Per-user mutexes serializing the SNMPv3 operations of the sessions that share a localized USM
+// user, i.e. have the same (security name, engine ID). Sessions of different users run in
+// parallel; the session handles only hold g_netsnmp_usm_mutex while Net-SNMP reads the user list.
+std::mutex g_usm_user_locks_mutex;
+std::map<std::pair<std::string, std::string>, std::weak_ptr<std::mutex>> g_usm_user_locks;
+
+std::shared_ptr<std::mutex> usm_user_mutex(std::string const& security_name,
+                                           std::string const& engine_id) {
+   std::lock_guard<std::mutex> lock(g_usm_user_locks_mutex);
+   std::weak_ptr<std::mutex>& entry = g_usm_user_locks[{security_name, engine_id}];
+   std::shared_ptr<std::mutex> mutex = entry.lock();
+   if (!mutex) {
+      // Forget the mutexes of the users nobody is operating on any more
+      for (auto it = g_usm_user_locks.begin(); it != g_usm_user_locks.end();) {
+         if (it->second.expired() && &it->second != &entry) {
+            it = g_usm_user_locks.erase(it);
+         } else {
+            ++it;
+         }
       }
+      mutex = std::make_shared<std::mutex>();
+      entry = mutex;
    }
+   return mutex;
+}
 
-   ~SnmpV3OperationGuard() {
-      if (m_enabled) {
-         remove_v3_user_from_cache(m_security_name, m_context_engine_id);
+// Held for the duration of an SNMPv3 operation: serializes it with the other operations on the
+// same USM user.
+class UsmUserGuard {
+  public:
+   UsmUserGuard(bool enabled, SessionHandle const& handle) {
+      if (enabled) {
+         m_user_mutex = usm_user_mutex(handle.security_name(), handle.security_engine_id());
+         m_user_lock = std::unique_lock<std::mutex>(*m_user_mutex);
       }
    }
 
-   SnmpV3OperationGuard(SnmpV3OperationGuard const&) = delete;
-   SnmpV3OperationGuard& operator=(SnmpV3OperationGuard const&) = delete;
+   UsmUserGuard(UsmUserGuard const&) = delete;
+   UsmUserGuard& operator=(UsmUserGuard const&) = delete;
 
   private:
-   bool m_enabled;
-   std::string const& m_security_name;
-   std::string const& m_context_engine_id;
-   std::unique_lock<std::mutex> m_lock;
+   std::shared_ptr<std::mutex> m_user_mutex;
+   std::unique_lock<std::mutex> m_user_lock;
 };
 
-class SnmpV3SetterGuard {
-  public:
-   explicit SnmpV3SetterGuard(bool enabled) {
-      if (enabled) {
-         m_lock = std::unique_lock<std::mutex>(g_snmpv3_operation_mutex);
-      }
+// Mirrors the -Cr<NUM> handling of snmpbulkwalk/snmpbulkget, which default to 10.
+int parse_max_repetitions(std::string const& set_max_repeaters_to_num) {
+   if (set_max_repeaters_to_num.empty()) {
+      return 10;
    }
 
-   SnmpV3SetterGuard(SnmpV3SetterGuard const&) = delete;
-   SnmpV3SetterGuard& operator=(SnmpV3SetterGuard const&) = delete;
+   char* endptr = nullptr;
+   long const max_repetitions = std::strtol(set_max_repeaters_to_num.c_str(), &endptr, 0);
+   if (endptr == set_max_repeaters_to_num.c_str()) {
+      /*
+       * No number given -- error.
+       */
+      throw ParseErrorBase("No number given for -Cr option\n");
+   }
+   return static_cast<int>(max_repetitions);
+}
 
-  private:
-   std::unique_lock<std::mutex> m_lock;
-};
+// Describes the type and value of a row, to tell whether the value changed.
+std::string row_fingerprint(ResultTable const& table, std::size_t row) {
+   std::size_t const begin = table.text_offsets[row];
+   return std::to_string(table.type_codes[row]) + ":" + std::to_string(table.integer_values[row]) +
+          ":" + table.text_values.substr(begin, table.text_offsets[row + 1] - begin);
+}
 
 } // namespace
 
@@ -189,10 +218,10 @@ SessionBase::SessionBase(std::string const& hostname,
 SessionBase::~SessionBase() {}
 
 void SessionBase::_close() {
-   // Reference-counted cleanup: only last thread calls snmp_shutdown()
-   // snmp_shutdown() is called internally by netsnmp_thread_cleanup() when reference count reaches
-   // 0
-   netsnmp_thread_cleanup(m_init_name);
+   std::lock_guard<std::mutex> lock(m_session_mutex);
+   // The handle holds the Net-SNMP library reference. Reference-counted cleanup: unless the
+   // library is kept alive, the last one calls snmp_shutdown() via netsnmp_thread_cleanup().
+   reset_session_handle();
 }
 
 void SessionBase::populate_args() {
@@ -376,78 +405,520 @@ void SessionBase::populate_args() {
    }
 
    m_args.push_back(host_address);
+   m_connection_args_size = m_args.size();
+}
+
+void SessionBase::append_args(std::vector<std::string> const& mibs) {
+   m_args.resize(m_connection_args_size);
+   for (auto const& entry : mibs) {
+      m_args.push_back(entry);
+   }
+}
+
+void SessionBase::drop_inherited_session_handle() {
+   if (m_session_handle && m_session_handle_generation != g_netsnmp_fork_generation.load()) {
+      // Inherited from the parent process, whose socket it shares
+      reset_session_handle();
+   }
+}
+
+SessionHandle& SessionBase::session_handle() {
+   drop_inherited_session_handle();
+   if (m_session_handle && m_session_handle->engine_stale()) {
+      // The agent no longer knows the engine the handle was opened with, discover it again
+      reset_session_handle(true);
+   }
+   if (!m_session_handle) {
+      m_session_handle = std::make_unique<SessionHandle>(connection_args(), m_init_name);
+      m_session_handle->set_batch_limits(batch_limits());
+      m_session_handle_generation = g_netsnmp_fork_generation.load();
+   }
+   return *m_session_handle;
+}
+
+std::vector<std::string> SessionBase::connection_args() const {
+   std::vector<std::string> args;
+   for (std::size_t i = 0; i < m_connection_args_size; ++i) {
+      if (m_args[i].rfind("-C", 0) != 0) {
+         args.push_back(m_args[i]);
+      }
+   }
+   return args;
+}
+
+BatchLimits SessionBase::batch_limits() const {
+   BatchLimits limits;
+   limits.max_varbinds = m_max_varbinds_per_pdu;
+   limits.max_size = m_max_pdu_size;
+   limits.max_outstanding = std::max<std::size_t>(m_max_outstanding_requests, 1);
+   return limits;
 }
 
-void SessionBase::check_and_clear_v3_user() {
-   if (m_version == "3") {
-      remove_v3_user_from_cache(m_security_username, m_context_engine_id);
+void SessionBase::reset_session_handle(bool credentials_changed) {
+   if (m_session_handle) {
+      std::vector<AsyncCompletion> cancelled = m_session_handle->async_cancel(
+          "Request cancelled: the session was closed or reconfigured\n");
+      std::move(cancelled.begin(), cancelled.end(), std::back_inserter(m_async_cancelled));
    }
+   if (m_session_handle && credentials_changed) {
+      m_session_handle->forget_usm_user();
+   }
+   m_session_handle.reset();
 }
 
 std::vector<Result> SessionBase::walk(std::string const& mib) {
-   SnmpV3OperationGuard guard(m_version == "3", m_security_username, m_context_engine_id);
-   populate_args();
+   std::lock_guard<std::mutex> lock(m_session_mutex);
 
+   std::vector<std::string> mibs;
    if (!mib.empty()) {
-      m_args.push_back(mib);
+      mibs.push_back(mib);
    }
+   append_args(mibs);
 
-   return snmpwalk(m_args, m_init_name);
+   SessionHandle& handle = session_handle();
+   UsmUserGuard guard(m_version == "3", handle);
+   return handle.walk(mib);
 }
 
 std::vector<Result> SessionBase::bulk_walk(std::string const& mib) {
-   SnmpV3OperationGuard guard(m_version == "3", m_security_username, m_context_engine_id);
-   populate_args();
+   std::vector<std::string> mibs;
+   if (!mib.empty()) {
+      mibs.push_back(mib);
+   }
+   return bulk_walk(mibs);
+}
 
+std::vector<Result> SessionBase::bulk_walk(std::vector<std::string> const& mibs) {
+   std::lock_guard<std::mutex> lock(m_session_mutex);
+   append_args(mibs);
+
+   int const max_repetitions = parse_max_repetitions(m_set_max_repeaters_to_num);
+   SessionHandle& handle = session_handle();
+   UsmUserGuard guard(m_version == "3", handle);
+   return handle.bulk_walk(mibs, max_repetitions);
+}
+
+ResultTable SessionBase::_walk_columnar(std::string const& mib) {
+   std::lock_guard<std::mutex> lock(m_session_mutex);
+
+   std::vector<std::string> mibs;
    if (!mib.empty()) {
-      m_args.push_back(mib);
+      mibs.push_back(mib);
    }
+   append_args(mibs);
 
-   return snmpbulkwalk(m_args, m_init_name);
+   SessionHandle& handle = session_handle();
+   UsmUserGuard guard(m_version == "3", handle);
+   return handle.walk_columnar(mib);
 }
 
-std::vector<Result> SessionBase::bulk_walk(std::vector<std::string> const& mibs) {
-   SnmpV3OperationGuard guard(m_version == "3", m_security_username, m_context_engine_id);
-   populate_args();
+ResultTable SessionBase::_bulk_walk_columnar(std::vector<std::string> const& mibs, bool adaptive) {
+   std::lock_guard<std::mutex> lock(m_session_mutex);
+   append_args(mibs);
 
-   for (auto const& entry : mibs) {
-      m_args.push_back(entry);
+   int const max_repetitions = parse_max_repetitions(m_set_max_repeaters_to_num);
+   SessionHandle& handle = session_handle();
+   UsmUserGuard guard(m_version == "3", handle);
+   return handle.bulk_walk_columnar(mibs, max_repetitions, adaptive);
+}
+
+std::vector<Result> SessionBase::_bulk_walk_adaptive(std::vector<std::string> const& mibs) {
+   std::lock_guard<std::mutex> lock(m_session_mutex);
+   append_args(mibs);
+
+   int const max_repetitions = parse_max_repetitions(m_set_max_repeaters_to_num);
+   SessionHandle& handle = session_handle();
+   UsmUserGuard guard(m_version == "3", handle);
+   return handle.bulk_walk(mibs, max_repetitions, true);
+}
+
+std::vector<std::vector<Result>> SessionBase::_bulk_walk_table(
+    std::vector<std::string> const& columns) {
+   std::lock_guard<std::mutex> lock(m_session_mutex);
+   append_args(columns);
+
+   int const max_repetitions = parse_max_repetitions(m_set_max_repeaters_to_num);
+   SessionHandle& handle = session_handle();
+   UsmUserGuard guard(m_version == "3", handle);
+   return handle.bulk_walk_table(columns, max_repetitions);
+}
+
+TableRows SessionBase::_get_table(std::string const& table) {
+   std::lock_guard<std::mutex> lock(m_session_mutex);
+   append_args({table});
+
+   bool const bulk = m_version != "1";
+   int const max_repetitions = bulk ? parse_max_repetitions(m_set_max_repeaters_to_num) : 0;
+   SessionHandle& handle = session_handle();
+   UsmUserGuard guard(m_version == "3", handle);
+   return handle.get_table(table, bulk, max_repetitions);
+}
+
+ResumableWalk SessionBase::_resumable_walk(std::vector<std::string> const& mibs,
+                                           std::string const& start_after,
+                                           bool bulk,
+                                           bool adaptive) {
+   std::lock_guard<std::mutex> lock(m_session_mutex);
+   append_args(mibs);
+
+   int const max_repetitions = bulk ? parse_max_repetitions(m_set_max_repeaters_to_num) : 0;
+   SessionHandle& handle = session_handle();
+   UsmUserGuard guard(m_version == "3", handle);
+   return handle.resumable_walk(mibs, start_after, bulk, max_repetitions, adaptive);
+}
+
+std::vector<Result> SessionBase::_delta_walk(std::string const& mib,
+                                             std::string const& sentinel,
+                                             bool bulk) {
+   std::lock_guard<std::mutex> lock(m_session_mutex);
+
+   std::vector<std::string> mibs;
+   if (!mib.empty()) {
+      mibs.push_back(mib);
    }
+   append_args(mibs);
+
+   int const max_repetitions = bulk ? parse_max_repetitions(m_set_max_repeaters_to_num) : 0;
+   SessionHandle& handle = session_handle();
+   UsmUserGuard guard(m_version == "3", handle);
 
-   return snmpbulkwalk(m_args, m_init_name);
+   std::string const indicator = sentinel.empty() ? handle.change_indicator(mib) : sentinel;
+   if (indicator.empty()) {
+      throw GenericErrorBase("No change indicator is known for " + mib + ", give a sentinel OID\n");
+   }
+   ResultTable const marks = handle.get_columnar({".1.3.6.1.2.1.1.3.0", indicator});
+   bool const has_uptime = marks.size() == 2 && marks.type_codes[0] == ASN_TIMETICKS;
+   bool const has_indicator = marks.size() == 2 && marks.type_codes[1] < SNMP_NOSUCHOBJECT;
+   uint64_t const uptime = has_uptime ? marks.integer_values[0] : 0;
+   std::string const fingerprint = has_indicator ? row_fingerprint(marks, 1) : "";
+
+   // The snapshots of a subtree are told apart by everything that can change the agent's view
+   std::string key;
+   for (auto const& arg : connection_args()) {
+      key += arg + '\n';
+   }
+   key += mib + '\n' + indicator;
+
+   // An agent that restarted may have changed without the indicator moving
+   WalkSnapshot snapshot;
+   if (has_indicator && walk_snapshot_lookup(key, snapshot) && snapshot.sentinel == fingerprint &&
+       snapshot.uptime <= uptime) {
+      return snapshot.results;
+   }
+
+   snapshot.uptime = uptime;
+   snapshot.sentinel = fingerprint;
+   snapshot.results = bulk ? handle.bulk_walk(mibs, max_repetitions) : handle.walk(mib);
+   if (has_indicator) {
+      walk_snapshot_store(key, snapshot);
+   }
+   return snapshot.results;
 }
 
-std::vector<Result> SessionBase::get(std::string const& mib) {
-   SnmpV3OperationGuard guard(m_version == "3", m_security_username, m_context_engine_id);
-   populate_args();
+std::vector<Result> SessionBase::_parallel_walk(std::string const& mib,
+                                                int workers,
+                                                std::vector<std::string> const& split_points,
+                                                bool bulk,
+                                                bool pipelined) {
+   std::lock_guard<std::mutex> lock(m_session_mutex);
 
+   std::vector<std::string> mibs;
    if (!mib.empty()) {
-      m_args.push_back(mib);
+      mibs.push_back(mib);
+   }
+   append_args(mibs);
+
+   int const max_repetitions = bulk ? parse_max_repetitions(m_set_max_repeaters_to_num) : 0;
+   std::size_t const worker_count = static_cast<std::size_t>(std::max(workers, 1));
+   SessionHandle& handle = session_handle();
+
+   std::vector<std::string> points = split_points;
+   if (points.empty() && worker_count > 1) {
+      std::vector<std::string> sampled;
+      {
+         UsmUserGuard guard(m_version == "3", handle);
+         sampled = handle.sample_split_points(mib, 4 * worker_count);
+      }
+      // Pick points that cut the sampled branches into worker_count even groups
+      std::size_t const groups = std::min(worker_count, sampled.size() + 1);
+      for (std::size_t j = 1; j < groups; ++j) {
+         points.push_back(sampled[j * (sampled.size() + 1) / groups - 1]);
+      }
+   }
+
+   std::vector<WalkState> ranges(points.size() + 1);
+   for (std::size_t i = 0; i < ranges.size(); ++i) {
+      ranges[i].bulk = bulk;
+      ranges[i].max_repetitions = max_repetitions;
+      ranges[i].roots = mibs;
+      ranges[i].start_after = i > 0 ? points[i - 1] : "";
+      ranges[i].stop_after = i < points.size() ? points[i] : "";
    }
 
-   return snmpget(m_args, m_init_name);
+   std::vector<std::vector<Result>> range_results(ranges.size());
+   std::vector<std::exception_ptr> errors(ranges.size());
+   // Sessions of their own would walk SNMPv3 ranges one at a time under the user's guard
+   if (pipelined || m_version == "3") {
+      {
+         // Released before concatenate_ranges(), which may take it again to walk the root
+         UsmUserGuard guard(m_version == "3", handle);
+         range_results = handle.pipelined_walks(ranges, worker_count);
+      }
+      return concatenate_ranges(handle, mibs, max_repetitions, bulk, range_results, errors);
+   }
+
+   std::atomic<std::size_t> next_range{0};
+   std::vector<std::string> const args = connection_args();
+
+   // Worker 0 walks on the session's own handle, the others open one each
+   auto work = [&](std::size_t worker) {
+      std::unique_ptr<SessionHandle> own_handle;
+      for (std::size_t i = next_range++; i < ranges.size(); i = next_range++) {
+         try {
+            if (worker > 0 && !own_handle) {
+               own_handle = std::make_unique<SessionHandle>(args, m_init_name);
+            }
+            SessionHandle& range_handle = worker > 0 ? *own_handle : handle;
+            UsmUserGuard guard(m_version == "3", range_handle);
+            range_results[i] = range_handle.run_walk(ranges[i]);
+         } catch (...) {
+            errors[i] = std::current_exception();
+         }
+      }
+   };
+
+   std::vector<std::thread> threads;
+   for (std::size_t worker = 1; worker < std::min(worker_count, ranges.size()); ++worker) {
+      threads.emplace_back(work, worker);
+   }
+   work(0);
+   for (auto& thread : threads) {
+      thread.join();
+   }
+   return concatenate_ranges(handle, mibs, max_repetitions, bulk, range_results, errors);
 }
 
-std::vector<Result> SessionBase::get(std::vector<std::string> const& mibs) {
-   SnmpV3OperationGuard guard(m_version == "3", m_security_username, m_context_engine_id);
-   populate_args();
+std::vector<Result> SessionBase::concatenate_ranges(SessionHandle& handle,
+                                                    std::vector<std::string> const& mibs,
+                                                    int max_repetitions,
+                                                    bool bulk,
+                                                    std::vector<std::vector<Result>>& range_results,
+                                                    std::vector<std::exception_ptr> const& errors) {
+   std::vector<Result> results;
+   for (std::size_t i = 0; i < range_results.size(); ++i) {
+      if (errors[i]) {
+         std::rethrow_exception(errors[i]);
+      }
+      std::move(range_results[i].begin(), range_results[i].end(), std::back_inserter(results));
+   }
+   if (results.empty()) {
+      // An empty subtree walks its root with a GET, which only a whole walk does
+      UsmUserGuard guard(m_version == "3", handle);
+      return bulk ? handle.bulk_walk(mibs, max_repetitions)
+                  : handle.walk(mibs.empty() ? "" : mibs.front());
+   }
+   return results;
+}
 
-   for (auto const& entry : mibs) {
-      m_args.push_back(entry);
+WalkCursor SessionBase::_walk_cursor(std::string const& mib) {
+   std::lock_guard<std::mutex> lock(m_session_mutex);
+
+   std::vector<std::string> mibs;
+   if (!mib.empty()) {
+      mibs.push_back(mib);
    }
+   append_args(mibs);
 
-   return snmpget(m_args, m_init_name);
+   auto state = std::make_shared<WalkState>();
+   state->roots = mibs;
+   return WalkCursor(this, state);
 }
 
-std::vector<Result> SessionBase::get_next(std::vector<std::string> const& mibs) {
-   SnmpV3OperationGuard guard(m_version == "3", m_security_username, m_context_engine_id);
-   populate_args();
+WalkCursor SessionBase::_bulk_walk_cursor(std::vector<std::string> const& mibs) {
+   std::lock_guard<std::mutex> lock(m_session_mutex);
+   append_args(mibs);
 
-   for (auto const& entry : mibs) {
-      m_args.push_back(entry);
+   auto state = std::make_shared<WalkState>();
+   state->bulk = true;
+   state->max_repetitions = parse_max_repetitions(m_set_max_repeaters_to_num);
+   state->roots = mibs;
+   return WalkCursor(this, state);
+}
+
+std::vector<Result> SessionBase::walk_step(WalkState& state) {
+   std::lock_guard<std::mutex> lock(m_session_mutex);
+   if (state.done) {
+      return {};
+   }
+   SessionHandle& handle = session_handle();
+   UsmUserGuard guard(m_version == "3", handle);
+   return handle.walk_step(state);
+}
+
+WalkCursor::WalkCursor(SessionBase* session, std::shared_ptr<WalkState> state)
+    : m_session(session), m_state(std::move(state)) {}
+
+std::vector<Result> WalkCursor::next_batch() { return m_session->walk_step(*m_state); }
+
+bool WalkCursor::done() const {
+   std::lock_guard<std::mutex> lock(m_session->m_session_mutex);
+   return m_state->done;
+}
+
+void AsyncCompletion::rethrow() const {
+   if (error) {
+      std::rethrow_exception(error);
+   }
+}
+
+void ResumableWalk::rethrow() const {
+   if (error) {
+      std::rethrow_exception(error);
+   }
+}
+
+int SessionBase::_async_get(std::vector<std::string> const& mibs) {
+   std::lock_guard<std::mutex> lock(m_session_mutex);
+   append_args(mibs);
+
+   SessionHandle& handle = session_handle();
+   UsmUserGuard guard(m_version == "3", handle);
+   return handle.async_get(mibs);
+}
+
+int SessionBase::_async_get_next(std::vector<std::string> const& mibs) {
+   std::lock_guard<std::mutex> lock(m_session_mutex);
+   append_args(mibs);
+
+   SessionHandle& handle = session_handle();
+   UsmUserGuard guard(m_version == "3", handle);
+   return handle.async_get_next(mibs);
+}
+
+int SessionBase::_async_bulk_get(std::vector<std::string> const& mibs) {
+   std::lock_guard<std::mutex> lock(m_session_mutex);
+   append_args(mibs);
+
+   int const max_repetitions = parse_max_repetitions(m_set_max_repeaters_to_num);
+   SessionHandle& handle = session_handle();
+   UsmUserGuard guard(m_version == "3", handle);
+   return handle.async_bulk_get(mibs, 0, max_repetitions);
+}
+
+int SessionBase::_async_set(std::vector<std::string> const& mibs) {
+   std::lock_guard<std::mutex> lock(m_session_mutex);
+   append_args(mibs);
+
+   SessionHandle& handle = session_handle();
+   UsmUserGuard guard(m_version == "3", handle);
+   return handle.async_set(mibs);
+}
+
+int SessionBase::_async_walk(std::string const& mib) {
+   std::lock_guard<std::mutex> lock(m_session_mutex);
+
+   WalkState state;
+   if (!mib.empty()) {
+      state.roots.push_back(mib);
+   }
+   append_args(state.roots);
+
+   SessionHandle& handle = session_handle();
+   UsmUserGuard guard(m_version == "3", handle);
+   return handle.async_walk(state);
+}
+
+int SessionBase::_async_bulk_walk(std::vector<std::string> const& mibs) {
+   std::lock_guard<std::mutex> lock(m_session_mutex);
+   append_args(mibs);
+
+   WalkState state;
+   state.bulk = true;
+   state.max_repetitions = parse_max_repetitions(m_set_max_repeaters_to_num);
+   state.roots = mibs;
+   SessionHandle& handle = session_handle();
+   UsmUserGuard guard(m_version == "3", handle);
+   return handle.async_walk(state);
+}
+
+std::vector<AsyncCompletion> SessionBase::_async_read() {
+   std::lock_guard<std::mutex> lock(m_session_mutex);
+   drop_inherited_session_handle();
+
+   std::vector<AsyncCompletion> completions;
+   completions.swap(m_async_cancelled);
+   if (m_session_handle) {
+      UsmUserGuard guard(m_version == "3", *m_session_handle);
+      std::vector<AsyncCompletion> finished = m_session_handle->async_read();
+      std::move(finished.begin(), finished.end(), std::back_inserter(completions));
+   }
+   return completions;
+}
+
+std::vector<AsyncCompletion> SessionBase::_async_timeout() {
+   std::lock_guard<std::mutex> lock(m_session_mutex);
+   drop_inherited_session_handle();
+
+   std::vector<AsyncCompletion> completions;
+   completions.swap(m_async_cancelled);
+   if (m_session_handle) {
+      UsmUserGuard guard(m_version == "3", *m_session_handle);
+      std::vector<AsyncCompletion> finished = m_session_handle->async_timeout();
+      std::move(finished.begin(), finished.end(), std::back_inserter(completions));
+   }
+   return completions;
+}
+
+int SessionBase::_async_fd() {
+   std::lock_guard<std::mutex> lock(m_session_mutex);
+   return session_handle().async_fd();
+}
+
+double SessionBase::_async_next_timeout() {
+   std::lock_guard<std::mutex> lock(m_session_mutex);
+   drop_inherited_session_handle();
+   if (!m_async_cancelled.empty()) {
+      return 0;
    }
+   if (!m_session_handle) {
+      return -1;
+   }
+   return m_session_handle->async_next_timeout();
+}
+
+std::vector<Result> SessionBase::get(std::string const& mib) {
+   std::vector<std::string> mibs;
+   if (!mib.empty()) {
+      mibs.push_back(mib);
+   }
+   return get(mibs);
+}
+
+std::vector<Result> SessionBase::get(std::vector<std::string> const& mibs) {
+   std::lock_guard<std::mutex> lock(m_session_mutex);
+   append_args(mibs);
+
+   SessionHandle& handle = session_handle();
+   UsmUserGuard guard(m_version == "3", handle);
+   return handle.get(mibs);
+}
+
+ResultTable SessionBase::_get_columnar(std::vector<std::string> const& mibs) {
+   std::lock_guard<std::mutex> lock(m_session_mutex);
+   append_args(mibs);
 
-   return snmpgetnext(m_args, m_init_name);
+   SessionHandle& handle = session_handle();
+   UsmUserGuard guard(m_version == "3", handle);
+   return handle.get_columnar(mibs);
+}
+
+std::vector<Result> SessionBase::get_next(std::vector<std::string> const& mibs) {
+   std::lock_guard<std::mutex> lock(m_session_mutex);
+   append_args(mibs);
+
+   SessionHandle& handle = session_handle();
+   UsmUserGuard guard(m_version == "3", handle);
+   return handle.get_next(mibs);
 }
 
 std::vector<Result> SessionBase::get_next(std::string const& mib) {
@@ -467,27 +938,111 @@ std::vector<Result> SessionBase::bulk_get(std::string const& mib) {
 }
 
 std::vector<Result> SessionBase::bulk_get(std::vector<std::string> const& mibs) {
-   SnmpV3OperationGuard guard(m_version == "3", m_security_username, m_context_engine_id);
-   populate_args();
+   std::lock_guard<std::mutex> lock(m_session_mutex);
+   append_args(mibs);
 
-   for (auto const& entry : mibs) {
-      m_args.push_back(entry);
+   int const max_repetitions = parse_max_repetitions(m_set_max_repeaters_to_num);
+   SessionHandle& handle = session_handle();
+   UsmUserGuard guard(m_version == "3", handle);
+   return handle.bulk_get(mibs, 0, max_repetitions);
+}
+
+std::vector<Result> SessionBase::set(std::vector<std::string> const& mibs) {
+   std::lock_guard<std::mutex> lock(m_session_mutex);
+   append_args(mibs);
+
+   SessionHandle& handle = session_handle();
+   UsmUserGuard guard(m_version == "3", handle);
+   return handle.set(mibs);
+}
+
+EngineCacheInfo SessionBase::_get_engine_cache_info() {
+   std::lock_guard<std::mutex> lock(m_session_mutex);
+   if (m_session_handle && !m_session_handle->engine_cache_key().empty()) {
+      return engine_cache_info(m_session_handle->engine_cache_key());
    }
+   // The transport address is the last connection argument
+   return engine_cache_info(m_connection_args_size > 0 ? m_args[m_connection_args_size - 1] : "");
+}
+
+void SessionBase::_set_engine_cache_ttl(double seconds) { engine_cache_set_ttl(seconds); }
 
-   return snmpbulkget(m_args, m_init_name);
+double SessionBase::_get_engine_cache_ttl() { return engine_cache_get_ttl(); }
+
+void SessionBase::_clear_engine_cache() { engine_cache_clear(); }
+
+int SessionBase::_get_learned_max_repetitions() const {
+   // The transport address is the last connection argument
+   std::string const address = m_connection_args_size > 0 ? m_args[m_connection_args_size - 1] : "";
+   int max_repetitions = 0;
+   max_repetitions_cache_lookup(address, max_repetitions);
+   return max_repetitions;
 }
 
-std::vector<Result> SessionBase::set(std::vector<std::string> const& mibs) {
-   SnmpV3OperationGuard guard(m_version == "3", m_security_username, m_context_engine_id);
-   populate_args();
+void SessionBase::_clear_max_repetitions_cache() { max_repetitions_cache_clear(); }
 
-   for (auto const& entry : mibs) {
-      m_args.push_back(entry);
+std::size_t SessionBase::_get_walk_snapshot_count() { return walk_snapshot_count(); }
+
+void SessionBase::_clear_walk_snapshots() { walk_snapshot_clear(); }
+
+std::string SessionBase::_translate(std::string const& name, bool numeric) {
+   return _translate_oids(std::vector<std::string>{name}, numeric).front();
+}
+
+std::vector<std::string> SessionBase::_translate_oids(std::vector<std::string> const& names,
+                                                      bool numeric) {
+   OutputFormat format;
+   if (numeric) {
+      format.oid_output_format = NETSNMP_OID_OUTPUT_NUMERIC;
    }
+   return translate_names(names, format);
+}
 
-   return snmpset(m_args, m_init_name);
+void SessionBase::_clear_translation_cache() { translation_cache_clear(); }
+
+void SessionBase::_init_library(bool keep_alive) { netsnmp_library_init("ezsnmp", keep_alive); }
+
+void SessionBase::_set_mib_loading(int mib_loading) {
+   netsnmp_library_set_mib_loading(mib_loading);
 }
 
+void SessionBase::_shutdown_library() { netsnmp_library_shutdown(); }
+
+void SessionBase::_set_mib_cache_directory(std::string const& directory) {
+   mib_cache_set_directory(directory);
+}
+
+std::string SessionBase::_get_mib_cache_directory() { return mib_cache_get_directory(); }
+
+std::size_t SessionBase::_load_mib_tree() { return mib_tree()->size(); }
+
+void SessionBase::_prepare_fork() {
+   netsnmp_prepare_fork();
+   g_usm_user_locks_mutex.lock();
+}
+
+void SessionBase::_after_fork_in_parent() {
+   g_usm_user_locks_mutex.unlock();
+   netsnmp_after_fork_in_parent();
+}
+
+void SessionBase::_after_fork_in_child() {
+   // A user lock held by a thread of the parent would never be released: start afresh
+   g_usm_user_locks.clear();
+   g_usm_user_locks_mutex.unlock();
+   netsnmp_after_fork_in_child();
+}
+
+void SessionBase::_set_usm_key_cache_capacity(std::size_t capacity) {
+   usm_key_cache_set_capacity(capacity);
+}
+
+std::size_t SessionBase::_get_usm_key_cache_capacity() { return usm_key_cache_get_capacity(); }
+
+std::size_t SessionBase::_get_usm_key_cache_size() { return usm_key_cache_size(); }
+
+void SessionBase::_clear_usm_key_cache() { usm_key_cache_clear(); }
+
 std::vector<std::string> const& SessionBase::_get_args() const { return m_args; }
 std::string const& SessionBase::_get_hostname() const { return m_hostname; }
 std::string const& SessionBase::_get_port_number() const { return m_port_number; }
@@ -515,126 +1070,190 @@ bool SessionBase::_get_print_hex_strings() const { return m_print_hex_strings; }
 std::string const& SessionBase::_get_set_max_repeaters_to_num() const {
    return m_set_max_repeaters_to_num;
 }
+std::size_t SessionBase::_get_max_varbinds_per_pdu() const { return m_max_varbinds_per_pdu; }
+
+std::size_t SessionBase::_get_max_pdu_size() const { return m_max_pdu_size; }
+
+std::size_t SessionBase::_get_max_outstanding_requests() const {
+   return m_max_outstanding_requests;
+}
+
 void SessionBase::_set_hostname(std::string const& hostname) {
+   std::lock_guard<std::mutex> lock(m_session_mutex);
    m_hostname = hostname;
    populate_args();
+   reset_session_handle();
 }
 void SessionBase::_set_port_number(std::string const& port_number) {
+   std::lock_guard<std::mutex> lock(m_session_mutex);
    m_port_number = port_number;
    populate_args();
+   reset_session_handle();
 }
 void SessionBase::_set_version(std::string const& version) {
+   std::lock_guard<std::mutex> lock(m_session_mutex);
    m_version = version;
    populate_args();
+   reset_session_handle();
 }
 void SessionBase::_set_community(std::string const& community) {
+   std::lock_guard<std::mutex> lock(m_session_mutex);
    m_community = community;
    populate_args();
+   reset_session_handle();
 }
 void SessionBase::_set_auth_protocol(std::string const& auth_protocol) {
-   SnmpV3SetterGuard guard(m_version == "3");
+   std::lock_guard<std::mutex> lock(m_session_mutex);
    m_auth_protocol = auth_protocol;
    populate_args();
-   check_and_clear_v3_user();
+   reset_session_handle(true);
 }
 void SessionBase::_set_auth_passphrase(std::string const& auth_passphrase) {
-   SnmpV3SetterGuard guard(m_version == "3");
+   std::lock_guard<std::mutex> lock(m_session_mutex);
    m_auth_passphrase = auth_passphrase;
    populate_args();
-   check_and_clear_v3_user();
+   reset_session_handle(true);
 }
 void SessionBase::_set_security_engine_id(std::string const& security_engine_id) {
-   SnmpV3SetterGuard guard(m_version == "3");
+   std::lock_guard<std::mutex> lock(m_session_mutex);
    m_security_engine_id = security_engine_id;
    populate_args();
-   check_and_clear_v3_user();
+   reset_session_handle(true);
 }
 void SessionBase::_set_context_engine_id(std::string const& context_engine_id) {
-   SnmpV3SetterGuard guard(m_version == "3");
+   std::lock_guard<std::mutex> lock(m_session_mutex);
    m_context_engine_id = context_engine_id;
    populate_args();
-   check_and_clear_v3_user();
+   reset_session_handle(true);
 }
 void SessionBase::_set_security_level(std::string const& security_level) {
-   SnmpV3SetterGuard guard(m_version == "3");
+   std::lock_guard<std::mutex> lock(m_session_mutex);
    m_security_level = security_level;
    populate_args();
-   check_and_clear_v3_user();
+   reset_session_handle(true);
 }
 void SessionBase::_set_context(std::string const& context) {
-   SnmpV3SetterGuard guard(m_version == "3");
+   std::lock_guard<std::mutex> lock(m_session_mutex);
    m_context = context;
    populate_args();
-   check_and_clear_v3_user();
+   reset_session_handle(true);
 }
 void SessionBase::_set_security_username(std::string const& security_username) {
-   SnmpV3SetterGuard guard(m_version == "3");
+   std::lock_guard<std::mutex> lock(m_session_mutex);
    m_security_username = security_username;
    populate_args();
-   check_and_clear_v3_user();
+   reset_session_handle(true);
 }
 void SessionBase::_set_privacy_protocol(std::string const& privacy_protocol) {
-   SnmpV3SetterGuard guard(m_version == "3");
+   std::lock_guard<std::mutex> lock(m_session_mutex);
    m_privacy_protocol = privacy_protocol;
    populate_args();
-   check_and_clear_v3_user();
+   reset_session_handle(true);
 }
 void SessionBase::_set_privacy_passphrase(std::string const& privacy_passphrase) {
-   SnmpV3SetterGuard guard(m_version == "3");
+   std::lock_guard<std::mutex> lock(m_session_mutex);
    m_privacy_passphrase = privacy_passphrase;
    populate_args();
-   check_and_clear_v3_user();
+   reset_session_handle(true);
 }
 void SessionBase::_set_boots_time(std::string const& boots_time) {
-   SnmpV3SetterGuard guard(m_version == "3");
+   std::lock_guard<std::mutex> lock(m_session_mutex);
    m_boots_time = boots_time;
    populate_args();
+   reset_session_handle();
 }
 void SessionBase::_set_retries(std::string const& retries) {
+   std::lock_guard<std::mutex> lock(m_session_mutex);
    m_retries = retries;
    populate_args();
+   reset_session_handle();
 }
 void SessionBase::_set_timeout(std::string const& timeout) {
+   std::lock_guard<std::mutex> lock(m_session_mutex);
    m_timeout = timeout;
    populate_args();
+   reset_session_handle();
 }
 
 void SessionBase::_set_load_mibs(std::string const& load_mibs) {
+   std::lock_guard<std::mutex> lock(m_session_mutex);
    m_load_mibs = load_mibs;
    populate_args();
+   reset_session_handle();
 }
 
 void SessionBase::_set_mib_directories(std::string const& mib_directories) {
+   std::lock_guard<std::mutex> lock(m_session_mutex);
    m_mib_directories = mib_directories;
    populate_args();
+   reset_session_handle();
 }
 
 void SessionBase::_set_print_enums_numerically(bool print_enums_numerically) {
+   std::lock_guard<std::mutex> lock(m_session_mutex);
    m_print_enums_numerically = print_enums_numerically;
    populate_args();
+   reset_session_handle();
 }
 
 void SessionBase::_set_print_full_oids(bool print_full_oids) {
+   std::lock_guard<std::mutex> lock(m_session_mutex);
    m_print_full_oids = print_full_oids;
    populate_args();
+   reset_session_handle();
 }
 
 void SessionBase::_set_print_oids_numerically(bool print_oids_numerically) {
+   std::lock_guard<std::mutex> lock(m_session_mutex);
    m_print_oids_numerically = print_oids_numerically;
    populate_args();
+   reset_session_handle();
 }
 
 void SessionBase::_set_print_timeticks_numerically(bool print_timeticks_numerically) {
+   std::lock_guard<std::mutex> lock(m_session_mutex);
    m_print_timeticks_numerically = print_timeticks_numerically;
    populate_args();
+   reset_session_handle();
 }
 
 void SessionBase::_set_print_hex_strings(bool print_hex_strings) {
+   std::lock_guard<std::mutex> lock(m_session_mutex);
    m_print_hex_strings = print_hex_strings;
    populate_args();
+   reset_session_handle();
 }
 
 void SessionBase::_set_max_repeaters_to_num(std::string const& set_max_repeaters_to_num) {
+   std::lock_guard<std::mutex> lock(m_session_mutex);
+   // Applied per request, the open session stays valid.
    m_set_max_repeaters_to_num = set_max_repeaters_to_num;
    populate_args();
+}
+
+void SessionBase::_set_max_varbinds_per_pdu(std::size_t max_varbinds_per_pdu) {
+   std::lock_guard<std::mutex> lock(m_session_mutex);
+   // Applied per request, the open session stays valid.
+   m_max_varbinds_per_pdu = max_varbinds_per_pdu;
+   if (m_session_handle) {
+      m_session_handle->set_batch_limits(batch_limits());
+   }
+}
+
+void SessionBase::_set_max_pdu_size(std::size_t max_pdu_size) {
+   std::lock_guard<std::mutex> lock(m_session_mutex);
+   // Applied per request, the open session stays valid.
+   m_max_pdu_size = max_pdu_size;
+   if (m_session_handle) {
+      m_session_handle->set_batch_limits(batch_limits());
+   }
+}
+
+void SessionBase::_set_max_outstanding_requests(std::size_t max_outstanding_requests) {
+   std::lock_guard<std::mutex> lock(m_session_mutex);
+   // Applied per request, the open session stays valid.
+   m_max_outstanding_requests = max_outstanding_requests;
+   if (m_session_handle) {
+      m_session_handle->set_batch_limits(batch_limits());
+   }
 }
\ No newline at end of file
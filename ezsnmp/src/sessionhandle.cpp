@@ -0,0 +1,1803 @@
+#include "sessionhandle.h"
+
+#include <algorithm>
+#include <cerrno>
+#include <chrono>
+#include <cstdio>
+#include <cstring>
+#include <deque>
+#include <iterator>
+#include <map>
+#include <mutex>
+#include <optional>
+#include <shared_mutex>
+#include <string>
+#include <utility>
+#include <vector>
+
+#include "enginecache.h"
+#include "exceptionsbase.h"
+#include "helpers.h"
+#include "maxrepetitions.h"
+#include "mibcache.h"
+#include "oidtranslation.h"
+#include "thread_safety.h"
+#include "usmkeycache.h"
+
+namespace {
+
+oid const MIB2_ROOT[] = {1, 3, 6, 1, 2, 1};
+
+// The ...LastChange objects of the standard MIBs, by the subtree they keep track of. Only subtrees
+// without counters or gauges: ifTableLastChange, for one, does not move when ifInOctets does.
+struct ChangeIndicator {
+   std::vector<oid> subtree;
+   char const *indicator;
+};
+
+std::vector<ChangeIndicator> const CHANGE_INDICATORS = {
+    {{1, 3, 6, 1, 2, 1, 1, 9}, ".1.3.6.1.2.1.1.8.0"},        // sysORTable: sysORLastChange
+    {{1, 3, 6, 1, 2, 1, 31, 1, 2}, ".1.3.6.1.2.1.31.1.6.0"}, // ifStackTable: ifStackLastChange
+    {{1, 3, 6, 1, 2, 1, 47, 1}, ".1.3.6.1.2.1.47.1.4.1.0"},  // entityMIBObjects: entLastChangeTime
+};
+
+// Net-SNMP keeps one localized USM user per (security name, engine ID) in a global list and
+// snmp_sess_open() reuses an existing entry. Count the handles using each entry so it is only
+// removed once the last of them is closed. The counts are guarded by g_netsnmp_usm_mutex, held
+// exclusively while a v3 handle opens, so a closing handle cannot remove an entry another handle
+// has just picked up.
+std::map<std::pair<std::string, std::string>, int> g_usm_user_refs;
+
+// snmp_parse_args() needs an option handler for the application options. A session handle only
+// receives connection arguments, application options (-C) are applied per request instead.
+void sessionhandle_optProc(int, char *const *, int) {}
+
+std::string packet_error_message(netsnmp_pdu const *response) {
+   std::string err_msg =
+       "Error in packet.\nReason: " + std::string(snmp_errstring(response->errstat)) + "\n";
+
+   if (response->errindex != 0) {
+      netsnmp_variable_list const *vars = nullptr;
+      long count = 0;
+
+      err_msg = err_msg + "Failed object: ";
+      for (count = 1, vars = response->variables; vars && count != response->errindex;
+           vars = vars->next_variable, count++)
+         /*EMPTY*/;
+      if (vars) {
+         err_msg = err_msg + print_objid_to_string(vars->name, vars->name_length);
+      }
+      err_msg = err_msg + "\n";
+   }
+
+   return err_msg;
+}
+
+bool is_valid_set_type(std::string const &type) {
+   std::string valid_types = "=iu3taosxdbn";
+#ifdef NETSNMP_WITH_OPAQUE_SPECIAL_TYPES
+   valid_types += "IUFD";
+#endif /* NETSNMP_WITH_OPAQUE_SPECIAL_TYPES */
+   return !type.empty() && valid_types.find(type[0]) != std::string::npos;
+}
+
+bool is_exception_value(netsnmp_variable_list const *vars) {
+   return vars->type == SNMP_ENDOFMIBVIEW || vars->type == SNMP_NOSUCHOBJECT ||
+          vars->type == SNMP_NOSUCHINSTANCE;
+}
+
+// Assigns the cells of a table walk to their columns. The OID of a cell is
+// <table>.1.<column>.<index> or <entry>.<column>.<index>; the column names are looked up in the
+// MIB, falling back to the column number.
+void split_table_cells(TableRows &table, oid const *root, size_t root_length) {
+   std::shared_ptr<MibTree const> const tree = mib_tree();
+   auto const first_child = [&tree](uint32_t node) {
+      return node == MibTree::NONE ? MibTree::NONE : tree->node(node).first_child;
+   };
+   std::size_t depth = 0;
+   uint32_t entry = tree->find(root, root_length, depth);
+   if (depth < root_length) {
+      entry = MibTree::NONE;
+   }
+   std::size_t column_position = root_length;
+   if (entry == MibTree::NONE || first_child(entry) == MibTree::NONE ||
+       first_child(first_child(entry)) != MibTree::NONE) {
+      // A table: its only child is the entry, whose children are the columns
+      entry = first_child(entry);
+      ++column_position;
+   }
+   table.index_offset = column_position + 1;
+
+   ResultTable const &cells = table.cells;
+   std::map<uint32_t, uint32_t> columns; // Column number to position in column_names
+   table.cell_columns.reserve(cells.size());
+   for (std::size_t cell = 0; cell < cells.size(); ++cell) {
+      uint32_t const *subids = cells.oid_subids.data() + cells.oid_offsets[cell];
+      std::size_t const length = cells.oid_offsets[cell + 1] - cells.oid_offsets[cell];
+      if (length <= table.index_offset ||
+          (column_position > root_length && subids[root_length] != 1)) {
+         table.cell_columns.push_back(TableRows::NO_COLUMN);
+         continue;
+      }
+
+      uint32_t const number = subids[column_position];
+      auto position = columns.find(number);
+      if (position == columns.end()) {
+         std::string name = std::to_string(number);
+         for (uint32_t node = first_child(entry); node != MibTree::NONE;
+              node = tree->node(node).next_peer) {
+            if (tree->node(node).subid == number && tree->node(node).label != MibTree::NONE) {
+               name = tree->string(tree->node(node).label);
+               break;
+            }
+         }
+         position = columns.emplace(number, table.column_names.size()).first;
+         table.column_names.push_back(name);
+      }
+      table.cell_columns.push_back(position->second);
+   }
+}
+
+// Formats an OID as dotted numbers with a leading dot, whatever the output options.
+std::string numeric_oid_to_string(oid const *name, size_t name_length) {
+   std::string text;
+   for (size_t i = 0; i < name_length; ++i) {
+      text += "." + std::to_string(name[i]);
+   }
+   return text;
+}
+
+// Estimated size of the PDU header and of a variable, in BER-encoded bytes.
+constexpr std::size_t PDU_OVERHEAD = 48;
+
+std::size_t encoded_variable_size(oid const *name, size_t name_length, std::size_t value_length) {
+   std::size_t size = 8 + value_length;
+   for (size_t i = 0; i < name_length; ++i) {
+      for (oid subid = name[i]; subid >= 0x80; subid >>= 7) {
+         ++size;
+      }
+      ++size;
+   }
+   return size;
+}
+
+// Approximate BER-encoded size of the variables of a response, plus the message headers.
+std::size_t encoded_size(netsnmp_pdu const *response) {
+   std::size_t size = PDU_OVERHEAD;
+   for (auto vars = response->variables; vars; vars = vars->next_variable) {
+      size += encoded_variable_size(vars->name, vars->name_length, vars->val_len);
+   }
+   return size;
+}
+
+// Whether a variable of the given size starts a new batch after count variables of size bytes.
+bool starts_batch(BatchLimits const &limits,
+                  std::size_t count,
+                  std::size_t size,
+                  std::size_t variable_size) {
+   return count > 0 && ((limits.max_varbinds > 0 && count >= limits.max_varbinds) ||
+                        (limits.max_size > 0 && size + variable_size > limits.max_size));
+}
+
+// Digest a passphrase is cached under, so the passphrase itself is not kept. Empty if it cannot
+// be computed, in which case the key is not cached.
+std::string passphrase_digest(std::string const &passphrase) {
+   u_char digest[USM_AUTH_KU_LEN];
+   size_t digest_len = sizeof(digest);
+   if (sc_hash(usmHMACSHA1AuthProtocol, USM_LENGTH_OID_TRANSFORM,
+               reinterpret_cast<u_char const *>(passphrase.data()), passphrase.size(), digest,
+               &digest_len) != SNMPERR_SUCCESS) {
+      return "";
+   }
+   return std::string(reinterpret_cast<char const *>(digest), digest_len);
+}
+
+std::string to_hex_key(std::string const &key) {
+   std::string hex = "0x";
+   for (unsigned char const byte : key) {
+      char digits[3];
+      std::snprintf(digits, sizeof(digits), "%02x", byte);
+      hex += digits;
+   }
+   return hex;
+}
+
+// Master keys (Ku) derived by snmp_parse_args() that are to be cached once it returns.
+struct MasterKeysToCache {
+   std::string auth; ///< Cache key of the authentication key, empty if nothing to cache.
+   std::string priv; ///< Cache key of the privacy key, empty if nothing to cache.
+};
+
+// Password-to-key hashes a megabyte of the passphrase for every key. Replace the -A and -X
+// passphrases whose master keys are cached by the keys themselves (-3m and -3M), so that
+// snmp_parse_args() only derives the keys of credentials it has not seen yet.
+MasterKeysToCache use_cached_master_keys(std::vector<std::string> &args) {
+   std::string auth_protocol;
+   std::size_t auth_index = args.size();
+   std::size_t priv_index = args.size();
+   for (std::size_t i = 0; i + 1 < args.size(); ++i) {
+      if (args[i].size() != 2 || args[i][0] != '-') {
+         continue;
+      }
+      if (args[i] == "-a") {
+         auth_protocol = args[i + 1];
+      } else if (args[i] == "-A") {
+         auth_index = i;
+      } else if (args[i] == "-X") {
+         priv_index = i;
+      }
+      ++i;
+   }
+
+   MasterKeysToCache to_cache;
+   std::pair<std::size_t, char const *> const options[] = {{auth_index, "-3m"},
+                                                           {priv_index, "-3M"}};
+   for (auto const &option : options) {
+      if (option.first == args.size()) {
+         continue;
+      }
+      std::string const digest = passphrase_digest(args[option.first + 1]);
+      if (digest.empty()) {
+         continue;
+      }
+      bool const auth = option.first == auth_index;
+      std::string const key = usm_key_cache_key(auth ? "auth" : "priv", auth_protocol, digest);
+      std::string master_key;
+      if (usm_key_cache_lookup(key, master_key)) {
+         args[option.first] = option.second;
+         args[option.first + 1] = to_hex_key(master_key);
+      } else {
+         (auth ? to_cache.auth : to_cache.priv) = key;
+      }
+   }
+   return to_cache;
+}
+
+// The -m and -M options only take effect when snmp_parse_args() initializes Net-SNMP, and then
+// for every session. Take them out of the arguments, to load the modules on demand instead.
+void take_mib_options(std::vector<std::string> &args,
+                      std::string &directories,
+                      std::string &modules) {
+   std::vector<std::string> remaining;
+   remaining.reserve(args.size());
+   for (std::size_t i = 0; i < args.size(); ++i) {
+      if (i + 1 < args.size() && (args[i] == "-M" || args[i] == "-m")) {
+         std::string &list = args[i] == "-M" ? directories : modules;
+         list += (list.empty() ? "" : std::string(1, ENV_SEPARATOR_CHAR)) + args[i + 1];
+         ++i;
+      } else {
+         remaining.push_back(std::move(args[i]));
+      }
+   }
+   args = std::move(remaining);
+}
+
+} // namespace
+
+/*
+ * One operation, possibly spanning several requests: next_pdu() builds the request to send and
+ * handle_response() consumes its response, until next_pdu() has nothing left to send. The same
+ * request objects are driven synchronously by SessionHandle::run() and asynchronously by
+ * SessionHandle::async_start().
+ */
+class SessionHandle::Request {
+  public:
+   using PduPtr = std::unique_ptr<netsnmp_pdu, SnmpPduDeleter>;
+
+   Request(SessionHandle &handle, char const *prog_name)
+       : m_handle(handle), m_prog_name(prog_name) {}
+   virtual ~Request() = default;
+
+   Request(Request const &) = delete;
+   Request &operator=(Request const &) = delete;
+
+   // Returns the next request to send, nullptr once the operation is over.
+   virtual PduPtr next_pdu() { return std::move(m_pdu); }
+
+   virtual void handle_response(netsnmp_pdu *response) = 0;
+
+   // Called instead of handle_response() when a request times out or cannot be sent. Returns
+   // whether the operation carries on regardless.
+   virtual bool handle_failure(bool /* timed_out */) { return false; }
+
+   char const *prog_name() const { return m_prog_name; }
+
+   // Appends the variables to a table instead of results.
+   void collect_into(ResultTable &table) { m_table_builder.emplace(table); }
+
+   std::vector<Result> results;
+
+  protected:
+   void parse_oid(std::string const &name, oid *objid, size_t *objid_len) const {
+      m_handle.parse_oid(name, objid, objid_len);
+   }
+
+   PduPtr null_var_pdu(int command, std::vector<std::string> const &oids) const {
+      PduPtr pdu(snmp_pdu_create(command));
+      for (auto const &entry : oids) {
+         oid name[MAX_OID_LEN];
+         size_t name_length = MAX_OID_LEN;
+         parse_oid(entry, name, &name_length);
+         snmp_add_null_var(pdu.get(), name, name_length);
+      }
+      return pdu;
+   }
+
+   Result format_variable(netsnmp_variable_list const *vars) const {
+      return m_handle.format_variable(vars);
+   }
+
+   void add_result(netsnmp_variable_list const *vars) {
+      if (m_table_builder) {
+         m_table_builder->append(vars);
+      } else {
+         results.push_back(format_variable(vars));
+      }
+   }
+
+   std::size_t result_count() const {
+      return m_table_builder ? m_table_builder->size() : results.size();
+   }
+
+   void add_results(netsnmp_pdu const *response) {
+      for (auto vars = response->variables; vars; vars = vars->next_variable) {
+         add_result(vars);
+      }
+   }
+
+   BatchLimits const &batch_limits() const { return m_handle.m_batch_limits; }
+
+   bool batched() const { return batch_limits().max_varbinds > 0 || batch_limits().max_size > 0; }
+
+   SessionHandle &m_handle;
+   char const *m_prog_name;
+   PduPtr m_pdu; ///< The next request to send.
+   std::optional<ResultTableBuilder> m_table_builder;
+};
+
+namespace {
+
+using Request = SessionHandle::Request;
+using PduPtr = Request::PduPtr;
+
+// GET and GETNEXT, sent in batches within the limits of the session. If a batch fails, note
+// the OID that caused the error, "fix" the PDU (removing the error-prone OID) and retry; a
+// batch the agent answers tooBig is split in two.
+class FixingRequest : public Request {
+  public:
+   FixingRequest(SessionHandle &handle,
+                 int command,
+                 std::vector<std::string> const &oids,
+                 char const *prog_name)
+       : Request(handle, prog_name), m_command(command), m_names(oids.size()) {
+      if (oids.empty()) {
+         throw GenericErrorBase("Missing object name\n");
+      }
+      if (!batched() && static_cast<int>(oids.size()) > SNMP_MAX_CMDLINE_OIDS) {
+         std::string err_msg =
+             "Too many object identifiers specified. "
+             "Only " +
+             std::to_string(SNMP_MAX_CMDLINE_OIDS) + " allowed in one request.\n";
+         throw GenericErrorBase(err_msg);
+      }
+
+      std::size_t begin = 0;
+      std::size_t size = PDU_OVERHEAD;
+      for (std::size_t i = 0; i < oids.size(); ++i) {
+         oid name[MAX_OID_LEN];
+         size_t name_length = MAX_OID_LEN;
+         parse_oid(oids[i], name, &name_length);
+         m_names[i].assign(name, name + name_length);
+
+         std::size_t const variable_size = encoded_variable_size(name, name_length, 0);
+         if (starts_batch(batch_limits(), i - begin, size, variable_size)) {
+            m_batches.emplace_back(begin, i);
+            begin = i;
+            size = PDU_OVERHEAD;
+         }
+         size += variable_size;
+      }
+      m_batches.emplace_back(begin, oids.size());
+   }
+
+   std::size_t batch_count() const { return m_batches.size(); }
+
+   // Splits the operation into one operation per batch, to be sent at the same time.
+   std::vector<std::unique_ptr<Request>> split() {
+      std::vector<std::unique_ptr<Request>> requests;
+      for (auto const &batch : m_batches) {
+         requests.push_back(std::unique_ptr<Request>(
+             new FixingRequest(m_handle, m_command, m_prog_name,
+                               std::vector<std::vector<oid>>(m_names.begin() + batch.first,
+                                                             m_names.begin() + batch.second))));
+      }
+      m_batches.clear();
+      return requests;
+   }
+
+   PduPtr next_pdu() override {
+      if (m_pdu) {
+         // The fixed batch
+         return std::move(m_pdu);
+      }
+      if (m_batches.empty()) {
+         return nullptr;
+      }
+      m_batch = m_batches.front();
+      m_batches.pop_front();
+      PduPtr pdu(snmp_pdu_create(m_command));
+      for (std::size_t i = m_batch.first; i < m_batch.second; ++i) {
+         snmp_add_null_var(pdu.get(), m_names[i].data(), m_names[i].size());
+      }
+      return pdu;
+   }
+
+   void handle_response(netsnmp_pdu *response) override {
+      if (response->errstat == SNMP_ERR_NOERROR) {
+         add_results(response);
+         return;
+      }
+      if (response->errstat == SNMP_ERR_TOOBIG && m_batch.second - m_batch.first > 1) {
+         std::size_t const middle = m_batch.first + (m_batch.second - m_batch.first) / 2;
+         m_batches.emplace_front(middle, m_batch.second);
+         m_batches.emplace_front(m_batch.first, middle);
+         return;
+      }
+
+      std::string const err_msg = packet_error_message(response);
+      m_pdu.reset(snmp_fix_pdu(response, m_command));
+      if (!m_pdu) {
+         throw PacketErrorBase(err_msg);
+      }
+   }
+
+  private:
+   // One batch of parsed OIDs.
+   FixingRequest(SessionHandle &handle,
+                 int command,
+                 char const *prog_name,
+                 std::vector<std::vector<oid>> names)
+       : Request(handle, prog_name), m_command(command), m_names(std::move(names)) {
+      m_batches.emplace_back(0, m_names.size());
+   }
+
+   int m_command;
+   std::vector<std::vector<oid>> m_names;                     ///< Parsed OIDs.
+   std::deque<std::pair<std::size_t, std::size_t>> m_batches; ///< Ranges of m_names to send.
+   std::pair<std::size_t, std::size_t> m_batch;               ///< The range sent last.
+};
+
+class BulkGetRequest : public Request {
+  public:
+   BulkGetRequest(SessionHandle &handle,
+                  std::vector<std::string> const &oids,
+                  int non_repeaters,
+                  int max_repetitions)
+       : Request(handle, "snmpbulkget") {
+      if (static_cast<int>(oids.size()) < non_repeaters) {
+         return;
+      }
+      m_pdu = null_var_pdu(SNMP_MSG_GETBULK, oids);
+      m_pdu->non_repeaters = non_repeaters;
+      m_pdu->max_repetitions = max_repetitions; /* fill the packet */
+   }
+
+   void handle_response(netsnmp_pdu *response) override {
+      if (response->errstat == SNMP_ERR_NOERROR) {
+         add_results(response);
+      } else if (response->errstat != SNMP_ERR_NOSUCHNAME && response->errindex != 0) {
+         throw PacketErrorBase(packet_error_message(response));
+      }
+   }
+};
+
+class SetRequest : public Request {
+  public:
+   SetRequest(SessionHandle &handle, std::vector<std::string> const &oid_type_values)
+       : Request(handle, "snmpset") {
+      // Malformed assignments are reported the same way the snmpset tool reports them:
+      // on stderr, with an empty result.
+      if (oid_type_values.empty()) {
+         fprintf(stderr, "Missing object name\n");
+         return;
+      }
+      if (!batched() && static_cast<int>(oid_type_values.size()) > 3 * SNMP_MAX_CMDLINE_OIDS) {
+         fprintf(stderr, "Too many assignments specified. ");
+         fprintf(stderr, "Only %d allowed in one request.\n", SNMP_MAX_CMDLINE_OIDS);
+         return;
+      }
+      for (std::size_t i = 0; i < oid_type_values.size(); i += 3) {
+         if (i + 1 >= oid_type_values.size()) {
+            fprintf(stderr, "%s: Needs type and value\n", oid_type_values[i].c_str());
+            return;
+         }
+         if (!is_valid_set_type(oid_type_values[i + 1])) {
+            fprintf(stderr, "%s: Bad object type: %c\n", oid_type_values[i].c_str(),
+                    oid_type_values[i + 1].empty() ? ' ' : oid_type_values[i + 1][0]);
+            return;
+         }
+         if (i + 2 >= oid_type_values.size()) {
+            fprintf(stderr, "%s: Needs value\n", oid_type_values[i].c_str());
+            return;
+         }
+      }
+
+      /*
+       * create PDUs for SET requests and add object names and values to them
+       */
+      std::size_t count = 0;
+      std::size_t size = PDU_OVERHEAD;
+      for (std::size_t i = 0; i < oid_type_values.size(); i += 3) {
+         oid name[MAX_OID_LEN];
+         size_t name_length = MAX_OID_LEN;
+         parse_oid(oid_type_values[i], name, &name_length);
+
+         std::size_t const variable_size =
+             encoded_variable_size(name, name_length, oid_type_values[i + 2].size());
+         if (m_batches.empty() || starts_batch(batch_limits(), count, size, variable_size)) {
+            m_batches.emplace_back(snmp_pdu_create(SNMP_MSG_SET));
+            count = 0;
+            size = PDU_OVERHEAD;
+         }
+         ++count;
+         size += variable_size;
+
+         std::lock_guard<std::mutex> mib_lock(g_netsnmp_mib_mutex);
+         if (snmp_add_var(m_batches.back().get(), name, name_length, oid_type_values[i + 1][0],
+                          oid_type_values[i + 2].c_str())) {
+            snmp_perror_exception(oid_type_values[i].c_str());
+         }
+      }
+   }
+
+   PduPtr next_pdu() override {
+      if (m_batches.empty()) {
+         return nullptr;
+      }
+      PduPtr pdu = std::move(m_batches.front());
+      m_batches.pop_front();
+      return pdu;
+   }
+
+   void handle_response(netsnmp_pdu *response) override {
+      if (response->errstat != SNMP_ERR_NOERROR) {
+         throw PacketErrorBase(packet_error_message(response));
+      }
+      add_results(response);
+   }
+
+  private:
+   std::deque<PduPtr> m_batches; ///< Requests not sent yet.
+};
+
+// GETNEXT and GETBULK walks over one or more subtrees.
+class WalkRequest : public Request {
+  public:
+   // Walks with a state owned by the caller, e.g. one request at a time.
+   WalkRequest(SessionHandle &handle, WalkState &state)
+       : Request(handle, state.bulk ? "snmpbulkwalk" : "snmpwalk"), m_state(state) {}
+
+   // Walks with a state of its own.
+   WalkRequest(SessionHandle &handle, std::unique_ptr<WalkState> state)
+       : Request(handle, state->bulk ? "snmpbulkwalk" : "snmpwalk"),
+         m_owned_state(std::move(state)),
+         m_state(*m_owned_state) {}
+
+   PduPtr next_pdu() override {
+      if (m_state.done) {
+         return nullptr;
+      }
+      if (m_state.fetching_root) {
+         /*
+          * no printed successful results, which may mean we were
+          * pointed at an only existing instance. Attempt a GET, just
+          * for good measure.
+          */
+         PduPtr pdu(snmp_pdu_create(SNMP_MSG_GET));
+         snmp_add_null_var(pdu.get(), m_state.root, m_state.rootlen);
+         return pdu;
+      }
+      if (!m_state.walking) {
+         start_subtree();
+      }
+
+      /*
+       * create PDU for GETNEXT/GETBULK request and add object name to request
+       */
+      PduPtr pdu(snmp_pdu_create(m_state.bulk ? SNMP_MSG_GETBULK : SNMP_MSG_GETNEXT));
+      if (m_state.bulk) {
+         pdu->non_repeaters = 0;
+         pdu->max_repetitions = m_state.max_repetitions; /* fill the packet */
+      }
+      snmp_add_null_var(pdu.get(), m_state.name, m_state.name_length);
+      m_sent = std::chrono::steady_clock::now();
+      return pdu;
+   }
+
+   void handle_response(netsnmp_pdu *response) override {
+      if (m_state.fetching_root) {
+         if (response->errstat == SNMP_ERR_NOERROR) {
+            add_results(response);
+            for (auto vars = response->variables; vars; vars = vars->next_variable) {
+               remember(vars);
+            }
+         }
+         finish_subtree();
+         return;
+      }
+
+      if (response->errstat == SNMP_ERR_TOOBIG && m_state.tuner && m_state.tuner->too_big()) {
+         // Ask again for fewer variables
+         tuned();
+         return;
+      }
+
+      bool running = true;
+      std::size_t const previous_count = result_count();
+      if (response->errstat != SNMP_ERR_NOERROR) {
+         /*
+          * error in response, end of MIB is not an error
+          */
+         running = false;
+         if (response->errstat != SNMP_ERR_NOSUCHNAME && response->errindex != 0) {
+            throw PacketErrorBase(packet_error_message(response));
+         }
+      } else {
+         for (auto vars = response->variables; vars; vars = vars->next_variable) {
+            bool const in_subtree =
+                m_state.bulk
+                    ? vars->name_length >= m_state.rootlen &&
+                          std::memcmp(m_state.root, vars->name, m_state.rootlen * sizeof(oid)) == 0
+                    : snmp_oid_compare(m_state.end_oid, m_state.end_len, vars->name,
+                                       vars->name_length) > 0;
+            bool const in_range =
+                m_state.stop_len == 0 || snmp_oid_compare(vars->name, vars->name_length,
+                                                          m_state.stop_oid, m_state.stop_len) <= 0;
+            if (!in_subtree || !in_range) {
+               /*
+                * not part of this subtree
+                */
+               running = false;
+               continue;
+            }
+            add_result(vars);
+            remember(vars);
+
+            if (is_exception_value(vars)) {
+               running = false;
+               continue;
+            }
+            if (snmp_oid_compare(m_state.name, m_state.name_length, vars->name,
+                                 vars->name_length) >= 0) {
+               std::string err_msg = "Error: OID not increasing: ";
+               err_msg =
+                   err_msg + print_objid_to_string(m_state.name, m_state.name_length) + " >= ";
+               err_msg = err_msg + print_objid_to_string(vars->name, vars->name_length) + "\n";
+               throw GenericErrorBase(err_msg);
+            }
+            /*
+             * GETBULK continues from the last variable of the response
+             */
+            if (!m_state.bulk || vars->next_variable == NULL) {
+               std::memmove(m_state.name, vars->name, vars->name_length * sizeof(oid));
+               m_state.name_length = vars->name_length;
+            }
+         }
+      }
+
+      if (result_count() > previous_count) {
+         m_state.found = true;
+      }
+      if (m_state.tuner && response->errstat == SNMP_ERR_NOERROR) {
+         std::size_t varbinds = 0;
+         for (auto vars = response->variables; vars; vars = vars->next_variable) {
+            ++varbinds;
+         }
+         m_state.tuner->response_received(
+             varbinds, encoded_size(response),
+             std::chrono::duration<double>(std::chrono::steady_clock::now() - m_sent).count());
+         tuned();
+      }
+      if (!running) {
+         // A range without variables does not mean that the subtree is empty
+         if (m_state.found || m_state.partial) {
+            finish_subtree();
+         } else {
+            m_state.fetching_root = true;
+         }
+      }
+   }
+
+   bool handle_failure(bool timed_out) override {
+      // Like the walk tools, failures of the best-effort GET are not reported.
+      if (m_state.fetching_root) {
+         finish_subtree();
+         return true;
+      }
+      if (timed_out && m_state.tuner && m_state.tuner->timed_out()) {
+         // The agent answered smaller requests, ask again for fewer variables
+         tuned();
+         return true;
+      }
+      return false;
+   }
+
+  private:
+   // Applies the max-repetitions chosen by the tuner and remembers it for the address.
+   void tuned() {
+      if (m_state.tuner->max_repetitions() != m_state.max_repetitions) {
+         m_state.max_repetitions = m_state.tuner->max_repetitions();
+         max_repetitions_cache_store(m_state.tuner_address, m_state.max_repetitions);
+      }
+   }
+
+   void start_subtree() {
+      bool const resuming = m_state.next_root == 0 && !m_state.start_after.empty();
+      oid after[MAX_OID_LEN];
+      size_t after_length = MAX_OID_LEN;
+      if (resuming) {
+         parse_oid(m_state.start_after, after, &after_length);
+         m_state.next_root = root_holding(after, after_length);
+      }
+
+      if (m_state.roots.empty()) {
+         std::memmove(m_state.root, MIB2_ROOT, sizeof(MIB2_ROOT));
+         m_state.rootlen = OID_LENGTH(MIB2_ROOT);
+      } else {
+         m_state.rootlen = MAX_OID_LEN;
+         parse_oid(m_state.roots[m_state.next_root], m_state.root, &m_state.rootlen);
+      }
+      m_state.next_root++;
+
+      /*
+       * a GETNEXT walk ends at the first OID past the subtree
+       */
+      m_state.end_len = m_state.rootlen;
+      std::memmove(m_state.end_oid, m_state.root, m_state.rootlen * sizeof(oid));
+      m_state.end_oid[m_state.end_len - 1]++;
+
+      std::memmove(m_state.name, m_state.root, m_state.rootlen * sizeof(oid));
+      m_state.name_length = m_state.rootlen;
+      if (resuming) {
+         std::memmove(m_state.name, after, after_length * sizeof(oid));
+         m_state.name_length = after_length;
+      }
+      m_state.stop_len = 0;
+      if (!m_state.stop_after.empty()) {
+         m_state.stop_len = MAX_OID_LEN;
+         parse_oid(m_state.stop_after, m_state.stop_oid, &m_state.stop_len);
+      }
+      m_state.partial = resuming || m_state.stop_len > 0;
+      m_state.walking = true;
+      m_state.found = false;
+   }
+
+   // Index of the first root whose subtree holds the OID, the first root if there is none.
+   std::size_t root_holding(oid const *name, size_t name_length) const {
+      for (std::size_t i = 0; i < m_state.roots.size(); ++i) {
+         oid root[MAX_OID_LEN];
+         size_t root_length = MAX_OID_LEN;
+         parse_oid(m_state.roots[i], root, &root_length);
+         if (name_length >= root_length &&
+             std::memcmp(root, name, root_length * sizeof(oid)) == 0) {
+            return i;
+         }
+      }
+      return 0;
+   }
+
+   void remember(netsnmp_variable_list const *vars) {
+      std::memmove(m_state.last_oid, vars->name, vars->name_length * sizeof(oid));
+      m_state.last_len = vars->name_length;
+   }
+
+   void finish_subtree() {
+      m_state.fetching_root = false;
+      m_state.walking = false;
+      m_state.done = m_state.next_root >= std::max<std::size_t>(m_state.roots.size(), 1);
+   }
+
+   std::unique_ptr<WalkState> m_owned_state;
+   WalkState &m_state;
+   std::chrono::steady_clock::time_point m_sent; ///< When the last request was built.
+};
+
+// GETBULK walk of several table columns at once. Every request carries one variable per column
+// that is not finished yet, so the response holds one row of each of them per repetition.
+class TableWalkRequest : public Request {
+  public:
+   TableWalkRequest(SessionHandle &handle,
+                    std::vector<std::string> const &columns,
+                    int max_repetitions)
+       : Request(handle, "snmpbulkwalk"),
+         m_max_repetitions(max_repetitions),
+         m_columns(columns.size()) {
+      if (columns.empty()) {
+         throw GenericErrorBase("Missing object name\n");
+      }
+      for (std::size_t i = 0; i < columns.size(); ++i) {
+         Column &column = m_columns[i];
+         column.root_length = MAX_OID_LEN;
+         parse_oid(columns[i], column.root, &column.root_length);
+         std::memmove(column.name, column.root, column.root_length * sizeof(oid));
+         column.name_length = column.root_length;
+         m_active.push_back(i);
+      }
+      column_results.resize(columns.size());
+   }
+
+   PduPtr next_pdu() override {
+      if (m_active.empty()) {
+         return nullptr;
+      }
+      PduPtr pdu(snmp_pdu_create(SNMP_MSG_GETBULK));
+      pdu->non_repeaters = 0;
+      pdu->max_repetitions = m_max_repetitions;
+      for (std::size_t const i : m_active) {
+         snmp_add_null_var(pdu.get(), m_columns[i].name, m_columns[i].name_length);
+      }
+      return pdu;
+   }
+
+   void handle_response(netsnmp_pdu *response) override {
+      if (response->errstat != SNMP_ERR_NOERROR) {
+         /*
+          * error in response, end of MIB is not an error
+          */
+         m_active.clear();
+         if (response->errstat != SNMP_ERR_NOSUCHNAME && response->errindex != 0) {
+            throw PacketErrorBase(packet_error_message(response));
+         }
+         return;
+      }
+
+      // The variables come row by row, one per column of the request
+      std::size_t position = 0;
+      for (auto vars = response->variables; vars; vars = vars->next_variable, ++position) {
+         std::size_t const i = m_active[position % m_active.size()];
+         Column &column = m_columns[i];
+         if (column.finished) {
+            continue;
+         }
+         if (is_exception_value(vars) || vars->name_length < column.root_length ||
+             std::memcmp(column.root, vars->name, column.root_length * sizeof(oid)) != 0) {
+            column.finished = true;
+            continue;
+         }
+         if (snmp_oid_compare(column.name, column.name_length, vars->name, vars->name_length) >=
+             0) {
+            std::string err_msg = "Error: OID not increasing: ";
+            err_msg = err_msg + print_objid_to_string(column.name, column.name_length) + " >= ";
+            err_msg = err_msg + print_objid_to_string(vars->name, vars->name_length) + "\n";
+            throw GenericErrorBase(err_msg);
+         }
+         column_results[i].push_back(format_variable(vars));
+         std::memmove(column.name, vars->name, vars->name_length * sizeof(oid));
+         column.name_length = vars->name_length;
+      }
+
+      if (position == 0) {
+         m_active.clear();
+         return;
+      }
+      m_active.erase(std::remove_if(m_active.begin(), m_active.end(),
+                                    [this](std::size_t i) { return m_columns[i].finished; }),
+                     m_active.end());
+   }
+
+   std::vector<std::vector<Result>> column_results; ///< Variables of each column.
+
+  private:
+   struct Column {
+      oid root[MAX_OID_LEN];
+      size_t root_length = 0;
+      oid name[MAX_OID_LEN]; ///< OID the next request continues from.
+      size_t name_length = 0;
+      bool finished = false;
+   };
+
+   int m_max_repetitions;
+   std::vector<Column> m_columns;
+   std::vector<std::size_t> m_active; ///< Columns still being walked, in request order.
+};
+
+// A single GETNEXT of a numeric OID, keeping the OID of the variable that follows it.
+class NextOidRequest : public Request {
+  public:
+   NextOidRequest(SessionHandle &handle, std::vector<oid> const &name)
+       : Request(handle, "snmpgetnext") {
+      m_pdu.reset(snmp_pdu_create(SNMP_MSG_GETNEXT));
+      snmp_add_null_var(m_pdu.get(), name.data(), name.size());
+   }
+
+   void handle_response(netsnmp_pdu *response) override {
+      netsnmp_variable_list const *vars = response->variables;
+      if (response->errstat == SNMP_ERR_NOERROR && vars != nullptr && !is_exception_value(vars)) {
+         next.assign(vars->name, vars->name + vars->name_length);
+      }
+   }
+
+   std::vector<oid> next; ///< Empty at the end of the MIB view.
+};
+
+// Holds g_netsnmp_usm_mutex shared while Net-SNMP reads the USM user list of an SNMPv3 session,
+// i.e. while it builds, resends or parses a message. Never while waiting for the agent, so that
+// opening a session does not wait for the requests in flight.
+std::shared_lock<WriterPreferringSharedMutex> lock_usm_list(bool usm) {
+   return usm ? std::shared_lock<WriterPreferringSharedMutex>(g_netsnmp_usm_mutex)
+              : std::shared_lock<WriterPreferringSharedMutex>();
+}
+
+// The outcome of a request sent by synch_response().
+struct SynchState {
+   bool waiting = true;
+   int status = STAT_ERROR;
+   PduPtr response; ///< The response, or the report an SNMPv3 agent sent instead.
+};
+
+// Like Net-SNMP's snmp_synch_input(): keeps a copy of the response, Net-SNMP frees its own.
+int synch_input(int operation, netsnmp_session *session, int, netsnmp_pdu *pdu, void *magic) {
+   auto *state = static_cast<SynchState *>(magic);
+   state->waiting = false;
+   if (operation == NETSNMP_CALLBACK_OP_RECEIVED_MESSAGE && pdu != nullptr) {
+      if (pdu->command == SNMP_MSG_REPORT) {
+         int const report_type = snmpv3_get_report_type(pdu);
+         // Net-SNMP resends the request after a time window report itself
+         state->waiting = report_type == SNMPERR_NOT_IN_TIME_WINDOW;
+         session->s_snmp_errno = report_type;
+         state->status = STAT_ERROR;
+      } else {
+         state->status = STAT_SUCCESS;
+      }
+      state->response.reset(snmp_clone_pdu(pdu));
+   } else if (operation == NETSNMP_CALLBACK_OP_TIMED_OUT) {
+      session->s_snmp_errno = SNMPERR_TIMEOUT;
+      state->status = STAT_TIMEOUT;
+   } else {
+      state->status = STAT_ERROR;
+   }
+   return 1;
+}
+
+// Like snmp_sess_synch_response(), which holds the USM user list for the whole exchange
+// when called under lock_usm_list(): the list is only held to send, resend and read.
+int synch_response(void *sessp, bool usm, PduPtr pdu, PduPtr &response) {
+   SynchState state;
+   {
+      auto const list_lock = lock_usm_list(usm);
+      // A failed send leaves the PDU to the caller
+      if (snmp_sess_async_send(sessp, pdu.get(), synch_input, &state) == 0) {
+         return STAT_ERROR;
+      }
+   }
+   pdu.release();
+
+   while (state.waiting) {
+      int numfds = 0;
+      int block = 1;
+      struct timeval timeout = {0, 0};
+      netsnmp_large_fd_set fdset;
+      netsnmp_large_fd_set_init(&fdset, FD_SETSIZE);
+      snmp_sess_select_info2(sessp, &numfds, &fdset, &timeout, &block);
+      int const count =
+          netsnmp_large_fd_set_select(numfds, &fdset, nullptr, nullptr, block ? nullptr : &timeout);
+      int const select_errno = errno;
+      {
+         auto const list_lock = lock_usm_list(usm);
+         if (count > 0) {
+            snmp_sess_read2(sessp, &fdset);
+         } else if (count == 0) {
+            snmp_sess_timeout(sessp);
+         } else if (select_errno != EINTR) {
+            state.waiting = false;
+            state.status = STAT_ERROR;
+         }
+      }
+      netsnmp_large_fd_set_cleanup(&fdset);
+   }
+   response = std::move(state.response);
+   return state.status;
+}
+
+// Net-SNMP sends the engine ID probe as the empty user, which it adds to the user list once.
+// The caller holds g_netsnmp_usm_mutex exclusively.
+void add_probe_user() {
+   char empty[] = "";
+   if (usm_get_user(nullptr, 0, empty) != nullptr) {
+      return;
+   }
+   struct usmUser *user = usm_create_user();
+   if (user == nullptr) {
+      throw GenericErrorBase("snmp_sess_open: Unable to create the engine ID probe user");
+   }
+   user->name = strdup("");
+   user->secName = strdup("");
+   usm_add_user(user);
+}
+
+// Asks an SNMPv3 agent for its engine ID like snmp_sess_open() does, but on a session of its
+// own: the round trip may take the whole timeout, so the user list is only held to open that
+// session and to build and parse the messages.
+std::string probe_engine_id(netsnmp_session session) {
+   session.flags |= SNMP_FLAGS_DONT_PROBE;
+   std::unique_ptr<void, SnmpSingleSessionCloser> probe;
+   {
+      std::lock_guard<WriterPreferringSharedMutex> usm_lock(g_netsnmp_usm_mutex);
+      add_probe_user();
+      probe.reset(snmp_sess_open(&session));
+   }
+   if (!probe) {
+      snmp_sess_perror_exception("snmp_sess_open", &session);
+   }
+
+   PduPtr pdu(snmp_pdu_create(SNMP_MSG_GET));
+   pdu->version = SNMP_VERSION_3;
+   pdu->securityName = strdup("");
+   pdu->securityNameLen = 0;
+   pdu->securityLevel = SNMP_SEC_LEVEL_NOAUTH;
+   pdu->securityModel = SNMP_SEC_MODEL_USM;
+   PduPtr response;
+   int const status = synch_response(probe.get(), true, std::move(pdu), response);
+
+   // The agent answers with a report carrying its engine ID
+   if (response != nullptr && response->securityEngineIDLen > 0) {
+      return std::string(reinterpret_cast<char const *>(response->securityEngineID),
+                         response->securityEngineIDLen);
+   }
+   if (status != STAT_TIMEOUT) {
+      snmp_sess_session(probe.get())->s_snmp_errno = SNMPERR_UNKNOWN_ENG_ID;
+   }
+   snmp_single_sess_perror_exception("snmp_sess_open", probe.get());
+   return "";
+}
+
+} // namespace
+
+SessionHandle::SessionHandle(std::vector<std::string> const &args, std::string const &init_app_name)
+    : m_init_name(init_app_name) {
+   // Reference-counted initialization: the handle holds one reference until it is destroyed
+   netsnmp_thread_init(m_init_name);
+   SOCK_STARTUP;
+
+   try {
+      std::vector<std::string> parse_args = args;
+      take_mib_options(parse_args, m_mib_directories, m_mib_modules);
+      MasterKeysToCache const master_keys_to_cache = use_cached_master_keys(parse_args);
+      int argc = 0;
+      std::unique_ptr<char *[], Deleter> argv = create_argv(parse_args, argc);
+      netsnmp_session session;
+
+      // Serialize Net-SNMP global setup: snmp_parse_args modifies shared Net-SNMP
+      // global state (option parsing, DS library settings). The -O output flags are
+      // toggles, so start from a clean slate, capture what this argument list
+      // produces and put the previous values back for everybody else.
+      {
+         std::lock_guard<std::mutex> setup_lock(g_netsnmp_setup_mutex);
+         std::lock_guard<std::mutex> mib_lock(g_netsnmp_mib_mutex);
+         OutputFormatScope clean_output_format{OutputFormat()};
+
+         netsnmp_register_loghandler(NETSNMP_LOGHANDLER_NONE, 0);
+         netsnmp_ds_set_int(NETSNMP_DS_LIBRARY_ID, NETSNMP_DS_LIB_MIB_WARNINGS, 0);
+         switch (snmp_parse_args(argc, argv.get(), &session, "C:", sessionhandle_optProc)) {
+            case NETSNMP_PARSE_ARGS_ERROR:
+               throw ParseErrorBase("NETSNMP_PARSE_ARGS_ERROR");
+
+            case NETSNMP_PARSE_ARGS_SUCCESS_EXIT:
+               throw ParseErrorBase("NETSNMP_PARSE_ARGS_SUCCESS_EXIT");
+
+            case NETSNMP_PARSE_ARGS_ERROR_USAGE:
+               throw ParseErrorBase("NETSNMP_PARSE_ARGS_ERROR_USAGE");
+
+            default:
+               break;
+         }
+
+         m_output_format = read_output_format();
+         // Without MIBs, OIDs are printed as numbers with a few names mixed in
+         if (g_netsnmp_mib_loading.load() == MIB_LOADING_NUMERIC &&
+             m_output_format.oid_output_format == 0) {
+            m_output_format.oid_output_format = NETSNMP_OID_OUTPUT_NUMERIC;
+         }
+      }
+
+      if (!master_keys_to_cache.auth.empty() && session.securityAuthKeyLen > 0) {
+         usm_key_cache_store(master_keys_to_cache.auth,
+                             std::string(reinterpret_cast<char const *>(session.securityAuthKey),
+                                         session.securityAuthKeyLen));
+      }
+      if (!master_keys_to_cache.priv.empty() && session.securityPrivKeyLen > 0) {
+         usm_key_cache_store(master_keys_to_cache.priv,
+                             std::string(reinterpret_cast<char const *>(session.securityPrivKey),
+                                         session.securityPrivKeyLen));
+      }
+
+      /*
+       * Open an SNMP session. For SNMPv3 this creates the localized USM user that later
+       * requests reuse, for the engine ID probed beforehand unless it is known.
+       */
+      std::unique_lock<WriterPreferringSharedMutex> usm_lock(g_netsnmp_usm_mutex, std::defer_lock);
+      std::string known_engine_id;
+      bool discovering = false;
+      if (session.version == SNMP_VERSION_3) {
+         m_usm = true;
+         m_engine_cache_key = session.peername != nullptr ? session.peername : "";
+         discovering = session.securityEngineIDLen == 0;
+
+         // Start from the engine discovered earlier at this address instead of probing the
+         // agent again; the boots and time spare the time synchronization round trip too.
+         unsigned int engine_boots = 0;
+         unsigned int engine_time = 0;
+         if (discovering &&
+             engine_cache_lookup(m_engine_cache_key, known_engine_id, engine_boots, engine_time)) {
+            discovering = false;
+            session.securityEngineID = reinterpret_cast<u_char *>(&known_engine_id[0]);
+            session.securityEngineIDLen = known_engine_id.size();
+            if (session.engineBoots == 0 && session.engineTime == 0) {
+               session.engineBoots = engine_boots;
+               session.engineTime = engine_time;
+            }
+         } else if (discovering) {
+            // Without the user list held, the agent may take its time to answer
+            known_engine_id = probe_engine_id(session);
+            session.securityEngineID = reinterpret_cast<u_char *>(&known_engine_id[0]);
+            session.securityEngineIDLen = known_engine_id.size();
+         }
+         usm_lock.lock();
+      }
+      m_sessp.reset(snmp_sess_open(&session));
+      if (!m_sessp) {
+         /*
+          * diagnose snmp_open errors with the input netsnmp_session pointer
+          */
+         snmp_sess_perror_exception("snmp_sess_open", &session);
+      }
+
+      // snmp_sess_open() copies everything it needs out of the parsed session. The few
+      // buffers snmp_parse_args() allocates are left alone on purpose: the Net-SNMP 5.7
+      // and 5.8 APIs have no netsnmp_cleanup_session() to release them with.
+      netsnmp_session const *opened = snmp_sess_session(m_sessp.get());
+      if (opened != nullptr && opened->peername != nullptr) {
+         m_peername = opened->peername;
+      }
+      if (usm_lock.owns_lock() && opened != nullptr && opened->securityName != nullptr &&
+          opened->securityEngineID != nullptr && opened->securityEngineIDLen > 0) {
+         m_security_name = opened->securityName;
+         m_security_engine_id = std::string(
+             reinterpret_cast<char const *>(opened->securityEngineID), opened->securityEngineIDLen);
+         ++g_usm_user_refs[{m_security_name, m_security_engine_id}];
+         m_holds_usm_user = true;
+
+         if (discovering) {
+            u_int engine_boots = 0;
+            u_int engine_time = 0;
+            get_enginetime(opened->securityEngineID, opened->securityEngineIDLen, &engine_boots,
+                           &engine_time, TRUE);
+            engine_cache_store(m_engine_cache_key, m_security_engine_id, engine_boots, engine_time);
+         }
+      }
+   } catch (...) {
+      m_sessp.reset();
+      SOCK_CLEANUP;
+      netsnmp_thread_cleanup(m_init_name);
+      throw;
+   }
+}
+
+SessionHandle::~SessionHandle() {
+   // Closing the session may report its outstanding requests, there is nobody left to tell
+   m_async_reqids.clear();
+   m_sessp.reset();
+   release_usm_user(false);
+   SOCK_CLEANUP;
+   netsnmp_thread_cleanup(m_init_name);
+}
+
+std::string const &SessionHandle::security_name() const { return m_security_name; }
+
+std::string const &SessionHandle::engine_cache_key() const { return m_engine_cache_key; }
+
+bool SessionHandle::engine_stale() const { return m_engine_stale; }
+
+std::string const &SessionHandle::security_engine_id() const { return m_security_engine_id; }
+
+void SessionHandle::forget_usm_user() {
+   std::lock_guard<std::mutex> lock(m_mutex);
+   release_usm_user(true);
+}
+
+void SessionHandle::release_usm_user(bool force) {
+   if (!m_holds_usm_user) {
+      return;
+   }
+   m_holds_usm_user = false;
+
+   std::lock_guard<WriterPreferringSharedMutex> usm_lock(g_netsnmp_usm_mutex);
+   auto const key = std::make_pair(m_security_name, m_security_engine_id);
+   auto const entry = g_usm_user_refs.find(key);
+   bool const last_reference = entry == g_usm_user_refs.end() || --entry->second <= 0;
+   if (last_reference && entry != g_usm_user_refs.end()) {
+      g_usm_user_refs.erase(entry);
+   }
+   if (force || last_reference) {
+      remove_v3_user_for_engine(m_security_name, m_security_engine_id);
+   }
+}
+
+void SessionHandle::set_batch_limits(BatchLimits const &limits) {
+   std::lock_guard<std::mutex> lock(m_mutex);
+   m_batch_limits = limits;
+}
+
+std::vector<Result> SessionHandle::get(std::vector<std::string> const &oids) {
+   std::lock_guard<std::mutex> lock(m_mutex);
+   return pipelined_get(SNMP_MSG_GET, oids, "snmpget");
+}
+
+ResultTable SessionHandle::get_columnar(std::vector<std::string> const &oids) {
+   std::lock_guard<std::mutex> lock(m_mutex);
+   ResultTable table;
+   FixingRequest request(*this, SNMP_MSG_GET, oids, "snmpget");
+   request.collect_into(table);
+   run(request);
+   return table;
+}
+
+std::vector<Result> SessionHandle::get_next(std::vector<std::string> const &oids) {
+   std::lock_guard<std::mutex> lock(m_mutex);
+   return pipelined_get(SNMP_MSG_GETNEXT, oids, "snmpgetnext");
+}
+
+std::vector<Result> SessionHandle::bulk_get(std::vector<std::string> const &oids,
+                                            int non_repeaters,
+                                            int max_repetitions) {
+   std::lock_guard<std::mutex> lock(m_mutex);
+   BulkGetRequest request(*this, oids, non_repeaters, max_repetitions);
+   run(request);
+   return std::move(request.results);
+}
+
+std::vector<Result> SessionHandle::set(std::vector<std::string> const &oid_type_values) {
+   std::lock_guard<std::mutex> lock(m_mutex);
+   SetRequest request(*this, oid_type_values);
+   run(request);
+   return std::move(request.results);
+}
+
+std::vector<Result> SessionHandle::walk(std::string const &root_name) {
+   std::lock_guard<std::mutex> lock(m_mutex);
+   WalkState state;
+   if (!root_name.empty()) {
+      state.roots.push_back(root_name);
+   }
+   WalkRequest request(*this, state);
+   run(request);
+   return std::move(request.results);
+}
+
+std::vector<Result> SessionHandle::bulk_walk(std::vector<std::string> const &roots,
+                                             int max_repetitions,
+                                             bool adaptive) {
+   std::lock_guard<std::mutex> lock(m_mutex);
+   WalkState state = bulk_walk_state(roots, max_repetitions, adaptive);
+   WalkRequest request(*this, state);
+   run(request);
+   return std::move(request.results);
+}
+
+ResultTable SessionHandle::walk_columnar(std::string const &root_name) {
+   std::lock_guard<std::mutex> lock(m_mutex);
+   WalkState state;
+   if (!root_name.empty()) {
+      state.roots.push_back(root_name);
+   }
+   ResultTable table;
+   WalkRequest request(*this, state);
+   request.collect_into(table);
+   run(request);
+   return table;
+}
+
+ResultTable SessionHandle::bulk_walk_columnar(std::vector<std::string> const &roots,
+                                              int max_repetitions,
+                                              bool adaptive) {
+   std::lock_guard<std::mutex> lock(m_mutex);
+   WalkState state = bulk_walk_state(roots, max_repetitions, adaptive);
+   ResultTable table;
+   WalkRequest request(*this, state);
+   request.collect_into(table);
+   run(request);
+   return table;
+}
+
+std::vector<std::vector<Result>> SessionHandle::bulk_walk_table(
+    std::vector<std::string> const &columns, int max_repetitions) {
+   std::lock_guard<std::mutex> lock(m_mutex);
+   TableWalkRequest request(*this, columns, max_repetitions);
+   run(request);
+   return std::move(request.column_results);
+}
+
+TableRows SessionHandle::get_table(std::string const &table_name, bool bulk, int max_repetitions) {
+   std::lock_guard<std::mutex> lock(m_mutex);
+   WalkState state;
+   state.bulk = bulk;
+   state.max_repetitions = max_repetitions;
+   state.roots.push_back(table_name);
+   TableRows table;
+   WalkRequest request(*this, state);
+   request.collect_into(table.cells);
+   run(request);
+   split_table_cells(table, state.root, state.rootlen);
+   return table;
+}
+
+std::vector<Result> SessionHandle::run_walk(WalkState &state) {
+   std::lock_guard<std::mutex> lock(m_mutex);
+   WalkRequest request(*this, state);
+   run(request);
+   return std::move(request.results);
+}
+
+std::vector<std::vector<Result>> SessionHandle::pipelined_walks(
+    std::vector<WalkState> const &states, std::size_t max_outstanding) {
+   std::lock_guard<std::mutex> lock(m_mutex);
+   std::vector<std::unique_ptr<Request>> requests;
+   for (auto const &state : states) {
+      requests.push_back(std::make_unique<WalkRequest>(*this, std::make_unique<WalkState>(state)));
+   }
+   return pipeline(std::move(requests), max_outstanding);
+}
+
+ResumableWalk SessionHandle::resumable_walk(std::vector<std::string> const &roots,
+                                            std::string const &start_after,
+                                            bool bulk,
+                                            int max_repetitions,
+                                            bool adaptive) {
+   std::lock_guard<std::mutex> lock(m_mutex);
+   WalkState state;
+   if (bulk) {
+      state = bulk_walk_state(roots, max_repetitions, adaptive);
+   } else {
+      state.roots = roots;
+   }
+   state.start_after = start_after;
+
+   ResumableWalk walk;
+   WalkRequest request(*this, state);
+   try {
+      run(request);
+   } catch (...) {
+      walk.error = std::current_exception();
+   }
+   walk.results = std::move(request.results);
+   // A walk that failed before its first variable resumes where it started
+   walk.resume_token =
+       state.last_len > 0 ? numeric_oid_to_string(state.last_oid, state.last_len) : start_after;
+   return walk;
+}
+
+std::vector<std::string> SessionHandle::sample_split_points(std::string const &root_name,
+                                                            std::size_t max_points) {
+   std::lock_guard<std::mutex> lock(m_mutex);
+   oid root[MAX_OID_LEN];
+   size_t root_length = OID_LENGTH(MIB2_ROOT);
+   std::memmove(root, MIB2_ROOT, sizeof(MIB2_ROOT));
+   if (!root_name.empty()) {
+      parse_oid(root_name, root, &root_length);
+   }
+   if (root_length == 0) {
+      return {};
+   }
+
+   // The OID following a given one, empty past the subtree
+   auto next_in_subtree = [&](std::vector<oid> const &name) {
+      NextOidRequest request(*this, name);
+      run(request);
+      if (request.next.size() <= root_length ||
+          !std::equal(root, root + root_length, request.next.begin())) {
+         request.next.clear();
+      }
+      return std::move(request.next);
+   };
+
+   std::vector<oid> const first = next_in_subtree(std::vector<oid>(root, root + root_length));
+   std::vector<std::string> points;
+   for (std::size_t depth = root_length + 1; depth < first.size() && points.empty(); ++depth) {
+      // The branches are the distinct prefixes of this length; skip one at a time
+      std::vector<oid> branch_end(first.begin(), first.begin() + depth);
+      while (points.size() < max_points) {
+         branch_end.resize(depth);
+         branch_end.push_back(MAX_SUBID);
+         std::vector<oid> const next = next_in_subtree(branch_end);
+         if (next.size() < depth) {
+            break;
+         }
+         points.push_back(numeric_oid_to_string(branch_end.data(), branch_end.size()));
+         branch_end.assign(next.begin(), next.begin() + depth);
+      }
+   }
+   return points;
+}
+
+std::string SessionHandle::change_indicator(std::string const &root_name) const {
+   oid root[MAX_OID_LEN];
+   size_t root_length = OID_LENGTH(MIB2_ROOT);
+   std::memmove(root, MIB2_ROOT, sizeof(MIB2_ROOT));
+   if (!root_name.empty()) {
+      parse_oid(root_name, root, &root_length);
+   }
+   for (auto const &entry : CHANGE_INDICATORS) {
+      if (root_length >= entry.subtree.size() &&
+          std::equal(entry.subtree.begin(), entry.subtree.end(), root)) {
+         return entry.indicator;
+      }
+   }
+   return "";
+}
+
+WalkState SessionHandle::bulk_walk_state(std::vector<std::string> const &roots,
+                                         int max_repetitions,
+                                         bool adaptive) const {
+   WalkState state;
+   state.bulk = true;
+   state.max_repetitions = max_repetitions;
+   state.roots = roots;
+   if (adaptive) {
+      max_repetitions_cache_lookup(m_peername, state.max_repetitions);
+      state.tuner.emplace(state.max_repetitions);
+      state.max_repetitions = state.tuner->max_repetitions();
+      state.tuner_address = m_peername;
+   }
+   return state;
+}
+
+std::vector<Result> SessionHandle::walk_step(WalkState &state) {
+   std::lock_guard<std::mutex> lock(m_mutex);
+   WalkRequest request(*this, state);
+   exchange(request);
+   return std::move(request.results);
+}
+
+int SessionHandle::async_get(std::vector<std::string> const &oids) {
+   std::lock_guard<std::mutex> lock(m_mutex);
+   return async_start(std::make_unique<FixingRequest>(*this, SNMP_MSG_GET, oids, "snmpget"));
+}
+
+int SessionHandle::async_get_next(std::vector<std::string> const &oids) {
+   std::lock_guard<std::mutex> lock(m_mutex);
+   return async_start(
+       std::make_unique<FixingRequest>(*this, SNMP_MSG_GETNEXT, oids, "snmpgetnext"));
+}
+
+int SessionHandle::async_bulk_get(std::vector<std::string> const &oids,
+                                  int non_repeaters,
+                                  int max_repetitions) {
+   std::lock_guard<std::mutex> lock(m_mutex);
+   return async_start(
+       std::make_unique<BulkGetRequest>(*this, oids, non_repeaters, max_repetitions));
+}
+
+int SessionHandle::async_set(std::vector<std::string> const &oid_type_values) {
+   std::lock_guard<std::mutex> lock(m_mutex);
+   return async_start(std::make_unique<SetRequest>(*this, oid_type_values));
+}
+
+int SessionHandle::async_walk(WalkState const &state) {
+   std::lock_guard<std::mutex> lock(m_mutex);
+   return async_start(std::make_unique<WalkRequest>(*this, std::make_unique<WalkState>(state)));
+}
+
+std::vector<AsyncCompletion> SessionHandle::async_read() {
+   std::lock_guard<std::mutex> lock(m_mutex);
+   netsnmp_transport *transport = snmp_sess_transport(m_sessp.get());
+   if (transport != nullptr && transport->sock >= 0) {
+      netsnmp_large_fd_set fdset;
+      netsnmp_large_fd_set_init(&fdset, transport->sock + 1);
+      NETSNMP_LARGE_FD_SET(transport->sock, &fdset);
+      // Responses are dispatched to async_callback() from in here
+      {
+         auto const list_lock = lock_usm_list(m_usm);
+         snmp_sess_read2(m_sessp.get(), &fdset);
+      }
+      netsnmp_large_fd_set_cleanup(&fdset);
+   }
+   return async_collect();
+}
+
+std::vector<AsyncCompletion> SessionHandle::async_timeout() {
+   std::lock_guard<std::mutex> lock(m_mutex);
+   {
+      auto const list_lock = lock_usm_list(m_usm);
+      snmp_sess_timeout(m_sessp.get());
+   }
+   return async_collect();
+}
+
+std::vector<AsyncCompletion> SessionHandle::async_cancel(std::string const &reason) {
+   std::lock_guard<std::mutex> lock(m_mutex);
+   // Responses that still arrive for the cancelled requests find no operation and are dropped
+   m_async_reqids.clear();
+   m_async_ready.clear();
+   while (!m_async_requests.empty()) {
+      async_complete(m_async_requests.begin()->first,
+                     std::make_exception_ptr(GenericErrorBase(reason)));
+   }
+
+   std::vector<AsyncCompletion> completions;
+   completions.swap(m_async_completed);
+   return completions;
+}
+
+int SessionHandle::async_fd() {
+   std::lock_guard<std::mutex> lock(m_mutex);
+   netsnmp_transport const *transport = snmp_sess_transport(m_sessp.get());
+   return transport != nullptr ? transport->sock : -1;
+}
+
+double SessionHandle::async_next_timeout() {
+   std::lock_guard<std::mutex> lock(m_mutex);
+   if (!m_async_ready.empty() || !m_async_completed.empty()) {
+      return 0;
+   }
+   if (m_async_reqids.empty()) {
+      return -1;
+   }
+
+   int numfds = 0;
+   int block = 1;
+   struct timeval timeout = {0, 0};
+   netsnmp_large_fd_set fdset;
+   netsnmp_large_fd_set_init(&fdset, FD_SETSIZE);
+   snmp_sess_select_info2(m_sessp.get(), &numfds, &fdset, &timeout, &block);
+   netsnmp_large_fd_set_cleanup(&fdset);
+
+   // The requests are still outstanding, so Net-SNMP always reports when they expire
+   return block ? -1 : static_cast<double>(timeout.tv_sec) + timeout.tv_usec / 1e6;
+}
+
+void SessionHandle::run(Request &request) {
+   while (exchange(request)) {
+   }
+}
+
+bool SessionHandle::exchange(Request &request) {
+   PduPtr pdu = request.next_pdu();
+   if (!pdu) {
+      return false;
+   }
+
+   PduPtr response;
+   int const status = synch_response(m_sessp.get(), m_usm, std::move(pdu), response);
+
+   if (status == STAT_SUCCESS && response != nullptr) {
+      request.handle_response(response.get());
+   } else if (!request.handle_failure(status == STAT_TIMEOUT)) {
+      if (status == STAT_SUCCESS) {
+         snmp_check_null_response(response.get());
+      } else if (status == STAT_TIMEOUT) {
+         throw TimeoutErrorBase(timeout_message());
+      } else { /* status == STAT_ERROR */
+         check_engine_report();
+         snmp_single_sess_perror_exception(request.prog_name(), m_sessp.get());
+      }
+   }
+   return true;
+}
+
+std::vector<Result> SessionHandle::pipelined_get(int command,
+                                                 std::vector<std::string> const &oids,
+                                                 char const *prog_name) {
+   FixingRequest request(*this, command, oids, prog_name);
+   if (m_batch_limits.max_outstanding <= 1 || request.batch_count() <= 1) {
+      run(request);
+      return std::move(request.results);
+   }
+
+   std::vector<Result> results;
+   for (auto &batch_results : pipeline(request.split(), m_batch_limits.max_outstanding)) {
+      std::move(batch_results.begin(), batch_results.end(), std::back_inserter(results));
+   }
+   return results;
+}
+
+std::vector<std::vector<Result>> SessionHandle::pipeline(
+    std::vector<std::unique_ptr<Request>> requests, std::size_t max_outstanding) {
+   std::vector<std::vector<Result>> results(requests.size());
+   std::map<int, std::size_t> running; // Index of each started operation by id
+   std::vector<AsyncCompletion> others;
+   std::exception_ptr error;
+   std::size_t next = 0;
+
+   while (true) {
+      // After a failure the operations in flight finish, no new ones start
+      while (!error && next < requests.size() && running.size() < max_outstanding) {
+         running.emplace(async_start(std::move(requests[next])), next);
+         ++next;
+      }
+      if (running.empty()) {
+         break;
+      }
+
+      async_wait();
+      for (auto &completion : async_collect()) {
+         auto const entry = running.find(completion.request_id);
+         if (entry == running.end()) {
+            // An operation of async_get() and friends, left for async_read() to report
+            others.push_back(std::move(completion));
+            continue;
+         }
+         if (completion.error && !error) {
+            error = completion.error;
+         }
+         results[entry->second] = std::move(completion.results);
+         running.erase(entry);
+      }
+   }
+
+   m_async_completed.insert(m_async_completed.begin(), std::make_move_iterator(others.begin()),
+                            std::make_move_iterator(others.end()));
+   if (error) {
+      std::rethrow_exception(error);
+   }
+   return results;
+}
+
+void SessionHandle::async_wait() {
+   if (!m_async_ready.empty() || !m_async_completed.empty()) {
+      return;
+   }
+
+   int numfds = 0;
+   int block = 1;
+   struct timeval timeout = {0, 0};
+   netsnmp_large_fd_set fdset;
+   netsnmp_large_fd_set_init(&fdset, FD_SETSIZE);
+   snmp_sess_select_info2(m_sessp.get(), &numfds, &fdset, &timeout, &block);
+
+   // Responses and timeouts are dispatched to async_callback() from in here
+   int const count =
+       netsnmp_large_fd_set_select(numfds, &fdset, nullptr, nullptr, block ? nullptr : &timeout);
+   {
+      auto const list_lock = lock_usm_list(m_usm);
+      if (count > 0) {
+         snmp_sess_read2(m_sessp.get(), &fdset);
+      } else if (count == 0) {
+         snmp_sess_timeout(m_sessp.get());
+      }
+   }
+   netsnmp_large_fd_set_cleanup(&fdset);
+}
+
+std::string SessionHandle::timeout_message() const {
+   return "Timeout: No Response from " + m_peername + ".\n";
+}
+
+int SessionHandle::async_start(std::unique_ptr<Request> request) {
+   int const id = s_async_next_id++;
+   m_async_requests.emplace(id, std::move(request));
+   async_send(id);
+   return id;
+}
+
+void SessionHandle::async_send(int id) {
+   Request &request = *m_async_requests.at(id);
+   try {
+      PduPtr pdu = request.next_pdu();
+      if (!pdu) {
+         async_complete(id, nullptr);
+         return;
+      }
+
+      // Unlike snmp_sess_synch_response(), a failed send leaves the PDU to the caller
+      int reqid = 0;
+      {
+         auto const list_lock = lock_usm_list(m_usm);
+         reqid = snmp_sess_async_send(m_sessp.get(), pdu.get(), async_callback, this);
+      }
+      if (reqid == 0) {
+         snmp_single_sess_perror_exception(request.prog_name(), m_sessp.get());
+      }
+      pdu.release();
+      m_async_reqids[reqid] = id;
+   } catch (...) {
+      async_complete(id, std::current_exception());
+   }
+}
+
+void SessionHandle::async_complete(int id, std::exception_ptr error) {
+   auto const entry = m_async_requests.find(id);
+   AsyncCompletion completion;
+   completion.request_id = id;
+   completion.error = error;
+   if (!error) {
+      completion.results = std::move(entry->second->results);
+   }
+   m_async_requests.erase(entry);
+   m_async_completed.push_back(std::move(completion));
+}
+
+std::vector<AsyncCompletion> SessionHandle::async_collect() {
+   // Send the follow-up requests of the responses handled by async_callback()
+   std::vector<int> ready;
+   ready.swap(m_async_ready);
+   for (int const id : ready) {
+      async_send(id);
+   }
+
+   std::vector<AsyncCompletion> completions;
+   completions.swap(m_async_completed);
+   return completions;
+}
+
+int SessionHandle::async_callback(
+    int operation, netsnmp_session *, int reqid, netsnmp_pdu *pdu, void *magic) {
+   auto *handle = static_cast<SessionHandle *>(magic);
+   auto const entry = handle->m_async_reqids.find(reqid);
+   if (entry == handle->m_async_reqids.end()) {
+      return 1;
+   }
+   int const id = entry->second;
+   handle->m_async_reqids.erase(entry);
+   Request &request = *handle->m_async_requests.at(id);
+
+   // Net-SNMP frees the response once the callback returns, so it is handled right here. The
+   // next request is only sent from async_collect(), outside of snmp_sess_read().
+   try {
+      if (operation == NETSNMP_CALLBACK_OP_RECEIVED_MESSAGE && pdu != nullptr) {
+         request.handle_response(pdu);
+         handle->m_async_ready.push_back(id);
+      } else if (request.handle_failure(operation == NETSNMP_CALLBACK_OP_TIMED_OUT)) {
+         handle->m_async_ready.push_back(id);
+      } else if (operation == NETSNMP_CALLBACK_OP_TIMED_OUT) {
+         throw TimeoutErrorBase(handle->timeout_message());
+      } else {
+         handle->check_engine_report();
+         snmp_single_sess_perror_exception(request.prog_name(), handle->m_sessp.get());
+      }
+   } catch (...) {
+      handle->async_complete(id, std::current_exception());
+   }
+   return 1;
+}
+
+void SessionHandle::check_engine_report() {
+   if (m_engine_cache_key.empty()) {
+      return;
+   }
+   netsnmp_session const *opened = snmp_sess_session(m_sessp.get());
+   if (opened != nullptr && (opened->s_snmp_errno == SNMPERR_UNKNOWN_ENG_ID ||
+                             opened->s_snmp_errno == SNMPERR_NOT_IN_TIME_WINDOW)) {
+      // The agent has a new engine (or rebooted beyond resynchronization): rediscover it
+      engine_cache_forget(m_engine_cache_key);
+      m_engine_stale = true;
+   }
+}
+
+Result SessionHandle::format_variable(netsnmp_variable_list const *vars) const {
+   // Names, enumerations and display hints come from the MIBs
+   if (m_output_format.oid_output_format != NETSNMP_OID_OUTPUT_NUMERIC ||
+       !m_output_format.print_numeric_enum) {
+      load_mibs();
+   }
+   return decode_variable(vars, m_output_format);
+}
+
+void SessionHandle::parse_oid(std::string const &name, oid *objid, size_t *objid_len) const {
+   if (!is_numeric_oid(name)) {
+      load_mibs();
+   }
+   translate_name(name, objid, objid_len);
+}
+
+void SessionHandle::load_mibs() const {
+   // The handle holds a reference, so Net-SNMP is not initialized again while it lives
+   unsigned const generation = g_netsnmp_init_generation.load();
+   if (m_mibs_loaded.load(std::memory_order_acquire) == generation) {
+      return;
+   }
+   {
+      std::lock_guard<std::mutex> mib_lock(g_netsnmp_mib_mutex);
+      mib_load_modules(m_mib_directories, m_mib_modules);
+   }
+   m_mibs_loaded.store(generation, std::memory_order_release);
+}
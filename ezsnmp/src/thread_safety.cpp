@@ -3,6 +3,9 @@
 #include <net-snmp/net-snmp-config.h>
 #include <net-snmp/net-snmp-includes.h>
 
+#include <cstdlib>
+#include <optional>
+
 // Global mutex definition for Net-SNMP thread safety
 std::mutex g_netsnmp_mib_mutex;
 
@@ -15,9 +18,100 @@ std::mutex g_netsnmp_setup_mutex;
 // thread was already past the spin check but before it called init_snmp.
 std::mutex g_netsnmp_lifecycle_mutex;
 
+// Shared mutex guarding the SNMPv3 USM user list
+WriterPreferringSharedMutex g_netsnmp_usm_mutex;
+
 // Reference counter for init/cleanup
 std::atomic<int> g_netsnmp_init_count(0);
 std::atomic<bool> g_netsnmp_initialized(false);
+std::atomic<bool> g_netsnmp_keep_alive(true);
+std::atomic<unsigned> g_netsnmp_init_generation(0);
+std::atomic<unsigned> g_netsnmp_mib_generation(0);
+std::atomic<int> g_netsnmp_mib_loading(MIB_LOADING_EAGER);
+
+// Fork generation of the process
+std::atomic<unsigned> g_netsnmp_fork_generation(0);
+
+namespace {
+
+// Application name init_snmp was called with, which snmp_shutdown must be called with too
+std::string g_netsnmp_app_name;
+
+// MibLoading of the next initialization
+std::atomic<int> g_requested_mib_loading(MIB_LOADING_EAGER);
+
+// Sets an environment variable for the lifetime of the object, then puts the old value back
+class EnvironmentScope {
+  public:
+   EnvironmentScope(char const* name, char const* value) : m_name(name) {
+      char const* const old_value = std::getenv(name);
+      if (old_value != nullptr) {
+         m_old_value = old_value;
+      }
+      set(value);
+   }
+
+   ~EnvironmentScope() { set(m_old_value ? m_old_value->c_str() : nullptr); }
+
+   EnvironmentScope(EnvironmentScope const&) = delete;
+   EnvironmentScope& operator=(EnvironmentScope const&) = delete;
+
+  private:
+   void set(char const* value) {
+#ifdef _WIN32
+      _putenv_s(m_name, value != nullptr ? value : "");
+#else
+      if (value != nullptr) {
+         setenv(m_name, value, 1);
+      } else {
+         unsetenv(m_name);
+      }
+#endif
+   }
+
+   char const* m_name;
+   std::optional<std::string> m_old_value;
+};
+
+// Both must be called with the lifecycle mutex held
+void initialize_library(std::string const& app_name) {
+   if (g_netsnmp_initialized.load(std::memory_order_acquire)) {
+      return;
+   }
+   std::lock_guard<std::mutex> mib_lock(g_netsnmp_mib_mutex);
+   /* completely disable logging otherwise it will default to stderr */
+   netsnmp_register_loghandler(NETSNMP_LOGHANDLER_NONE, 0);
+   int const mib_loading = g_requested_mib_loading.load();
+   if (mib_loading == MIB_LOADING_EAGER) {
+      init_snmp(app_name.c_str());
+   } else {
+      // init_snmp reads the MIBS modules from the MIBDIRS directories
+      EnvironmentScope mibs("MIBS", "");
+      std::optional<EnvironmentScope> mib_directories;
+      if (mib_loading == MIB_LOADING_NUMERIC) {
+         mib_directories.emplace("MIBDIRS", "");
+      }
+      init_snmp(app_name.c_str());
+   }
+   g_netsnmp_app_name = app_name;
+   g_netsnmp_mib_loading.store(mib_loading);
+   ++g_netsnmp_init_generation;
+   ++g_netsnmp_mib_generation;
+   g_netsnmp_initialized.store(true, std::memory_order_release);
+}
+
+void shutdown_library() {
+   if (!g_netsnmp_initialized.load(std::memory_order_acquire)) {
+      return;
+   }
+   std::lock_guard<std::mutex> mib_lock(g_netsnmp_mib_mutex);
+   /* completely disable logging otherwise it will default to stderr */
+   netsnmp_register_loghandler(NETSNMP_LOGHANDLER_NONE, 0);
+   snmp_shutdown(g_netsnmp_app_name.c_str());
+   g_netsnmp_initialized.store(false, std::memory_order_release);
+}
+
+} // namespace
 
 void netsnmp_thread_init(std::string const& app_name) {
    std::lock_guard<std::mutex> lock(g_netsnmp_lifecycle_mutex);
@@ -25,19 +119,14 @@ void netsnmp_thread_init(std::string const& app_name) {
    // Increment counter while holding the lifecycle mutex so that the
    // increment, the init_snmp call, and the flag store are all atomic
    // with respect to concurrent cleanup/init calls.
-   int count = g_netsnmp_init_count.fetch_add(1);
+   g_netsnmp_init_count.fetch_add(1);
 
-   // Only the first thread (count == 0 before increment) calls init_snmp
-   if (count == 0) {
-      std::lock_guard<std::mutex> mib_lock(g_netsnmp_mib_mutex);
-      /* completely disable logging otherwise it will default to stderr */
-      netsnmp_register_loghandler(NETSNMP_LOGHANDLER_NONE, 0);
-      init_snmp(app_name.c_str());
-      g_netsnmp_initialized.store(true, std::memory_order_release);
-   }
+   // Only the first thread calls init_snmp, unless the library was kept alive
+   initialize_library(app_name);
 }
 
 void netsnmp_thread_cleanup(std::string const& app_name) {
+   (void)app_name; // snmp_shutdown takes the name init_snmp was called with
    std::lock_guard<std::mutex> lock(g_netsnmp_lifecycle_mutex);
 
    // Decrement counter while holding the lifecycle mutex so the decrement,
@@ -46,11 +135,93 @@ void netsnmp_thread_cleanup(std::string const& app_name) {
    int count = g_netsnmp_init_count.fetch_sub(1);
 
    // Only the last thread (count == 1 before decrement, 0 after) calls snmp_shutdown
-   if (count == 1) {
-      std::lock_guard<std::mutex> mib_lock(g_netsnmp_mib_mutex);
-      /* completely disable logging otherwise it will default to stderr */
-      netsnmp_register_loghandler(NETSNMP_LOGHANDLER_NONE, 0);
-      snmp_shutdown(app_name.c_str());
-      g_netsnmp_initialized.store(false, std::memory_order_release);
+   if (count == 1 && !g_netsnmp_keep_alive.load()) {
+      shutdown_library();
+   }
+}
+
+void netsnmp_library_init(std::string const& app_name, bool keep_alive) {
+   std::lock_guard<std::mutex> lock(g_netsnmp_lifecycle_mutex);
+   g_netsnmp_keep_alive.store(keep_alive);
+   if (keep_alive) {
+      initialize_library(app_name);
+   } else if (g_netsnmp_init_count.load() <= 0) {
+      shutdown_library();
+   }
+}
+
+void netsnmp_library_set_mib_loading(int mib_loading) {
+   std::lock_guard<std::mutex> lock(g_netsnmp_lifecycle_mutex);
+   g_requested_mib_loading.store(mib_loading);
+   if (g_netsnmp_initialized.load() && g_netsnmp_mib_loading.load() != mib_loading &&
+       g_netsnmp_init_count.load() <= 0) {
+      shutdown_library();
+   }
+}
+
+void netsnmp_library_shutdown() {
+   std::lock_guard<std::mutex> lock(g_netsnmp_lifecycle_mutex);
+   g_netsnmp_keep_alive.store(false);
+   if (g_netsnmp_init_count.load() <= 0) {
+      shutdown_library();
+   }
+}
+
+void netsnmp_prepare_fork() {
+   // In the order the rest of the code nests them
+   g_netsnmp_lifecycle_mutex.lock();
+   g_netsnmp_setup_mutex.lock();
+   g_netsnmp_usm_mutex.lock();
+   g_netsnmp_mib_mutex.lock();
+}
+
+void netsnmp_after_fork_in_parent() {
+   g_netsnmp_mib_mutex.unlock();
+   g_netsnmp_usm_mutex.unlock();
+   g_netsnmp_setup_mutex.unlock();
+   g_netsnmp_lifecycle_mutex.unlock();
+}
+
+void netsnmp_after_fork_in_child() {
+   ++g_netsnmp_fork_generation;
+   g_netsnmp_usm_mutex.forget_waiting_writers();
+   netsnmp_after_fork_in_parent();
+}
+
+void WriterPreferringSharedMutex::lock() {
+   std::unique_lock<std::mutex> lock(m_mutex);
+   ++m_waiting_writers;
+   m_changed.wait(lock, [this] { return !m_writer && m_readers == 0; });
+   --m_waiting_writers;
+   m_writer = true;
+}
+
+void WriterPreferringSharedMutex::unlock() {
+   {
+      std::lock_guard<std::mutex> lock(m_mutex);
+      m_writer = false;
+   }
+   m_changed.notify_all();
+}
+
+void WriterPreferringSharedMutex::forget_waiting_writers() {
+   std::lock_guard<std::mutex> lock(m_mutex);
+   m_waiting_writers = 0;
+}
+
+void WriterPreferringSharedMutex::lock_shared() {
+   std::unique_lock<std::mutex> lock(m_mutex);
+   m_changed.wait(lock, [this] { return !m_writer && m_waiting_writers == 0; });
+   ++m_readers;
+}
+
+void WriterPreferringSharedMutex::unlock_shared() {
+   bool last_reader;
+   {
+      std::lock_guard<std::mutex> lock(m_mutex);
+      last_reader = --m_readers == 0;
+   }
+   if (last_reader) {
+      m_changed.notify_all();
    }
 }
@@ -0,0 +1,91 @@
+#include "usmkeycache.h"
+
+#include <cstddef>
+#include <list>
+#include <mutex>
+#include <string>
+#include <unordered_map>
+#include <utility>
+
+namespace {
+
+// Most recently used entries first; the index points into the list.
+using Entries = std::list<std::pair<std::string, std::string>>;
+
+std::mutex g_usm_key_cache_mutex;
+Entries g_usm_key_cache;
+std::unordered_map<std::string, Entries::iterator> g_usm_key_cache_index;
+std::size_t g_usm_key_cache_capacity = 1024;
+
+// Drops the least recently used entries beyond the capacity. Must be called with
+// g_usm_key_cache_mutex held.
+void evict() {
+   while (g_usm_key_cache.size() > g_usm_key_cache_capacity) {
+      g_usm_key_cache_index.erase(g_usm_key_cache.back().first);
+      g_usm_key_cache.pop_back();
+   }
+}
+
+} // namespace
+
+std::string usm_key_cache_key(std::string const& kind,
+                              std::string const& auth_protocol,
+                              std::string const& passphrase_digest) {
+   std::string key = kind;
+   key += '\0';
+   for (char const c : auth_protocol) {
+      key += (c >= 'a' && c <= 'z') ? static_cast<char>(c - 'a' + 'A') : c;
+   }
+   key += '\0';
+   key += passphrase_digest;
+   return key;
+}
+
+bool usm_key_cache_lookup(std::string const& key, std::string& master_key) {
+   std::lock_guard<std::mutex> lock(g_usm_key_cache_mutex);
+   auto const entry = g_usm_key_cache_index.find(key);
+   if (entry == g_usm_key_cache_index.end()) {
+      return false;
+   }
+   g_usm_key_cache.splice(g_usm_key_cache.begin(), g_usm_key_cache, entry->second);
+   master_key = entry->second->second;
+   return true;
+}
+
+void usm_key_cache_store(std::string const& key, std::string const& master_key) {
+   std::lock_guard<std::mutex> lock(g_usm_key_cache_mutex);
+   if (g_usm_key_cache_capacity == 0 || master_key.empty()) {
+      return;
+   }
+   auto const entry = g_usm_key_cache_index.find(key);
+   if (entry != g_usm_key_cache_index.end()) {
+      entry->second->second = master_key;
+      g_usm_key_cache.splice(g_usm_key_cache.begin(), g_usm_key_cache, entry->second);
+      return;
+   }
+   g_usm_key_cache.emplace_front(key, master_key);
+   g_usm_key_cache_index[key] = g_usm_key_cache.begin();
+   evict();
+}
+
+void usm_key_cache_clear() {
+   std::lock_guard<std::mutex> lock(g_usm_key_cache_mutex);
+   g_usm_key_cache.clear();
+   g_usm_key_cache_index.clear();
+}
+
+void usm_key_cache_set_capacity(std::size_t capacity) {
+   std::lock_guard<std::mutex> lock(g_usm_key_cache_mutex);
+   g_usm_key_cache_capacity = capacity;
+   evict();
+}
+
+std::size_t usm_key_cache_get_capacity() {
+   std::lock_guard<std::mutex> lock(g_usm_key_cache_mutex);
+   return g_usm_key_cache_capacity;
+}
+
+std::size_t usm_key_cache_size() {
+   std::lock_guard<std::mutex> lock(g_usm_key_cache_mutex);
+   return g_usm_key_cache.size();
+}
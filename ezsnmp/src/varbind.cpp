@@ -0,0 +1,447 @@
+#include "varbind.h"
+
+#include <algorithm>
+#include <array>
+#include <cctype>
+#include <cstdint>
+#include <cstdlib>
+#include <memory>
+#include <mutex>
+#include <string>
+#include <vector>
+
+#include "helpers.h"
+#include "mibcache.h"
+#include "oidtranslation.h"
+#include "thread_safety.h"
+
+namespace {
+
+char const NO_SUCH_OBJECT_TEXT[] = "No Such Object available on this agent at this OID";
+char const NO_SUCH_INSTANCE_TEXT[] = "No Such Instance currently exists at this OID";
+
+// Matches the \w and - characters of the MIB-style OID_INDEX_RE* patterns.
+bool is_label_char(char c) {
+   return std::isalnum(static_cast<unsigned char>(c)) || c == '_' || c == '-';
+}
+
+// Returns the end of the run of label characters starting at pos.
+size_t label_end(std::string const &name, size_t pos) {
+   while (pos < name.size() && is_label_char(name[pos])) {
+      pos++;
+   }
+   return pos;
+}
+
+std::string numeric_oid_to_string(oid const *name, size_t name_length) {
+   std::string text;
+   text.reserve(name_length * 4);
+   for (size_t i = 0; i < name_length; i++) {
+      text += '.';
+      text += std::to_string(name[i]);
+   }
+   return text;
+}
+
+// Runs one of the sprint_realloc_* printers into a std::string.
+template <typename Printer>
+std::string sprint_to_string(Printer print) {
+   u_char *buf = nullptr;
+   size_t buf_len = 256, out_len = 0;
+
+   if ((buf = static_cast<u_char *>(calloc(buf_len, 1))) == nullptr) {
+      return "[TRUNCATED]";
+   }
+
+   std::string text;
+   if (print(&buf, &buf_len, &out_len)) {
+      text.assign(reinterpret_cast<char *>(buf), out_len);
+   } else {
+      text = std::string(reinterpret_cast<char *>(buf)) + " [TRUNCATED]";
+   }
+   SNMP_FREE(buf);
+
+   return text;
+}
+
+// Takes the value out of a printed "TYPE: value" the same way parse_result() does.
+std::string value_from_text(std::string const &text) {
+   size_t const separator = text.find(':');
+   std::string value = separator == std::string::npos ? text : text.substr(separator + 1);
+
+   if (!value.empty() && value[0] == ' ') {
+      value.erase(0, 1);
+   }
+   value = value.substr(0, value.find_last_not_of(" \t\n\r") + 1);
+   if (value.length() >= 2 && value.front() == '"' && value.back() == '"') {
+      value = value.substr(1, value.length() - 2);
+   }
+
+   return value;
+}
+
+std::string render_value(netsnmp_variable_list const *vars, OutputFormat const &format) {
+   std::lock_guard<std::mutex> lock(g_netsnmp_mib_mutex);
+   OutputFormatScope output_format(format);
+   return value_from_text(sprint_to_string([vars](u_char **buf, size_t *buf_len, size_t *out_len) {
+      return sprint_realloc_value(buf, buf_len, out_len, 1, vars->name, vars->name_length, vars);
+   }));
+}
+
+// The value of a received variable of one of the types decode_variable() converts itself, kept
+// just far enough to print it if it is ever read: the OID (inline when it is short, as most
+// instance OIDs are) and the value, instead of a clone of the whole netsnmp_variable_list.
+class PendingValue final : public Result::LazyValue {
+  public:
+   PendingValue(netsnmp_variable_list const *vars, OutputFormat const &format)
+       : m_type(vars->type), m_name_length(vars->name_length), m_format(format) {
+      if (m_name_length <= m_short_name.size()) {
+         std::copy(vars->name, vars->name + m_name_length, m_short_name.begin());
+      } else {
+         m_long_name.assign(vars->name, vars->name + m_name_length);
+      }
+
+      switch (m_type) {
+         case ASN_COUNTER64:
+            m_counter64 = *vars->val.counter64;
+            break;
+
+         case ASN_IPADDRESS:
+         case ASN_OCTET_STR:
+            m_bytes.assign(reinterpret_cast<char const *>(vars->val.string), vars->val_len);
+            break;
+
+         default:
+            m_integer = *vars->val.integer;
+            break;
+      }
+   }
+
+  private:
+   std::string render() const override {
+      netsnmp_variable_list vars = {};
+      vars.name = const_cast<oid *>(m_long_name.empty() ? m_short_name.data() : m_long_name.data());
+      vars.name_length = m_name_length;
+      vars.type = m_type;
+
+      switch (m_type) {
+         case ASN_COUNTER64:
+            vars.val.counter64 = const_cast<struct counter64 *>(&m_counter64);
+            vars.val_len = sizeof(m_counter64);
+            break;
+
+         case ASN_IPADDRESS:
+         case ASN_OCTET_STR:
+            vars.val.string = reinterpret_cast<u_char *>(const_cast<char *>(m_bytes.data()));
+            vars.val_len = m_bytes.size();
+            break;
+
+         default:
+            vars.val.integer = const_cast<long *>(&m_integer);
+            vars.val_len = sizeof(m_integer);
+            break;
+      }
+
+      return render_value(&vars, m_format);
+   }
+
+   u_char m_type;
+   size_t m_name_length;
+   std::array<oid, 16> m_short_name;
+   std::vector<oid> m_long_name;
+   long m_integer = 0;
+   struct counter64 m_counter64 = {};
+   std::string m_bytes;
+   OutputFormat m_format;
+};
+
+// Prints the whole variable and parses it back, for values whose conversion depends on the MIB.
+Result decode_printed(netsnmp_variable_list const *vars, OutputFormat const &format) {
+   std::string text;
+   {
+      std::lock_guard<std::mutex> lock(g_netsnmp_mib_mutex);
+      OutputFormatScope output_format(format);
+      text = sprint_to_string([vars](u_char **buf, size_t *buf_len, size_t *out_len) {
+         return sprint_realloc_variable(buf, buf_len, out_len, 1, vars->name, vars->name_length,
+                                        vars);
+      });
+   }
+   return parse_result(text);
+}
+
+// A display hint or BITS syntax changes how Net-SNMP prints an OCTET STRING.
+bool has_mib_string_format(netsnmp_variable_list const *vars) {
+   std::shared_ptr<MibTree const> const tree = mib_tree();
+   std::size_t depth = 0;
+   uint32_t const node = tree->find(vars->name, vars->name_length, depth);
+   return node != MibTree::NONE &&
+          (tree->node(node).hint != MibTree::NONE || tree->node(node).type == TYPE_BITS);
+}
+
+// The choice sprint_realloc_octet_string() makes for a string without a display hint.
+bool is_hex_string(netsnmp_variable_list const *vars, OutputFormat const &format) {
+   if (format.string_output_format == NETSNMP_STRING_OUTPUT_HEX) {
+      return true;
+   }
+   for (size_t i = 0; i < vars->val_len; i++) {
+      int const c = vars->val.string[i];
+      if (!std::isprint(c) && !std::isspace(c)) {
+         return true;
+      }
+   }
+   return false;
+}
+
+// The text sprint_realloc_asciistring() prints between the quotes of a STRING.
+std::string ascii_string(netsnmp_variable_list const *vars) {
+   std::string text;
+   text.reserve(vars->val_len);
+   for (size_t i = 0; i < vars->val_len; i++) {
+      char const c = static_cast<char>(vars->val.string[i]);
+      if (c == '\\' || c == '"') {
+         text += '\\';
+      }
+      text += c;
+   }
+   return text;
+}
+
+} // namespace
+
+OutputFormat read_output_format() {
+   OutputFormat format;
+   format.oid_output_format =
+       netsnmp_ds_get_int(NETSNMP_DS_LIBRARY_ID, NETSNMP_DS_LIB_OID_OUTPUT_FORMAT);
+   format.string_output_format =
+       netsnmp_ds_get_int(NETSNMP_DS_LIBRARY_ID, NETSNMP_DS_LIB_STRING_OUTPUT_FORMAT);
+   format.print_numeric_enum =
+       netsnmp_ds_get_boolean(NETSNMP_DS_LIBRARY_ID, NETSNMP_DS_LIB_PRINT_NUMERIC_ENUM);
+   format.numeric_timeticks =
+       netsnmp_ds_get_boolean(NETSNMP_DS_LIBRARY_ID, NETSNMP_DS_LIB_NUMERIC_TIMETICKS);
+   return format;
+}
+
+void apply_output_format(OutputFormat const &format) {
+   netsnmp_ds_set_int(NETSNMP_DS_LIBRARY_ID, NETSNMP_DS_LIB_OID_OUTPUT_FORMAT,
+                      format.oid_output_format);
+   netsnmp_ds_set_int(NETSNMP_DS_LIBRARY_ID, NETSNMP_DS_LIB_STRING_OUTPUT_FORMAT,
+                      format.string_output_format);
+   netsnmp_ds_set_boolean(NETSNMP_DS_LIBRARY_ID, NETSNMP_DS_LIB_PRINT_NUMERIC_ENUM,
+                          format.print_numeric_enum);
+   netsnmp_ds_set_boolean(NETSNMP_DS_LIBRARY_ID, NETSNMP_DS_LIB_NUMERIC_TIMETICKS,
+                          format.numeric_timeticks);
+}
+
+OutputFormatScope::OutputFormatScope(OutputFormat const &format) : m_saved(read_output_format()) {
+   apply_output_format(format);
+}
+
+OutputFormatScope::~OutputFormatScope() { apply_output_format(m_saved); }
+
+void split_oid_index(std::string const &name, std::string &oid, std::string &index) {
+   size_t const module_end = label_end(name, 0);
+   bool const has_module = module_end > 0 && name.compare(module_end, 2, "::") == 0;
+
+   if (has_module) {
+      size_t const label_begin = module_end + 2;
+      size_t const dot = label_end(name, label_begin);
+
+      if (dot > label_begin && dot < name.size() && name[dot] == '.') {
+         std::string const rest = name.substr(dot + 1);
+
+         // OID_INDEX_RE4: an index holding a quoted string, e.g. ipv4."192.168.1.181"
+         size_t const open_quote = rest.find('"', 1);
+         if (open_quote != std::string::npos &&
+             rest.find('"', open_quote + 1) != std::string::npos) {
+            oid = name.substr(0, dot);
+            index = rest;
+            return;
+         }
+
+         // OID_INDEX_RE3: RFC1213-MIB objects keep their whole numeric index
+         if (name.compare(0, module_end, "RFC1213-MIB") == 0 && !rest.empty() &&
+             rest.find_first_not_of("0123456789.") == std::string::npos) {
+            oid = name.substr(0, dot);
+            index = rest;
+            return;
+         }
+      }
+   }
+
+   // OID_INDEX_RE2: everything after the last dot
+   size_t const last_dot = name.rfind('.');
+   if (last_dot != std::string::npos && last_dot > 0 && last_dot + 1 < name.size()) {
+      oid = name.substr(0, last_dot);
+      index = name.substr(last_dot + 1);
+      return;
+   }
+
+   oid = name;
+   index = "";
+}
+
+Result decode_variable(netsnmp_variable_list const *vars, OutputFormat const &format) {
+   bool const numeric_oids = format.oid_output_format == NETSNMP_OID_OUTPUT_NUMERIC;
+   bool const octet_string = vars->type == ASN_OCTET_STR;
+   bool mib_string_format = false;
+   std::string name;
+
+   // Numeric OIDs need neither the MIB tree nor the global output flags
+   if (numeric_oids) {
+      name = numeric_oid_to_string(vars->name, vars->name_length);
+   } else {
+      name = translate_oid(vars->name, vars->name_length, format);
+   }
+   if (octet_string) {
+      mib_string_format = has_mib_string_format(vars);
+   }
+
+   Result result;
+   switch (vars->type) {
+      case ASN_INTEGER:
+         result.type = "INTEGER";
+         result.converted_value = static_cast<int>(*vars->val.integer);
+         break;
+
+      case ASN_COUNTER:
+         result.type = "Counter32";
+         result.converted_value = static_cast<uint32_t>(*vars->val.integer);
+         break;
+
+      case ASN_GAUGE:
+         result.type = "Gauge32";
+         result.converted_value = static_cast<uint32_t>(*vars->val.integer);
+         break;
+
+      case ASN_TIMETICKS:
+         result.type = "Timeticks";
+         result.converted_value = static_cast<uint32_t>(*vars->val.integer);
+         break;
+
+      case ASN_COUNTER64:
+         result.type = "Counter64";
+         result.converted_value =
+             (static_cast<uint64_t>(vars->val.counter64->high & 0xffffffffUL) << 32) |
+             static_cast<uint64_t>(vars->val.counter64->low & 0xffffffffUL);
+         break;
+
+      case ASN_IPADDRESS:
+         if (vars->val_len != 4) {
+            return decode_printed(vars, format);
+         }
+         result.type = "IpAddress";
+         result.converted_value =
+             std::to_string(vars->val.string[0]) + "." + std::to_string(vars->val.string[1]) + "." +
+             std::to_string(vars->val.string[2]) + "." + std::to_string(vars->val.string[3]);
+         break;
+
+      case ASN_OCTET_STR:
+         if (mib_string_format || format.string_output_format == NETSNMP_STRING_OUTPUT_ASCII) {
+            return decode_printed(vars, format);
+         }
+         if (is_hex_string(vars, format)) {
+            result.type = "Hex-STRING";
+            result.converted_value =
+                std::vector<unsigned char>(vars->val.string, vars->val.string + vars->val_len);
+         } else {
+            result.type = "STRING";
+            result.converted_value = ascii_string(vars);
+         }
+         break;
+
+      case SNMP_NOSUCHOBJECT:
+         split_oid_index(name, result.oid, result.index);
+         result.type = "NOSUCHOBJECT";
+         result.value = NO_SUCH_OBJECT_TEXT;
+         result.update_converted_value();
+         return result;
+
+      case SNMP_NOSUCHINSTANCE:
+         split_oid_index(name, result.oid, result.index);
+         result.type = "NOSUCHINSTANCE";
+         result.value = NO_SUCH_INSTANCE_TEXT;
+         result.update_converted_value();
+         return result;
+
+      default:
+         return decode_printed(vars, format);
+   }
+
+   split_oid_index(name, result.oid, result.index);
+
+   // Keep what is needed to print the textual value if it is ever read
+   result._lazy_value = std::make_shared<PendingValue>(vars, format);
+
+   return result;
+}
+
+void ResultTableBuilder::append(netsnmp_variable_list const *vars) {
+   uint64_t integer_value = 0;
+   std::string text;
+   switch (vars->type) {
+      case ASN_INTEGER:
+         integer_value = static_cast<uint64_t>(static_cast<int64_t>(*vars->val.integer));
+         break;
+
+      case ASN_COUNTER:
+      case ASN_GAUGE:
+      case ASN_TIMETICKS:
+      case ASN_UINTEGER:
+         integer_value = static_cast<uint32_t>(*vars->val.integer);
+         break;
+
+      case ASN_COUNTER64:
+         integer_value = (static_cast<uint64_t>(vars->val.counter64->high & 0xffffffffUL) << 32) |
+                         static_cast<uint64_t>(vars->val.counter64->low & 0xffffffffUL);
+         break;
+
+      case ASN_IPADDRESS:
+         if (vars->val_len == 4) {
+            text = std::to_string(vars->val.string[0]) + "." + std::to_string(vars->val.string[1]) +
+                   "." + std::to_string(vars->val.string[2]) + "." +
+                   std::to_string(vars->val.string[3]);
+         }
+         break;
+
+      case ASN_OBJECT_ID:
+         text = numeric_oid_to_string(vars->val.objid, vars->val_len / sizeof(oid));
+         break;
+
+      case ASN_NULL:
+      case SNMP_NOSUCHOBJECT:
+      case SNMP_NOSUCHINSTANCE:
+      case SNMP_ENDOFMIBVIEW:
+         break;
+
+      default:
+         // OCTET STRING, BITS, Opaque, ...: the raw octets
+         if (vars->val.string != nullptr) {
+            text.assign(reinterpret_cast<char const *>(vars->val.string), vars->val_len);
+         }
+         break;
+   }
+   m_table.append(vars->name, vars->name_length, index_length(vars), vars->type, integer_value,
+                  text);
+}
+
+std::size_t ResultTableBuilder::index_length(netsnmp_variable_list const *vars) {
+   if (!m_leaf.empty() && vars->name_length > m_leaf.size() &&
+       std::equal(m_leaf.begin(), m_leaf.end(), vars->name)) {
+      return vars->name_length - m_leaf.size();
+   }
+
+   // Follow the OID down the MIB tree as far as it goes
+   if (m_tree == nullptr) {
+      m_tree = mib_tree();
+   }
+   std::size_t depth = 0;
+   uint32_t const node = m_tree->find(vars->name, vars->name_length, depth);
+   bool const leaf = node != MibTree::NONE && m_tree->node(node).first_child == MibTree::NONE;
+
+   if (leaf && depth < vars->name_length) {
+      m_leaf.assign(vars->name, vars->name + depth);
+      return vars->name_length - depth;
+   }
+   m_leaf.clear();
+   return vars->name_length > depth ? 1 : 0;
+}
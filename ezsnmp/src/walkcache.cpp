@@ -0,0 +1,38 @@
+#include "walkcache.h"
+
+#include <cstddef>
+#include <map>
+#include <mutex>
+#include <string>
+
+namespace {
+
+std::mutex g_walk_snapshots_mutex;
+std::map<std::string, WalkSnapshot> g_walk_snapshots;
+
+} // namespace
+
+void walk_snapshot_store(std::string const& key, WalkSnapshot const& snapshot) {
+   std::lock_guard<std::mutex> lock(g_walk_snapshots_mutex);
+   g_walk_snapshots[key] = snapshot;
+}
+
+bool walk_snapshot_lookup(std::string const& key, WalkSnapshot& snapshot) {
+   std::lock_guard<std::mutex> lock(g_walk_snapshots_mutex);
+   auto const entry = g_walk_snapshots.find(key);
+   if (entry == g_walk_snapshots.end()) {
+      return false;
+   }
+   snapshot = entry->second;
+   return true;
+}
+
+void walk_snapshot_clear() {
+   std::lock_guard<std::mutex> lock(g_walk_snapshots_mutex);
+   g_walk_snapshots.clear();
+}
+
+std::size_t walk_snapshot_count() {
+   std::lock_guard<std::mutex> lock(g_walk_snapshots_mutex);
+   return g_walk_snapshots.size();
+}
@@ -22,6 +22,7 @@ Available Tests:
   - test_snmp_get.py             SNMP get operations (2,4,8,16,32 workers)
   - test_snmp_walk.py            SNMP walk operations (2,4,8,16,32 workers)
   - test_snmp_bulkwalk.py        SNMP bulkwalk operations (2,4,8,16,32 workers)
+  - test_thread_scaling.py       Thread scaling against simulated agents (up to 32 threads)
 
 EOF
 	exit 0
@@ -164,6 +165,36 @@ for i in 2 4 8 16 32; do
 done
 echo "[$(date +%H:%M:%S)] COMPLETED: SNMP bulkwalk tests"
 
+# --- Run thread scaling test ---
+echo ""
+echo "[$(date +%H:%M:%S)] Running thread scaling test..."
+START_TIME=$(date +%s)
+python3 test_thread_scaling.py 32 2>&1 | tee "$OUTPUT_DIR/test_thread_scaling.log"
+TEST_EXIT_CODE=${PIPESTATUS[0]}
+END_TIME=$(date +%s)
+DURATION=$((END_TIME - START_TIME))
+
+if [ "$TEST_EXIT_CODE" -eq 0 ]; then
+	printf '[%s] PASS: Thread scaling test completed successfully (%ds)\n' "$(date +%H:%M:%S)" "$DURATION"
+else
+	printf '[%s] FAIL: Thread scaling test failed (%ds)\n' "$(date +%H:%M:%S)" "$DURATION"
+fi
+
+# --- Run session lifetime benchmark ---
+echo ""
+echo "[$(date +%H:%M:%S)] Running session lifetime benchmark..."
+START_TIME=$(date +%s)
+python3 test_session_lifetime.py 2>&1 | tee "$OUTPUT_DIR/test_session_lifetime.log"
+TEST_EXIT_CODE=${PIPESTATUS[0]}
+END_TIME=$(date +%s)
+DURATION=$((END_TIME - START_TIME))
+
+if [ "$TEST_EXIT_CODE" -eq 0 ]; then
+	printf '[%s] PASS: Session lifetime benchmark completed successfully (%ds)\n' "$(date +%H:%M:%S)" "$DURATION"
+else
+	printf '[%s] FAIL: Session lifetime benchmark failed (%ds)\n' "$(date +%H:%M:%S)" "$DURATION"
+fi
+
 echo ""
 echo "=========================================="
 echo "All Integration Tests Completed"
@@ -0,0 +1,46 @@
+"""
+This script measures the cost of short-lived sessions with and without keeping Net-SNMP alive.
+
+Each session is opened, sends one GET and is closed, as when polling devices one after the other.
+When Net-SNMP is shut down by the last close, every session initializes it again and parses the
+MIBs on disk; kept alive (the default), it is initialized once for the process.
+"""
+
+import sys
+from time import perf_counter
+
+import ezsnmp
+from ezsnmp.session import Session
+from globals import SESS_V2_ARGS
+
+
+def measure(sessions):
+    """Returns the average time in seconds of a session opened, used once and closed."""
+    start_time = perf_counter()
+    for _ in range(sessions):
+        with Session(**SESS_V2_ARGS) as session:
+            session.get("sysDescr.0")
+    return (perf_counter() - start_time) / sessions
+
+
+if __name__ == "__main__":
+    # The number of sessions per measurement is optional
+    sessions = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+
+    ezsnmp.init(keep_alive=False)
+    per_session_before = measure(sessions)
+    print(
+        f"session_lifetime: - shut down on last close - {per_session_before * 1000:.2f} ms/session"
+    )
+
+    ezsnmp.init(keep_alive=True)
+    per_session_after = measure(sessions)
+    print(f"session_lifetime: - kept alive - {per_session_after * 1000:.2f} ms/session")
+    ezsnmp.shutdown()
+
+    speedup = per_session_before / per_session_after
+    print(f"session_lifetime: - speedup {speedup:.1f}x")
+    if speedup < 1:
+        print("session_lifetime: - FAIL: keeping Net-SNMP alive made sessions slower")
+        sys.exit(1)
+    print("session_lifetime: - PASS")
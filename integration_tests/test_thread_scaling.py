@@ -0,0 +1,117 @@
+"""
+This script checks that SNMP requests made from several threads run in parallel.
+
+Each thread queries an agent of its own. The agents are simulated by separate processes that
+answer every SNMPv2c GET after a fixed delay, standing in for the round trip to a remote
+device. While a request waits for its response ezsnmp does not hold the GIL, so N threads
+against N agents should complete about N times as many requests per second as one thread.
+"""
+
+import multiprocessing
+import socket
+import sys
+import threading
+from time import perf_counter, sleep
+from ezsnmp.session import Session
+
+BASE_PORT = 21161
+LATENCY = 0.02
+MIN_EFFICIENCY = 0.7
+
+
+def skip_tlv(data, offset):
+    """Returns the offset following the BER TLV that starts at offset."""
+    length = data[offset + 1]
+    offset += 2
+    if length & 0x80:
+        num_bytes = length & 0x7F
+        length = int.from_bytes(data[offset : offset + num_bytes], "big")
+        offset += num_bytes
+    return offset + length
+
+
+def agent(port, latency, ready):
+    """Answers every GET with its own varbinds (NULL values) after a delay."""
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sock.bind(("127.0.0.1", port))
+    ready.set()
+    while True:
+        request, address = sock.recvfrom(65535)
+        # SEQUENCE { version, community, PDU }: skip the sequence header and the first two TLVs
+        offset = 2 if request[1] < 0x80 else 2 + (request[1] & 0x7F)
+        offset = skip_tlv(request, skip_tlv(request, offset))
+        response = bytearray(request)
+        response[offset] = 0xA2  # GetResponse-PDU
+        sleep(latency)
+        sock.sendto(bytes(response), address)
+
+
+def worker(port, requests, counts, index):
+    """Sends requests GETs to the agent listening on port."""
+    sess = Session(
+        hostname="127.0.0.1",
+        port_number=port,
+        version="2c",
+        community="public",
+        timeout=2,
+        retries=1,
+    )
+    for _ in range(requests):
+        sess.get(".1.3.6.1.2.1.1.1.0")
+        counts[index] += 1
+    sess.close()
+
+
+def measure(num_threads, requests):
+    """Returns the requests per second completed by num_threads threads."""
+    counts = [0] * num_threads
+    threads = [
+        threading.Thread(target=worker, args=(BASE_PORT + i, requests, counts, i))
+        for i in range(num_threads)
+    ]
+    start_time = perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return sum(counts) / (perf_counter() - start_time)
+
+
+if __name__ == "__main__":
+    # The largest number of threads and the number of requests per thread are optional
+    max_threads = int(sys.argv[1]) if len(sys.argv) > 1 else 8
+    requests = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+
+    agents = []
+    for i in range(max_threads):
+        ready = multiprocessing.Event()
+        process = multiprocessing.Process(
+            target=agent, args=(BASE_PORT + i, LATENCY, ready), daemon=True
+        )
+        process.start()
+        ready.wait()
+        agents.append(process)
+
+    try:
+        baseline = measure(1, requests)
+        print(f"thread_scaling: - 1 thread - {baseline:.1f} requests/s")
+
+        failed = False
+        num_threads = 2
+        while num_threads <= max_threads:
+            throughput = measure(num_threads, requests)
+            efficiency = throughput / (num_threads * baseline)
+            print(
+                f"thread_scaling: - {num_threads} threads - {throughput:.1f} requests/s"
+                f" - efficiency {efficiency:.2f}"
+            )
+            failed = failed or efficiency < MIN_EFFICIENCY
+            num_threads *= 2
+    finally:
+        for process in agents:
+            process.terminate()
+
+    if failed:
+        print(f"thread_scaling: - FAIL: efficiency below {MIN_EFFICIENCY}")
+        sys.exit(1)
+    print("thread_scaling: - PASS")
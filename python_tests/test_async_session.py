@@ -0,0 +1,104 @@
+"""
+Network tests for the AsyncSession operations.
+"""
+
+import asyncio
+
+import pytest
+
+from ezsnmp import AsyncSession
+from ezsnmp.exceptions import GenericError, PacketError, TimeoutError
+import faulthandler
+
+faulthandler.enable()
+
+
+def _values(results):
+    return [(r.oid, r.index, r.type, r.value) for r in results]
+
+
+@pytest.fixture
+def async_sess(sess_args):
+    return AsyncSession(**sess_args)
+
+
+def test_async_session_get(async_sess, sess):
+
+    res = asyncio.run(async_sess.get(["sysContact.0", "sysLocation.0"]))
+
+    assert res[0].oid == "SNMPv2-MIB::sysContact"
+    assert res[0].value == "G. S. Marzot <gmarzot@marzot.net>"
+    assert res[1].value == "my original location"
+    assert _values(res) == _values(sess.get(["sysContact.0", "sysLocation.0"]))
+
+    async_sess.close()
+
+
+def test_async_session_concurrent_requests(async_sess, sess):
+
+    async def run():
+        return await asyncio.gather(
+            async_sess.get("sysContact.0"),
+            async_sess.get_next("sysDescr.0"),
+            async_sess.walk("system"),
+        )
+
+    contact, next_res, walk_res = asyncio.run(run())
+
+    assert contact[0].value == "G. S. Marzot <gmarzot@marzot.net>"
+    assert _values(next_res) == _values(sess.get_next("sysDescr.0"))
+    assert _values(walk_res) == _values(sess.walk("system"))
+
+    async_sess.close()
+
+
+def test_async_session_bulk_walk(async_sess, sess):
+
+    if async_sess.version == "1":
+        with pytest.raises(PacketError):
+            asyncio.run(async_sess.bulk_walk("system"))
+
+    else:
+
+        res = asyncio.run(async_sess.bulk_walk(["system"]))
+
+        assert _values(res) == _values(sess.bulk_walk(["system"]))
+        assert async_sess.set_max_repeaters_to_num == ""
+
+    async_sess.close()
+
+
+def test_async_session_timeout():
+
+    async_sess = AsyncSession(
+        version="2c",
+        hostname="localhost",
+        port_number="11111",
+        retries="0",
+        timeout="1",
+    )
+
+    with pytest.raises(TimeoutError):
+        asyncio.run(async_sess.get("sysDescr.0"))
+
+    async_sess.close()
+
+
+def test_async_session_close_fails_requests_in_flight():
+
+    async_sess = AsyncSession(
+        version="2c",
+        hostname="localhost",
+        port_number="11111",
+        retries="0",
+        timeout="5",
+    )
+
+    async def run():
+        pending = asyncio.ensure_future(async_sess.get("sysDescr.0"))
+        await asyncio.sleep(0.1)
+        async_sess.close()
+        return await pending
+
+    with pytest.raises(GenericError, match="cancelled"):
+        asyncio.run(run())
@@ -119,3 +119,71 @@ def test_v3_not_caching_user(sess_v3_md5_des):
     assert res[0].oid == "SNMPv2-MIB::sysDescr"
     assert res[0].index == "0"
     assert res[0].type == "STRING"
+
+
+def test_v3_engine_cache_reuses_discovered_engine(sess_v3_md5_aes):
+    Session.clear_engine_cache()
+    s = Session(**sess_v3_md5_aes)
+    assert s.engine_cache_info() is None
+
+    s.get("sysDescr.0")
+    info = s.engine_cache_info()
+    assert info["address"] == "localhost:11161"
+    assert info["engine_id"]
+    assert info["ttl"] == Session.get_engine_cache_ttl()
+    s.close()
+
+    # A new session for the same target starts from the cached engine
+    s = Session(**sess_v3_md5_aes)
+    res = s.get("sysDescr.0")
+    assert res[0].oid == "SNMPv2-MIB::sysDescr"
+    assert s.engine_cache_info()["engine_id"] == info["engine_id"]
+    s.close()
+
+    Session.clear_engine_cache()
+    assert Session(**sess_v3_md5_aes).engine_cache_info() is None
+
+
+def test_v3_engine_cache_ttl(sess_v3_md5_aes):
+    ttl = Session.get_engine_cache_ttl()
+    try:
+        Session.set_engine_cache_ttl(0)
+        s = Session(**sess_v3_md5_aes)
+        s.get("sysDescr.0")
+        assert s.engine_cache_info() is None
+        s.close()
+    finally:
+        Session.set_engine_cache_ttl(ttl)
+
+
+def test_v3_usm_key_cache_reuses_derived_keys(sess_v3_md5_aes):
+    Session.clear_usm_key_cache()
+    assert Session.get_usm_key_cache_size() == 0
+
+    s = Session(**sess_v3_md5_aes)
+    s.get("sysDescr.0")
+    s.close()
+    # One authentication key and one privacy key
+    assert Session.get_usm_key_cache_size() == 2
+
+    # A new session with the same credentials authenticates with the cached keys
+    s = Session(**sess_v3_md5_aes)
+    res = s.get("sysDescr.0")
+    assert res[0].oid == "SNMPv2-MIB::sysDescr"
+    assert Session.get_usm_key_cache_size() == 2
+    s.close()
+
+    Session.clear_usm_key_cache()
+    assert Session.get_usm_key_cache_size() == 0
+
+
+def test_v3_usm_key_cache_capacity(sess_v3_md5_aes):
+    capacity = Session.get_usm_key_cache_capacity()
+    try:
+        Session.set_usm_key_cache_capacity(0)
+        s = Session(**sess_v3_md5_aes)
+        s.get("sysDescr.0")
+        s.close()
+        assert Session.get_usm_key_cache_size() == 0
+    finally:
+        Session.set_usm_key_cache_capacity(capacity)
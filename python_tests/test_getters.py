@@ -49,6 +49,9 @@ def test_session_default_constructed_getters_do_not_crash():
     assert isinstance(s._get_print_timeticks_numerically(), bool)
     assert isinstance(s._get_print_hex_strings(), bool)
     assert isinstance(s._get_set_max_repeaters_to_num(), str)
+    assert s._get_max_varbinds_per_pdu() == 0
+    assert s._get_max_pdu_size() == 0
+    assert s._get_max_outstanding_requests() == 1
     args = s._get_args()
     assert isinstance(args, (list, tuple))
     assert len(args) > 0
@@ -0,0 +1,118 @@
+"""
+Network tests for the Poller.
+"""
+
+import pytest
+
+from ezsnmp import Poller, ProcessPoller, Session
+from ezsnmp.exceptions import GenericError, TimeoutError
+import faulthandler
+
+faulthandler.enable()
+
+
+def _values(results):
+    return [(r.oid, r.index, r.type, r.value) for r in results]
+
+
+def test_poller_runs_jobs_on_many_targets(sess_args, sess):
+
+    jobs = [
+        (sess_args, "get", ["sysContact.0", "sysLocation.0"]),
+        (sess_args, "get_next", "sysDescr.0"),
+        (sess_args, "walk", "system"),
+    ]
+    with Poller(max_in_flight=2) as poller:
+        results = sorted(poller.run(jobs))
+
+    assert [result.operation for result in results] == ["get", "get_next", "walk"]
+    assert all(result.error is None for result in results)
+    assert _values(results[0].results) == _values(
+        sess.get(["sysContact.0", "sysLocation.0"])
+    )
+    assert _values(results[1].results) == _values(sess.get_next("sysDescr.0"))
+    assert _values(results[2].results) == _values(sess.walk("system"))
+
+
+def test_poller_uses_given_sessions(sess_args, sess):
+
+    session = Session(**sess_args)
+    with Poller() as poller:
+        job_id = poller.submit(session, "get", "sysContact.0")
+        assert poller.pending == 1
+        results = poller.poll()
+        assert poller.pending == 0
+
+    assert len(results) == 1
+    assert results[0].job_id == job_id
+    assert results[0].target is session
+    assert _values(results[0].results) == _values(sess.get("sysContact.0"))
+    session.close()
+
+
+def test_poller_times_out_unreachable_targets_only(sess_args):
+
+    unreachable = {
+        "version": "2c",
+        "hostname": "localhost",
+        "port_number": "11111",
+        "retries": "0",
+        "timeout": "1",
+    }
+    with Poller() as poller:
+        results = {
+            result.target["port_number"]: result
+            for result in poller.run(
+                [(unreachable, "get", "sysDescr.0"), (sess_args, "get", "sysDescr.0")]
+            )
+        }
+
+    assert isinstance(results["11111"].error, TimeoutError)
+    assert results["11111"].results == ()
+    assert results[sess_args["port_number"]].error is None
+    assert len(results[sess_args["port_number"]].results) == 1
+
+
+def test_poller_rejects_unknown_operations():
+
+    with Poller(version="2c", community="public") as poller:
+        with pytest.raises(GenericError):
+            poller.submit("localhost", "getbulk", "sysDescr.0")
+        with pytest.raises(TypeError):
+            poller.submit(42, "get", "sysDescr.0")
+        assert poller.pending == 0
+
+
+def test_process_poller_matches_the_session(sess_args, sess):
+
+    jobs = [
+        (sess_args, "get", ["sysContact.0", "sysLocation.0"]),
+        (sess_args, "walk", "system"),
+        (
+            dict(sess_args, port_number="11111", retries="0", timeout="1"),
+            "get",
+            "sysDescr.0",
+        ),
+    ]
+    with ProcessPoller(processes=2) as poller:
+        results = sorted(poller.run(jobs))
+
+    assert [result.job_id for result in results] == [0, 1, 2]
+    assert results[0].error is None
+    assert _values(results[0].results) == _values(
+        sess.get(["sysContact.0", "sysLocation.0"])
+    )
+    assert _values(results[1].results) == _values(sess.walk("system"))
+    assert [r.converted_value for r in results[1].results] == [
+        r.converted_value for r in sess.walk("system")
+    ]
+    assert isinstance(results[2].error, TimeoutError)
+
+
+def test_process_poller_rejects_sessions(sess_args):
+
+    session = Session(**sess_args)
+    with ProcessPoller(processes=1) as poller:
+        with pytest.raises(TypeError):
+            list(poller.run([(session, "get", "sysContact.0")]))
+    session.close()
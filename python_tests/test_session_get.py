@@ -8,6 +8,7 @@ import platform
 
 import pytest
 
+import ezsnmp
 from ezsnmp.session import Session
 from ezsnmp.exceptions import (
     ConnectionError,
@@ -192,3 +193,162 @@ def test_string_values_no_surrounding_quotes(sess):
     ), f"Value should not end with quote: {res[0].value}"
 
     del sess
+
+
+def test_session_get_reuses_session_across_setters(sess):
+    """The persistent session is reopened after a connection setter and keeps working."""
+    first = sess.get("sysDescr.0")
+    assert sess.get("sysDescr.0")[0].value == first[0].value
+
+    sess.timeout = "4"
+    assert sess.get("sysDescr.0")[0].value == first[0].value
+
+    sess.print_oids_numerically = True
+    res = sess.get("sysDescr.0")
+    assert res[0].oid.startswith(".1.3.6.1.2.1.1.1")
+    assert res[0].value == first[0].value
+
+
+def test_session_get_in_batches(sess):
+    """Lists longer than a request allows are split into batches, results stay in order."""
+    oids = [
+        "sysUpTime.0",
+        "sysContact.0",
+        "sysLocation.0",
+        "sysName.0",
+        "sysDescr.0",
+    ] * 40
+    expected = [(r.oid, r.index) for r in sess.get(oids[:5])] * 40
+
+    sess.max_varbinds_per_pdu = 10
+    assert sess.max_varbinds_per_pdu == 10
+    res = sess.get(oids)
+    assert [(r.oid, r.index) for r in res] == expected
+
+    sess.max_varbinds_per_pdu = 0
+    sess.max_pdu_size = 200
+    res = sess.get_next(oids)
+    assert len(res) == len(oids)
+    assert res[0].oid == "SNMPv2-MIB::sysContact"
+
+    del sess
+
+
+def test_session_get_pipelined_batches(sess):
+    """Batches in flight at the same time are matched to their OIDs by request ID."""
+    oids = [
+        "sysUpTime.0",
+        "sysContact.0",
+        "sysLocation.0",
+        "sysName.0",
+        "sysDescr.0",
+    ] * 40
+    expected = [(r.oid, r.index) for r in sess.get(oids[:5])] * 40
+
+    sess.max_varbinds_per_pdu = 5
+    sess.max_outstanding_requests = 8
+    assert sess.max_outstanding_requests == 8
+    res = sess.get(oids)
+    assert [(r.oid, r.index) for r in res] == expected
+
+    res = sess.get_next(oids)
+    assert [r.oid for r in res[:2]] == ["SNMPv2-MIB::sysContact", "SNMPv2-MIB::sysName"]
+
+    del sess
+
+
+def test_session_get_across_library_lifetimes(sess_args):
+
+    expected = Session(**sess_args).get("sysContact.0")[0].value
+    try:
+        # Shut down by every last close, then kept alive again
+        ezsnmp.init(keep_alive=False)
+        for _ in range(2):
+            with Session(**sess_args) as session:
+                assert session.get("sysContact.0")[0].value == expected
+        ezsnmp.init()
+        for _ in range(2):
+            with Session(**sess_args) as session:
+                assert session.get("sysContact.0")[0].value == expected
+
+        ezsnmp.shutdown()
+        with Session(**sess_args) as session:
+            assert session.get("sysContact.0")[0].value == expected
+    finally:
+        ezsnmp.init()
+
+
+def test_session_get_with_mib_cache_directory(sess_args, tmp_path):
+
+    try:
+        ezsnmp.init(mib_cache_dir=tmp_path)
+        assert len(list(tmp_path.glob("mibtree-*.bin"))) == 1
+        with Session(**sess_args) as session:
+            assert session.get("sysContact.0")[0].oid == "SNMPv2-MIB::sysContact"
+    finally:
+        ezsnmp.init(mib_cache_dir="")
+
+
+def test_translate():
+
+    assert ezsnmp.translate("sysDescr.0") == ".1.3.6.1.2.1.1.1.0"
+    assert ezsnmp.translate("SNMPv2-MIB::sysDescr.0") == ".1.3.6.1.2.1.1.1.0"
+    assert (
+        ezsnmp.translate(".1.3.6.1.2.1.1.1.0", numeric=False)
+        == "SNMPv2-MIB::sysDescr.0"
+    )
+    # Remembered by the thread
+    assert (
+        ezsnmp.translate(".1.3.6.1.2.1.1.1.0", numeric=False)
+        == "SNMPv2-MIB::sysDescr.0"
+    )
+
+    with pytest.raises(ezsnmp.GenericError):
+        ezsnmp.translate("noSuchMibObject.0")
+
+
+def test_translate_oids(sess_args):
+
+    names = ["sysDescr.0", "SNMPv2-MIB::sysContact.0", ".1.3.6.1.2.1.1.6.0"]
+    oids = ezsnmp.translate_oids(names)
+    assert oids == [".1.3.6.1.2.1.1.1.0", ".1.3.6.1.2.1.1.4.0", ".1.3.6.1.2.1.1.6.0"]
+    assert ezsnmp.translate_oids(oids, numeric=False) == [
+        "SNMPv2-MIB::sysDescr.0",
+        "SNMPv2-MIB::sysContact.0",
+        "SNMPv2-MIB::sysLocation.0",
+    ]
+    assert ezsnmp.translate_oids("sysDescr.0") == [".1.3.6.1.2.1.1.1.0"]
+    assert ezsnmp.translate_oids([]) == []
+
+    with Session(**sess_args) as session:
+        assert [result.oid for result in session.get(oids)] == [
+            "SNMPv2-MIB::sysDescr",
+            "SNMPv2-MIB::sysContact",
+            "SNMPv2-MIB::sysLocation",
+        ]
+
+    with pytest.raises(ezsnmp.GenericError):
+        ezsnmp.translate_oids(["sysDescr.0", "noSuchMibObject.0"])
+
+
+def test_session_get_with_mib_loading(sess_args):
+
+    try:
+        ezsnmp.init(mib_loading="lazy")
+        with Session(**sess_args) as session:
+            res = session.get("sysContact.0")
+            assert res[0].oid == "SNMPv2-MIB::sysContact"
+            assert res[0].value == "G. S. Marzot <gmarzot@marzot.net>"
+
+        ezsnmp.init(mib_loading="numeric")
+        with Session(**sess_args) as session:
+            res = session.get(".1.3.6.1.2.1.1.4.0")
+            assert res[0].oid.startswith(".1.3.6.1.2.1.1.4")
+            assert res[0].value == "G. S. Marzot <gmarzot@marzot.net>"
+            with pytest.raises(ezsnmp.GenericError):
+                session.get("sysContact.0")
+
+        with pytest.raises(ValueError):
+            ezsnmp.init(mib_loading="sometimes")
+    finally:
+        ezsnmp.init(mib_loading="eager")
@@ -381,4 +381,13 @@ def test_session_property_setters_extended():
     s.set_max_repeaters_to_num = "20"
     assert s.set_max_repeaters_to_num == "20"
 
+    s.max_varbinds_per_pdu = 50
+    assert s.max_varbinds_per_pdu == 50
+
+    s.max_pdu_size = 1400
+    assert s.max_pdu_size == 1400
+
+    s.max_outstanding_requests = 4
+    assert s.max_outstanding_requests == 4
+
     del s
@@ -6,7 +6,8 @@ import platform
 
 import pytest
 
-from ezsnmp.exceptions import PacketError
+from ezsnmp import Session
+from ezsnmp.exceptions import GenericError, PacketError, TimeoutError
 import faulthandler
 
 faulthandler.enable()
@@ -107,3 +108,332 @@ def test_session_bulk_walk_none_oids(sess):
     else:
         res = sess.bulk_walk(None)
         assert res is not None
+
+
+def test_session_walk_start_after(sess):
+
+    expected = [(r.oid, r.index, r.type, r.value) for r in sess.walk("system")]
+    assert expected[3][:2] == ("SNMPv2-MIB::sysContact", "0")
+
+    # Continues after sysContact.0
+    res = sess.walk("system", start_after=".1.3.6.1.2.1.1.4.0")
+    assert [(r.oid, r.index, r.type, r.value) for r in res] == expected[4:]
+
+    if sess.version != "1":
+        # The subtrees before the one holding the token are skipped
+        res = sess.bulk_walk(
+            ["system", "ifDescr"], start_after=".1.3.6.1.2.1.2.2.1.2.1"
+        )
+        assert [(r.oid, r.index) for r in res] == [
+            (r.oid, r.index) for r in sess.bulk_walk("ifDescr")[1:]
+        ]
+
+    del sess
+
+
+def test_session_resumable_walk_failure():
+
+    sess = Session(
+        version="2c",
+        hostname="localhost",
+        port_number="11111",
+        retries="0",
+        timeout="1",
+    )
+
+    with pytest.raises(TimeoutError) as excinfo:
+        sess.walk("system", resumable=True)
+    assert excinfo.value.partial_results == ()
+    assert excinfo.value.resume_token == ""
+
+    # A walk that fails before its first variable resumes where it started
+    with pytest.raises(TimeoutError) as excinfo:
+        sess.bulk_walk("system", start_after=".1.3.6.1.2.1.1.4.0")
+    assert excinfo.value.resume_token == ".1.3.6.1.2.1.1.4.0"
+
+    sess.close()
+
+
+def test_session_delta_walk(sess):
+
+    Session.clear_walk_snapshots()
+    expected = [(r.oid, r.index) for r in sess.walk("system")]
+
+    first = sess.delta_walk("system", sentinel="sysContact.0")
+    assert [(r.oid, r.index) for r in first] == expected
+    assert Session.get_walk_snapshot_count() == 1
+
+    # Nothing is walked again: even sysUpTime.0 keeps the value of the first walk
+    second = sess.delta_walk("system", sentinel="sysContact.0")
+    assert [(r.oid, r.index, r.value) for r in second] == [
+        (r.oid, r.index, r.value) for r in first
+    ]
+    assert Session.get_walk_snapshot_count() == 1
+
+    with pytest.raises(GenericError):
+        sess.delta_walk("ipAddrTable")
+
+    Session.clear_walk_snapshots()
+    assert Session.get_walk_snapshot_count() == 0
+
+    del sess
+
+
+def test_session_delta_walk_of_counters_needs_a_sentinel(sess):
+
+    Session.clear_walk_snapshots()
+
+    # ifTableLastChange does not move with the counters, so a counter walk is never served from
+    # a snapshot kept on it
+    for oid in ["interfaces", "ifTable", "ifInOctets", "ifXTable", "ifHCInOctets"]:
+        with pytest.raises(GenericError, match="sentinel"):
+            sess.delta_walk(oid)
+    assert Session.get_walk_snapshot_count() == 0
+
+    del sess
+
+
+def test_session_parallel_walk_matches_walk(sess):
+
+    expected = [(r.oid, r.index, r.type, r.value) for r in sess.walk("interfaces")]
+
+    res = sess.parallel_walk("interfaces", workers=3)
+    assert [(r.oid, r.index, r.type, r.value) for r in res] == expected
+
+    res = sess.parallel_walk(
+        "interfaces", workers=2, split_points=["ifDescr.1", "ifType"]
+    )
+    assert [(r.oid, r.index, r.type, r.value) for r in res] == expected
+
+    # A scalar walks like a whole walk does
+    assert sess.parallel_walk("sysDescr.0", workers=2)[0].oid == "SNMPv2-MIB::sysDescr"
+
+    del sess
+
+
+def test_session_pipelined_parallel_walk_matches_walk(sess):
+
+    expected = [(r.oid, r.index, r.type) for r in sess.walk("system")]
+
+    res = sess.parallel_walk("system", workers=3, pipelined=True)
+    assert [(r.oid, r.index, r.type) for r in res] == expected
+
+    res = sess.parallel_walk("system", workers=2, bulk=True, pipelined=True)
+    assert [(r.oid, r.index, r.type) for r in res] == expected
+
+    del sess
+
+
+def test_session_iter_walk_matches_walk(sess):
+
+    res = list(sess.iter_walk("system"))
+    expected = sess.walk("system")
+
+    assert [(r.oid, r.index, r.type, r.value) for r in res] == [
+        (r.oid, r.index, r.type, r.value) for r in expected
+    ]
+
+    del sess
+
+
+def test_session_iter_walk_stops_early(sess):
+
+    for item in sess.iter_walk("system"):
+        assert item.oid == "SNMPv2-MIB::sysDescr"
+        break
+
+    # The abandoned walk leaves the session usable
+    res = sess.get("sysContact.0")
+    assert res[0].value == "G. S. Marzot <gmarzot@marzot.net>"
+
+    del sess
+
+
+def test_session_iter_bulk_walk(sess):
+
+    if sess.version == "1":
+        with pytest.raises(PacketError):
+            list(sess.iter_bulk_walk("system"))
+
+    else:
+
+        res = list(sess.iter_bulk_walk(["system"]))
+        expected = sess.bulk_walk(["system"])
+
+        assert [(r.oid, r.index, r.type, r.value) for r in res] == [
+            (r.oid, r.index, r.type, r.value) for r in expected
+        ]
+        assert sess.set_max_repeaters_to_num == ""
+
+    del sess
+
+
+def test_session_walk_as_columns(sess):
+
+    table = sess.walk("system", as_columns=True)
+    expected = sess.walk("system")
+
+    assert len(table) == len(expected)
+    assert table.oids()[0] == ".1.3.6.1.2.1.1.1"
+    assert table.indexes()[0] == "0"
+    assert table.types()[0] == "STRING"
+    assert platform.version() in table.values()[0].decode()
+    assert table.values()[3] == b"G. S. Marzot <gmarzot@marzot.net>"
+    assert table.indexes() == [r.index for r in expected]
+
+    del sess
+
+
+def test_session_bulk_walk_as_columns(sess):
+
+    if sess.version == "1":
+        with pytest.raises(PacketError):
+            sess.bulk_walk("system", as_columns=True)
+
+    else:
+
+        table = sess.bulk_walk("system", as_columns=True)
+        expected = sess.bulk_walk(["system"])
+
+        assert len(table) == len(expected)
+        assert table.indexes() == [r.index for r in expected]
+        assert len(table.type_code_bytes()) == len(table)
+
+        # sysUpTime is a TimeTicks counter, stored in the integer column
+        uptime = table.types().index("Timeticks")
+        assert table.integers()[uptime] == table.values()[uptime] > 0
+        assert sess.set_max_repeaters_to_num == ""
+
+    del sess
+
+
+def test_session_walk_numeric_arrays(sess):
+
+    table = sess.walk("system", as_columns=True)
+    values, type_codes, indexes = table.numeric_arrays()
+
+    assert values.format == "Q"
+    assert type_codes.format == "B"
+    assert indexes.format == "Q"
+    assert len(values) == len(type_codes) == len(indexes) > 0
+
+    # Only the rows with an integer value are exported
+    integer_rows = [
+        row
+        for row, code in enumerate(table.type_code_bytes())
+        if code in (0x02, 0x41, 0x42, 0x43, 0x46, 0x47)
+    ]
+    assert list(type_codes) == [table.type_code_bytes()[row] for row in integer_rows]
+    assert list(values) == [table.integers()[row] % 2**64 for row in integer_rows]
+
+    uptime = list(type_codes).index(0x43)
+    assert values[uptime] > 0
+    assert indexes[uptime] == 0
+
+    del sess
+
+
+def test_session_get_as_columns(sess):
+
+    table = sess.get(["sysUpTime.0", "sysContact.0"], as_columns=True)
+
+    assert len(table) == 2
+    assert table.types() == ["Timeticks", "STRING"]
+    assert table.indexes() == ["0", "0"]
+    assert table.values()[1] == b"G. S. Marzot <gmarzot@marzot.net>"
+    values, type_codes, _ = table.numeric_arrays()
+    assert list(type_codes) == [0x43]
+    assert values[0] == table.integers()[0]
+
+    assert len(sess.get([], as_columns=True)) == 0
+
+    del sess
+
+
+def test_session_bulk_walk_adaptive(sess):
+
+    if sess.version == "1":
+        with pytest.raises(PacketError):
+            sess.bulk_walk("system", adaptive=True)
+
+    else:
+
+        Session.clear_max_repetitions_cache()
+        assert sess.learned_max_repetitions() is None
+
+        expected = sess.bulk_walk(["system"])
+        res = sess.bulk_walk(["system"], adaptive=True)
+        assert [(r.oid, r.index, r.value) for r in res] == [
+            (r.oid, r.index, r.value) for r in expected
+        ]
+
+        table = sess.bulk_walk("system", as_columns=True, adaptive=True)
+        assert len(table) == len(expected)
+
+        learned = sess.learned_max_repetitions()
+        assert learned is None or learned >= 1
+
+        Session.clear_max_repetitions_cache()
+        assert sess.learned_max_repetitions() is None
+
+    del sess
+
+
+def test_session_bulk_walk_table(sess):
+
+    if sess.version == "1":
+        with pytest.raises(PacketError):
+            sess.bulk_walk_table(["ifIndex", "ifDescr"])
+
+    else:
+
+        rows = sess.bulk_walk_table(["ifIndex", "ifDescr"])
+        descriptions = sess.bulk_walk("ifDescr")
+
+        assert list(rows) == [r.index for r in descriptions]
+        for result in descriptions:
+            row = rows[result.index]
+            assert row["ifIndex"].value == result.index
+            assert row["ifDescr"].oid == "IF-MIB::ifDescr"
+            assert row["ifDescr"].value == result.value
+
+        # The shorter column finishes first, the other one carries on
+        rows = sess.bulk_walk_table(["sysORID", "ifIndex"])
+        assert len([row for row in rows.values() if "sysORID" in row]) == len(
+            sess.bulk_walk("sysORID")
+        )
+        assert len([row for row in rows.values() if "ifIndex" in row]) == len(
+            descriptions
+        )
+        assert sess.set_max_repeaters_to_num == ""
+
+    del sess
+
+
+def test_session_get_table(sess):
+
+    rows = sess.get_table("IF-MIB::ifTable")
+    expected = sess.walk("ifDescr")
+
+    assert list(rows) == [(int(r.index),) for r in expected]
+    for result in expected:
+        row = rows[(int(result.index),)]
+        assert row["ifIndex"] == int(result.index)
+        assert row["ifDescr"].decode() == result.value
+        assert isinstance(row["ifInOctets"], int)
+
+    # The entry and the numeric OID give the same rows as the table
+    for other in (
+        sess.get_table("IF-MIB::ifEntry"),
+        sess.get_table(".1.3.6.1.2.1.2.2"),
+    ):
+        assert list(other) == list(rows)
+        assert [row["ifDescr"] for row in other.values()] == [
+            row["ifDescr"] for row in rows.values()
+        ]
+
+    assert sess.get_table("SNMPv2-MIB::sysORTable")[(1,)]["sysORID"].startswith(
+        ".1.3.6"
+    )
+
+    del sess
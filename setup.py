@@ -160,6 +160,15 @@ def build_extensions(cfg: dict):
         "ezsnmp/src/exceptionsbase.cpp",
         "ezsnmp/src/datatypes.cpp",
         "ezsnmp/src/sessionbase.cpp",
+        "ezsnmp/src/sessionhandle.cpp",
+        "ezsnmp/src/pollerbase.cpp",
+        "ezsnmp/src/enginecache.cpp",
+        "ezsnmp/src/maxrepetitions.cpp",
+        "ezsnmp/src/usmkeycache.cpp",
+        "ezsnmp/src/walkcache.cpp",
+        "ezsnmp/src/mibcache.cpp",
+        "ezsnmp/src/oidtranslation.cpp",
+        "ezsnmp/src/varbind.cpp",
         "ezsnmp/src/helpers.cpp",
         "ezsnmp/src/thread_safety.cpp",
     ] + netsnmp_versioned_sources